@@ -0,0 +1,123 @@
+"""
+Бенчмарк: задержка event loop при конкурентных апдейтах (sync CRUD vs async CRUD)
+
+Имитирует N одновременных апдейтов "текст → inbox" (get_or_create_user +
+create_inbox_item + get_inbox_count) и параллельно меряет, насколько
+опаздывает heartbeat-корутина, которая спит по 1 мс. Для синхронного CRUD
+каждый запрос к SQLite замораживает весь loop; для async CRUD — нет.
+
+Запуск:
+    python -m benchmarks.event_loop_latency [--updates 500] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+from src.database.models import Base  # noqa: E402
+from src.database import crud, crud_async  # noqa: E402
+
+
+HEARTBEAT_INTERVAL = 0.001
+
+
+async def _heartbeat(lags: list, stop: asyncio.Event):
+    """Меряет опоздание пробуждений loop относительно ожидаемого"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def _sync_update(telegram_id: int):
+    user = crud.get_or_create_user(telegram_id)
+    crud.create_inbox_item(user.id, "benchmark")
+    crud.get_inbox_count(user.id)
+
+
+async def _async_update(telegram_id: int):
+    user = await crud_async.get_or_create_user(telegram_id)
+    await crud_async.create_inbox_item(user.id, "benchmark")
+    await crud_async.get_inbox_count(user.id)
+
+
+async def _run(update, updates: int, concurrency: int) -> dict:
+    lags = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        async with semaphore:
+            await update(1000 + i % concurrency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(updates)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "elapsed_s": elapsed,
+        "updates_per_s": updates / elapsed,
+        "lag_p50_ms": statistics.median(lags_ms),
+        "lag_p99_ms": lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))],
+        "lag_max_ms": lags_ms[-1],
+    }
+
+
+def _print_result(name: str, result: dict):
+    print(
+        f"{name:<6} | {result['elapsed_s']:7.2f}s | {result['updates_per_s']:8.1f} upd/s | "
+        f"lag p50 {result['lag_p50_ms']:7.2f}ms | p99 {result['lag_p99_ms']:7.2f}ms | "
+        f"max {result['lag_max_ms']:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async_session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+        with patch.object(crud, "get_session", session_factory), \
+                patch.object(crud_async, "get_async_session", async_session_factory):
+            print(f"{args.updates} updates, concurrency {args.concurrency}")
+            _print_result("sync", asyncio.run(_run(_sync_update, args.updates, args.concurrency)))
+
+            async def run_async():
+                try:
+                    return await _run(_async_update, args.updates, args.concurrency)
+                finally:
+                    await async_engine.dispose()
+
+            _print_result("async", asyncio.run(run_async()))
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Бенчмарк: пропускная способность FSM storage (MemoryStorage vs SQLiteStorage)
+
+Повторяет шаг диалога утреннего кайдзена: get_state (фильтр хэндлера),
+get_data, update_data, set_state — для --users пользователей по кругу.
+SQLiteStorage — в двух режимах: write-behind (FSM_FLUSH_INTERVAL по умолчанию)
+и запись сразу (flush_interval=0), оба на профиле SQLITE_PRAGMAS.
+
+Запуск:
+    python -m benchmarks.fsm_storage [--steps 5000] [--users 50]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+
+from aiogram.fsm.context import FSMContext  # noqa: E402
+from aiogram.fsm.state import State, StatesGroup  # noqa: E402
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from src.config import FSM_FLUSH_INTERVAL  # noqa: E402
+from src.database.fsm_storage import SQLiteStorage  # noqa: E402
+from src.database.models import Base, apply_sqlite_pragmas  # noqa: E402
+
+
+class Morning(StatesGroup):
+    task_1 = State()
+    task_2 = State()
+
+
+async def _run(storage, steps: int, users: int) -> float:
+    contexts = [
+        FSMContext(storage, StorageKey(bot_id=1, chat_id=user_id, user_id=user_id))
+        for user_id in range(users)
+    ]
+
+    started = time.perf_counter()
+    for step in range(steps):
+        context = contexts[step % users]
+        await context.get_state()
+        data = await context.get_data()
+        await context.update_data(task_1=f"Задача {step}", steps=data.get("steps", 0) + 1)
+        await context.set_state(Morning.task_2 if step % 2 else Morning.task_1)
+    # Несохранённое тоже считаем: write-behind не должен выигрывать за счёт недописанного
+    await storage.close()
+    elapsed = time.perf_counter() - started
+
+    return steps / elapsed
+
+
+async def _run_sqlite(db_path: Path, flush_interval: float, steps: int, users: int) -> float:
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    apply_sqlite_pragmas(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    apply_sqlite_pragmas(engine)
+    try:
+        return await _run(SQLiteStorage(engine, flush_interval=flush_interval), steps, users)
+    finally:
+        await engine.dispose()
+
+
+async def _main(steps: int, users: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        memory_rate = await _run(MemoryStorage(), steps, users)
+        behind_rate = await _run_sqlite(Path(tmp) / "behind.db", FSM_FLUSH_INTERVAL, steps, users)
+        through_rate = await _run_sqlite(Path(tmp) / "through.db", 0, steps, users)
+
+    print(f"{steps} dialog steps for {users} users (get_state + get_data + update_data + set_state)")
+    print(f"memory                | {memory_rate:9.1f} steps/s")
+    print(f"sqlite write-behind   | {behind_rate:9.1f} steps/s ({behind_rate / memory_rate:.2f}x memory, "
+          f"flush every {FSM_FLUSH_INTERVAL:g}s)")
+    print(f"sqlite write-through  | {through_rate:9.1f} steps/s ({through_rate / memory_rate:.2f}x memory)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.steps, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Бенчмарк: пропускная способность мелких коммитов SQLite (default vs tuned PRAGMA)
+
+Повторяет паттерн add_reward: обновление баланса фонда + вставка транзакции,
+каждый шаг отдельным коммитом. Сравнивает rollback-journal по умолчанию
+с профилем SQLITE_PRAGMAS из models.py (WAL, synchronous=NORMAL, ...).
+
+Запуск:
+    python -m benchmarks.write_throughput [--writes 2000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from src.database.models import (  # noqa: E402
+    Base, User, RewardFund, RewardTransaction, SQLITE_PRAGMAS, apply_sqlite_pragmas
+)
+
+
+def _run(db_path: Path, pragmas: dict | None, writes: int) -> float:
+    engine = create_engine(f"sqlite:///{db_path}")
+    if pragmas is not None:
+        apply_sqlite_pragmas(engine, pragmas)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    user = User(telegram_id=1)
+    session.add(user)
+    session.flush()
+    fund = RewardFund(user_id=user.id, balance=0, total_earned=0)
+    session.add(fund)
+    session.commit()
+    fund_id = fund.id
+    session.close()
+
+    started = time.perf_counter()
+    for i in range(writes):
+        session = Session()
+        try:
+            fund = session.get(RewardFund, fund_id)
+            fund.balance += 1
+            fund.total_earned += 1
+            session.commit()
+
+            session.add(RewardTransaction(fund_id=fund_id, amount=1, transaction_type="benchmark"))
+            session.commit()
+        finally:
+            session.close()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_rate = _run(Path(tmp) / "default.db", None, args.writes)
+        tuned_rate = _run(Path(tmp) / "tuned.db", SQLITE_PRAGMAS, args.writes)
+
+    print(f"{args.writes} add_reward-style writes (2 commits each)")
+    print(f"default | {default_rate:8.1f} writes/s")
+    print(f"tuned   | {tuned_rate:8.1f} writes/s ({tuned_rate / default_rate:.1f}x)")
+    print("profile: " + ", ".join(f"{k}={v}" for k, v in SQLITE_PRAGMAS.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,16 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from src.config import BOT_TOKEN
+from src.config import BOT_TOKEN, FSM_STORAGE
 from src.database.models import init_db
+from src.database.fsm_storage import SQLiteStorage
+from src.middlewares.db_session import DbSessionMiddleware
 from src.handlers import start, morning, evening, stats, goals, settings, report, habits
 from src.handlers import review, someday, inbox, calendar, rewards
 from src.handlers import principles, dates, user_tasks, quizlet
 from src.handlers import calendar_reminders, habits_calendar, calendar_actions, task_reminders
 from src.scheduler.jobs import set_bot, setup_scheduler, start_scheduler
+from src.scheduler.calendar_queue import calendar_queue
 
 # Настройка логирования
 logging.basicConfig(
@@ -28,7 +31,12 @@ async def main():
 
     # Создание бота и диспетчера
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher(storage=MemoryStorage())
+    # FSM в SQLite: диалоги переживают перезапуск (storage закрывается на shutdown диспетчера)
+    storage = SQLiteStorage() if FSM_STORAGE == "sqlite" else MemoryStorage()
+    dp = Dispatcher(storage=storage)
+
+    # Unit of work: одна сессия БД и один коммит на апдейт
+    dp.update.middleware(DbSessionMiddleware())
 
     # Регистрация роутеров
     dp.include_router(start.router)
@@ -65,11 +73,15 @@ async def main():
     setup_scheduler()
     start_scheduler()
 
+    # Очередь записи в Google Calendar (задачи из хэндлеров и опроса)
+    calendar_queue.start()
+
     # Запуск бота
     logger.info("Бот запущен!")
     try:
         await dp.start_polling(bot)
     finally:
+        await calendar_queue.stop()
         await bot.session.close()
 
 
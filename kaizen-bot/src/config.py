@@ -10,16 +10,41 @@ BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATABASE_PATH = DATA_DIR / "kaizen.db"
 
+# SQLite tuning (PRAGMA на каждое соединение; пустое значение = не менять)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024))  # байты
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-16000")  # отрицательное = KiB
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_BUSY_TIMEOUT = os.getenv("SQLITE_BUSY_TIMEOUT", "5000")  # мс
+
 # Telegram
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "0"))
 
+# FSM storage: sqlite (переживает перезапуск, общая для процессов) или memory;
+# write-behind: изменения пишутся в БД пачкой раз в FSM_FLUSH_INTERVAL (0 = сразу),
+# прочитанное состояние кэшируется на FSM_CACHE_TTL (0 = всегда читать из БД)
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite")
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.5"))  # секунды
+FSM_CACHE_TTL = float(os.getenv("FSM_CACHE_TTL", "60"))  # секунды
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))  # ключей
+
 # Расписание напоминаний
 MORNING_HOUR = int(os.getenv("MORNING_HOUR", "7"))
 MORNING_MINUTE = int(os.getenv("MORNING_MINUTE", "0"))
 EVENING_HOUR = int(os.getenv("EVENING_HOUR", "22"))
 EVENING_MINUTE = int(os.getenv("EVENING_MINUTE", "0"))
 
+# Рассылки (лимиты Telegram: ~30 сообщений/сек на бота, ~1/сек в один чат)
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "30"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1.0"))  # секунды
+
+# Кэш User / RewardFund в процессе (LRU + TTL; изменения в этом процессе инвалидируют сразу)
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "5000"))  # ключей
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "60"))  # секунды
+
 # Таймзона
 TIMEZONE = os.getenv("TIMEZONE", "Europe/Moscow")
 
@@ -29,6 +54,40 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "urn:ietf:wg:oauth:2.0:oob")
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")  # Fernet key для шифрования токенов
 
+# Вызовы Google API из asyncio: размер пула потоков и таймаут одного вызова
+GOOGLE_API_MAX_WORKERS = int(os.getenv("GOOGLE_API_MAX_WORKERS", "8"))
+GOOGLE_API_TIMEOUT = float(os.getenv("GOOGLE_API_TIMEOUT", "20"))  # секунды
+
+# Кэш клиентов Calendar API (credentials + service) по пользователю
+GOOGLE_CLIENT_CACHE_SIZE = int(os.getenv("GOOGLE_CLIENT_CACHE_SIZE", "500"))
+GOOGLE_CLIENT_CACHE_TTL = float(os.getenv("GOOGLE_CLIENT_CACHE_TTL", "3000"))  # секунды
+
+# Квота Calendar API: запросов в секунду на процесс и на пользователя (+ допустимый всплеск),
+# повторы при 403 rateLimitExceeded / 429 / 5xx, пауза после ошибок авторизации подряд
+GOOGLE_API_GLOBAL_RATE = float(os.getenv("GOOGLE_API_GLOBAL_RATE", "20"))
+GOOGLE_API_USER_RATE = float(os.getenv("GOOGLE_API_USER_RATE", "5"))
+GOOGLE_API_USER_BURST = float(os.getenv("GOOGLE_API_USER_BURST", "20"))
+GOOGLE_API_MAX_RETRIES = int(os.getenv("GOOGLE_API_MAX_RETRIES", "3"))
+GOOGLE_API_BACKOFF_BASE = float(os.getenv("GOOGLE_API_BACKOFF_BASE", "1"))  # секунды
+GOOGLE_API_BACKOFF_MAX = float(os.getenv("GOOGLE_API_BACKOFF_MAX", "8"))  # секунды
+GOOGLE_AUTH_FAILURE_THRESHOLD = int(os.getenv("GOOGLE_AUTH_FAILURE_THRESHOLD", "3"))
+GOOGLE_AUTH_CIRCUIT_HOURS = float(os.getenv("GOOGLE_AUTH_CIRCUIT_HOURS", "6"))
+
+# Локальное зеркало календаря (инкрементальная синхронизация по syncToken)
+CALENDAR_MIRROR_DAYS = int(os.getenv("CALENDAR_MIRROR_DAYS", "14"))  # окно полной синхронизации вперёд
+CALENDAR_FULL_RESYNC_HOURS = int(os.getenv("CALENDAR_FULL_RESYNC_HOURS", "24"))
+CALENDAR_SYNC_MAX_AGE = int(os.getenv("CALENDAR_SYNC_MAX_AGE", "5"))  # минуты, для хэндлеров
+
+# Сколько дней хранить отметки напоминаний / follow-up после окончания события
+CALENDAR_REMINDER_RETENTION_DAYS = int(os.getenv("CALENDAR_REMINDER_RETENTION_DAYS", "30"))
+
+# Очередь записи в календарь: воркеры, попытки, экспоненциальная задержка между ними
+CALENDAR_QUEUE_WORKERS = int(os.getenv("CALENDAR_QUEUE_WORKERS", "4"))
+CALENDAR_QUEUE_MAX_ATTEMPTS = int(os.getenv("CALENDAR_QUEUE_MAX_ATTEMPTS", "8"))
+CALENDAR_QUEUE_BACKOFF_BASE = float(os.getenv("CALENDAR_QUEUE_BACKOFF_BASE", "30"))  # секунды
+CALENDAR_QUEUE_BACKOFF_MAX = float(os.getenv("CALENDAR_QUEUE_BACKOFF_MAX", "3600"))  # секунды
+CALENDAR_QUEUE_POLL_INTERVAL = float(os.getenv("CALENDAR_QUEUE_POLL_INTERVAL", "5"))  # секунды
+
 # Проверка токена
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN не установлен! Создайте .env файл.")
@@ -1,14 +1,30 @@
 from datetime import date, datetime, timedelta
+from sqlalchemy import select, update, func, literal, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from src.database.models import (
-    User, DailyEntry, Goal, Report, InboxItem, SomedayMaybe, WeeklyReview, UserTask, get_session
+    User, DailyEntry, Goal, Report, InboxItem, InboxCounter, SomedayMaybe, WeeklyReview,
+    UserStatsDaily, get_session, session_scope, commit_or_flush
 )
+from src.database import stats_rollup  # noqa: F401 — регистрирует пересчёт user_stats_daily при flush
+from src.database.crud_calendar import delete_calendar_mirror, enqueue_item_event
+from src.database.identity_cache import identity_cache, USER
+from src.database.pagination import Page, keyset_page
+from src.integrations.client_cache import client_cache
+from src.integrations.quota import quota_governor
 
 
-def get_or_create_user(telegram_id: int, username: str = None, first_name: str = None) -> User:
+def get_or_create_user(telegram_id: int, username: str = None, first_name: str = None,
+                       session: Session = None) -> User:
     """Получить или создать пользователя"""
-    session = get_session()
-    try:
+    if session is None:
+        user = identity_cache.get((USER, "telegram_id", telegram_id))
+        if user is not None:
+            return user
+
+    own_session = session is None
+    epoch = identity_cache.epoch
+    with session_scope(session, get_session) as session:
         user = session.query(User).filter(User.telegram_id == telegram_id).first()
         if not user:
             user = User(
@@ -17,32 +33,52 @@ def get_or_create_user(telegram_id: int, username: str = None, first_name: str =
                 first_name=first_name
             )
             session.add(user)
-            session.commit()
+            commit_or_flush(session)
             session.refresh(user)
+        if own_session:
+            identity_cache.put(user, epoch)
         return user
-    finally:
-        session.close()
 
 
-def get_user_by_telegram_id(telegram_id: int) -> User:
-    """Получить пользователя по Telegram ID"""
-    session = get_session()
-    try:
-        return session.query(User).filter(User.telegram_id == telegram_id).first()
-    finally:
-        session.close()
+def get_user_by_telegram_id(telegram_id: int, session: Session = None) -> User:
+    """Получить пользователя по Telegram ID (без сессии — через identity_cache)"""
+    if session is None:
+        user = identity_cache.get((USER, "telegram_id", telegram_id))
+        if user is not None:
+            return user
+
+    own_session = session is None
+    epoch = identity_cache.epoch
+    with session_scope(session, get_session) as session:
+        user = session.query(User).filter(User.telegram_id == telegram_id).first()
+        if own_session:
+            identity_cache.put(user, epoch)
+        return user
+
+
+def get_user_by_id(user_id: int, session: Session = None) -> User | None:
+    """Получить пользователя по внутреннему ID (без сессии — через identity_cache)"""
+    if session is None:
+        user = identity_cache.get((USER, "id", user_id))
+        if user is not None:
+            return user
+
+    own_session = session is None
+    epoch = identity_cache.epoch
+    with session_scope(session, get_session) as session:
+        user = session.get(User, user_id)
+        if own_session:
+            identity_cache.put(user, epoch)
+        return user
 
 
-def get_today_entry(user_id: int) -> DailyEntry:
+def get_today_entry(user_id: int, session: Session = None) -> DailyEntry:
     """Получить запись на сегодня"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         return session.query(DailyEntry).filter(
             DailyEntry.user_id == user_id,
             DailyEntry.entry_date == date.today()
         ).first()
-    finally:
-        session.close()
 
 
 def create_today_entry(user_id: int) -> DailyEntry:
@@ -70,10 +106,10 @@ def get_or_create_today_entry(user_id: int) -> DailyEntry:
 
 
 def update_morning_entry(user_id: int, energy_plus: str, energy_minus: str,
-                         task_1: str, task_2: str, task_3: str) -> DailyEntry:
+                         task_1: str, task_2: str, task_3: str,
+                         session: Session = None) -> DailyEntry:
     """Обновить утреннюю запись"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         entry = session.query(DailyEntry).filter(
             DailyEntry.user_id == user_id,
             DailyEntry.entry_date == date.today()
@@ -91,18 +127,16 @@ def update_morning_entry(user_id: int, energy_plus: str, energy_minus: str,
         entry.morning_completed = True
         entry.morning_time = datetime.now()
 
-        session.commit()
+        commit_or_flush(session)
         session.refresh(entry)
         return entry
-    finally:
-        session.close()
 
 
 def update_evening_entry(user_id: int, task_1_done: bool, task_2_done: bool,
-                         task_3_done: bool, insight: str, improve: str) -> DailyEntry:
+                         task_3_done: bool, insight: str, improve: str,
+                         session: Session = None) -> DailyEntry:
     """Обновить вечернюю запись"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         entry = session.query(DailyEntry).filter(
             DailyEntry.user_id == user_id,
             DailyEntry.entry_date == date.today()
@@ -120,11 +154,9 @@ def update_evening_entry(user_id: int, task_1_done: bool, task_2_done: bool,
         entry.evening_completed = True
         entry.evening_time = datetime.now()
 
-        session.commit()
+        commit_or_flush(session)
         session.refresh(entry)
         return entry
-    finally:
-        session.close()
 
 
 def get_week_entries(user_id: int) -> list[DailyEntry]:
@@ -142,50 +174,76 @@ def get_week_entries(user_id: int) -> list[DailyEntry]:
         session.close()
 
 
-def get_week_stats(user_id: int) -> dict:
-    """Получить статистику за неделю"""
-    entries = get_week_entries(user_id)
-
-    total_tasks = 0
-    completed_tasks = 0
-    energy_plus_list = []
-    energy_minus_list = []
-    insights = []
-
-    for entry in entries:
-        if entry.task_1:
-            total_tasks += 1
-            if entry.task_1_done:
-                completed_tasks += 1
-        if entry.task_2:
-            total_tasks += 1
-            if entry.task_2_done:
-                completed_tasks += 1
-        if entry.task_3:
-            total_tasks += 1
-            if entry.task_3_done:
-                completed_tasks += 1
-
-        if entry.energy_plus:
-            energy_plus_list.append(entry.energy_plus)
-        if entry.energy_minus:
-            energy_minus_list.append(entry.energy_minus)
-        if entry.insight:
-            insights.append(entry.insight)
-
+def _week_counts_query(session: Session, since: date):
+    """Счётчики недели по пользователям из user_stats_daily"""
+    return session.query(
+        UserStatsDaily.user_id,
+        func.count().label("total_entries"),
+        func.sum(UserStatsDaily.morning_completed).label("morning_completed"),
+        func.sum(UserStatsDaily.evening_completed).label("evening_completed"),
+        func.sum(UserStatsDaily.tasks_planned).label("total_tasks"),
+        func.sum(UserStatsDaily.tasks_done).label("completed_tasks"),
+    ).filter(UserStatsDaily.stat_date >= since).group_by(UserStatsDaily.user_id)
+
+
+def _week_texts_query(session: Session, since: date):
+    """Энергия и инсайты недели (только текстовые колонки, новые дни сверху)"""
+    return session.query(
+        DailyEntry.user_id, DailyEntry.energy_plus, DailyEntry.energy_minus, DailyEntry.insight
+    ).filter(
+        DailyEntry.entry_date >= since,
+        or_(DailyEntry.energy_plus.isnot(None), DailyEntry.energy_minus.isnot(None), DailyEntry.insight.isnot(None))
+    ).order_by(DailyEntry.user_id, DailyEntry.entry_date.desc())
+
+
+def _week_stats(counts, texts) -> dict:
+    """Словарь недельной статистики из строки _week_counts_query (или None) и текстов"""
+    total_tasks = counts.total_tasks if counts else 0
+    completed_tasks = counts.completed_tasks if counts else 0
     return {
-        "total_entries": len(entries),
-        "morning_completed": sum(1 for e in entries if e.morning_completed),
-        "evening_completed": sum(1 for e in entries if e.evening_completed),
+        "total_entries": counts.total_entries if counts else 0,
+        "morning_completed": counts.morning_completed if counts else 0,
+        "evening_completed": counts.evening_completed if counts else 0,
         "total_tasks": total_tasks,
         "completed_tasks": completed_tasks,
         "completion_rate": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-        "energy_plus": energy_plus_list,
-        "energy_minus": energy_minus_list,
-        "insights": insights
+        "energy_plus": [row.energy_plus for row in texts if row.energy_plus],
+        "energy_minus": [row.energy_minus for row in texts if row.energy_minus],
+        "insights": [row.insight for row in texts if row.insight]
     }
 
 
+def get_week_stats(user_id: int) -> dict:
+    """Получить статистику за неделю (счётчики — из user_stats_daily)"""
+    session = get_session()
+    try:
+        week_ago = date.today() - timedelta(days=7)
+        counts = _week_counts_query(session, week_ago).filter(UserStatsDaily.user_id == user_id).first()
+        texts = _week_texts_query(session, week_ago).filter(DailyEntry.user_id == user_id).all()
+        return _week_stats(counts, texts)
+    finally:
+        session.close()
+
+
+def get_week_stats_for_all_users() -> dict[int, dict]:
+    """
+    Недельная статистика всех пользователей с записями за неделю (воскресный отчёт):
+    один GROUP BY по user_stats_daily и одна выборка текстов вместо запросов на пользователя
+    """
+    session = get_session()
+    try:
+        week_ago = date.today() - timedelta(days=7)
+        texts_by_user = {}
+        for row in _week_texts_query(session, week_ago):
+            texts_by_user.setdefault(row.user_id, []).append(row)
+        return {
+            counts.user_id: _week_stats(counts, texts_by_user.get(counts.user_id, []))
+            for counts in _week_counts_query(session, week_ago)
+        }
+    finally:
+        session.close()
+
+
 def get_all_users() -> list[User]:
     """Получить всех пользователей"""
     session = get_session()
@@ -214,16 +272,13 @@ def create_goal(user_id: int, title: str, category: str = None, description: str
         session.close()
 
 
-def get_user_goals(user_id: int, status: str = "active") -> list[Goal]:
+def get_user_goals(user_id: int, status: str = "active", session: Session = None) -> list[Goal]:
     """Получить цели пользователя"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         query = session.query(Goal).filter(Goal.user_id == user_id)
         if status:
             query = query.filter(Goal.status == status)
         return query.all()
-    finally:
-        session.close()
 
 
 # Работа с репортами
@@ -244,14 +299,16 @@ def create_report(user_id: int, report_type: str, description: str) -> Report:
         session.close()
 
 
-def get_all_reports(status: str = None) -> list[Report]:
-    """Получить все репорты"""
+def get_reports_page(status: str = None, cursor: str = None, limit: int = 20) -> Page:
+    """Страница репортов (новые сверху) от курсора"""
     session = get_session()
     try:
-        query = session.query(Report).order_by(Report.created_at.desc())
+        query = session.query(Report)
+        total_query = session.query(func.count(Report.id))
         if status:
             query = query.filter(Report.status == status)
-        return query.all()
+            total_query = total_query.filter(Report.status == status)
+        return keyset_page(query, Report, total_query.scalar(), cursor, limit)
     finally:
         session.close()
 
@@ -321,10 +378,10 @@ def update_user_settings(
 
 # Работа с привычками
 def update_habits(user_id: int, sleep_time: str = None, wake_time: str = None,
-                  exercised: bool = None, ate_well: bool = None) -> DailyEntry:
+                  exercised: bool = None, ate_well: bool = None,
+                  session: Session = None) -> DailyEntry:
     """Обновить данные о привычках за сегодня"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         entry = session.query(DailyEntry).filter(
             DailyEntry.user_id == user_id,
             DailyEntry.entry_date == date.today()
@@ -343,78 +400,58 @@ def update_habits(user_id: int, sleep_time: str = None, wake_time: str = None,
         if ate_well is not None:
             entry.ate_well = ate_well
 
-        session.commit()
+        commit_or_flush(session)
         session.refresh(entry)
         return entry
-    finally:
-        session.close()
+
+
+def _format_avg_minutes(minutes: list[int]) -> str:
+    """Среднее время "HH:MM" по минутам с полуночи"""
+    # TODO: Обработка времени после полуночи (sleep_time "01:30" = 25:30?)
+    if not minutes:
+        return "-"
+    avg_min = sum(minutes) // len(minutes)
+    return f"{avg_min // 60:02d}:{avg_min % 60:02d}"
 
 
 def get_habits_stats(user_id: int) -> dict:
-    """Получить статистику привычек за последние 30 дней"""
+    """Получить статистику привычек за последние 30 дней (из user_stats_daily)"""
     session = get_session()
     try:
         month_ago = date.today() - timedelta(days=30)
-        entries = session.query(DailyEntry).filter(
-            DailyEntry.user_id == user_id,
-            DailyEntry.entry_date >= month_ago
-        ).order_by(DailyEntry.entry_date.desc()).all()
+        days = session.query(UserStatsDaily).filter(
+            UserStatsDaily.user_id == user_id,
+            UserStatsDaily.stat_date >= month_ago
+        ).order_by(UserStatsDaily.stat_date.desc()).all()
 
         # Подсчёт streak для спорта
         exercise_streak = 0
-        for entry in entries:
-            if entry.exercised:
+        for day in days:
+            if day.exercised:
                 exercise_streak += 1
             else:
                 break
 
         # Подсчёт streak для питания
         eating_streak = 0
-        for entry in entries:
-            if entry.ate_well:
+        for day in days:
+            if day.ate_well:
                 eating_streak += 1
             else:
                 break
 
         # Статистика за неделю
         week_ago = date.today() - timedelta(days=7)
-        week_entries = [e for e in entries if e.entry_date >= week_ago]
-
-        week_exercise = sum(1 for e in week_entries if e.exercised)
-        week_eating = sum(1 for e in week_entries if e.ate_well)
-
-        # Среднее время сна и подъёма
-        wake_times = [e.wake_time for e in week_entries if e.wake_time]
-        sleep_times = [e.sleep_time for e in week_entries if e.sleep_time]
-
-        def avg_time(times: list) -> str:
-            # TODO: Добавить валидацию времени (0 <= h < 24, 0 <= m < 60)
-            # TODO: Обработка времени после полуночи (sleep_time "01:30" = 25:30?)
-            # TODO: Заменить bare except на except ValueError
-            if not times:
-                return "-"
-            total_minutes = 0
-            valid_count = 0
-            for t in times:
-                try:
-                    h, m = map(int, t.split(":"))
-                    total_minutes += h * 60 + m
-                    valid_count += 1
-                except:
-                    continue
-            if valid_count == 0:
-                return "-"
-            avg_min = total_minutes // valid_count
-            return f"{avg_min // 60:02d}:{avg_min % 60:02d}"
+        week_days = [d for d in days if d.stat_date >= week_ago]
 
         return {
             "exercise_streak": exercise_streak,
             "eating_streak": eating_streak,
-            "week_exercise": week_exercise,
-            "week_eating": week_eating,
-            "avg_wake": avg_time(wake_times),
-            "avg_sleep": avg_time(sleep_times),
-            "total_entries": len(entries)
+            "week_exercise": sum(d.exercised for d in week_days),
+            "week_eating": sum(d.ate_well for d in week_days),
+            "avg_wake": _format_avg_minutes([d.wake_minutes for d in week_days if d.wake_minutes is not None]),
+            "avg_sleep": _format_avg_minutes([d.sleep_minutes for d in week_days if d.sleep_minutes is not None]),
+            "total_entries": len(days)
         }
     finally:
         session.close()
@@ -422,6 +459,46 @@ def get_habits_stats(user_id: int) -> dict:
 
 # ============ GTD INBOX ============
 
+def inbox_pending_delta(user_id: int, delta: int):
+    """UPDATE счётчика pending-задач: pending + delta, RETURNING новое значение (None — строки нет)"""
+    return (
+        update(InboxCounter)
+        .where(InboxCounter.user_id == user_id)
+        .values(pending=func.max(InboxCounter.pending + delta, 0))
+        .returning(InboxCounter.pending)
+    )
+
+
+def inbox_pending_recount(user_id: int):
+    """
+    Пересчитать счётчик через COUNT(*) по inbox_items (UPSERT, RETURNING pending).
+    Нужен, только если строки счётчика ещё нет; выполнять после flush изменения.
+    """
+    stmt = sqlite_insert(InboxCounter).from_select(
+        ["user_id", "pending"],
+        select(literal(user_id), func.count(InboxItem.id)).where(
+            InboxItem.user_id == user_id,
+            InboxItem.status == "pending"
+        )
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[InboxCounter.user_id],
+        set_={"pending": stmt.excluded.pending}
+    ).returning(InboxCounter.pending)
+
+
+def _pending_delta(old_status: str | None, new_status: str | None) -> int:
+    """+1 / -1 / 0 для счётчика при смене статуса элемента inbox"""
+    return int(new_status == "pending") - int(old_status == "pending")
+
+
+def _update_inbox_counter(session: Session, user_id: int, delta: int):
+    if delta:
+        session.flush()
+        if session.execute(inbox_pending_delta(user_id, delta)).scalar_one_or_none() is None:
+            session.execute(inbox_pending_recount(user_id))
+
+
 def create_inbox_item(user_id: int, text: str,
                       energy_level: str = None,
                       time_estimate: str = None) -> InboxItem:
@@ -432,9 +509,11 @@ def create_inbox_item(user_id: int, text: str,
             user_id=user_id,
             text=text,
             energy_level=energy_level,
-            time_estimate=time_estimate
+            time_estimate=time_estimate,
+            status="pending"
         )
         session.add(item)
+        _update_inbox_counter(session, user_id, 1)
         session.commit()
         session.refresh(item)
         return item
@@ -454,36 +533,33 @@ def get_user_inbox(user_id: int, status: str = "pending") -> list[InboxItem]:
         session.close()
 
 
-def get_inbox_item(item_id: int) -> InboxItem:
+def get_inbox_item(item_id: int, session: Session = None) -> InboxItem:
     """Получить элемент inbox по ID"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         return session.query(InboxItem).filter(InboxItem.id == item_id).first()
-    finally:
-        session.close()
 
 
 def update_inbox_item(item_id: int, status: str = None,
                       energy_level: str = None,
-                      time_estimate: str = None) -> InboxItem:
+                      time_estimate: str = None,
+                      session: Session = None) -> InboxItem:
     """Обновить элемент inbox"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         item = session.query(InboxItem).filter(InboxItem.id == item_id).first()
         if item:
             if status is not None:
+                delta = _pending_delta(item.status, status)
                 item.status = status
                 if status == "processed":
                     item.processed_at = datetime.now()
+                _update_inbox_counter(session, item.user_id, delta)
             if energy_level is not None:
                 item.energy_level = energy_level
             if time_estimate is not None:
                 item.time_estimate = time_estimate
-            session.commit()
+            commit_or_flush(session)
             session.refresh(item)
         return item
-    finally:
-        session.close()
 
 
 def delete_inbox_item(item_id: int) -> bool:
@@ -492,7 +568,9 @@ def delete_inbox_item(item_id: int) -> bool:
     try:
         item = session.query(InboxItem).filter(InboxItem.id == item_id).first()
         if item:
+            delta = _pending_delta(item.status, "deleted")
             item.status = "deleted"
+            _update_inbox_counter(session, item.user_id, delta)
             session.commit()
             return True
         return False
@@ -501,9 +579,12 @@ def delete_inbox_item(item_id: int) -> bool:
 
 
 def get_inbox_count(user_id: int) -> int:
-    """Количество необработанных задач в inbox"""
+    """Количество необработанных задач в inbox (из счётчика; без него — COUNT)"""
     session = get_session()
     try:
+        counter = session.get(InboxCounter, user_id)
+        if counter is not None:
+            return counter.pending
         return session.query(InboxItem).filter(
             InboxItem.user_id == user_id,
             InboxItem.status == "pending"
@@ -512,21 +593,28 @@ def get_inbox_count(user_id: int) -> int:
         session.close()
 
 
-def get_inbox_by_context(user_id: int,
-                         energy_level: str = None,
-                         time_estimate: str = None) -> list[InboxItem]:
-    """Фильтрация inbox по контексту"""
+def get_inbox_page(user_id: int, cursor: str = None, limit: int = 5,
+                   energy_level: str = None, time_estimate: str = None) -> Page:
+    """
+    Страница pending-задач inbox (новые сверху) от курсора, с фильтром по контексту.
+    Без фильтра total берётся из счётчика, с фильтром — COUNT по индексу.
+    """
     session = get_session()
     try:
-        query = session.query(InboxItem).filter(
-            InboxItem.user_id == user_id,
-            InboxItem.status == "pending"
-        )
+        conditions = [InboxItem.user_id == user_id, InboxItem.status == "pending"]
         if energy_level:
-            query = query.filter(InboxItem.energy_level == energy_level)
+            conditions.append(InboxItem.energy_level == energy_level)
         if time_estimate:
-            query = query.filter(InboxItem.time_estimate == time_estimate)
-        return query.order_by(InboxItem.created_at.desc()).all()
+            conditions.append(InboxItem.time_estimate == time_estimate)
+
+        counter = None if energy_level or time_estimate else session.get(InboxCounter, user_id)
+        if counter is not None:
+            total = counter.pending
+        else:
+            total = session.query(func.count(InboxItem.id)).filter(*conditions).scalar()
+
+        query = session.query(InboxItem).filter(*conditions)
+        return keyset_page(query, InboxItem, total, cursor, limit)
     finally:
         session.close()
 
@@ -562,6 +650,17 @@ def get_user_someday(user_id: int) -> list[SomedayMaybe]:
         session.close()
 
 
+def get_someday_page(user_id: int, cursor: str = None, limit: int = 10) -> Page:
+    """Страница списка 'когда-нибудь' (новые сверху) от курсора"""
+    session = get_session()
+    try:
+        total = session.query(func.count(SomedayMaybe.id)).filter(SomedayMaybe.user_id == user_id).scalar()
+        query = session.query(SomedayMaybe).filter(SomedayMaybe.user_id == user_id)
+        return keyset_page(query, SomedayMaybe, total, cursor, limit)
+    finally:
+        session.close()
+
+
 def get_someday_item(item_id: int) -> SomedayMaybe:
     """Получить элемент someday по ID"""
     session = get_session()
@@ -586,8 +685,10 @@ def move_inbox_to_someday(inbox_id: int) -> SomedayMaybe:
         )
         session.add(someday_item)
 
+        delta = _pending_delta(inbox_item.status, "processed")
         inbox_item.status = "processed"
         inbox_item.processed_at = datetime.now()
+        _update_inbox_counter(session, inbox_item.user_id, delta)
 
         session.commit()
         session.refresh(someday_item)
@@ -606,10 +707,12 @@ def move_someday_to_inbox(someday_id: int) -> InboxItem:
 
         inbox_item = InboxItem(
             user_id=someday_item.user_id,
-            text=someday_item.text
+            text=someday_item.text,
+            status="pending"
         )
         session.add(inbox_item)
         session.delete(someday_item)
+        _update_inbox_counter(session, someday_item.user_id, 1)
 
         session.commit()
         session.refresh(inbox_item)
@@ -733,10 +836,9 @@ def get_last_weekly_review(user_id: int) -> WeeklyReview:
 
 # ============ GTD PRIORITY TASK ============
 
-def update_priority_task(user_id: int, priority_task: int) -> DailyEntry:
+def update_priority_task(user_id: int, priority_task: int, session: Session = None) -> DailyEntry:
     """Установить приоритетную задачу дня (1, 2 или 3)"""
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         entry = session.query(DailyEntry).filter(
             DailyEntry.user_id == user_id,
             DailyEntry.entry_date == date.today()
@@ -744,36 +846,24 @@ def update_priority_task(user_id: int, priority_task: int) -> DailyEntry:
 
         if entry:
             entry.priority_task = priority_task
-            session.commit()
+            commit_or_flush(session)
             session.refresh(entry)
         return entry
-    finally:
-        session.close()
 
 
 def get_priority_task_stats(user_id: int, days: int = 7) -> dict:
-    """Статистика выполнения приоритетных задач"""
+    """Статистика выполнения приоритетных задач (один агрегат по user_stats_daily)"""
     session = get_session()
     try:
         # TODO: >= возвращает days+1 записей, использовать > для точного количества
         start_date = date.today() - timedelta(days=days)
-        entries = session.query(DailyEntry).filter(
-            DailyEntry.user_id == user_id,
-            DailyEntry.entry_date >= start_date,
-            DailyEntry.priority_task.isnot(None)
-        ).all()
-
-        total = len(entries)
-        completed = 0
-
-        for entry in entries:
-            priority = entry.priority_task
-            if priority == 1 and entry.task_1_done:
-                completed += 1
-            elif priority == 2 and entry.task_2_done:
-                completed += 1
-            elif priority == 3 and entry.task_3_done:
-                completed += 1
+        total, completed = session.query(
+            func.coalesce(func.sum(UserStatsDaily.priority_set), 0),
+            func.coalesce(func.sum(UserStatsDaily.priority_done), 0)
+        ).filter(
+            UserStatsDaily.user_id == user_id,
+            UserStatsDaily.stat_date >= start_date
+        ).one()
 
         return {
             "total": total,
@@ -795,6 +885,8 @@ def update_user_google_token(telegram_id: int, encrypted_token: str) -> User:
             user.google_refresh_token_encrypted = encrypted_token
             user.calendar_sync_enabled = True
             session.commit()
+            client_cache.invalidate(user.id)
+            quota_governor.reset(user.id)  # новый токен — снимаем паузу после ошибок авторизации
             session.refresh(user)
         return user
     finally:
@@ -820,7 +912,9 @@ def disable_calendar_sync(telegram_id: int) -> bool:
             user.google_refresh_token_encrypted = None
             user.calendar_sync_enabled = False
             user.calendar_last_sync = None
+            delete_calendar_mirror(user.id, session=session)
             session.commit()
+            client_cache.invalidate(user.id)
             return True
         return False
     finally:
@@ -854,12 +948,15 @@ def update_calendar_last_sync(telegram_id: int) -> User:
 
 
 def update_inbox_item_deadline(item_id: int, deadline: datetime) -> InboxItem:
-    """Добавить дедлайн к задаче"""
+    """Добавить дедлайн к задаче (и в той же транзакции — событие в очередь календаря)"""
     session = get_session()
     try:
         item = session.query(InboxItem).filter(InboxItem.id == item_id).first()
         if item:
             item.deadline = deadline
+            user = session.get(User, item.user_id)
+            if user and user.calendar_sync_enabled:
+                enqueue_item_event(user.id, "inbox", item.id, deadline, session=session)
             session.commit()
             session.refresh(item)
         return item
@@ -936,50 +1033,3 @@ def get_inbox_item_by_event_id(event_id: str) -> InboxItem | None:
     finally:
         session.close()
 
-
-# ============ UNIFIED TASKS VIEW ============
-
-def get_unified_tasks(user_id: int, filter_type: str = "all") -> dict:
-    """
-    Получить объединённый список задач для unified view.
-
-    Args:
-        user_id: ID пользователя
-        filter_type: "all" | "user_tasks" | "inbox" | "daily"
-
-    Returns: {
-        "user_tasks": list[UserTask],
-        "inbox_tasks": list[InboxItem],
-        "daily_entry": DailyEntry | None
-    }
-    """
-    from datetime import date
-    session = get_session()
-    try:
-        result = {"user_tasks": [], "inbox_tasks": [], "daily_entry": None}
-
-        # Daily entry за сегодня (всегда получаем для unified view)
-        if filter_type in ["all", "daily"]:
-            result["daily_entry"] = session.query(DailyEntry).filter(
-                DailyEntry.user_id == user_id,
-                DailyEntry.entry_date == date.today(),
-                DailyEntry.morning_completed == True
-            ).first()
-
-        # User tasks (active only)
-        if filter_type in ["all", "user_tasks"]:
-            result["user_tasks"] = session.query(UserTask).filter(
-                UserTask.user_id == user_id,
-                UserTask.is_active == True
-            ).all()
-
-        # Inbox tasks (pending only)
-        if filter_type in ["all", "inbox"]:
-            result["inbox_tasks"] = session.query(InboxItem).filter(
-                InboxItem.user_id == user_id,
-                InboxItem.status == "pending"
-            ).all()
-
-        return result
-    finally:
-        session.close()
@@ -0,0 +1,313 @@
+"""
+Асинхронные CRUD операции (AsyncSession + aiosqlite)
+
+Зеркалит самые горячие функции из crud.py / crud_rewards.py, но не блокирует
+event loop: handlers и scheduler jobs вызывают их через await.
+Семантика и сигнатуры совпадают с синхронными версиями.
+"""
+from datetime import date
+from sqlalchemy import select, insert, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import (
+    User, DailyEntry, InboxItem, InboxCounter, RewardFund, RewardTransaction, get_async_session
+)
+from src.database.crud import inbox_pending_delta, inbox_pending_recount
+from src.database.identity_cache import identity_cache, USER
+
+
+# ============ USERS ============
+
+async def get_or_create_user(telegram_id: int, username: str = None, first_name: str = None) -> User:
+    """Получить или создать пользователя"""
+    async with get_async_session() as session:
+        result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            user = User(
+                telegram_id=telegram_id,
+                username=username,
+                first_name=first_name
+            )
+            session.add(user)
+            await session.commit()
+            await session.refresh(user)
+        return user
+
+
+async def get_user_by_telegram_id(telegram_id: int) -> User:
+    """Получить пользователя по Telegram ID"""
+    async with get_async_session() as session:
+        result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+        return result.scalar_one_or_none()
+
+
+async def get_all_users() -> list[User]:
+    """Получить всех пользователей"""
+    async with get_async_session() as session:
+        result = await session.execute(select(User))
+        return list(result.scalars().all())
+
+
+async def get_users_with_calendar_enabled() -> list[User]:
+    """Получить пользователей с включённой синхронизацией"""
+    async with get_async_session() as session:
+        result = await session.execute(select(User).where(
+            User.calendar_sync_enabled == True,
+            User.google_refresh_token_encrypted.isnot(None)
+        ))
+        return list(result.scalars().all())
+
+
+# ============ DAILY ENTRY ============
+
+async def get_today_entry(user_id: int) -> DailyEntry:
+    """Получить запись на сегодня"""
+    async with get_async_session() as session:
+        result = await session.execute(select(DailyEntry).where(
+            DailyEntry.user_id == user_id,
+            DailyEntry.entry_date == date.today()
+        ))
+        return result.scalars().first()
+
+
+async def get_or_create_today_entry(user_id: int) -> DailyEntry:
+    """Получить или создать запись на сегодня"""
+    async with get_async_session() as session:
+        result = await session.execute(select(DailyEntry).where(
+            DailyEntry.user_id == user_id,
+            DailyEntry.entry_date == date.today()
+        ))
+        entry = result.scalars().first()
+        if not entry:
+            entry = DailyEntry(user_id=user_id, entry_date=date.today())
+            session.add(entry)
+            await session.commit()
+            await session.refresh(entry)
+        return entry
+
+
+# ============ REMINDER AUDIENCES ============
+# Аудитория каждого job'а — одним запросом (LEFT JOIN на сегодняшнюю запись),
+# без get_today_entry на каждого пользователя. user_ids — только эти
+# пользователи (те, чьё напоминание сработало в индексе), запрос идёт пачками
+
+# Не упираться в лимит bind-параметров SQLite
+IN_CHUNK_SIZE = 500
+
+
+def _today_entry_join():
+    return and_(DailyEntry.user_id == User.id, DailyEntry.entry_date == date.today())
+
+
+async def _fetch_audience(query, user_ids: list[int] | None, scalars: bool) -> list:
+    if user_ids is not None and not user_ids:
+        return []
+    chunks = [None] if user_ids is None else [
+        user_ids[i:i + IN_CHUNK_SIZE] for i in range(0, len(user_ids), IN_CHUNK_SIZE)
+    ]
+
+    rows = []
+    async with get_async_session() as session:
+        for chunk in chunks:
+            chunk_query = query if chunk is None else query.where(User.id.in_(chunk))
+            result = await session.execute(chunk_query)
+            rows.extend(result.scalars().all() if scalars else [tuple(row) for row in result.all()])
+    return rows
+
+
+async def get_morning_reminder_audience(user_ids: list[int] = None) -> list[User]:
+    """Пользователи без сегодняшней записи или с незаполненным утром"""
+    return await _fetch_audience(
+        select(User)
+        .outerjoin(DailyEntry, _today_entry_join())
+        .where(or_(DailyEntry.id.is_(None), DailyEntry.morning_completed.isnot(True))),
+        user_ids, scalars=True
+    )
+
+
+async def get_evening_reminder_audience(user_ids: list[int] = None) -> list[User]:
+    """Пользователи, у которых утро заполнено, а вечер — нет"""
+    return await _fetch_audience(
+        select(User)
+        .join(DailyEntry, _today_entry_join())
+        .where(DailyEntry.morning_completed == True, DailyEntry.evening_completed.isnot(True)),
+        user_ids, scalars=True
+    )
+
+
+async def get_task_reminder_audience(user_ids: list[int] = None) -> list[tuple[User, DailyEntry]]:
+    """
+    Пары (user, сегодняшняя запись) для напоминания о задачах дня:
+    напоминания включены, утро заполнено, вечер — нет
+    """
+    return await _fetch_audience(
+        select(User, DailyEntry)
+        .join(DailyEntry, _today_entry_join())
+        .where(
+            User.task_reminders_enabled == True,
+            DailyEntry.morning_completed == True,
+            DailyEntry.evening_completed.isnot(True)
+        ),
+        user_ids, scalars=False
+    )
+
+
+async def get_inbox_counts() -> dict[int, int]:
+    """Количество необработанных задач inbox по всем пользователям: {user_id: count}"""
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(InboxItem.user_id, func.count(InboxItem.id))
+            .where(InboxItem.status == "pending")
+            .group_by(InboxItem.user_id)
+        )
+        return dict(result.all())
+
+
+# ============ GTD INBOX ============
+
+async def _update_inbox_counter(session: AsyncSession, user_id: int, delta: int) -> int:
+    """Сдвинуть счётчик pending (после flush); без строки счётчика — пересчитать COUNT"""
+    pending = (await session.execute(inbox_pending_delta(user_id, delta))).scalar_one_or_none()
+    if pending is None:
+        pending = (await session.execute(inbox_pending_recount(user_id))).scalar_one()
+    return pending
+
+
+async def create_inbox_item(user_id: int, text: str,
+                            energy_level: str = None,
+                            time_estimate: str = None) -> InboxItem:
+    """Добавить задачу в inbox"""
+    async with get_async_session() as session:
+        item = InboxItem(
+            user_id=user_id,
+            text=text,
+            energy_level=energy_level,
+            time_estimate=time_estimate,
+            status="pending"
+        )
+        session.add(item)
+        await session.flush()
+        await _update_inbox_counter(session, user_id, 1)
+        await session.commit()
+        await session.refresh(item)
+        return item
+
+
+async def capture_inbox_item(telegram_id: int, text: str,
+                             username: str = None, first_name: str = None) -> int:
+    """
+    Быстрый путь захвата текста в inbox (самый частый апдейт бота):
+    пользователь из identity_cache, INSERT задачи и UPSERT счётчика одной транзакцией.
+    Returns: количество pending-задач после добавления
+    """
+    user = identity_cache.get((USER, "telegram_id", telegram_id))
+    async with get_async_session() as session:
+        if user is None:
+            epoch = identity_cache.epoch
+            result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+            user = result.scalar_one_or_none()
+            if user:
+                identity_cache.put(user, epoch)
+            else:
+                user = User(telegram_id=telegram_id, username=username, first_name=first_name)
+                session.add(user)
+                await session.flush()
+        user_id = user.id
+
+        await session.execute(insert(InboxItem).values(user_id=user_id, text=text, status="pending"))
+        pending = await _update_inbox_counter(session, user_id, 1)
+        await session.commit()
+        return pending
+
+
+async def get_user_inbox(user_id: int, status: str = "pending") -> list[InboxItem]:
+    """Получить inbox пользователя"""
+    async with get_async_session() as session:
+        query = select(InboxItem).where(InboxItem.user_id == user_id)
+        if status:
+            query = query.where(InboxItem.status == status)
+        result = await session.execute(query.order_by(InboxItem.created_at.desc()))
+        return list(result.scalars().all())
+
+
+async def get_inbox_count(user_id: int) -> int:
+    """Количество необработанных задач в inbox (из счётчика; без него — COUNT)"""
+    async with get_async_session() as session:
+        counter = await session.get(InboxCounter, user_id)
+        if counter is not None:
+            return counter.pending
+        result = await session.execute(
+            select(func.count(InboxItem.id)).where(
+                InboxItem.user_id == user_id,
+                InboxItem.status == "pending"
+            )
+        )
+        return result.scalar_one()
+
+
+# ============ REWARDS ============
+
+async def get_or_create_reward_fund(user_id: int) -> RewardFund:
+    """Получить или создать фонд наград для пользователя"""
+    async with get_async_session() as session:
+        result = await session.execute(select(RewardFund).where(RewardFund.user_id == user_id))
+        fund = result.scalar_one_or_none()
+        if not fund:
+            fund = RewardFund(user_id=user_id)
+            session.add(fund)
+            await session.commit()
+            await session.refresh(fund)
+        return fund
+
+
+async def get_reward_balance(user_id: int) -> int:
+    """Получить текущий баланс"""
+    fund = await get_or_create_reward_fund(user_id)
+    return fund.balance if fund else 0
+
+
+async def get_reward_balance_by_telegram_id(telegram_id: int) -> int:
+    """Получить баланс по telegram_id"""
+    user = await get_user_by_telegram_id(telegram_id)
+    if not user:
+        return 0
+    return await get_reward_balance(user.id)
+
+
+async def add_reward(
+    user_id: int,
+    amount: int,
+    transaction_type: str,
+    description: str = None,
+    daily_entry_id: int = None,
+    weekly_review_id: int = None,
+    reward_item_id: int = None,
+    inbox_item_id: int = None
+) -> RewardTransaction:
+    """Добавить награду в фонд (баланс и транзакция — одним коммитом)"""
+    async with get_async_session() as session:
+        result = await session.execute(select(RewardFund).where(RewardFund.user_id == user_id))
+        fund = result.scalar_one_or_none()
+
+        if not fund:
+            fund = RewardFund(user_id=user_id, balance=0, total_earned=0, total_spent=0)
+            session.add(fund)
+            await session.flush()
+
+        fund.balance += amount
+        fund.total_earned += amount
+
+        transaction = RewardTransaction(
+            fund_id=fund.id,
+            amount=amount,
+            transaction_type=transaction_type,
+            description=description,
+            daily_entry_id=daily_entry_id,
+            weekly_review_id=weekly_review_id,
+            reward_item_id=reward_item_id,
+            inbox_item_id=inbox_item_id
+        )
+        session.add(transaction)
+        await session.commit()
+        await session.refresh(transaction)
+        return transaction
@@ -0,0 +1,509 @@
+"""
+CRUD для локального зеркала Google Calendar
+
+Функционал:
+- Применение выборки events().list (полной или инкрементальной) одним upsert'ом
+- Состояние синхронизации: syncToken, время последней (полной) синхронизации
+- Чтение событий окна / дня для напоминаний, follow-up, /calendar и привычек
+- Сверка событий бота: перенесённые → новые дедлайны/время, удалённые → снять ссылки
+- Очередь записи в календарь (calendar_jobs): постановка со склейкой, аренда, повтор
+- Напоминания о событиях (calendar_event_reminders): upsert строк тика, очистка старых
+"""
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.config import TIMEZONE
+from src.database.models import (
+    CalendarEvent, CalendarEventReminder, CalendarJob, CalendarSyncState, DailyEntry, HabitCalendarEvent, InboxItem, UserTask,
+    get_session, session_scope, commit_or_flush
+)
+
+# Размер пачки для IN (...) при удалении отменённых событий
+IN_CHUNK_SIZE = 500
+
+# Поля, обновляемые при повторном получении события
+_UPSERT_FIELDS = (
+    "recurring_event_id", "summary", "color_id",
+    "start_time", "end_time", "is_all_day", "updated_at", "synced_at",
+)
+
+
+def _parse_utc(value: str) -> datetime | None:
+    """ISO-время Google → UTC без tzinfo"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_event_boundary(boundary: dict) -> tuple[datetime | None, bool]:
+    """start/end события → (время, is_all_day)"""
+    if boundary.get('dateTime'):
+        return _parse_utc(boundary['dateTime']), False
+    if boundary.get('date'):
+        try:
+            return datetime.combine(date.fromisoformat(boundary['date']), time()), True
+        except ValueError:
+            return None, True
+    return None, False
+
+
+def event_to_row(user_id: int, event: dict, synced_at: datetime = None) -> dict | None:
+    """Событие Google API → строка calendar_events (None, если без времени)"""
+    start, is_all_day = _parse_event_boundary(event.get('start', {}))
+    end, _ = _parse_event_boundary(event.get('end', {}))
+    if not event.get('id') or start is None:
+        return None
+
+    return {
+        "user_id": user_id,
+        "google_event_id": event['id'],
+        "recurring_event_id": event.get('recurringEventId'),
+        "summary": (event.get('summary') or '')[:500],
+        "color_id": event.get('colorId'),
+        "start_time": start,
+        "end_time": end or start,
+        "is_all_day": is_all_day,
+        "updated_at": _parse_utc(event['updated']) if event.get('updated') else None,
+        "synced_at": synced_at or datetime.utcnow(),
+    }
+
+
+# ============ СИНХРОНИЗАЦИЯ ============
+
+def _sync_state(session: Session, user_id: int) -> CalendarSyncState:
+    state = session.get(CalendarSyncState, user_id)
+    if state is None:
+        state = CalendarSyncState(user_id=user_id)
+        session.add(state)
+    return state
+
+
+def get_calendar_sync_state(user_id: int, session: Session = None) -> CalendarSyncState | None:
+    """Состояние синхронизации пользователя"""
+    with session_scope(session, get_session) as session:
+        return session.get(CalendarSyncState, user_id)
+
+
+def apply_calendar_changes(
+    user_id: int,
+    calendar_id: str,
+    events: list,
+    sync_token: str | None,
+    full: bool = False,
+    session: Session = None
+) -> tuple[int, int]:
+    """
+    Применить выборку к зеркалу в одной транзакции.
+
+    full=True — полная синхронизация: зеркало пользователя заменяется целиком.
+    Иначе — upsert изменённых и удаление отменённых (status="cancelled").
+
+    Returns: (upserted, deleted)
+    """
+    now = datetime.utcnow()
+    rows, cancelled = [], []
+    for event in events:
+        if event.get('status') == 'cancelled':
+            cancelled.append(event.get('id'))
+            continue
+        row = event_to_row(user_id, event, now)
+        if row:
+            rows.append(row)
+
+    with session_scope(session, get_session) as session:
+        deleted = 0
+        if full:
+            deleted = session.execute(
+                delete(CalendarEvent).where(CalendarEvent.user_id == user_id)
+            ).rowcount
+        else:
+            for i in range(0, len(cancelled), IN_CHUNK_SIZE):
+                deleted += session.execute(
+                    delete(CalendarEvent).where(
+                        CalendarEvent.user_id == user_id,
+                        CalendarEvent.google_event_id.in_(cancelled[i:i + IN_CHUNK_SIZE])
+                    )
+                ).rowcount
+
+        if rows:
+            stmt = sqlite_insert(CalendarEvent.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "google_event_id"],
+                set_={field: stmt.excluded[field] for field in _UPSERT_FIELDS}
+            )
+            session.execute(stmt, rows)
+
+        state = _sync_state(session, user_id)
+        state.calendar_id = calendar_id
+        state.sync_token = sync_token
+        state.last_synced_at = now
+        if full:
+            state.last_full_sync_at = now
+
+        commit_or_flush(session)
+        return len(rows), deleted
+
+
+def delete_calendar_mirror(user_id: int, session: Session = None):
+    """Удалить зеркало и состояние синхронизации (календарь отключён)"""
+    with session_scope(session, get_session) as session:
+        session.execute(delete(CalendarEvent).where(CalendarEvent.user_id == user_id))
+        session.execute(delete(CalendarSyncState).where(CalendarSyncState.user_id == user_id))
+        commit_or_flush(session)
+
+
+# ============ СВЕРКА СОБЫТИЙ БОТА ============
+
+def _bot_local_time(event: dict) -> datetime | None:
+    """
+    Начало события в таймзоне бота без tzinfo — так хранятся
+    InboxItem.deadline и UserTask.calendar_time
+    """
+    value = event.get('start', {}).get('dateTime')
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(ZoneInfo(TIMEZONE)).replace(tzinfo=None)
+    return parsed
+
+
+# Поля DailyEntry со ссылками на события задач (номер задачи → поле)
+DAILY_EVENT_FIELDS = {1: "task_1_event_id", 2: "task_2_event_id", 3: "task_3_event_id"}
+
+
+def reconcile_bot_events(
+    user_id: int,
+    events: list,
+    reconciled_at: datetime,
+    session: Session = None
+) -> dict:
+    """
+    Отразить изменения событий бота в локальных записях одной транзакцией.
+
+    - перенесённое событие → InboxItem.deadline / UserTask.calendar_time
+    - удалённое событие → ссылка снимается (inbox, задачи, задачи дня, привычки);
+      номер задачи дня запоминается в calendar_deleted_tasks, чтобы синхронизация
+      не создала событие снова
+
+    Returns: {"moved": N, "unlinked": N}
+    """
+    stats = {"moved": 0, "unlinked": 0}
+    by_id = {event['id']: event for event in events if event.get('id')}
+    cancelled = {event_id for event_id, event in by_id.items() if event.get('status') == 'cancelled'}
+
+    with session_scope(session, get_session) as session:
+        event_ids = list(by_id)
+        for i in range(0, len(event_ids), IN_CHUNK_SIZE):
+            chunk = event_ids[i:i + IN_CHUNK_SIZE]
+
+            for item in session.query(InboxItem).filter(
+                InboxItem.user_id == user_id, InboxItem.google_event_id.in_(chunk)
+            ):
+                if item.google_event_id in cancelled:
+                    item.google_event_id = None
+                    stats["unlinked"] += 1
+                    continue
+                start = _bot_local_time(by_id[item.google_event_id])
+                if start and start != item.deadline:
+                    item.deadline = start
+                    stats["moved"] += 1
+
+            for task in session.query(UserTask).filter(
+                UserTask.user_id == user_id, UserTask.google_event_id.in_(chunk)
+            ):
+                if task.google_event_id in cancelled:
+                    task.google_event_id = None
+                    task.calendar_time = None
+                    stats["unlinked"] += 1
+                    continue
+                start = _bot_local_time(by_id[task.google_event_id])
+                if start and start != task.calendar_time:
+                    task.calendar_time = start
+                    stats["moved"] += 1
+
+            cancelled_chunk = cancelled.intersection(chunk)
+            if not cancelled_chunk:
+                continue
+
+            for entry in session.query(DailyEntry).filter(
+                DailyEntry.user_id == user_id,
+                or_(*(getattr(DailyEntry, field).in_(cancelled_chunk) for field in DAILY_EVENT_FIELDS.values()))
+            ):
+                deleted = set(filter(None, (entry.calendar_deleted_tasks or "").split(",")))
+                for task_num, field in DAILY_EVENT_FIELDS.items():
+                    if getattr(entry, field) in cancelled_chunk:
+                        if entry.priority_event_id == getattr(entry, field):
+                            entry.priority_event_id = None
+                        setattr(entry, field, None)
+                        deleted.add(str(task_num))
+                        stats["unlinked"] += 1
+                entry.calendar_deleted_tasks = ",".join(sorted(deleted))
+
+            for habit in session.query(HabitCalendarEvent).filter(
+                HabitCalendarEvent.user_id == user_id,
+                HabitCalendarEvent.google_event_id.in_(cancelled_chunk)
+            ):
+                habit.google_event_id = None
+                habit.is_active = False
+                stats["unlinked"] += 1
+
+        _sync_state(session, user_id).last_reconciled_at = reconciled_at
+        commit_or_flush(session)
+
+    return stats
+
+
+# ============ НАПОМИНАНИЯ О СОБЫТИЯХ ============
+
+def get_or_create_event_reminders(
+    user_id: int,
+    rows: list[dict],
+    session: Session = None
+) -> dict[str, CalendarEventReminder]:
+    """
+    Строки напоминаний для событий тика: новые — одним INSERT ... ON CONFLICT DO NOTHING
+    по уникальному (user_id, google_event_id), затем все — одним IN-запросом.
+
+    rows — google_event_id, event_start, event_end, event_summary, is_bot_created, is_excluded.
+    Отметки reminder_sent_at / followup_sent_at вызывающий коммитит одним разом.
+
+    Returns: {google_event_id: CalendarEventReminder}
+    """
+    rows = list({row["google_event_id"]: row for row in rows}.values())
+    if not rows:
+        return {}
+
+    stmt = sqlite_insert(CalendarEventReminder.__table__).on_conflict_do_nothing(
+        index_elements=["user_id", "google_event_id"]
+    )
+    with session_scope(session, get_session) as session:
+        session.execute(stmt, [{**row, "user_id": user_id} for row in rows])
+        commit_or_flush(session)
+
+        return {
+            reminder.google_event_id: reminder
+            for reminder in session.query(CalendarEventReminder).filter(
+                CalendarEventReminder.user_id == user_id,
+                CalendarEventReminder.google_event_id.in_([row["google_event_id"] for row in rows])
+            )
+        }
+
+
+def purge_event_reminders(ended_before: datetime, session: Session = None) -> int:
+    """Удалить напоминания о событиях, завершившихся раньше ended_before. Returns: сколько удалено"""
+    with session_scope(session, get_session) as session:
+        deleted = session.execute(
+            delete(CalendarEventReminder).where(or_(
+                CalendarEventReminder.event_end < ended_before,
+                and_(CalendarEventReminder.event_end.is_(None), CalendarEventReminder.event_start < ended_before)
+            ))
+        ).rowcount
+        commit_or_flush(session)
+        return deleted
+
+
+# ============ ЧТЕНИЕ ============
+
+def _to_naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def get_calendar_events_between(user_id: int, start: datetime, end: datetime) -> list[CalendarEvent]:
+    """События со временем (не на весь день), пересекающие окно [start, end]"""
+    session = get_session()
+    try:
+        return session.query(CalendarEvent).filter(
+            CalendarEvent.user_id == user_id,
+            CalendarEvent.is_all_day == False,
+            CalendarEvent.start_time <= _to_naive_utc(end),
+            CalendarEvent.end_time >= _to_naive_utc(start)
+        ).order_by(CalendarEvent.start_time).all()
+    finally:
+        session.close()
+
+
+def get_day_calendar_events(user_id: int, day: date, zone) -> list[CalendarEvent]:
+    """События дня day по таймзоне zone: сначала на весь день, затем по времени"""
+    day_start = datetime.combine(day, time(), tzinfo=zone)
+    day_end = day_start + timedelta(days=1)
+    midnight = datetime.combine(day, time())
+
+    session = get_session()
+    try:
+        return session.query(CalendarEvent).filter(
+            CalendarEvent.user_id == user_id,
+            or_(
+                and_(
+                    CalendarEvent.is_all_day == False,
+                    CalendarEvent.start_time < _to_naive_utc(day_end),
+                    CalendarEvent.end_time > _to_naive_utc(day_start)
+                ),
+                and_(
+                    CalendarEvent.is_all_day == True,
+                    CalendarEvent.start_time <= midnight,
+                    CalendarEvent.end_time > midnight
+                )
+            )
+        ).order_by(CalendarEvent.is_all_day.desc(), CalendarEvent.start_time).all()
+    finally:
+        session.close()
+
+
+# ============ ОЧЕРЕДЬ ЗАПИСИ В КАЛЕНДАРЬ ============
+
+# Виды задач очереди
+CALENDAR_JOB_PUSH = "push"  # sync_user_tasks_to_calendar
+CALENDAR_JOB_EVENT = "event"  # одно событие для inbox item / задачи (quick action, дедлайн)
+
+
+def enqueue_calendar_job(
+    user_id: int,
+    kind: str,
+    job_key: str = "",
+    payload: dict = None,
+    session: Session = None
+):
+    """
+    Поставить задачу в очередь (в транзакции вызывающего, если передана session).
+
+    Задача с тем же (user_id, kind, job_key) склеивается: payload заменяется,
+    счётчик попыток сбрасывается, выполнение — как можно скорее.
+    """
+    now = datetime.utcnow()
+    stmt = sqlite_insert(CalendarJob.__table__).values(
+        user_id=user_id,
+        kind=kind,
+        job_key=job_key,
+        payload=json.dumps(payload) if payload is not None else None,
+        generation=1,
+        attempts=0,
+        next_run_at=now,
+        created_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "kind", "job_key"],
+        set_={
+            "payload": stmt.excluded.payload,
+            "generation": CalendarJob.__table__.c.generation + 1,
+            "attempts": 0,
+            "next_run_at": now,
+            "last_error": None,
+        }
+    )
+    with session_scope(session, get_session) as session:
+        session.execute(stmt)
+        commit_or_flush(session)
+
+
+def enqueue_tasks_push(user_id: int, session: Session = None):
+    """Задачи дня и inbox с дедлайнами → календарь (одна задача на пользователя)"""
+    enqueue_calendar_job(user_id, CALENDAR_JOB_PUSH, session=session)
+
+
+def enqueue_item_event(user_id: int, item_type: str, item_id: int, start: datetime, session: Session = None):
+    """Inbox item / задача → событие на start (повторная постановка переносит время)"""
+    enqueue_calendar_job(
+        user_id, CALENDAR_JOB_EVENT, f"{item_type}:{item_id}",
+        {"item_type": item_type, "item_id": item_id, "start": start.isoformat()},
+        session=session
+    )
+
+
+def claim_calendar_jobs(
+    limit: int,
+    lease: timedelta,
+    exclude_users=(),
+    now: datetime = None
+) -> list[CalendarJob]:
+    """
+    Взять в работу до limit готовых задач — не больше одной на пользователя.
+
+    Задачи арендуются до now + lease: после падения бота аренда истекает,
+    и задача выполняется снова.
+    """
+    now = now or datetime.utcnow()
+    session = get_session()
+    try:
+        due = session.query(CalendarJob).filter(
+            CalendarJob.next_run_at <= now,
+            or_(CalendarJob.locked_until.is_(None), CalendarJob.locked_until <= now)
+        ).order_by(CalendarJob.next_run_at, CalendarJob.id).all()
+
+        busy = set(exclude_users)
+        claimed = []
+        for job in due:
+            if job.user_id in busy:
+                continue
+            busy.add(job.user_id)
+            job.locked_until = now + lease
+            claimed.append(job)
+            if len(claimed) >= limit:
+                break
+
+        session.flush()
+        for job in claimed:
+            session.expunge(job)
+        session.commit()
+        return claimed
+    finally:
+        session.close()
+
+
+def complete_calendar_job(job_id: int, generation: int):
+    """Удалить выполненную задачу; если её успели поставить заново — снять аренду"""
+    session = get_session()
+    try:
+        deleted = session.execute(
+            delete(CalendarJob).where(CalendarJob.id == job_id, CalendarJob.generation == generation)
+        ).rowcount
+        if not deleted:
+            session.execute(update(CalendarJob).where(CalendarJob.id == job_id).values(locked_until=None))
+        session.commit()
+    finally:
+        session.close()
+
+
+def fail_calendar_job(job_id: int, generation: int, error: str, retry_at: datetime | None):
+    """
+    Записать неудачу: повтор в retry_at или удаление (retry_at=None — попытки исчерпаны).
+    Задача, поставленная заново во время выполнения, просто освобождается.
+    """
+    session = get_session()
+    try:
+        job = session.get(CalendarJob, job_id)
+        if job is None:
+            return
+        if job.generation != generation:
+            job.locked_until = None
+        elif retry_at is None:
+            session.delete(job)
+        else:
+            job.attempts = (job.attempts or 0) + 1
+            job.next_run_at = retry_at
+            job.locked_until = None
+            job.last_error = (error or "")[:1000]
+        session.commit()
+    finally:
+        session.close()
+
+
+def count_calendar_jobs() -> int:
+    """Размер очереди (для логов)"""
+    session = get_session()
+    try:
+        return session.query(CalendarJob).count()
+    finally:
+        session.close()
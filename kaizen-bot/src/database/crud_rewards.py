@@ -8,19 +8,27 @@ CRUD операции для системы наград (@whysasha методи
 - Анти-кортизол: празднуем победы, не стыдим за провалы
 """
 from datetime import datetime, date, timedelta
+from sqlalchemy.orm import Session
 from src.database.models import (
     RewardFund, RewardTransaction, RewardItem,
     User, DailyEntry, WeeklyReview,
-    get_session
+    get_session, session_scope, commit_or_flush
 )
+from src.database.identity_cache import identity_cache, FUND, USER
 
 
 # ============ REWARD FUND ============
 
-def get_or_create_reward_fund(user_id: int) -> RewardFund:
-    """Получить или создать фонд наград для пользователя"""
-    session = get_session()
-    try:
+def get_or_create_reward_fund(user_id: int, session: Session = None) -> RewardFund:
+    """Получить или создать фонд наград для пользователя (без сессии — через identity_cache)"""
+    if session is None:
+        fund = identity_cache.get((FUND, "user_id", user_id))
+        if fund is not None:
+            return fund
+
+    own_session = session is None
+    epoch = identity_cache.epoch
+    with session_scope(session, get_session) as session:
         fund = session.query(RewardFund).filter(
             RewardFund.user_id == user_id
         ).first()
@@ -28,18 +36,24 @@ def get_or_create_reward_fund(user_id: int) -> RewardFund:
         if not fund:
             fund = RewardFund(user_id=user_id)
             session.add(fund)
-            session.commit()
+            commit_or_flush(session)
             session.refresh(fund)
 
+        if own_session:
+            identity_cache.put(fund, epoch)
         return fund
-    finally:
-        session.close()
 
 
-def get_reward_fund_by_telegram_id(telegram_id: int) -> RewardFund | None:
+def get_reward_fund_by_telegram_id(telegram_id: int, session: Session = None) -> RewardFund | None:
     """Получить фонд наград по telegram_id"""
-    session = get_session()
-    try:
+    if session is None:
+        user = identity_cache.get((USER, "telegram_id", telegram_id))
+        if user is not None:
+            return get_or_create_reward_fund(user.id)
+
+    own_session = session is None
+    epoch = identity_cache.epoch
+    with session_scope(session, get_session) as session:
         user = session.query(User).filter(User.telegram_id == telegram_id).first()
         if not user:
             return None
@@ -51,23 +65,24 @@ def get_reward_fund_by_telegram_id(telegram_id: int) -> RewardFund | None:
         if not fund:
             fund = RewardFund(user_id=user.id)
             session.add(fund)
-            session.commit()
+            commit_or_flush(session)
             session.refresh(fund)
 
+        if own_session:
+            identity_cache.put(user, epoch)
+            identity_cache.put(fund, epoch)
         return fund
-    finally:
-        session.close()
 
 
-def get_reward_balance(user_id: int) -> int:
+def get_reward_balance(user_id: int, session: Session = None) -> int:
     """Получить текущий баланс"""
-    fund = get_or_create_reward_fund(user_id)
+    fund = get_or_create_reward_fund(user_id, session=session)
     return fund.balance if fund else 0
 
 
-def get_reward_balance_by_telegram_id(telegram_id: int) -> int:
+def get_reward_balance_by_telegram_id(telegram_id: int, session: Session = None) -> int:
     """Получить баланс по telegram_id"""
-    fund = get_reward_fund_by_telegram_id(telegram_id)
+    fund = get_reward_fund_by_telegram_id(telegram_id, session=session)
     return fund.balance if fund else 0
 
 
@@ -111,51 +126,97 @@ def toggle_penalties(user_id: int, enabled: bool) -> RewardFund:
 
 # ============ TRANSACTIONS ============
 
-def add_reward(
+def apply_rewards(
+    session: Session,
+    fund: RewardFund,
+    items: list[tuple[str, int, str | None]],
+    **links
+) -> list[RewardTransaction]:
+    """
+    Записать строки наград в открытую сессию: один INSERT (executemany) на все
+    транзакции и одна дельта баланса фонда. Коммит — на вызывающей стороне.
+    """
+    if not items:
+        return []
+
+    now = datetime.now()
+    session.execute(RewardTransaction.__table__.insert(), [
+        {
+            "fund_id": fund.id,
+            "amount": amount,
+            "transaction_type": transaction_type,
+            "description": description,
+            "created_at": now,
+            **links
+        }
+        for transaction_type, amount, description in items
+    ])
+
+    # Дельта выражением SQL: UPDATE ... SET balance = balance + :delta
+    delta = sum(amount for _, amount, _ in items)
+    fund.balance = RewardFund.balance + delta
+    fund.total_earned = RewardFund.total_earned + delta
+    session.flush()
+
+    # pysqlite не умеет RETURNING в executemany — читаем строки обратно.
+    # Транзакция уже держит блокировку записи, чужих вставок между нами нет
+    transactions = session.query(RewardTransaction).filter(
+        RewardTransaction.fund_id == fund.id
+    ).order_by(RewardTransaction.id.desc()).limit(len(items)).all()
+    return transactions[::-1]
+
+
+def add_rewards(
     user_id: int,
-    amount: int,
-    transaction_type: str,
-    description: str = None,
+    items: list[tuple[str, int, str | None]],
     daily_entry_id: int = None,
     weekly_review_id: int = None,
     reward_item_id: int = None,
-    inbox_item_id: int = None
-) -> RewardTransaction:
-    """Добавить награду в фонд"""
-    session = get_session()
-    try:
-        fund = session.query(RewardFund).filter(
-            RewardFund.user_id == user_id
-        ).first()
-
-        if not fund:
-            fund = RewardFund(user_id=user_id)
-            session.add(fund)
-            session.commit()
-            session.refresh(fund)
-
-        # Обновляем баланс
-        fund.balance += amount
-        fund.total_earned += amount
+    inbox_item_id: int = None,
+    session: Session = None
+) -> list[RewardTransaction]:
+    """
+    Начислить пачку наград одной транзакцией.
 
-        # Создаём транзакцию
-        transaction = RewardTransaction(
-            fund_id=fund.id,
-            amount=amount,
-            transaction_type=transaction_type,
-            description=description,
+    items: [(transaction_type, amount, description), ...]
+    Returns: созданные транзакции в порядке items
+    """
+    with session_scope(session, get_session) as session:
+        fund = get_or_create_reward_fund(user_id, session=session)
+        transactions = apply_rewards(
+            session, fund, items,
             daily_entry_id=daily_entry_id,
             weekly_review_id=weekly_review_id,
             reward_item_id=reward_item_id,
             inbox_item_id=inbox_item_id
         )
-        session.add(transaction)
-        session.commit()
-        session.refresh(transaction)
+        commit_or_flush(session)
+        for transaction in transactions:
+            session.refresh(transaction)
+        return transactions
 
-        return transaction
-    finally:
-        session.close()
+
+def add_reward(
+    user_id: int,
+    amount: int,
+    transaction_type: str,
+    description: str = None,
+    daily_entry_id: int = None,
+    weekly_review_id: int = None,
+    reward_item_id: int = None,
+    inbox_item_id: int = None,
+    session: Session = None
+) -> RewardTransaction:
+    """Добавить награду в фонд"""
+    return add_rewards(
+        user_id,
+        [(transaction_type, amount, description)],
+        daily_entry_id=daily_entry_id,
+        weekly_review_id=weekly_review_id,
+        reward_item_id=reward_item_id,
+        inbox_item_id=inbox_item_id,
+        session=session
+    )[0]
 
 
 def spend_reward(user_id: int, reward_item_id: int) -> tuple[bool, str, int]:
@@ -333,26 +394,27 @@ def delete_reward_item(item_id: int) -> bool:
 
 # ============ REWARD GRANTING LOGIC ============
 
-def grant_morning_kaizen_reward(user_id: int, daily_entry_id: int = None) -> int:
+def grant_morning_kaizen_reward(user_id: int, daily_entry_id: int = None,
+                                session: Session = None) -> int:
     """
     Начислить награду за утренний кайдзен.
     Returns: сумма награды
     """
-    fund = get_or_create_reward_fund(user_id)
-    if not fund or not fund.is_active:
-        return 0
+    with session_scope(session, get_session) as session:
+        fund = get_or_create_reward_fund(user_id, session=session)
+        if not fund or not fund.is_active:
+            return 0
 
-    amount = fund.rate_morning_kaizen
+        amount = fund.rate_morning_kaizen
 
-    add_reward(
-        user_id=user_id,
-        amount=amount,
-        transaction_type="morning_kaizen",
-        description="Утренний кайдзен завершён",
-        daily_entry_id=daily_entry_id
-    )
+        apply_rewards(
+            session, fund,
+            [("morning_kaizen", amount, "Утренний кайдзен завершён")],
+            daily_entry_id=daily_entry_id
+        )
+        commit_or_flush(session)
 
-    return amount
+        return amount
 
 
 def grant_evening_reflection_reward(
@@ -361,82 +423,52 @@ def grant_evening_reflection_reward(
     tasks_done: int = 0,
     priority_done: bool = False,
     exercised: bool = False,
-    ate_well: bool = False
+    ate_well: bool = False,
+    session: Session = None
 ) -> dict:
     """
     Начислить награды за вечернюю рефлексию.
+    Все строки — одной транзакцией (один INSERT, одна дельта баланса).
     Returns: breakdown словарь с детализацией
     """
-    fund = get_or_create_reward_fund(user_id)
-    if not fund or not fund.is_active:
-        return {"total": 0}
+    with session_scope(session, get_session) as session:
+        fund = get_or_create_reward_fund(user_id, session=session)
+        if not fund or not fund.is_active:
+            return {"total": 0}
 
-    breakdown = {}
-    total = 0
+        breakdown = {}
+        items = []
 
-    # Награда за вечернюю рефлексию
-    amount = fund.rate_evening_reflection
-    add_reward(
-        user_id=user_id,
-        amount=amount,
-        transaction_type="evening_reflection",
-        description="Вечерняя рефлексия завершена",
-        daily_entry_id=daily_entry_id
-    )
-    breakdown["evening"] = amount
-    total += amount
-
-    # Награда за каждую выполненную задачу
-    if tasks_done > 0:
-        tasks_amount = tasks_done * fund.rate_task_done
-        add_reward(
-            user_id=user_id,
-            amount=tasks_amount,
-            transaction_type="task_done",
-            description=f"Выполнено задач: {tasks_done}",
-            daily_entry_id=daily_entry_id
-        )
-        breakdown["tasks"] = tasks_amount
-        total += tasks_amount
-
-    # Бонус за приоритетную задачу
-    if priority_done:
-        add_reward(
-            user_id=user_id,
-            amount=fund.rate_priority_task_bonus,
-            transaction_type="priority_task",
-            description="Главная задача дня выполнена!",
-            daily_entry_id=daily_entry_id
-        )
-        breakdown["priority"] = fund.rate_priority_task_bonus
-        total += fund.rate_priority_task_bonus
-
-    # Награда за спорт
-    if exercised:
-        add_reward(
-            user_id=user_id,
-            amount=fund.rate_exercise,
-            transaction_type="exercise",
-            description="Тренировка выполнена",
-            daily_entry_id=daily_entry_id
-        )
-        breakdown["exercise"] = fund.rate_exercise
-        total += fund.rate_exercise
-
-    # Награда за питание
-    if ate_well:
-        add_reward(
-            user_id=user_id,
-            amount=fund.rate_eating_well,
-            transaction_type="eating_well",
-            description="Хорошее питание",
-            daily_entry_id=daily_entry_id
-        )
-        breakdown["eating"] = fund.rate_eating_well
-        total += fund.rate_eating_well
+        # Награда за вечернюю рефлексию
+        breakdown["evening"] = fund.rate_evening_reflection
+        items.append(("evening_reflection", fund.rate_evening_reflection, "Вечерняя рефлексия завершена"))
+
+        # Награда за каждую выполненную задачу
+        if tasks_done > 0:
+            tasks_amount = tasks_done * fund.rate_task_done
+            breakdown["tasks"] = tasks_amount
+            items.append(("task_done", tasks_amount, f"Выполнено задач: {tasks_done}"))
+
+        # Бонус за приоритетную задачу
+        if priority_done:
+            breakdown["priority"] = fund.rate_priority_task_bonus
+            items.append(("priority_task", fund.rate_priority_task_bonus, "Главная задача дня выполнена!"))
+
+        # Награда за спорт
+        if exercised:
+            breakdown["exercise"] = fund.rate_exercise
+            items.append(("exercise", fund.rate_exercise, "Тренировка выполнена"))
+
+        # Награда за питание
+        if ate_well:
+            breakdown["eating"] = fund.rate_eating_well
+            items.append(("eating_well", fund.rate_eating_well, "Хорошее питание"))
 
-    breakdown["total"] = total
-    return breakdown
+        apply_rewards(session, fund, items, daily_entry_id=daily_entry_id)
+        commit_or_flush(session)
+
+        breakdown["total"] = sum(amount for _, amount, _ in items)
+        return breakdown
 
 
 def grant_weekly_review_reward(user_id: int, weekly_review_id: int = None) -> int:
@@ -488,7 +520,8 @@ def grant_inbox_task_reward(
     user_id: int,
     inbox_item_id: int,
     time_estimate: str | None,
-    energy_level: str | None
+    energy_level: str | None,
+    session: Session = None
 ) -> dict:
     """
     Начислить награду за выполнение inbox задачи.
@@ -507,64 +540,64 @@ def grant_inbox_task_reward(
     """
     import math
 
-    fund = get_or_create_reward_fund(user_id)
-    if not fund or not fund.is_active:
-        return {
-            "base_amount": 0,
-            "energy_multiplier": 1.0,
-            "total": 0,
-            "description": "Фонд неактивен"
-        }
+    with session_scope(session, get_session) as session:
+        fund = get_or_create_reward_fund(user_id, session=session)
+        if not fund or not fund.is_active:
+            return {
+                "base_amount": 0,
+                "energy_multiplier": 1.0,
+                "total": 0,
+                "description": "Фонд неактивен"
+            }
 
-    # Базовая сумма по времени
-    time_rewards = {
-        "5min": 10,
-        "15min": 15,
-        "30min": 25,
-        "1hour": 40
-    }
-    base_amount = time_rewards.get(time_estimate, 15)
+        # Базовая сумма по времени
+        time_rewards = {
+            "5min": 10,
+            "15min": 15,
+            "30min": 25,
+            "1hour": 40
+        }
+        base_amount = time_rewards.get(time_estimate, 15)
 
-    # Множитель по энергии
-    energy_multipliers = {
-        "low": 1.0,
-        "medium": 1.5,
-        "high": 2.0
-    }
-    multiplier = energy_multipliers.get(energy_level, 1.0)
-
-    # Итоговая сумма (округление вверх)
-    total = math.ceil(base_amount * multiplier)
-
-    # Формирование description
-    parts = []
-    if time_estimate:
-        parts.append(f"{time_estimate} ({base_amount}₽)")
-    if energy_level and multiplier > 1.0:
-        energy_emoji = {
-            "high": "🔋🔋🔋",
-            "medium": "🔋🔋",
-            "low": "🔋"
+        # Множитель по энергии
+        energy_multipliers = {
+            "low": 1.0,
+            "medium": 1.5,
+            "high": 2.0
         }
-        parts.append(f"энергия {energy_emoji.get(energy_level, energy_level)} (×{multiplier})")
+        multiplier = energy_multipliers.get(energy_level, 1.0)
+
+        # Итоговая сумма (округление вверх)
+        total = math.ceil(base_amount * multiplier)
+
+        # Формирование description
+        parts = []
+        if time_estimate:
+            parts.append(f"{time_estimate} ({base_amount}₽)")
+        if energy_level and multiplier > 1.0:
+            energy_emoji = {
+                "high": "🔋🔋🔋",
+                "medium": "🔋🔋",
+                "low": "🔋"
+            }
+            parts.append(f"энергия {energy_emoji.get(energy_level, energy_level)} (×{multiplier})")
 
-    description = " × ".join(parts) if parts else "Inbox задача выполнена"
+        description = " × ".join(parts) if parts else "Inbox задача выполнена"
 
-    # Начисление награды
-    add_reward(
-        user_id=user_id,
-        amount=total,
-        transaction_type="inbox_task_done",
-        description=description,
-        inbox_item_id=inbox_item_id
-    )
+        # Начисление награды
+        apply_rewards(
+            session, fund,
+            [("inbox_task_done", total, description)],
+            inbox_item_id=inbox_item_id
+        )
+        commit_or_flush(session)
 
-    return {
-        "base_amount": base_amount,
-        "energy_multiplier": multiplier,
-        "total": total,
-        "description": description
-    }
+        return {
+            "base_amount": base_amount,
+            "energy_multiplier": multiplier,
+            "total": total,
+            "description": description
+        }
 
 
 def grant_streak_bonus(user_id: int, streak_days: int, streak_type: str) -> int:
@@ -5,11 +5,13 @@ CRUD операции для пользовательских задач с на
 При выполнении задачи начисляется награда в фонд наград.
 """
 from datetime import datetime, date
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
 from src.database.models import (
-    UserTask, UserTaskCompletion, User,
-    get_session
+    UserTask, UserTaskCompletion, User, InboxItem, DailyEntry,
+    get_session, session_scope, commit_or_flush
 )
-from src.database.crud_rewards import add_reward
+from src.database.crud_rewards import get_or_create_reward_fund, apply_rewards
 
 
 # ============ УПРАВЛЕНИЕ ЗАДАЧАМИ ============
@@ -96,6 +98,21 @@ def update_user_task(
         session.close()
 
 
+def update_user_task_event(task_id: int, event_id: str, calendar_time: datetime) -> UserTask | None:
+    """Связать задачу с событием Google Calendar"""
+    session = get_session()
+    try:
+        task = session.query(UserTask).filter(UserTask.id == task_id).first()
+        if task:
+            task.google_event_id = event_id
+            task.calendar_time = calendar_time
+            session.commit()
+            session.refresh(task)
+        return task
+    finally:
+        session.close()
+
+
 def delete_user_task(task_id: int) -> bool:
     """Удалить задачу (soft delete)"""
     session = get_session()
@@ -114,9 +131,10 @@ def delete_user_task(task_id: int) -> bool:
 
 # ============ ВЫПОЛНЕНИЕ ЗАДАЧ ============
 
-def complete_user_task(user_id: int, task_id: int) -> dict:
+def complete_user_task(user_id: int, task_id: int, session: Session = None) -> dict:
     """
     Отметить задачу как выполненную и начислить награду.
+    Награда, отметка о выполнении и архивация — одной транзакцией.
 
     Returns: {
         "success": bool,
@@ -125,8 +143,7 @@ def complete_user_task(user_id: int, task_id: int) -> dict:
         "balance": int
     }
     """
-    session = get_session()
-    try:
+    with session_scope(session, get_session) as session:
         task = session.query(UserTask).filter(
             UserTask.id == task_id,
             UserTask.user_id == user_id,
@@ -152,7 +169,7 @@ def complete_user_task(user_id: int, task_id: int) -> dict:
 
         # Для повторяющихся задач: проверить, не выполнена ли уже сегодня
         if task.is_recurring:
-            completions_today = get_task_completions_today(user_id, task_id)
+            completions_today = get_task_completions_today(user_id, task_id, session=session)
             if completions_today > 0:
                 return {
                     "success": False,
@@ -162,11 +179,10 @@ def complete_user_task(user_id: int, task_id: int) -> dict:
                 }
 
         # Начислить награду
-        reward_transaction = add_reward(
-            user_id=user_id,
-            amount=task.reward_amount,
-            transaction_type="user_task_done",
-            description=f"Задача: {task.name}"
+        fund = get_or_create_reward_fund(user_id, session=session)
+        reward_transaction, = apply_rewards(
+            session, fund,
+            [("user_task_done", task.reward_amount, f"Задача: {task.name}")]
         )
 
         # Создать запись о выполнении
@@ -181,44 +197,27 @@ def complete_user_task(user_id: int, task_id: int) -> dict:
             task.completed_once = True
             task.is_active = False
 
-        session.commit()
-        session.refresh(completion)
-
-        # Получить новый баланс
-        from src.database.crud_rewards import get_reward_balance
-        new_balance = get_reward_balance(user_id)
+        commit_or_flush(session)
+        session.refresh(fund)
 
         return {
             "success": True,
             "message": f"Отлично! +{task.reward_amount}₽ за {task.name}",
             "reward": task.reward_amount,
-            "balance": new_balance
+            "balance": fund.balance
         }
-    finally:
-        session.close()
 
 
-def get_task_completions_today(user_id: int, task_id: int) -> int:
-    """Подсчёт выполнений задачи за сегодня"""
-    session = get_session()
-    try:
-        task = session.query(UserTask).filter(
-            UserTask.id == task_id,
-            UserTask.user_id == user_id
-        ).first()
-
-        if not task:
-            return 0
-
-        today = date.today()
-        count = session.query(UserTaskCompletion).filter(
+def get_task_completions_today(user_id: int, task_id: int, session: Session = None) -> int:
+    """Подсчёт выполнений задачи за сегодня (0, если задача не пользователя)"""
+    with session_scope(session, get_session) as session:
+        return session.query(func.count(UserTaskCompletion.id)).join(
+            UserTask, UserTask.id == UserTaskCompletion.task_id
+        ).filter(
             UserTaskCompletion.task_id == task_id,
-            UserTaskCompletion.completion_date == today
-        ).count()
-
-        return count
-    finally:
-        session.close()
+            UserTaskCompletion.completion_date == date.today(),
+            UserTask.user_id == user_id
+        ).scalar()
 
 
 def get_task_history(task_id: int, limit: int = 10) -> list[UserTaskCompletion]:
@@ -245,39 +244,83 @@ def get_user_stats_today(user_id: int) -> dict:
     """
     session = get_session()
     try:
-        today = date.today()
-
-        # Получить все задачи пользователя
-        tasks = session.query(UserTask).filter(
-            UserTask.user_id == user_id
-        ).all()
-
-        task_ids = [t.id for t in tasks]
-
-        if not task_ids:
-            return {
-                "tasks_completed": 0,
-                "total_earned": 0
-            }
-
-        # Получить выполнения за сегодня
-        completions = session.query(UserTaskCompletion).filter(
-            UserTaskCompletion.task_id.in_(task_ids),
-            UserTaskCompletion.completion_date == today
-        ).all()
-
-        # Подсчитать заработанное
-        total_earned = 0
-        for completion in completions:
-            task = session.query(UserTask).filter(
-                UserTask.id == completion.task_id
-            ).first()
-            if task:
-                total_earned += task.reward_amount
+        tasks_completed, total_earned = session.query(
+            func.count(UserTaskCompletion.id),
+            func.coalesce(func.sum(UserTask.reward_amount), 0)
+        ).join(
+            UserTask, UserTask.id == UserTaskCompletion.task_id
+        ).filter(
+            UserTask.user_id == user_id,
+            UserTaskCompletion.completion_date == date.today()
+        ).one()
 
         return {
-            "tasks_completed": len(completions),
+            "tasks_completed": tasks_completed,
             "total_earned": total_earned
         }
     finally:
         session.close()
+
+
+def get_tasks_view(user_id: int, filter_type: str = "all", session: Session = None) -> dict:
+    """
+    Всё для экрана /tasks за три запроса: задачи с выполнениями за сегодня
+    (одним GROUP BY), pending inbox и сегодняшний DailyEntry.
+
+    Args:
+        user_id: ID пользователя
+        filter_type: "all" | "user_tasks" | "inbox" | "daily"
+
+    Returns: {
+        "user_tasks": list[UserTask] (активные),
+        "completions_today": {task_id: int},
+        "stats_today": {"tasks_completed": int, "total_earned": int},
+        "inbox_tasks": list[InboxItem],
+        "daily_entry": DailyEntry | None
+    }
+    """
+    today = date.today()
+    with session_scope(session, get_session) as session:
+        # Активные задачи + задачи, выполненные сегодня (одноразовые после выполнения
+        # архивируются, но их награда входит в статистику дня)
+        rows = session.query(
+            UserTask, func.count(UserTaskCompletion.id)
+        ).outerjoin(
+            UserTaskCompletion, and_(
+                UserTaskCompletion.task_id == UserTask.id,
+                UserTaskCompletion.completion_date == today
+            )
+        ).filter(
+            UserTask.user_id == user_id,
+            or_(UserTask.is_active == True, UserTaskCompletion.id.isnot(None))
+        ).group_by(UserTask.id).order_by(UserTask.id).all()
+
+        result = {
+            "user_tasks": [],
+            "completions_today": {},
+            "stats_today": {"tasks_completed": 0, "total_earned": 0},
+            "inbox_tasks": [],
+            "daily_entry": None
+        }
+
+        for task, count in rows:
+            result["stats_today"]["tasks_completed"] += count
+            result["stats_today"]["total_earned"] += count * (task.reward_amount or 0)
+            if task.is_active and filter_type in ["all", "user_tasks"]:
+                result["user_tasks"].append(task)
+                result["completions_today"][task.id] = count
+
+        if filter_type in ["all", "inbox"]:
+            result["inbox_tasks"] = session.query(InboxItem).filter(
+                InboxItem.user_id == user_id,
+                InboxItem.status == "pending"
+            ).all()
+
+        if filter_type in ["all", "daily"]:
+            result["daily_entry"] = session.query(DailyEntry).filter(
+                DailyEntry.user_id == user_id,
+                DailyEntry.entry_date == today,
+                DailyEntry.morning_completed == True
+            ).first()
+
+        return result
@@ -0,0 +1,199 @@
+"""
+FSM storage aiogram поверх SQLite (таблица fsm_states)
+
+В отличие от MemoryStorage, незавершённые диалоги (утренний кайдзен, вечерняя
+рефлексия, weekly review, оценка принципов) переживают перезапуск и деплой,
+а несколько процессов бота видят одно и то же состояние.
+
+Чтобы хэндлеры не ждали SQLite на каждом set_state / update_data:
+- чтения идут из кэша (LRU на FSM_CACHE_SIZE ключей, запись доверяется FSM_CACHE_TTL);
+- запись — write-behind: ключ помечается изменённым, а фоновая задача раз в
+  FSM_FLUSH_INTERVAL пишет все изменённые ключи одной транзакцией
+  (несколько изменений одного ключа за интервал склеиваются в одну строку);
+- close() (shutdown диспетчера) сбрасывает всё несохранённое.
+
+Несколько процессов: FSM_CACHE_TTL=0 (всегда читать из БД) и небольшой
+FSM_FLUSH_INTERVAL; FSM_FLUSH_INTERVAL=0 — запись сразу, без write-behind.
+Данные хранятся в JSON: ключи словарей — строки, значения — JSON-типы.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.config import FSM_FLUSH_INTERVAL, FSM_CACHE_TTL, FSM_CACHE_SIZE
+from src.database.models import FsmState, async_engine
+
+
+def storage_key(key: StorageKey) -> str:
+    """Строковый ключ fsm_states.key"""
+    thread_id = "" if key.thread_id is None else key.thread_id
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{thread_id}:{key.destiny}"
+
+
+class _Entry:
+    """Закэшированное состояние ключа"""
+    __slots__ = ("state", "data", "loaded_at")
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], loaded_at: float):
+        self.state = state
+        self.data = data
+        self.loaded_at = loaded_at
+
+
+class SQLiteStorage(BaseStorage):
+    """BaseStorage на таблице fsm_states с кэшем и отложенной записью"""
+
+    def __init__(
+        self,
+        engine=None,
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        cache_ttl: float = FSM_CACHE_TTL,
+        cache_size: int = FSM_CACHE_SIZE,
+        clock=time.monotonic
+    ):
+        self.engine = engine if engine is not None else async_engine
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.clock = clock
+
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    # === BaseStorage ===
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._entry(key)
+        entry.state = state.state if isinstance(state, State) else state
+        await self._mark_dirty(storage_key(key))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._entry(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        entry = await self._entry(key)
+        entry.data = data.copy()
+        await self._mark_dirty(storage_key(key))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._entry(key)).data.copy()
+
+    async def close(self) -> None:
+        """Сбросить несохранённые изменения (вызывается на shutdown диспетчера)"""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    # === Кэш ===
+
+    async def _entry(self, key: StorageKey) -> _Entry:
+        """Состояние ключа из кэша; из БД — если его нет в кэше или запись устарела"""
+        str_key = storage_key(key)
+        entry = self._cache.get(str_key)
+        if entry is not None and (
+            str_key in self._dirty or self.clock() - entry.loaded_at < self.cache_ttl
+        ):
+            self._cache.move_to_end(str_key)
+            return entry
+
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(
+                select(FsmState.state, FsmState.data).where(FsmState.key == str_key)
+            )).first()
+
+        # Пока шёл запрос, ключ мог измениться локально — локальное новее
+        entry = self._cache.get(str_key)
+        if entry is not None and str_key in self._dirty:
+            return entry
+
+        state, data = (row.state, json.loads(row.data) if row.data else {}) if row else (None, {})
+        entry = _Entry(state, data, self.clock())
+        self._cache[str_key] = entry
+        self._cache.move_to_end(str_key)
+        self._evict(keep=str_key)
+        return entry
+
+    def _evict(self, keep: str = None):
+        """Выкинуть самые старые ключи сверх cache_size (несохранённые и keep не трогаем)"""
+        if len(self._cache) <= self.cache_size:
+            return
+        for str_key in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if str_key not in self._dirty and str_key != keep:
+                del self._cache[str_key]
+
+    # === Запись ===
+
+    async def _mark_dirty(self, str_key: str):
+        self._dirty.add(str_key)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Записать изменённые ключи одной транзакцией. Returns: сколько ключей записано"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            pending = {str_key: self._cache[str_key] for str_key in self._dirty}
+            self._dirty.clear()
+
+            now = datetime.utcnow()
+            upserts, deletes = [], []
+            for str_key, entry in pending.items():
+                if entry.state is None and not entry.data:
+                    deletes.append(str_key)
+                else:
+                    upserts.append({
+                        "key": str_key,
+                        "state": entry.state,
+                        "data": json.dumps(entry.data, ensure_ascii=False),
+                        "updated_at": now,
+                    })
+
+            try:
+                async with self.engine.begin() as conn:
+                    if upserts:
+                        stmt = sqlite_insert(FsmState)
+                        await conn.execute(stmt.on_conflict_do_update(
+                            index_elements=[FsmState.key],
+                            set_={
+                                "state": stmt.excluded.state,
+                                "data": stmt.excluded.data,
+                                "updated_at": stmt.excluded.updated_at,
+                            }
+                        ), upserts)
+                    if deletes:
+                        await conn.execute(delete(FsmState).where(FsmState.key.in_(deletes)))
+            except Exception as e:
+                # Ключи остаются изменёнными: повторим через интервал (или на close)
+                print(f"FSM storage flush error: {e}")
+                self._dirty.update(pending)
+                if self.flush_interval > 0:
+                    self._flush_task = asyncio.create_task(self._flush_later())
+                return 0
+
+            loaded_at = self.clock()
+            for entry in pending.values():
+                entry.loaded_at = loaded_at
+            self._evict()
+            return len(pending)
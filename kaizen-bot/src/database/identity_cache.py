@@ -0,0 +1,162 @@
+"""
+Кэш горячих объектов: User и RewardFund.
+
+Почти каждый хэндлер начинается с get_user_by_telegram_id / get_or_create_user,
+а пути наград по несколько раз за апдейт читают фонд. Кэш хранит снимки
+(значения колонок) и на каждое попадание собирает новый detached-объект —
+вызывающие не делят один экземпляр и не видят чужих изменений.
+
+- LRU + TTL: не больше max_size ключей, снимок живёт ttl секунд
+  (верхняя граница устаревания для записей из других процессов);
+- ключи: пользователь по telegram_id и по id, фонд по user_id;
+- инвалидация write-through: любой flush сессии, изменивший / удаливший User
+  или RewardFund (update_user_settings, update_user_google_token,
+  update_reward_rates, toggle_penalties, начисления и списания, правки
+  из хэндлеров), выкидывает их ключи — сразу и ещё раз после коммита;
+- счётчики hits / misses по типу объекта (stats(), админская /cache).
+
+Кэш используется только без внешней сессии: внутри unit of work вызывающему
+нужен объект, привязанный к его сессии.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from src.config import IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL
+from src.database.models import User, RewardFund
+
+USER, FUND = "user", "fund"
+
+
+def user_keys(user) -> list[tuple]:
+    return [(USER, "id", user.id), (USER, "telegram_id", user.telegram_id)]
+
+
+def fund_keys(fund) -> list[tuple]:
+    return [(FUND, "user_id", fund.user_id)]
+
+
+def _snapshot(obj) -> tuple:
+    mapper = inspect(type(obj))
+    return type(obj), {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
+
+def _restore(snapshot: tuple):
+    """Новый detached-объект из снимка (как будто загружен и сессия закрыта)"""
+    cls, values = snapshot
+    obj = cls(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+class IdentityCache:
+    """LRU + TTL кэш снимков ORM-объектов; потокобезопасный"""
+
+    def __init__(self, max_size: int = IDENTITY_CACHE_SIZE, ttl: float = IDENTITY_CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = {USER: 0, FUND: 0}
+        self.misses = {USER: 0, FUND: 0}
+        # key -> (expires_at, snapshot)
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        # Растёт при каждой инвалидации: чтение, начатое до неё, не кладёт снимок в кэш
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def get(self, key: tuple):
+        """Detached-объект по ключу или None (нет, устарел)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses[key[0]] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[key[0]] += 1
+            snapshot = entry[1]
+        return _restore(snapshot)
+
+    def put(self, obj, epoch: int = None):
+        """Запомнить объект под всеми его ключами (epoch — значение до чтения из БД)"""
+        if obj is None:
+            return
+        keys = user_keys(obj) if isinstance(obj, User) else fund_keys(obj)
+        snapshot = _snapshot(obj)
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            expires_at = self.clock() + self.ttl
+            for key in keys:
+                self._entries[key] = (expires_at, snapshot)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """{"user" / "fund": {"hits", "misses"}}"""
+        with self._lock:
+            return {kind: {"hits": self.hits[kind], "misses": self.misses[kind]} for kind in self.hits}
+
+
+# Один кэш на процесс
+identity_cache = IdentityCache()
+
+
+# === Write-through инвалидация по событиям сессии ===
+
+_PENDING = "identity_cache_keys"
+
+
+def _changed_keys(session: Session) -> list[tuple]:
+    keys = []
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            keys += user_keys(obj)
+        elif isinstance(obj, RewardFund):
+            keys += fund_keys(obj)
+    return keys
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_on_flush(session, flush_context, instances):
+    keys = _changed_keys(session)
+    if keys:
+        identity_cache.invalidate(keys)
+        session.info.setdefault(_PENDING, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # Повторно после коммита: чтение между flush и commit могло положить старый снимок
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        identity_cache.invalidate(keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):
+    session.info.pop(_PENDING, None)
@@ -1,7 +1,17 @@
-from datetime import datetime, date
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, create_engine
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from src.config import DATABASE_PATH
+from contextlib import contextmanager
+from datetime import datetime, date, timezone
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Index, create_engine, event
+from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.config import (
+    DATABASE_PATH,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_TEMP_STORE,
+    SQLITE_BUSY_TIMEOUT
+)
 
 Base = declarative_base()
 
@@ -32,6 +42,7 @@ class User(Base):
     quiet_hours_start = Column(Integer, default=23)  # Начало тихих часов (0-23)
     quiet_hours_end = Column(Integer, default=7)  # Конец тихих часов (0-23)
     event_reminders_enabled = Column(Boolean, default=True)  # Напоминания о событиях включены
+    event_exclusions = Column(Text)  # Свои слова-исключения для follow-up, через запятую
 
     # Настройки напоминаний о задачах дня
     task_reminders_enabled = Column(Boolean, default=True)
@@ -53,6 +64,9 @@ class User(Base):
 class DailyEntry(Base):
     """Ежедневная запись (утро + вечер)"""
     __tablename__ = "daily_entries"
+    __table_args__ = (
+        Index("ix_daily_entries_user_date", "user_id", "entry_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -90,6 +104,7 @@ class DailyEntry(Base):
     task_2_event_id = Column(String(255))  # ID события для task_2
     task_3_event_id = Column(String(255))  # ID события для task_3
     priority_event_id = Column(String(255))  # ID события для приоритетной задачи
+    calendar_deleted_tasks = Column(String(20))  # "1,3" — события задач удалены в календаре, не создавать снова
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -97,6 +112,32 @@ class DailyEntry(Base):
     user = relationship("User", back_populates="daily_entries")
 
 
+class UserStatsDaily(Base):
+    """
+    Дневной rollup статистики: одна строка на (пользователь, день), уже посчитанная
+    из DailyEntry при каждом flush (src/database/stats_rollup.py).
+    /stats, привычки и еженедельный отчёт читают её вместо сырых записей.
+    """
+    __tablename__ = "user_stats_daily"
+    __table_args__ = (
+        Index("ix_user_stats_daily_date", "stat_date"),  # воскресный отчёт по всем пользователям
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    stat_date = Column(Date, primary_key=True)
+
+    morning_completed = Column(Integer, nullable=False, default=0)
+    evening_completed = Column(Integer, nullable=False, default=0)
+    tasks_planned = Column(Integer, nullable=False, default=0)  # задачи дня с текстом (0-3)
+    tasks_done = Column(Integer, nullable=False, default=0)
+    priority_set = Column(Integer, nullable=False, default=0)
+    priority_done = Column(Integer, nullable=False, default=0)
+    exercised = Column(Integer, nullable=False, default=0)
+    ate_well = Column(Integer, nullable=False, default=0)
+    wake_minutes = Column(Integer)  # wake_time / sleep_time в минутах с полуночи
+    sleep_minutes = Column(Integer)
+
+
 class Goal(Base):
     """Цели пользователя"""
     __tablename__ = "goals"
@@ -115,6 +156,9 @@ class Goal(Base):
 class Report(Base):
     """Баги, идеи и предложения по улучшению"""
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_created", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -129,6 +173,9 @@ class Report(Base):
 class InboxItem(Base):
     """GTD Inbox - быстрый сбор задач и мыслей"""
     __tablename__ = "inbox_items"
+    __table_args__ = (
+        Index("ix_inbox_items_user_status_created", "user_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -152,9 +199,24 @@ class InboxItem(Base):
     user = relationship("User", back_populates="inbox_items")
 
 
+class InboxCounter(Base):
+    """
+    Количество pending-задач inbox пользователя, поддерживается при каждом
+    изменении статуса (crud.inbox_pending_delta) — без COUNT по inbox_items;
+    строки нет (старые данные) — crud.inbox_pending_recount создаёт её по COUNT.
+    """
+    __tablename__ = "inbox_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    pending = Column(Integer, nullable=False, default=0)
+
+
 class SomedayMaybe(Base):
     """Список 'Когда-нибудь/может быть' (GTD)"""
     __tablename__ = "someday_maybe"
+    __table_args__ = (
+        Index("ix_someday_maybe_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -236,6 +298,9 @@ class RewardFund(Base):
 class RewardTransaction(Base):
     """История транзакций фонда наград"""
     __tablename__ = "reward_transactions"
+    __table_args__ = (
+        Index("ix_reward_transactions_fund_created", "fund_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     fund_id = Column(Integer, ForeignKey("reward_funds.id"), nullable=False)
@@ -348,6 +413,9 @@ class PrincipleRating(Base):
 class ImportantDate(Base):
     """Важные даты (дни рождения, годовщины)"""
     __tablename__ = "important_dates"
+    __table_args__ = (
+        Index("ix_important_dates_month_day_active", "month", "day", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -428,6 +496,9 @@ class UserTask(Base):
 class UserTaskCompletion(Base):
     """История выполнений пользовательских задач"""
     __tablename__ = "user_task_completions"
+    __table_args__ = (
+        Index("ix_user_task_completions_task_date", "task_id", "completion_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey("user_tasks.id"), nullable=False)
@@ -448,6 +519,11 @@ class UserTaskCompletion(Base):
 class CalendarEventReminder(Base):
     """Отслеживание напоминаний о событиях и follow-up"""
     __tablename__ = "calendar_event_reminders"
+    __table_args__ = (
+        # Уникальный: upsert строк тика по (user_id, google_event_id)
+        Index("ux_calendar_event_reminders_user_event", "user_id", "google_event_id", unique=True),
+        Index("ix_calendar_event_reminders_event_end", "event_end"),  # очистка старых
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -496,10 +572,149 @@ class HabitCalendarEvent(Base):
     user = relationship("User")
 
 
+# ============ ЗЕРКАЛО GOOGLE CALENDAR ============
+
+class CalendarEvent(Base):
+    """
+    Локальное зеркало событий Google Calendar.
+    Поддерживается инкрементальной синхронизацией (syncToken); напоминания,
+    follow-up, события дня и цвета привычек читаются отсюда, а не из API.
+    """
+    __tablename__ = "calendar_events"
+    __table_args__ = (
+        Index("ux_calendar_events_user_event", "user_id", "google_event_id", unique=True),
+        Index("ix_calendar_events_user_start", "user_id", "start_time"),
+        Index("ix_calendar_events_user_end", "user_id", "end_time"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    google_event_id = Column(String(255), nullable=False)
+    recurring_event_id = Column(String(255))  # ID серии для экземпляров повторяющихся событий
+    summary = Column(String(500))
+    color_id = Column(String(10))
+
+    # Время в UTC без tzinfo; для событий на весь день — даты в 00:00
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    is_all_day = Column(Boolean, default=False)
+
+    updated_at = Column(DateTime)  # event.updated из Google (UTC)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User")
+
+    def to_event_dict(self, zone=timezone.utc) -> dict:
+        """Событие в формате Google API (время — в таймзоне zone) для общих обработчиков"""
+        if self.is_all_day:
+            start = {'date': self.start_time.date().isoformat()}
+            end = {'date': self.end_time.date().isoformat()}
+        else:
+            start = {'dateTime': self.start_time.replace(tzinfo=timezone.utc).astimezone(zone).isoformat()}
+            end = {'dateTime': self.end_time.replace(tzinfo=timezone.utc).astimezone(zone).isoformat()}
+        return {
+            'id': self.google_event_id,
+            'summary': self.summary or '',
+            'colorId': self.color_id,
+            'recurringEventId': self.recurring_event_id,
+            'start': start,
+            'end': end,
+        }
+
+
+class CalendarSyncState(Base):
+    """Состояние инкрементальной синхронизации календаря пользователя"""
+    __tablename__ = "calendar_sync_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    calendar_id = Column(String(255))  # При смене календаря — полная синхронизация
+    sync_token = Column(Text)  # nextSyncToken последней выборки
+    last_synced_at = Column(DateTime)
+    last_full_sync_at = Column(DateTime)
+    last_reconciled_at = Column(DateTime)  # updatedMin следующей сверки событий бота
+
+
+class CalendarJob(Base):
+    """
+    Задача очереди записи в Google Calendar (переживает перезапуск бота).
+
+    Одна строка на (user_id, kind, job_key): повторная постановка не плодит дубли,
+    а обновляет payload и generation — воркер, выполнявший старую версию,
+    увидит смену generation и не удалит задачу.
+    """
+    __tablename__ = "calendar_jobs"
+    __table_args__ = (
+        Index("ux_calendar_jobs_user_kind_key", "user_id", "kind", "job_key", unique=True),
+        Index("ix_calendar_jobs_next_run", "next_run_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(20), nullable=False)  # push / event
+    job_key = Column(String(50), nullable=False, default="")  # ключ склейки внутри kind
+    payload = Column(Text)  # JSON
+
+    generation = Column(Integer, default=1)  # +1 при каждой повторной постановке
+    attempts = Column(Integer, default=0)
+    next_run_at = Column(DateTime, nullable=False)  # UTC
+    locked_until = Column(DateTime)  # аренда воркера (UTC); просроченная — задачу можно взять снова
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FsmState(Base):
+    """
+    Состояние FSM aiogram (SQLiteStorage): незавершённые диалоги переживают
+    перезапуск бота и видны всем его процессам.
+    Пустое состояние без данных не хранится — строка удаляется.
+    """
+    __tablename__ = "fsm_states"
+
+    key = Column(String(100), primary_key=True)  # bot:chat:user:thread:destiny
+    state = Column(String(100))  # например "MorningStates:wake_time"
+    data = Column(Text)  # JSON
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# Профиль PRAGMA для каждого соединения (настраивается через .env)
+# WAL + synchronous=NORMAL: коммит не делает полный fsync и не блокирует читателей
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    "synchronous": SQLITE_SYNCHRONOUS,
+    "mmap_size": SQLITE_MMAP_SIZE,
+    "cache_size": SQLITE_CACHE_SIZE,
+    "temp_store": SQLITE_TEMP_STORE,
+    "busy_timeout": SQLITE_BUSY_TIMEOUT,
+}
+
+
+def apply_sqlite_pragmas(target_engine, pragmas: dict = None):
+    """Повесить на движок connect-событие, выставляющее PRAGMA"""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    # Для AsyncEngine события вешаются на sync_engine
+    sync_engine = getattr(target_engine, "sync_engine", target_engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value not in (None, ""):
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
 # Создание движка и сессии
 engine = create_engine(f"sqlite:///{DATABASE_PATH}", echo=False)
+apply_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(bind=engine)
 
+# Асинхронный движок (aiosqlite) для handlers и scheduler jobs —
+# не блокирует event loop aiogram на время запроса к SQLite
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_PATH}", echo=False)
+apply_sqlite_pragmas(async_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 
 def _get_column_type_sql(column):
     """Получить SQL тип колонки для ALTER TABLE"""
@@ -549,6 +764,76 @@ def _auto_migrate():
                 conn.commit()
 
 
+def _create_missing_indexes():
+    """Создать индексы, объявленные в моделях, на уже существующих таблицах.
+
+    create_all() пропускает существующие таблицы целиком, вместе с их индексами,
+    поэтому новые индексы для старой БД создаём отдельно.
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+
+    for table_name, table in Base.metadata.tables.items():
+        if not inspector.has_table(table_name):
+            continue
+
+        existing_indexes = {idx['name'] for idx in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                print(f"[AUTO-MIGRATE] Added index: {index.name} on {table_name}")
+
+
+def _dedupe_calendar_event_reminders():
+    """
+    Убрать дубли (user_id, google_event_id) перед созданием уникального индекса:
+    старый код мог создать несколько строк на событие. Остаётся самая ранняя.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    if not inspector.has_table("calendar_event_reminders"):
+        return
+    if "ux_calendar_event_reminders_user_event" in {idx['name'] for idx in inspector.get_indexes("calendar_event_reminders")}:
+        return
+
+    with engine.connect() as conn:
+        deleted = conn.execute(text(
+            "DELETE FROM calendar_event_reminders WHERE id NOT IN ("
+            "SELECT MIN(id) FROM calendar_event_reminders GROUP BY user_id, google_event_id)"
+        )).rowcount
+        conn.commit()
+    if deleted:
+        print(f"[AUTO-MIGRATE] Removed {deleted} duplicate calendar_event_reminders rows")
+
+
+def _seed_inbox_counters():
+    """Счётчики inbox для пользователей, у которых их ещё нет (идемпотентно)"""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        seeded = conn.execute(text(
+            "INSERT INTO inbox_counters (user_id, pending) "
+            "SELECT user_id, COUNT(*) FROM inbox_items WHERE status = 'pending' GROUP BY user_id "
+            "ON CONFLICT (user_id) DO NOTHING"
+        )).rowcount
+        conn.commit()
+    if seeded:
+        print(f"[AUTO-MIGRATE] Seeded inbox counters for {seeded} users")
+
+
+def _seed_stats_daily():
+    """Заполнить rollup статистики при первом запуске, если он пуст, а записи есть"""
+    from src.database.stats_rollup import backfill_stats_daily
+
+    with engine.connect() as conn:
+        has_rollup = conn.exec_driver_sql("SELECT 1 FROM user_stats_daily LIMIT 1").first()
+        has_entries = conn.exec_driver_sql("SELECT 1 FROM daily_entries LIMIT 1").first()
+    if has_entries and not has_rollup:
+        print(f"[AUTO-MIGRATE] Backfilled user_stats_daily: {backfill_stats_daily()} days")
+
+
 def init_db():
     """Инициализация базы данных с автомиграцией"""
     DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -556,9 +841,13 @@ def init_db():
     # Сначала добавляем новые колонки в существующие таблицы
     if DATABASE_PATH.exists():
         _auto_migrate()
+        _dedupe_calendar_event_reminders()
+        _create_missing_indexes()
 
     # Затем создаём новые таблицы
     Base.metadata.create_all(engine)
+    _seed_inbox_counters()
+    _seed_stats_daily()
 
     # Инициализация 25 принципов жизни
     from src.database.crud_principles import init_default_principles
@@ -568,3 +857,51 @@ def init_db():
 def get_session():
     """Получение сессии БД"""
     return SessionLocal()
+
+
+@contextmanager
+def session_scope(session: Session = None, factory=None):
+    """
+    Сессия для CRUD-функции.
+
+    Если передана внешняя сессия (unit of work на апдейт из DbSessionMiddleware) —
+    работаем в ней и не закрываем. Иначе открываем свою через factory
+    (модульный get_session) и закрываем на выходе.
+    """
+    if session is not None:
+        yield session
+        return
+
+    session = (factory or get_session)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def commit_or_flush(session: Session):
+    """commit() для своей сессии, flush() внутри unit of work (коммит один — в конце апдейта)"""
+    if session.info.get("unit_of_work"):
+        session.flush()
+    else:
+        session.commit()
+
+
+def end_unit_of_work(session: Session = None):
+    """
+    Зафиксировать unit of work апдейта до первого сетевого await хэндлера.
+
+    Коммит здесь, а не в middleware после ответа: блокировка записи SQLite
+    не держится, пока хэндлер ждёт Telegram. Дальше сессия работает как
+    обычная — каждая запись коммитится сразу (commit_or_flush).
+    Без unit of work (session=None) CRUD уже закоммитил сам — ничего не делаем.
+    """
+    if session is None or not session.info.get("unit_of_work"):
+        return
+    session.commit()
+    session.info["unit_of_work"] = False
+
+
+def get_async_session():
+    """Получение асинхронной сессии БД (использовать через async with)"""
+    return AsyncSessionLocal()
@@ -0,0 +1,78 @@
+"""
+Keyset-пагинация списков по (created_at, id), новые сверху.
+
+Вместо «загрузить всё и нарезать» страница — один запрос с LIMIT от курсора,
+поэтому её стоимость не зависит от длины списка. Курсор — короткая строка
+для callback_data (лимит Telegram — 64 байта):
+
+    a<микросекунды>_<id>  — строки старше (следующая страница)
+    b<микросекунды>_<id>  — строки новее (предыдущая страница)
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import tuple_
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+AFTER, BEFORE = "a", "b"
+
+
+class Page(NamedTuple):
+    """Страница списка: элементы, общее количество и курсоры соседних страниц"""
+    items: list
+    total: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def encode_cursor(direction: str, created_at: datetime, item_id: int) -> str:
+    return f"{direction}{(created_at - _EPOCH) // _MICROSECOND}_{item_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[str, datetime, int]:
+    """(направление, created_at, id); ValueError для битого курсора"""
+    direction, body = cursor[:1], cursor[1:]
+    if direction not in (AFTER, BEFORE):
+        raise ValueError(f"Unknown cursor direction: {cursor!r}")
+    micros, item_id = body.split("_")
+    return direction, _EPOCH + int(micros) * _MICROSECOND, int(item_id)
+
+
+def keyset_page(query, model, total: int, cursor: str = None, limit: int = 5) -> Page:
+    """
+    Страница ORM-запроса query (уже с фильтрами) по model.created_at, model.id.
+    Берётся limit + 1 строк: лишняя показывает, есть ли страница дальше.
+    Битый курсор (например, номер страницы из кнопок до keyset) — первая страница.
+    """
+    key = tuple_(model.created_at, model.id)
+    direction = AFTER
+    if cursor:
+        try:
+            direction, created_at, item_id = decode_cursor(cursor)
+        except ValueError:
+            direction, cursor = AFTER, None
+    if cursor:
+        bound = tuple_(created_at, item_id)
+        query = query.filter(key < bound if direction == AFTER else key > bound)
+
+    if direction == AFTER:
+        rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        has_newer, has_older = cursor is not None, len(rows) > limit
+        items = rows[:limit]
+    else:
+        rows = query.order_by(model.created_at.asc(), model.id.asc()).limit(limit + 1).all()
+        has_newer, has_older = len(rows) > limit, True
+        items = list(reversed(rows[:limit]))
+
+    if not items:
+        return Page([], total)
+    first, last = items[0], items[-1]
+    return Page(
+        items,
+        total,
+        next_cursor=encode_cursor(AFTER, last.created_at, last.id) if has_older else None,
+        prev_cursor=encode_cursor(BEFORE, first.created_at, first.id) if has_newer else None,
+    )
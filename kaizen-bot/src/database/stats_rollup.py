@@ -0,0 +1,134 @@
+"""
+Дневной rollup статистики (таблица user_stats_daily).
+
+DailyEntry меняют не только update_morning_entry / update_evening_entry /
+update_habits / update_priority_task, но и хэндлеры напрямую (отметка задачи
+из напоминания, /tasks), поэтому строка дня пересчитывается по событию сессии:
+любой flush, создавший, изменивший или удаливший DailyEntry, в той же
+транзакции обновляет (или удаляет) её строку в user_stats_daily.
+
+Флаги и числа считаются здесь один раз — статистика читает готовые строки
+(O(дней)), а воскресный отчёт по всем пользователям — один GROUP BY.
+
+Пересчитать rollup целиком (или начиная с даты):
+    python -m src.database.stats_rollup [--since 2026-01-01]
+"""
+
+import argparse
+from datetime import date
+
+from sqlalchemy import delete, event, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.database.models import DailyEntry, UserStatsDaily, get_session
+
+STAT_COLUMNS = (
+    "morning_completed", "evening_completed", "tasks_planned", "tasks_done",
+    "priority_set", "priority_done", "exercised", "ate_well", "wake_minutes", "sleep_minutes",
+)
+
+
+def parse_minutes(value: str | None) -> int | None:
+    """"HH:MM" -> минуты с полуночи; None, если не разбирается"""
+    if not value:
+        return None
+    try:
+        h, m = map(int, value.split(":"))
+    except ValueError:
+        return None
+    return h * 60 + m
+
+
+def stats_row(entry: DailyEntry) -> dict:
+    """Строка user_stats_daily из записи дня"""
+    tasks = [
+        (entry.task_1, entry.task_1_done),
+        (entry.task_2, entry.task_2_done),
+        (entry.task_3, entry.task_3_done),
+    ]
+    priority_done = {1: entry.task_1_done, 2: entry.task_2_done, 3: entry.task_3_done}.get(entry.priority_task)
+    return {
+        "user_id": entry.user_id,
+        "stat_date": entry.entry_date,
+        "morning_completed": int(bool(entry.morning_completed)),
+        "evening_completed": int(bool(entry.evening_completed)),
+        "tasks_planned": sum(1 for text, _ in tasks if text),
+        "tasks_done": sum(1 for text, done in tasks if text and done),
+        "priority_set": int(entry.priority_task is not None),
+        "priority_done": int(bool(priority_done)),
+        "exercised": int(bool(entry.exercised)),
+        "ate_well": int(bool(entry.ate_well)),
+        "wake_minutes": parse_minutes(entry.wake_time),
+        "sleep_minutes": parse_minutes(entry.sleep_time),
+    }
+
+
+def upsert_stats(rows: list[dict]):
+    """UPSERT строк rollup по (user_id, stat_date)"""
+    stmt = sqlite_insert(UserStatsDaily.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "stat_date"],
+        set_={column: stmt.excluded[column] for column in STAT_COLUMNS}
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session, flush_context):
+    # В after_flush new / dirty / deleted ещё содержат только что записанные объекты
+    changed = {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, DailyEntry):
+            changed[(obj.user_id, obj.entry_date)] = stats_row(obj)
+    removed = [
+        (obj.user_id, obj.entry_date) for obj in session.deleted
+        if isinstance(obj, DailyEntry) and (obj.user_id, obj.entry_date) not in changed
+    ]
+
+    # Через соединение: session.execute внутри flush снова запустил бы autoflush
+    connection = session.connection()
+    if removed:
+        table = UserStatsDaily.__table__
+        connection.execute(delete(table).where(tuple_(table.c.user_id, table.c.stat_date).in_(removed)))
+    if changed:
+        connection.execute(upsert_stats(list(changed.values())))
+
+
+def backfill_stats_daily(since: date = None, batch_size: int = 500) -> int:
+    """Пересчитать rollup из daily_entries (всё или с даты since). Returns: число дней"""
+    session = get_session()
+    try:
+        query = session.query(DailyEntry).order_by(DailyEntry.id)
+        if since:
+            query = query.filter(DailyEntry.entry_date >= since)
+
+        total = 0
+        batch = []
+        for entry in query.yield_per(batch_size):
+            batch.append(stats_row(entry))
+            if len(batch) >= batch_size:
+                session.connection().execute(upsert_stats(batch))
+                total += len(batch)
+                batch = []
+        if batch:
+            session.connection().execute(upsert_stats(batch))
+            total += len(batch)
+
+        session.commit()
+        return total
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчитать user_stats_daily из daily_entries")
+    parser.add_argument("--since", type=date.fromisoformat, help="начиная с даты (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from src.database.models import init_db
+    init_db()
+    print(f"user_stats_daily: пересчитано дней — {backfill_stats_daily(args.since)}")
+
+
+if __name__ == "__main__":
+    main()
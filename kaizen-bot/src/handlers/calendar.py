@@ -2,6 +2,8 @@
 Google Calendar интеграция - команды и настройки
 """
 
+from datetime import datetime, timedelta
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
@@ -14,9 +16,12 @@ from src.database.crud import (
     get_user_by_telegram_id, get_or_create_user,
     update_user_google_token, disable_calendar_sync
 )
-from src.integrations.google_calendar import GoogleCalendarService
+from src.database.crud_calendar import get_day_calendar_events
+from src.integrations.google_calendar import AsyncGoogleCalendarService
 from src.keyboards.inline import get_main_menu
-from src.config import GOOGLE_CLIENT_ID
+from src.config import GOOGLE_CLIENT_ID, CALENDAR_SYNC_MAX_AGE
+from src.scheduler.calendar_sync import sync_user_calendar
+from src.scheduler.reminder_index import user_zone
 
 router = Router()
 
@@ -150,7 +155,7 @@ async def start_calendar_connect(callback: CallbackQuery, state: FSMContext):
         return
 
     try:
-        service = GoogleCalendarService(user.id)
+        service = AsyncGoogleCalendarService(user.id)
         auth_url, auth_state = service.get_auth_url()
     except ValueError as e:
         await callback.answer(str(e), show_alert=True)
@@ -185,10 +190,10 @@ async def process_oauth_code(message: Message, state: FSMContext):
     oauth_state = data.get("oauth_state")
 
     user = get_user_by_telegram_id(message.from_user.id)
-    service = GoogleCalendarService(user.id)
+    service = AsyncGoogleCalendarService(user.id)
 
     try:
-        encrypted_token = service.exchange_code(code, oauth_state)
+        encrypted_token = await service.exchange_code(code, oauth_state)
         update_user_google_token(message.from_user.id, encrypted_token)
 
         await state.clear()
@@ -248,12 +253,18 @@ async def show_today_events(callback: CallbackQuery):
         await callback.answer("Календарь не подключён")
         return
 
-    service = GoogleCalendarService(user.id)
-    if not service.load_credentials(user.google_refresh_token_encrypted):
+    service = AsyncGoogleCalendarService(user.id)
+    if not await service.load_credentials(user.google_refresh_token_encrypted):
         await callback.answer("Ошибка авторизации. Переподключи календарь.", show_alert=True)
         return
 
-    events = service.get_today_events()
+    # Читаем из локального зеркала; в API — только если оно устарело
+    await sync_user_calendar(user, service, max_age=timedelta(minutes=CALENDAR_SYNC_MAX_AGE))
+    zone = user_zone(user.timezone)
+    events = [
+        event.to_event_dict(zone)
+        for event in get_day_calendar_events(user.id, datetime.now(zone).date(), zone)
+    ]
 
     if not events:
         text = "📆 *События на сегодня*\n\nНет запланированных событий."
@@ -3,6 +3,7 @@ Handlers для Quick Action "📅 В календарь".
 
 Обрабатывает добавление inbox items и user tasks в Google Calendar
 с выбором времени через quick slots или ручной ввод.
+Само событие создаёт воркер очереди calendar_queue — ответ пользователю сразу.
 """
 
 from datetime import datetime, timedelta
@@ -12,13 +13,13 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from src.database.models import get_session, InboxItem, UserTask
 from src.database.crud import get_user_by_telegram_id, get_inbox_item
+from src.database.crud_calendar import enqueue_item_event
 from src.database.crud_user_tasks import get_user_task
-from src.integrations.google_calendar import GoogleCalendarService
 from src.keyboards.inline_calendar import get_time_slots_keyboard
 from src.keyboards.inline import get_inbox_item_keyboard
 from src.keyboards.inline_user_tasks import get_task_view_keyboard
+from src.scheduler.calendar_queue import calendar_queue
 
 router = Router()
 
@@ -251,54 +252,30 @@ def _parse_datetime(text: str) -> datetime | None:
 
 
 async def _create_calendar_event(callback, user, item_type: str, item_id: int, event_time: datetime):
-    """Создать событие в Google Calendar"""
+    """Поставить событие в очередь Google Calendar (хэндлер не ждёт API)"""
 
     if not user.google_refresh_token_encrypted:
         await callback.answer("Google Calendar не подключён", show_alert=True)
         return
 
-    # Загружаем calendar service
-    calendar_service = GoogleCalendarService(user.id)
-    if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
-        await callback.answer("Ошибка подключения к календарю", show_alert=True)
-        return
-
-    session = get_session()
     try:
         # Получаем элемент
         if item_type == "inbox":
-            item = session.query(InboxItem).filter(InboxItem.id == item_id).first()
+            item = get_inbox_item(item_id)
             if not item:
                 await callback.answer("Элемент не найден", show_alert=True)
                 return
             summary = item.text[:100]
-            description = f"Из Inbox | {item.text}"
         else:
-            item = session.query(UserTask).filter(UserTask.id == item_id).first()
+            item = get_user_task(item_id)
             if not item:
                 await callback.answer("Задача не найдена", show_alert=True)
                 return
             summary = item.name
-            description = f"Задача из Kaizen Bot | Награда: {item.reward_amount}₽"
-
-        # Создаём событие
-        event_id = calendar_service.create_event(
-            summary=summary,
-            start_time=event_time,
-            description=description,
-            calendar_id=user.google_calendar_id or "primary",
-            is_priority=False
-        )
-
-        # Сохраняем event_id
-        if item_type == "inbox":
-            item.google_event_id = event_id
-            item.calendar_synced_at = datetime.now()
-        else:
-            item.google_event_id = event_id
-            item.calendar_time = event_time
 
-        session.commit()
+        # Событие создаст воркер очереди (с повторами при ошибках API)
+        enqueue_item_event(user.id, item_type, item_id, event_time)
+        calendar_queue.wake()
 
         # Успех!
         time_str = event_time.strftime("%d.%m %H:%M")
@@ -312,5 +289,3 @@ async def _create_calendar_event(callback, user, item_type: str, item_id: int, e
     except Exception as e:
         print(f"Error creating calendar event: {e}")
         await callback.answer("Произошла ошибка при создании события", show_alert=True)
-    finally:
-        session.close()
@@ -2,6 +2,8 @@
 Handlers для follow-up после событий и настроек напоминаний.
 """
 
+from html import escape
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -11,6 +13,7 @@ from src.database.models import get_session, CalendarEventReminder, User
 from src.database.crud import get_user_by_telegram_id, create_inbox_item
 from src.keyboards.inline_calendar import get_reminder_settings_keyboard
 from src.keyboards.inline import get_main_menu
+from src.scheduler.event_classifier import DEFAULT_EXCLUDED_KEYWORDS, parse_exclusions
 
 router = Router()
 
@@ -20,6 +23,11 @@ class FollowupStates(StatesGroup):
     waiting_for_action_items = State()
 
 
+class ReminderSettingsStates(StatesGroup):
+    """FSM состояния настроек напоминаний"""
+    waiting_for_exclusions = State()
+
+
 # === Follow-up handlers ===
 
 @router.callback_query(F.data.startswith("followup_yes:"))
@@ -179,3 +187,59 @@ async def set_reminder_time(callback: CallbackQuery):
 
     finally:
         session.close()
+
+
+@router.callback_query(F.data == "reminder_exclusions")
+async def ask_reminder_exclusions(callback: CallbackQuery, state: FSMContext):
+    """Запросить свои слова-исключения для follow-up"""
+    user = get_user_by_telegram_id(callback.from_user.id)
+    if not user:
+        await callback.answer("Пользователь не найден", show_alert=True)
+        return
+
+    current = ", ".join(parse_exclusions(user.event_exclusions)) or "—"
+    await state.set_state(ReminderSettingsStates.waiting_for_exclusions)
+
+    # Слова пользователя могут содержать _ * ` [ — HTML с экранированием вместо Markdown
+    await callback.message.edit_text(
+        "🚫 <b>Исключения для follow-up</b>\n\n"
+        "После событий с этими словами в названии бот не спрашивает про action items.\n\n"
+        f"Всегда: <i>{escape(', '.join(DEFAULT_EXCLUDED_KEYWORDS))}</i>\n"
+        f"Твои: <i>{escape(current)}</i>\n\n"
+        "Напиши слова через запятую (например: <code>standup, 1:1, спортзал</code>).\n"
+        "Отправь <code>-</code>, чтобы очистить.",
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.message(ReminderSettingsStates.waiting_for_exclusions)
+async def process_reminder_exclusions(message: Message, state: FSMContext):
+    """Сохранить свои исключения (нормализованные, без дублей)"""
+    text = (message.text or "").strip()
+    keywords = [] if text == "-" else parse_exclusions(text)
+
+    session = get_session()
+    try:
+        user = session.query(User).filter(
+            User.telegram_id == message.from_user.id
+        ).first()
+
+        if not user:
+            return
+
+        user.event_exclusions = ", ".join(keywords) or None
+        session.commit()
+
+        await message.answer(
+            f"✅ Исключения сохранены: <i>{escape(user.event_exclusions or '—')}</i>",
+            parse_mode="HTML",
+            reply_markup=get_reminder_settings_keyboard(
+                current_minutes=user.reminder_minutes_before or 15,
+                reminders_enabled=user.event_reminders_enabled if user.event_reminders_enabled is not None else True
+            )
+        )
+
+    finally:
+        session.close()
+        await state.clear()
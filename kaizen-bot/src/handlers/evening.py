@@ -3,8 +3,10 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy.orm import Session
 
 from src.database.crud import get_user_by_telegram_id, get_today_entry, update_evening_entry, update_habits
+from src.database.models import end_unit_of_work
 from src.keyboards.inline import get_task_completion_keyboard, get_skip_keyboard, get_main_menu
 
 router = Router()
@@ -30,10 +32,6 @@ def get_yes_no_keyboard(prefix: str = "habit") -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-# Временное хранение состояния задач
-task_states = {}
-
-
 @router.callback_query(F.data == "evening_start")
 async def start_evening(callback: CallbackQuery, state: FSMContext):
     """Начало вечерней рефлексии"""
@@ -52,21 +50,17 @@ async def start_evening(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         return
 
-    # Сохраняем данные
+    # Сохраняем данные; отметки задач живут в FSM data до конца рефлексии
     await state.update_data(
         user_id=user.id,
         task_1=entry.task_1,
         task_2=entry.task_2,
-        task_3=entry.task_3
+        task_3=entry.task_3,
+        task_1_done=bool(entry.task_1_done),
+        task_2_done=bool(entry.task_2_done),
+        task_3_done=bool(entry.task_3_done)
     )
 
-    # Инициализируем состояние задач
-    task_states[callback.from_user.id] = {
-        "t1": entry.task_1_done,
-        "t2": entry.task_2_done,
-        "t3": entry.task_3_done
-    }
-
     await callback.message.edit_text(
         "🌙 *Вечерняя рефлексия*\n\n"
         "Отметь выполненные задачи:",
@@ -84,24 +78,18 @@ async def start_evening(callback: CallbackQuery, state: FSMContext):
 async def toggle_task(callback: CallbackQuery, state: FSMContext):
     """Переключение статуса задачи"""
     task_num = callback.data.split(":")[1]
-    user_id = callback.from_user.id
-
-    if user_id not in task_states:
-        task_states[user_id] = {"t1": False, "t2": False, "t3": False}
 
     # Переключаем
-    key = f"t{task_num}"
-    task_states[user_id][key] = not task_states[user_id][key]
-
-    # Получаем данные
+    key = f"task_{task_num}_done"
     data = await state.get_data()
+    data = await state.update_data({key: not data.get(key, False)})
 
     await callback.message.edit_reply_markup(
         reply_markup=get_task_completion_keyboard(
             data.get("task_1", ""), data.get("task_2", ""), data.get("task_3", ""),
-            task_states[user_id]["t1"],
-            task_states[user_id]["t2"],
-            task_states[user_id]["t3"]
+            data.get("task_1_done", False),
+            data.get("task_2_done", False),
+            data.get("task_3_done", False)
         )
     )
     await callback.answer()
@@ -109,17 +97,7 @@ async def toggle_task(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(F.data == "tasks_done", EveningStates.tasks_check)
 async def tasks_done(callback: CallbackQuery, state: FSMContext):
-    """Задачи отмечены, переходим к инсайту"""
-    user_id = callback.from_user.id
-
-    # Сохраняем состояние задач
-    ts = task_states.get(user_id, {"t1": False, "t2": False, "t3": False})
-    await state.update_data(
-        task_1_done=ts["t1"],
-        task_2_done=ts["t2"],
-        task_3_done=ts["t3"]
-    )
-
+    """Задачи отмечены (отметки уже в FSM data), переходим к инсайту"""
     await callback.message.edit_text(
         "💡 *Какой главный инсайт дня?*\n"
         "(Что понял, осознал, чему научился)",
@@ -157,8 +135,8 @@ async def process_improve(message: Message, state: FSMContext):
     await state.set_state(EveningStates.exercised)
 
 
-async def finish_evening(message: Message, state: FSMContext):
-    """Завершение вечерней рефлексии"""
+async def finish_evening(message: Message, state: FSMContext, session: Session = None):
+    """Завершение вечерней рефлексии (session — unit of work апдейта)"""
     data = await state.get_data()
 
     # Сохраняем рефлексию в БД
@@ -168,7 +146,8 @@ async def finish_evening(message: Message, state: FSMContext):
         task_2_done=data.get("task_2_done", False),
         task_3_done=data.get("task_3_done", False),
         insight=data.get("insight", ""),
-        improve=data.get("improve", "")
+        improve=data.get("improve", ""),
+        session=session
     )
 
     # Сохраняем привычки
@@ -176,7 +155,8 @@ async def finish_evening(message: Message, state: FSMContext):
         user_id=data.get("user_id"),
         exercised=data.get("exercised"),
         ate_well=data.get("ate_well"),
-        sleep_time=data.get("sleep_time", "")
+        sleep_time=data.get("sleep_time", ""),
+        session=session
     )
 
     # Подсчёт выполненных задач
@@ -192,7 +172,7 @@ async def finish_evening(message: Message, state: FSMContext):
     ])
 
     # Проверяем статус главной задачи (GTD priority)
-    entry = get_today_entry(data.get("user_id"))
+    entry = get_today_entry(data.get("user_id"), session=session)
     priority_done = False
     priority_text = ""
 
@@ -221,7 +201,8 @@ async def finish_evening(message: Message, state: FSMContext):
         tasks_done=done_count,
         priority_done=priority_done,
         exercised=data.get("exercised", False),
-        ate_well=data.get("ate_well", False)
+        ate_well=data.get("ate_well", False),
+        session=session
     )
 
     # Формируем итоговое сообщение
@@ -255,7 +236,7 @@ async def finish_evening(message: Message, state: FSMContext):
         if reward_breakdown.get("eating"):
             summary += f"• Питание: +{reward_breakdown['eating']}₽\n"
 
-        balance = get_reward_balance_by_telegram_id(message.chat.id)
+        balance = get_reward_balance_by_telegram_id(message.chat.id, session=session)
         summary += f"\n📊 *Итого: +{reward_breakdown['total']}₽* | Баланс: {balance}₽\n\n"
 
     # Привычки
@@ -269,13 +250,10 @@ async def finish_evening(message: Message, state: FSMContext):
 
     summary += "\n🌙 Отличная работа! Спокойной ночи!"
 
+    # Коммит до ответа: не держим блокировку записи на время запроса к Telegram
+    end_unit_of_work(session)
     await message.answer(summary, parse_mode="Markdown", reply_markup=get_main_menu())
 
-    # Очищаем временные данные
-    user_id = message.from_user.id if hasattr(message, 'from_user') else None
-    if user_id and user_id in task_states:
-        del task_states[user_id]
-
     await state.clear()
 
 
@@ -312,10 +290,10 @@ async def process_eating(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(EveningStates.sleep_time)
-async def process_sleep_time(message: Message, state: FSMContext):
+async def process_sleep_time(message: Message, state: FSMContext, session: Session = None):
     """Обработка времени сна и завершение"""
     await state.update_data(sleep_time=message.text.strip())
-    await finish_evening(message, state)
+    await finish_evening(message, state, session)
 
 
 # Обработка пропусков
@@ -344,8 +322,8 @@ async def skip_improve(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "skip", EveningStates.sleep_time)
-async def skip_sleep_time(callback: CallbackQuery, state: FSMContext):
+async def skip_sleep_time(callback: CallbackQuery, state: FSMContext, session: Session = None):
     await state.update_data(sleep_time="")
     await callback.message.edit_text("⏳ Сохраняю...")
-    await finish_evening(callback.message, state)
+    await finish_evening(callback.message, state, session)
     await callback.answer()
@@ -16,7 +16,7 @@ from aiogram.fsm.state import State, StatesGroup
 
 from src.database.models import get_session, HabitCalendarEvent, User
 from src.database.crud import get_user_by_telegram_id
-from src.integrations.google_calendar import GoogleCalendarService
+from src.integrations.google_calendar import AsyncGoogleCalendarService
 from src.keyboards.inline_calendar import get_habit_calendar_keyboard, get_habit_time_keyboard
 
 router = Router()
@@ -210,8 +210,8 @@ async def _create_habit_event(callback, user, habit_type: str, time_str: str):
         return
 
     # Загружаем calendar service
-    calendar_service = GoogleCalendarService(user.id)
-    if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
+    calendar_service = AsyncGoogleCalendarService(user.id)
+    if not await calendar_service.load_credentials(user.google_refresh_token_encrypted):
         await callback.answer("Ошибка подключения к календарю", show_alert=True)
         return
 
@@ -224,7 +224,7 @@ async def _create_habit_event(callback, user, habit_type: str, time_str: str):
         ).first()
 
         # Создаём событие в Google Calendar
-        event_id = calendar_service.create_recurring_event(
+        event_id = await calendar_service.create_recurring_event(
             summary=HABIT_NAMES.get(habit_type, "Привычка"),
             start_time=time_str,
             duration_minutes=60,
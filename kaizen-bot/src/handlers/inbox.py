@@ -9,12 +9,14 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.orm import Session
 
 from src.database.crud import (
-    get_or_create_user, get_user_inbox, get_inbox_item, create_inbox_item,
-    update_inbox_item, delete_inbox_item, move_inbox_to_someday,
-    get_inbox_by_context, get_inbox_count
+    get_or_create_user, get_inbox_page, get_inbox_item,
+    update_inbox_item, delete_inbox_item, move_inbox_to_someday
 )
+from src.database import crud_async
+from src.database.models import end_unit_of_work
 from src.keyboards.inline import (
     get_inbox_keyboard, get_inbox_empty_keyboard, get_inbox_item_keyboard,
     get_two_minute_keyboard, get_energy_keyboard, get_time_estimate_keyboard,
@@ -38,7 +40,7 @@ class InboxStates(StatesGroup):
 @router.message(Command("inbox"))
 async def cmd_inbox(message: Message):
     """Показать inbox"""
-    user = get_or_create_user(
+    user = await crud_async.get_or_create_user(
         message.from_user.id,
         message.from_user.username,
         message.from_user.first_name
@@ -46,6 +48,21 @@ async def cmd_inbox(message: Message):
     await show_inbox_list(message, user.id)
 
 
+def inbox_list_view(page) -> tuple[str, object]:
+    """Текст и клавиатура страницы inbox"""
+    if not page.items:
+        return (
+            "📥 *Inbox пуст!*\n\n"
+            "Отправь мне любой текст, и он автоматически попадёт сюда.",
+            get_inbox_empty_keyboard()
+        )
+    return (
+        f"📥 *Inbox* ({page.total} задач)\n\n"
+        "Выбери задачу для обработки:",
+        get_inbox_keyboard(page)
+    )
+
+
 @router.callback_query(F.data == "inbox_show")
 async def callback_inbox_show(callback: CallbackQuery, state: FSMContext):
     """Показать inbox (callback)"""
@@ -55,64 +72,30 @@ async def callback_inbox_show(callback: CallbackQuery, state: FSMContext):
         callback.from_user.username,
         callback.from_user.first_name
     )
-    items = get_user_inbox(user.id)
-
-    if not items:
-        await callback.message.edit_text(
-            "📥 *Inbox пуст!*\n\n"
-            "Отправь мне любой текст, и он автоматически попадёт сюда.",
-            parse_mode="Markdown",
-            reply_markup=get_inbox_empty_keyboard()
-        )
-    else:
-        await callback.message.edit_text(
-            f"📥 *Inbox* ({len(items)} задач)\n\n"
-            "Выбери задачу для обработки:",
-            parse_mode="Markdown",
-            reply_markup=get_inbox_keyboard(items)
-        )
+    text, keyboard = inbox_list_view(get_inbox_page(user.id))
+    await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
     await callback.answer()
 
 
-async def show_inbox_list(message: Message, user_id: int, page: int = 0):
+async def show_inbox_list(message: Message, user_id: int, cursor: str = None):
     """Показать список inbox"""
-    items = get_user_inbox(user_id)
-
-    if not items:
-        await message.answer(
-            "📥 *Inbox пуст!*\n\n"
-            "Отправь мне любой текст, и он автоматически попадёт сюда.",
-            parse_mode="Markdown",
-            reply_markup=get_inbox_empty_keyboard()
-        )
-    else:
-        await message.answer(
-            f"📥 *Inbox* ({len(items)} задач)\n\n"
-            "Выбери задачу для обработки:",
-            parse_mode="Markdown",
-            reply_markup=get_inbox_keyboard(items, page)
-        )
+    text, keyboard = inbox_list_view(get_inbox_page(user_id, cursor=cursor))
+    await message.answer(text, parse_mode="Markdown", reply_markup=keyboard)
 
 
 # ============ Пагинация ============
 
 @router.callback_query(F.data.startswith("inbox_page:"))
 async def inbox_pagination(callback: CallbackQuery):
-    """Пагинация inbox"""
-    page = int(callback.data.split(":")[1])
+    """Пагинация inbox: курсор страницы в callback_data"""
+    cursor = callback.data.split(":", 1)[1]
     user = get_or_create_user(
         callback.from_user.id,
         callback.from_user.username,
         callback.from_user.first_name
     )
-    items = get_user_inbox(user.id)
-
-    await callback.message.edit_text(
-        f"📥 *Inbox* ({len(items)} задач)\n\n"
-        "Выбери задачу для обработки:",
-        parse_mode="Markdown",
-        reply_markup=get_inbox_keyboard(items, page)
-    )
+    text, keyboard = inbox_list_view(get_inbox_page(user.id, cursor=cursor))
+    await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
     await callback.answer()
 
 
@@ -148,13 +131,13 @@ async def show_inbox_item(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("inbox_quick_done:"))
-async def quick_done_inbox_item(callback: CallbackQuery, state: FSMContext):
-    """Быстрое выполнение задачи с начислением награды"""
+async def quick_done_inbox_item(callback: CallbackQuery, state: FSMContext, session: Session = None):
+    """Быстрое выполнение задачи с начислением награды (одна транзакция на апдейт)"""
     from src.database.crud_rewards import grant_inbox_task_reward, get_reward_balance
     from src.database.crud import get_user_by_telegram_id
 
     item_id = int(callback.data.split(":")[1])
-    item = get_inbox_item(item_id)
+    item = get_inbox_item(item_id, session=session)
 
     if not item:
         await callback.answer("Задача не найдена", show_alert=True)
@@ -165,7 +148,7 @@ async def quick_done_inbox_item(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Задача уже выполнена!", show_alert=True)
         return
 
-    user = get_user_by_telegram_id(callback.from_user.id)
+    user = get_user_by_telegram_id(callback.from_user.id, session=session)
     if not user:
         await callback.answer("Ошибка: пользователь не найден", show_alert=True)
         return
@@ -175,14 +158,15 @@ async def quick_done_inbox_item(callback: CallbackQuery, state: FSMContext):
         user_id=user.id,
         inbox_item_id=item.id,
         time_estimate=item.time_estimate,
-        energy_level=item.energy_level
+        energy_level=item.energy_level,
+        session=session
     )
 
     # Пометить как processed
-    update_inbox_item(item_id, status="processed")
+    update_inbox_item(item_id, status="processed", session=session)
 
     # Баланс
-    balance = get_reward_balance(user.id)
+    balance = get_reward_balance(user.id, session=session)
 
     # Messaging (анти-кортизол: празднуем!)
     text = "✅ *Отлично! Задача выполнена!*\n\n"
@@ -193,6 +177,8 @@ async def quick_done_inbox_item(callback: CallbackQuery, state: FSMContext):
     text += f"💰 Заработано: *{reward['total']}₽*\n\n"
     text += f"📊 Баланс: {balance}₽"
 
+    # Коммит до ответа: не держим блокировку записи на время запроса к Telegram
+    end_unit_of_work(session)
     await callback.message.edit_text(
         text,
         parse_mode="Markdown",
@@ -425,18 +411,20 @@ async def filter_time_menu(callback: CallbackQuery):
 
 @router.callback_query(F.data.startswith("inbox_fe:"))
 async def filter_by_energy(callback: CallbackQuery):
-    """Фильтр по энергии"""
-    energy = callback.data.split(":")[1]
+    """Фильтр по энергии (inbox_fe:<уровень>[:<курсор>])"""
+    parts = callback.data.split(":", 2)
+    energy = parts[1]
+    cursor = parts[2] if len(parts) > 2 else None
     user = get_or_create_user(
         callback.from_user.id,
         callback.from_user.username,
         callback.from_user.first_name
     )
-    items = get_inbox_by_context(user.id, energy_level=energy)
+    page = get_inbox_page(user.id, cursor=cursor, energy_level=energy)
 
     energy_map = {"high": "🔋🔋🔋 Высокая", "medium": "🔋🔋 Средняя", "low": "🔋 Низкая"}
 
-    if not items:
+    if not page.items:
         await callback.message.edit_text(
             f"📥 *Inbox* - {energy_map.get(energy, energy)}\n\n"
             "Нет задач с таким уровнем энергии.",
@@ -445,26 +433,28 @@ async def filter_by_energy(callback: CallbackQuery):
         )
     else:
         await callback.message.edit_text(
-            f"📥 *Inbox* - {energy_map.get(energy, energy)} ({len(items)})\n\n"
+            f"📥 *Inbox* - {energy_map.get(energy, energy)} ({page.total})\n\n"
             "Выбери задачу:",
             parse_mode="Markdown",
-            reply_markup=get_inbox_keyboard(items)
+            reply_markup=get_inbox_keyboard(page, callback_prefix=f"inbox_fe:{energy}")
         )
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("inbox_ft:"))
 async def filter_by_time(callback: CallbackQuery):
-    """Фильтр по времени"""
-    time_est = callback.data.split(":")[1]
+    """Фильтр по времени (inbox_ft:<оценка>[:<курсор>])"""
+    parts = callback.data.split(":", 2)
+    time_est = parts[1]
+    cursor = parts[2] if len(parts) > 2 else None
     user = get_or_create_user(
         callback.from_user.id,
         callback.from_user.username,
         callback.from_user.first_name
     )
-    items = get_inbox_by_context(user.id, time_estimate=time_est)
+    page = get_inbox_page(user.id, cursor=cursor, time_estimate=time_est)
 
-    if not items:
+    if not page.items:
         await callback.message.edit_text(
             f"📥 *Inbox* - {time_est}\n\n"
             "Нет задач с такой оценкой времени.",
@@ -473,10 +463,10 @@ async def filter_by_time(callback: CallbackQuery):
         )
     else:
         await callback.message.edit_text(
-            f"📥 *Inbox* - {time_est} ({len(items)})\n\n"
+            f"📥 *Inbox* - {time_est} ({page.total})\n\n"
             "Выбери задачу:",
             parse_mode="Markdown",
-            reply_markup=get_inbox_keyboard(items)
+            reply_markup=get_inbox_keyboard(page, callback_prefix=f"inbox_ft:{time_est}")
         )
     await callback.answer()
 
@@ -491,16 +481,14 @@ async def capture_to_inbox(message: Message, state: FSMContext):
     if message.text.startswith('/'):
         return
 
-    # Добавляем в inbox
-    user = get_or_create_user(
+    # Добавляем в inbox: одна транзакция, счётчик вместо COUNT
+    count = await crud_async.capture_inbox_item(
         message.from_user.id,
-        message.from_user.username,
-        message.from_user.first_name
+        message.text,
+        username=message.from_user.username,
+        first_name=message.from_user.first_name
     )
 
-    create_inbox_item(user.id, message.text)
-    count = get_inbox_count(user.id)
-
     await message.answer(
         f"📥 *Добавлено в Inbox!*\n\n"
         f"_{message.text}_\n\n"
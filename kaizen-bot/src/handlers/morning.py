@@ -4,13 +4,17 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy.orm import Session
 
 from src.database.crud import (
     get_user_by_telegram_id, update_morning_entry, get_or_create_today_entry,
     get_user_goals, update_habits, update_priority_task
 )
+from src.database.crud_calendar import enqueue_tasks_push
+from src.database.models import end_unit_of_work
 from src.keyboards.inline import get_skip_keyboard, get_main_menu, get_priority_keyboard, get_sport_question_keyboard
 from src.keyboards.inline_calendar import get_morning_sport_time_keyboard
+from src.scheduler.calendar_queue import calendar_queue
 
 router = Router()
 
@@ -135,7 +139,7 @@ async def process_task_2(message: Message, state: FSMContext):
 
 
 @router.message(MorningStates.task_3)
-async def process_task_3(message: Message, state: FSMContext):
+async def process_task_3(message: Message, state: FSMContext, session: Session = None):
     """Обработка задачи 3 -> выбор приоритета"""
     await state.update_data(task_3=message.text)
     data = await state.get_data()
@@ -163,11 +167,11 @@ async def process_task_3(message: Message, state: FSMContext):
         )
         await state.set_state(MorningStates.priority_task)
     else:
-        await finish_morning(message, state)
+        await finish_morning(message, state, session)
 
 
 @router.callback_query(F.data.startswith("priority:"), MorningStates.priority_task)
-async def process_priority(callback: CallbackQuery, state: FSMContext):
+async def process_priority(callback: CallbackQuery, state: FSMContext, session: Session = None):
     """Выбор приоритетной задачи → вопрос про спорт"""
     priority = int(callback.data.split(":")[1])
     await state.update_data(priority_task=priority)
@@ -186,13 +190,13 @@ async def process_priority(callback: CallbackQuery, state: FSMContext):
     else:
         # Календарь не подключён — завершаем
         await callback.message.edit_text("⏳ Сохраняю...")
-        await finish_morning(callback.message, state)
+        await finish_morning(callback.message, state, session)
 
     await callback.answer()
 
 
-async def finish_morning(message: Message, state: FSMContext):
-    """Завершение утреннего кайдзена"""
+async def finish_morning(message: Message, state: FSMContext, session: Session = None):
+    """Завершение утреннего кайдзена (session — unit of work апдейта)"""
     data = await state.get_data()
 
     # Сохраняем в БД
@@ -202,22 +206,24 @@ async def finish_morning(message: Message, state: FSMContext):
         energy_minus=data.get("energy_minus", ""),
         task_1=data.get("task_1", ""),
         task_2=data.get("task_2", ""),
-        task_3=data.get("task_3", "")
+        task_3=data.get("task_3", ""),
+        session=session
     )
 
     # Сохраняем приоритетную задачу
     priority = data.get("priority_task")
     if priority:
-        update_priority_task(data.get("user_id"), priority)
+        update_priority_task(data.get("user_id"), priority, session=session)
 
     # === НАГРАДА за утренний кайдзен ===
     from src.database.crud_rewards import grant_morning_kaizen_reward, get_reward_balance_by_telegram_id
     from src.database.crud import get_today_entry
 
-    entry = get_today_entry(data.get("user_id"))
+    entry = get_today_entry(data.get("user_id"), session=session)
     reward_amount = grant_morning_kaizen_reward(
         user_id=data.get("user_id"),
-        daily_entry_id=entry.id if entry else None
+        daily_entry_id=entry.id if entry else None,
+        session=session
     )
 
     # Формируем итоговое сообщение
@@ -239,7 +245,7 @@ async def finish_morning(message: Message, state: FSMContext):
 
     # Добавляем информацию о награде
     if reward_amount > 0:
-        balance = get_reward_balance_by_telegram_id(message.chat.id)
+        balance = get_reward_balance_by_telegram_id(message.chat.id, session=session)
         summary += f"\n\n💰 *+{reward_amount}₽* за утренний кайдзен!"
         summary += f"\n📊 Баланс: {balance}₽"
 
@@ -251,14 +257,16 @@ async def finish_morning(message: Message, state: FSMContext):
 
     summary += "\n\n🌙 Вечером я напомню подвести итоги!"
 
-    # Синхронизация с Google Calendar (задачи)
+    # Фиксируем unit of work до очереди (воркер читает задачи своей сессией) и до ответа в Telegram
+    end_unit_of_work(session)
+
+    # Задачи дня → Google Calendar через очередь: хэндлер не ждёт API
     try:
-        user = get_user_by_telegram_id(message.chat.id)
+        user = get_user_by_telegram_id(message.chat.id, session=session)
         if user and user.calendar_sync_enabled:
-            from src.scheduler.calendar_sync import sync_after_morning_kaizen
-            success, sync_msg = await sync_after_morning_kaizen(user)
-            if success:
-                summary += "\n\n📅 _Задачи добавлены в Google Calendar_"
+            enqueue_tasks_push(user.id)
+            calendar_queue.wake()
+            summary += "\n\n📅 _Задачи отправлены в Google Calendar_"
     except Exception as e:
         print(f"Calendar sync error: {e}")
 
@@ -329,7 +337,7 @@ async def skip_task_2(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "skip", MorningStates.task_3)
-async def skip_task_3(callback: CallbackQuery, state: FSMContext):
+async def skip_task_3(callback: CallbackQuery, state: FSMContext, session: Session = None):
     await state.update_data(task_3="")
     data = await state.get_data()
 
@@ -355,7 +363,7 @@ async def skip_task_3(callback: CallbackQuery, state: FSMContext):
         await state.set_state(MorningStates.priority_task)
     else:
         await callback.message.edit_text("⏳ Сохраняю...")
-        await finish_morning(callback.message, state)
+        await finish_morning(callback.message, state, session)
     await callback.answer()
 
 
@@ -375,23 +383,23 @@ async def sport_yes(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "morning_sport_no", MorningStates.sport_question)
-async def sport_no_from_question(callback: CallbackQuery, state: FSMContext):
+async def sport_no_from_question(callback: CallbackQuery, state: FSMContext, session: Session = None):
     """Не идёт на спорт (из вопроса)"""
     await callback.message.edit_text("⏳ Сохраняю...")
-    await finish_morning(callback.message, state)
+    await finish_morning(callback.message, state, session)
     await callback.answer()
 
 
 @router.callback_query(F.data == "morning_sport_no", MorningStates.sport_time)
-async def sport_no_from_time(callback: CallbackQuery, state: FSMContext):
+async def sport_no_from_time(callback: CallbackQuery, state: FSMContext, session: Session = None):
     """Не идёт на спорт (из выбора времени)"""
     await callback.message.edit_text("⏳ Сохраняю...")
-    await finish_morning(callback.message, state)
+    await finish_morning(callback.message, state, session)
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("morning_sport_time:"), MorningStates.sport_time)
-async def sport_time_selected(callback: CallbackQuery, state: FSMContext):
+async def sport_time_selected(callback: CallbackQuery, state: FSMContext, session: Session = None):
     """Выбрано время спорта — создаём событие в календарь"""
     parts = callback.data.split(":")
     hour = int(parts[1])
@@ -406,7 +414,7 @@ async def sport_time_selected(callback: CallbackQuery, state: FSMContext):
         await _create_sport_event(user, hour, minute)
         await state.update_data(sport_added=True)
 
-    await finish_morning(callback.message, state)
+    await finish_morning(callback.message, state, session)
     await callback.answer()
 
 
@@ -423,7 +431,7 @@ async def sport_custom_time(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(MorningStates.sport_time)
-async def sport_custom_time_input(message: Message, state: FSMContext):
+async def sport_custom_time_input(message: Message, state: FSMContext, session: Session = None):
     """Обработка введённого времени спорта"""
     text = message.text.strip()
 
@@ -449,18 +457,18 @@ async def sport_custom_time_input(message: Message, state: FSMContext):
         await _create_sport_event(user, hour, minute)
         await state.update_data(sport_added=True)
 
-    await finish_morning(message, state)
+    await finish_morning(message, state, session)
 
 
 async def _create_sport_event(user, hour: int, minute: int) -> bool:
     """Создать событие спорта в Google Calendar на сегодня"""
-    from src.integrations.google_calendar import GoogleCalendarService
+    from src.integrations.google_calendar import AsyncGoogleCalendarService, bot_event_tag
 
     if not user.google_refresh_token_encrypted:
         return False
 
-    calendar_service = GoogleCalendarService(user.id)
-    if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
+    calendar_service = AsyncGoogleCalendarService(user.id)
+    if not await calendar_service.load_credentials(user.google_refresh_token_encrypted):
         return False
 
     try:
@@ -486,13 +494,14 @@ async def _create_sport_event(user, hour: int, minute: int) -> bool:
                     {'method': 'popup', 'minutes': 30},
                 ],
             },
+            'extendedProperties': bot_event_tag(),
         }
 
         calendar_id = user.google_calendar_id or "primary"
-        result = calendar_service.service.events().insert(
+        result = await calendar_service.execute(calendar_service.service.events().insert(
             calendarId=calendar_id,
             body=event
-        ).execute()
+        ))
         return bool(result.get('id'))
     except Exception as e:
         print(f"Error creating sport event: {e}")
@@ -131,7 +131,8 @@ async def start_or_continue_assessment(callback: CallbackQuery, state: FSMContex
 
     # Получаем уже оценённые принципы
     existing_ratings = get_ratings_for_day(assessment.id, current_day)
-    ratings_dict = {r.principle_id: r.score for r in existing_ratings}
+    # Ключи — строки: данные FSM хранятся в JSON
+    ratings_dict = {str(r.principle_id): r.score for r in existing_ratings}
 
     await state.update_data(
         user_id=user.id,
@@ -162,7 +163,7 @@ async def show_current_principle(message, state: FSMContext):
 
     principle = principles[current_index]
     principle_id = principle["id"]
-    current_rating = ratings.get(principle_id)
+    current_rating = ratings.get(str(principle_id))
 
     # Глобальный номер принципа
     global_num = (current_day - 1) * 5 + current_index + 1
@@ -212,7 +213,7 @@ async def rate_principle(callback: CallbackQuery, state: FSMContext):
 
     data = await state.get_data()
     ratings = data.get("ratings", {})
-    ratings[principle_id] = score
+    ratings[str(principle_id)] = score
 
     # Сохраняем в БД
     save_principle_rating(data["assessment_id"], principle_id, score)
@@ -8,10 +8,12 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from src.config import ADMIN_USER_ID
 from src.database.crud import (
-    get_user_by_telegram_id, create_report, get_all_reports,
+    get_user_by_telegram_id, create_report, get_reports_page,
     update_report_status
 )
-from src.keyboards.inline import get_main_menu
+from src.database.identity_cache import identity_cache
+from src.database.pagination import Page
+from src.keyboards.inline import get_main_menu, add_page_navigation
 
 router = Router()
 
@@ -66,6 +68,30 @@ def get_report_status_keyboard(report_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_reports_keyboard(page: Page) -> InlineKeyboardMarkup:
+    """Листание списка репортов + главное меню"""
+    builder = InlineKeyboardBuilder()
+    add_page_navigation(builder, page, "reports_page")
+    builder.attach(InlineKeyboardBuilder.from_markup(get_main_menu()))
+    return builder.as_markup()
+
+
+def format_reports_page(page: Page) -> str:
+    """Текст страницы репортов"""
+    if not page.items:
+        return "📋 *Репорты*\n\nПока нет репортов."
+
+    text = f"📋 *Все репорты* ({page.total}):\n\n"
+    for report in page.items:
+        type_info = REPORT_TYPES.get(report.report_type, {"emoji": "❓", "name": "?"})
+        status_emoji = STATUS_EMOJI.get(report.status, "❓")
+        text += (
+            f"{status_emoji} *#{report.id}* {type_info['emoji']} "
+            f"{report.description[:40]}{'...' if len(report.description) > 40 else ''}\n"
+        )
+    return text
+
+
 @router.message(Command("report"))
 async def cmd_report(message: Message, state: FSMContext):
     """Команда /report — создание нового репорта"""
@@ -155,54 +181,42 @@ async def cmd_reports(message: Message):
         await message.answer("❌ Эта команда доступна только администратору.")
         return
 
-    reports = get_all_reports()
+    page = get_reports_page()  # Последние 20
+    await message.answer(format_reports_page(page), parse_mode="Markdown", reply_markup=get_reports_keyboard(page))
 
-    if not reports:
-        await message.answer(
-            "📋 *Репорты*\n\nПока нет репортов.",
-            parse_mode="Markdown",
-            reply_markup=get_main_menu()
-        )
+
+@router.message(Command("cache"))
+async def cmd_cache_stats(message: Message):
+    """Команда /cache — попадания в кэш User / RewardFund (для админа)"""
+    if message.from_user.id != ADMIN_USER_ID:
+        await message.answer("❌ Эта команда доступна только администратору.")
         return
 
-    text = "📋 *Все репорты:*\n\n"
-    for report in reports[:20]:  # Последние 20
-        type_info = REPORT_TYPES.get(report.report_type, {"emoji": "❓", "name": "?"})
-        status_emoji = STATUS_EMOJI.get(report.status, "❓")
-        text += (
-            f"{status_emoji} *#{report.id}* {type_info['emoji']} "
-            f"{report.description[:40]}{'...' if len(report.description) > 40 else ''}\n"
-        )
+    names = {"user": "Пользователи", "fund": "Фонды наград"}
+    text = f"🗄 *Кэш объектов* ({len(identity_cache)} ключей)\n\n"
+    for kind, counts in identity_cache.stats().items():
+        total = counts["hits"] + counts["misses"]
+        rate = counts["hits"] / total * 100 if total else 0
+        text += f"{names.get(kind, kind)}: {counts['hits']}/{total} попаданий ({rate:.0f}%)\n"
 
-    await message.answer(text, parse_mode="Markdown", reply_markup=get_main_menu())
+    await message.answer(text, parse_mode="Markdown")
 
 
 @router.callback_query(F.data == "reports_list")
+@router.callback_query(F.data.startswith("reports_page:"))
 async def show_reports_list(callback: CallbackQuery):
-    """Показать список репортов"""
+    """Показать список репортов (страница от курсора из callback_data)"""
     if callback.from_user.id != ADMIN_USER_ID:
         await callback.answer("Только для админа")
         return
 
-    reports = get_all_reports()
-
-    if not reports:
-        await callback.message.edit_text(
-            "📋 *Репорты*\n\nПока нет репортов.",
-            parse_mode="Markdown",
-            reply_markup=get_main_menu()
-        )
-    else:
-        text = "📋 *Все репорты:*\n\n"
-        for report in reports[:20]:
-            type_info = REPORT_TYPES.get(report.report_type, {"emoji": "❓", "name": "?"})
-            status_emoji = STATUS_EMOJI.get(report.status, "❓")
-            text += (
-                f"{status_emoji} *#{report.id}* {type_info['emoji']} "
-                f"{report.description[:40]}{'...' if len(report.description) > 40 else ''}\n"
-            )
-        await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=get_main_menu())
-
+    cursor = callback.data.split(":", 1)[1] if ":" in callback.data else None
+    page = get_reports_page(cursor=cursor)
+    await callback.message.edit_text(
+        format_reports_page(page),
+        parse_mode="Markdown",
+        reply_markup=get_reports_keyboard(page)
+    )
     await callback.answer()
 
 
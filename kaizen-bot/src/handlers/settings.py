@@ -7,6 +7,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from src.database.crud import get_user_by_telegram_id, update_user_settings
+from src.scheduler.jobs import reschedule_user_reminders
 from src.keyboards.inline import get_main_menu
 
 router = Router()
@@ -201,10 +202,10 @@ async def save_morning_time(callback: CallbackQuery):
         morning_hour=hour,
         morning_minute=minute
     )
+    reschedule_user_reminders(user)
 
     await callback.message.edit_text(
-        f"✅ Утреннее напоминание установлено на *{hour:02d}:{minute:02d}*\n\n"
-        "⚠️ Изменения вступят в силу после перезапуска бота на сервере.",
+        f"✅ Утреннее напоминание установлено на *{hour:02d}:{minute:02d}*",
         parse_mode="Markdown",
         reply_markup=get_settings_keyboard()
     )
@@ -222,10 +223,10 @@ async def save_evening_time(callback: CallbackQuery):
         evening_hour=hour,
         evening_minute=minute
     )
+    reschedule_user_reminders(user)
 
     await callback.message.edit_text(
-        f"✅ Вечернее напоминание установлено на *{hour:02d}:{minute:02d}*\n\n"
-        "⚠️ Изменения вступят в силу после перезапуска бота на сервере.",
+        f"✅ Вечернее напоминание установлено на *{hour:02d}:{minute:02d}*",
         parse_mode="Markdown",
         reply_markup=get_settings_keyboard()
     )
@@ -264,12 +265,11 @@ async def toggle_task_reminder(callback: CallbackQuery):
 
     new_status = not user.task_reminders_enabled
 
-    update_user_settings(
+    user = update_user_settings(
         telegram_id=callback.from_user.id,
         task_reminders_enabled=new_status
     )
-
-    user = get_user_by_telegram_id(callback.from_user.id)
+    reschedule_user_reminders(user)
     status_text = "включены" if new_status else "выключены"
 
     await callback.message.edit_text(
@@ -310,10 +310,10 @@ async def save_task_reminder_time(callback: CallbackQuery):
         task_reminder_hour=hour,
         task_reminder_minute=minute
     )
+    reschedule_user_reminders(user)
 
     await callback.message.edit_text(
-        f"✅ Напоминание о задачах установлено на *{hour:02d}:{minute:02d}*\n\n"
-        "Изменения вступят в силу при следующей проверке.",
+        f"✅ Напоминание о задачах установлено на *{hour:02d}:{minute:02d}*",
         parse_mode="Markdown",
         reply_markup=get_task_reminder_settings_keyboard(
             user.task_reminders_enabled,
@@ -9,7 +9,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 
 from src.database.crud import (
-    get_or_create_user, get_user_someday, get_someday_item,
+    get_or_create_user, get_someday_page, get_someday_item,
     move_someday_to_inbox, delete_someday_item
 )
 from src.keyboards.inline import (
@@ -22,6 +22,22 @@ router = Router()
 
 # ============ Команда /someday ============
 
+def someday_list_view(page) -> tuple[str, object]:
+    """Текст и клавиатура страницы списка 'когда-нибудь'"""
+    if not page.items:
+        return (
+            "💭 *Когда-нибудь/может быть*\n\n"
+            "Список пуст. Сюда попадают идеи из Inbox, "
+            "к которым ты вернёшься когда-нибудь.",
+            get_someday_empty_keyboard()
+        )
+    return (
+        f"💭 *Когда-нибудь/может быть* ({page.total})\n\n"
+        "Идеи, к которым вернёшься позже:",
+        get_someday_keyboard(page)
+    )
+
+
 @router.message(Command("someday"))
 async def cmd_someday(message: Message):
     """Показать список 'когда-нибудь'"""
@@ -30,50 +46,22 @@ async def cmd_someday(message: Message):
         message.from_user.username,
         message.from_user.first_name
     )
-    items = get_user_someday(user.id)
-
-    if not items:
-        await message.answer(
-            "💭 *Когда-нибудь/может быть*\n\n"
-            "Список пуст. Сюда попадают идеи из Inbox, "
-            "к которым ты вернёшься когда-нибудь.",
-            parse_mode="Markdown",
-            reply_markup=get_someday_empty_keyboard()
-        )
-    else:
-        await message.answer(
-            f"💭 *Когда-нибудь/может быть* ({len(items)})\n\n"
-            "Идеи, к которым вернёшься позже:",
-            parse_mode="Markdown",
-            reply_markup=get_someday_keyboard(items)
-        )
+    text, keyboard = someday_list_view(get_someday_page(user.id))
+    await message.answer(text, parse_mode="Markdown", reply_markup=keyboard)
 
 
 @router.callback_query(F.data == "someday_show")
+@router.callback_query(F.data.startswith("someday_page:"))
 async def callback_someday_show(callback: CallbackQuery):
-    """Показать список 'когда-нибудь' (callback)"""
+    """Показать список 'когда-нибудь' (callback; someday_page:<cursor> — листание)"""
     user = get_or_create_user(
         callback.from_user.id,
         callback.from_user.username,
         callback.from_user.first_name
     )
-    items = get_user_someday(user.id)
-
-    if not items:
-        await callback.message.edit_text(
-            "💭 *Когда-нибудь/может быть*\n\n"
-            "Список пуст. Сюда попадают идеи из Inbox, "
-            "к которым ты вернёшься когда-нибудь.",
-            parse_mode="Markdown",
-            reply_markup=get_someday_empty_keyboard()
-        )
-    else:
-        await callback.message.edit_text(
-            f"💭 *Когда-нибудь/может быть* ({len(items)})\n\n"
-            "Идеи, к которым вернёшься позже:",
-            parse_mode="Markdown",
-            reply_markup=get_someday_keyboard(items)
-        )
+    cursor = callback.data.split(":", 1)[1] if ":" in callback.data else None
+    text, keyboard = someday_list_view(get_someday_page(user.id, cursor=cursor))
+    await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
     await callback.answer()
 
 
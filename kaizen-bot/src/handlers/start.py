@@ -2,8 +2,9 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 
-from src.database.crud import get_or_create_user
+from src.database.crud_async import get_or_create_user
 from src.keyboards.inline import get_main_menu
+from src.scheduler.jobs import reschedule_user_reminders
 
 router = Router()
 
@@ -25,11 +26,12 @@ WELCOME_MESSAGE = """
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     """Команда /start"""
-    user = get_or_create_user(
+    user = await get_or_create_user(
         telegram_id=message.from_user.id,
         username=message.from_user.username,
         first_name=message.from_user.first_name
     )
+    reschedule_user_reminders(user)
 
     await message.answer(
         WELCOME_MESSAGE,
@@ -10,19 +10,18 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from src.database.crud import get_user_by_telegram_id, get_unified_tasks
+from src.database.crud import get_user_by_telegram_id
 from src.database.crud_rewards import add_reward, get_reward_balance
 from src.database.models import get_session, DailyEntry
 from src.database.crud_user_tasks import (
     add_user_task,
-    get_user_tasks,
     get_user_task,
     update_user_task,
     delete_user_task,
     complete_user_task,
     get_task_completions_today,
     get_task_history,
-    get_user_stats_today
+    get_tasks_view
 )
 from src.keyboards.inline_user_tasks import (
     get_tasks_main_menu,
@@ -36,24 +35,17 @@ from src.keyboards.inline_user_tasks import (
 from src.keyboards.inline import get_main_menu
 
 
-def _get_tasks_keyboard_data(user_id: int):
+def _get_tasks_keyboard_data(user_id: int, filter_type: str = "all"):
     """
     Вспомогательная функция для получения данных для клавиатуры задач.
     Возвращает tuple: (tasks, completions_today, stats_today, inbox_tasks, daily_entry)
     """
-    unified = get_unified_tasks(user_id, filter_type="all")
-    tasks = unified["user_tasks"]
-    inbox_tasks = unified["inbox_tasks"]
-    daily_entry = unified["daily_entry"]
-
-    stats_today = get_user_stats_today(user_id)
-
-    completions_today = {}
-    for task in tasks:
-        count = get_task_completions_today(user_id, task.id)
-        completions_today[task.id] = count
+    view = get_tasks_view(user_id, filter_type=filter_type)
+    return (
+        view["user_tasks"], view["completions_today"], view["stats_today"],
+        view["inbox_tasks"], view["daily_entry"]
+    )
 
-    return tasks, completions_today, stats_today, inbox_tasks, daily_entry
 
 router = Router()
 
@@ -79,18 +71,7 @@ async def cmd_tasks(message: Message):
         return
 
     # Получить unified данные
-    unified = get_unified_tasks(user.id, filter_type="all")
-    tasks = unified["user_tasks"]
-    inbox_tasks = unified["inbox_tasks"]
-    daily_entry = unified["daily_entry"]
-
-    stats_today = get_user_stats_today(user.id)
-
-    # Подсчитать выполнения за сегодня
-    completions_today = {}
-    for task in tasks:
-        count = get_task_completions_today(user.id, task.id)
-        completions_today[task.id] = count
+    tasks, completions_today, stats_today, inbox_tasks, daily_entry = _get_tasks_keyboard_data(user.id)
 
     text = "📋 *Мои задачи*\n\n"
 
@@ -143,17 +124,7 @@ async def show_tasks(callback: CallbackQuery, state: FSMContext):
         return
 
     # Unified данные
-    unified = get_unified_tasks(user.id, filter_type="all")
-    tasks = unified["user_tasks"]
-    inbox_tasks = unified["inbox_tasks"]
-    daily_entry = unified["daily_entry"]
-
-    stats_today = get_user_stats_today(user.id)
-
-    completions_today = {}
-    for task in tasks:
-        count = get_task_completions_today(user.id, task.id)
-        completions_today[task.id] = count
+    tasks, completions_today, stats_today, inbox_tasks, daily_entry = _get_tasks_keyboard_data(user.id)
 
     text = "📋 *Мои задачи*\n\n"
 
@@ -224,17 +195,7 @@ async def filter_tasks(callback: CallbackQuery):
         return
 
     # Получить unified данные с фильтром
-    unified = get_unified_tasks(user.id, filter_type=filter_type)
-    tasks = unified["user_tasks"]
-    inbox_tasks = unified["inbox_tasks"]
-    daily_entry = unified["daily_entry"]
-
-    stats_today = get_user_stats_today(user.id)
-
-    completions_today = {}
-    for task in tasks:
-        count = get_task_completions_today(user.id, task.id)
-        completions_today[task.id] = count
+    tasks, completions_today, stats_today, inbox_tasks, daily_entry = _get_tasks_keyboard_data(user.id, filter_type)
 
     text = "📋 *Мои задачи*\n\n"
 
@@ -701,13 +662,6 @@ async def cancel_action(callback: CallbackQuery, state: FSMContext):
     if not user:
         return
 
-    tasks = get_user_tasks(user.id, active_only=True)
-    stats_today = get_user_stats_today(user.id)
-    completions_today = {}
-    for t in tasks:
-        count = get_task_completions_today(user.id, t.id)
-        completions_today[t.id] = count
-
     tasks, completions_today, stats_today, inbox_tasks, daily_entry = _get_tasks_keyboard_data(user.id)
 
     await callback.message.edit_text(
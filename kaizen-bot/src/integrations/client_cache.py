@@ -0,0 +1,70 @@
+"""
+Кэш Google Calendar клиентов по пользователю.
+
+Job'ы напоминаний, follow-up и синхронизации каждые несколько минут
+создают GoogleCalendarService для каждого пользователя. Без кэша каждый
+раз заново расшифровывается refresh token, собирается клиент API и
+обновляется access token. Кэш хранит готовые (credentials, service):
+credentials держат действующий access token, и запрос идёт сразу.
+
+LRU + TTL: не больше max_size пользователей, запись живёт ttl секунд.
+Запись привязана к зашифрованному токену — новый токен даёт промах.
+Явная инвалидация — из update_user_google_token / disable_calendar_sync.
+
+Модуль без зависимостей от Google-библиотек, чтобы crud мог его импортировать.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from src.config import GOOGLE_CLIENT_CACHE_SIZE, GOOGLE_CLIENT_CACHE_TTL
+
+
+class CalendarClientCache:
+    """LRU + TTL кэш (credentials, service) по user_id; потокобезопасный"""
+
+    def __init__(self, max_size: int = GOOGLE_CLIENT_CACHE_SIZE, ttl: float = GOOGLE_CLIENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # user_id -> (encrypted_token, expires_at, credentials, service)
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, encrypted_token: str) -> tuple | None:
+        """(credentials, service) или None, если записи нет, она устарела или токен сменился"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != encrypted_token or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, user_id: int, encrypted_token: str, credentials, service):
+        with self._lock:
+            self._entries[user_id] = (encrypted_token, time.monotonic() + self.ttl, credentials, service)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Забыть клиента пользователя (токен обновлён или календарь отключён)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Один кэш на процесс
+client_cache = CalendarClientCache()
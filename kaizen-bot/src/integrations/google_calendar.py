@@ -1,37 +1,205 @@
 """
 Google Calendar интеграция для kaizen-bot
 
-OAuth2 авторизация (OOB flow) + CRUD операции с событиями
+OAuth2 авторизация (OOB flow) + CRUD операции с событиями.
+AsyncGoogleCalendarService — неблокирующий фасад для хэндлеров и job'ов.
+Каждый запрос к API проходит через quota_governor (лимиты, повторы, circuit breaker):
+в потоке пула — одна попытка, ожидание квоты и паузы перед повторами — на event loop.
 """
 
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from typing import Optional
 
+import httplib2
+from google.auth.exceptions import RefreshError
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from src.integrations.client_cache import client_cache
+from src.integrations.quota import (
+    quota_governor, CalendarCircuitOpen, RetryLater, CALLS, THROTTLED, FAILED
+)
 
 from src.config import (
     GOOGLE_CLIENT_ID,
     GOOGLE_CLIENT_SECRET,
     GOOGLE_REDIRECT_URI,
     ENCRYPTION_KEY,
-    TIMEZONE
+    TIMEZONE,
+    GOOGLE_API_MAX_WORKERS,
+    GOOGLE_API_TIMEOUT,
+    GOOGLE_API_MAX_RETRIES
 )
 
 # Scopes для Calendar API
 SCOPES = ['https://www.googleapis.com/auth/calendar.events']
 
+# Операций в одном batch-запросе (рекомендация Google — не больше 50)
+BATCH_SIZE = 50
+
+# Приватное extended property, которым помечаются события, созданные ботом:
+# сверка выбирает только их (privateExtendedProperty)
+BOT_EVENT_PROPERTY = ("kaizenBot", "1")
+
+
+def bot_event_tag() -> dict:
+    """extendedProperties для тела события, создаваемого ботом"""
+    key, value = BOT_EVENT_PROPERTY
+    return {'private': {key: value}}
 
+
+@lru_cache(maxsize=1)
 def _get_fernet():
-    """Получить Fernet для шифрования/дешифрования токенов"""
+    """Получить Fernet для шифрования/дешифрования токенов (один на процесс)"""
     if not ENCRYPTION_KEY:
         return None
     from cryptography.fernet import Fernet
     return Fernet(ENCRYPTION_KEY.encode())
 
 
+@lru_cache(maxsize=1)
+def _discovery_doc() -> dict:
+    """Discovery-документ Calendar v3 из пакета: без сетевого запроса, парсится один раз"""
+    return json.loads(get_static_doc('calendar', 'v3'))
+
+
+_thread_local = threading.local()
+
+
+def _thread_http() -> httplib2.Http:
+    """
+    httplib2.Http на поток пула: он не потокобезопасен, а клиент из кэша
+    может выполняться из разных потоков. Соединения переиспользуются внутри потока.
+    """
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        # Таймаут сокета: зависший запрос не держит поток пула бесконечно
+        http = _thread_local.http = httplib2.Http(timeout=GOOGLE_API_TIMEOUT)
+    return http
+
+
+def _authorized_http(credentials: Credentials) -> AuthorizedHttp:
+    """AuthorizedHttp поверх Http текущего потока — того, который выполняет запрос"""
+    return AuthorizedHttp(credentials, http=_thread_http())
+
+
+# Статусы, после которых запрос стоит повторить (ограничение или сбой на стороне Google)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# 403 повторяется только для этих причин (остальные 403 — нет доступа)
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def _is_retryable(error: HttpError) -> bool:
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403 and isinstance(error.error_details, list):
+        return any(
+            isinstance(detail, dict) and detail.get("reason") in RATE_LIMIT_REASONS
+            for detail in error.error_details
+        )
+    return False
+
+
+def _retry_after(error: HttpError) -> float | None:
+    """Заголовок Retry-After (секунды), если Google его прислал"""
+    get_header = getattr(error.resp, "get", None)
+    try:
+        return float(get_header("retry-after")) if get_header else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Ошибки API, после которых методы синхронного сервиса возвращают пустой результат:
+# ответ Google и пауза circuit breaker
+API_ERRORS = (HttpError, CalendarCircuitOpen)
+
+
+def governed_call(user_id: int | None, method: str, func, cost: int = 1):
+    """
+    Одна попытка запроса к API через quota_governor (в потоке пула, без ожидания).
+
+    Нет квоты или 403 rateLimitExceeded / 429 / 5xx — RetryLater: фасад
+    подождёт на event loop и повторит вызов. Ошибки авторизации (401,
+    отозванный refresh token) считаются для circuit breaker, пока он открыт —
+    CalendarCircuitOpen. Остальные исключения пробрасываются как есть.
+    """
+    wait = quota_governor.try_acquire(user_id, cost)
+    if wait > 0:
+        raise RetryLater(wait, method=method)
+    quota_governor.record(method, CALLS)
+    try:
+        result = func()
+    except HttpError as e:
+        if _is_retryable(e):
+            quota_governor.record(method, THROTTLED)
+            raise RetryLater(_retry_after(e), error=e, method=method) from e
+        if e.resp.status == 401:
+            quota_governor.auth_failed(user_id)
+        quota_governor.record(method, FAILED)
+        raise
+    except RefreshError:
+        quota_governor.auth_failed(user_id)
+        quota_governor.record(method, FAILED)
+        raise
+    quota_governor.auth_ok(user_id)
+    return result
+
+
+class GovernedHttpRequest(HttpRequest):
+    """HttpRequest, выполняемый через governed_call (user_id — владелец клиента)"""
+
+    user_id = None
+
+    def execute(self, http=None, num_retries=0):
+        # Запрос могли собрать в другом потоке (event loop) — Http берём у исполняющего
+        if http is None:
+            http = _authorized_http(self.http.credentials)
+        return governed_call(
+            self.user_id,
+            self.methodId or self.method,
+            partial(super().execute, http=http, num_retries=num_retries)
+        )
+
+
+def _build_service(credentials: Credentials, user_id: int = None):
+    """Клиент Calendar API: каждый запрос идёт через Http текущего потока и quota_governor"""
+    def request_builder(http, *args, **kwargs):
+        request = GovernedHttpRequest(_authorized_http(credentials), *args, **kwargs)
+        request.user_id = user_id
+        return request
+
+    return build_from_document(
+        _discovery_doc(),
+        http=_authorized_http(credentials),
+        requestBuilder=request_builder
+    )
+
+
+def _event_ids(results: list[tuple[dict | None, Exception | None]]) -> list[str | None]:
+    """event_id из результатов batch-вставки (None — не создано)"""
+    event_ids = []
+    for response, error in results:
+        if error:
+            print(f"Error creating event: {error}")
+        event_ids.append(response['id'] if response else None)
+    return event_ids
+
+
+class SyncTokenExpired(Exception):
+    """410 Gone: syncToken больше не принимается, нужна полная синхронизация"""
+
+
 class GoogleCalendarService:
     """Сервис для работы с Google Calendar API"""
 
@@ -101,7 +269,16 @@ class GoogleCalendarService:
         return credentials.refresh_token
 
     def load_credentials(self, encrypted_refresh_token: str) -> bool:
-        """Загрузить credentials из encrypted refresh token"""
+        """
+        Загрузить credentials из encrypted refresh token.
+        Готовый клиент пользователя берётся из client_cache (с действующим access token).
+        """
+        if self.user_id is not None:
+            cached = client_cache.get(self.user_id, encrypted_refresh_token)
+            if cached:
+                self.credentials, self.service = cached
+                return True
+
         try:
             if self._fernet:
                 refresh_token = self._fernet.decrypt(encrypted_refresh_token.encode()).decode()
@@ -116,7 +293,9 @@ class GoogleCalendarService:
                 client_secret=GOOGLE_CLIENT_SECRET,
                 scopes=SCOPES
             )
-            self.service = build('calendar', 'v3', credentials=self.credentials)
+            self.service = _build_service(self.credentials, self.user_id)
+            if self.user_id is not None:
+                client_cache.put(self.user_id, encrypted_refresh_token, self.credentials, self.service)
             return True
         except Exception as e:
             print(f"Error loading credentials: {e}")
@@ -140,6 +319,27 @@ class GoogleCalendarService:
         if not self.service:
             raise ValueError("Service не инициализирован. Вызовите load_credentials().")
 
+        event = self._event_body(summary, start_time, end_time, description, is_priority)
+
+        try:
+            result = self.service.events().insert(
+                calendarId=calendar_id,
+                body=event
+            ).execute()
+            return result['id']
+        except API_ERRORS as e:
+            print(f"Error creating event: {e}")
+            raise
+
+    @staticmethod
+    def _event_body(
+        summary: str,
+        start_time: datetime,
+        end_time: datetime = None,
+        description: str = None,
+        is_priority: bool = False
+    ) -> dict:
+        """Тело события задачи для insert"""
         if end_time is None:
             end_time = start_time + timedelta(hours=1)
 
@@ -149,7 +349,7 @@ class GoogleCalendarService:
         # Префикс для приоритетной задачи
         title = f"⭐ {summary}" if is_priority else f"[Kaizen] {summary}"
 
-        event = {
+        return {
             'summary': title,
             'description': description or "Создано через Kaizen Bot",
             'start': {
@@ -167,18 +367,9 @@ class GoogleCalendarService:
                     {'method': 'popup', 'minutes': 15},
                 ],
             },
+            'extendedProperties': bot_event_tag(),
         }
 
-        try:
-            result = self.service.events().insert(
-                calendarId=calendar_id,
-                body=event
-            ).execute()
-            return result['id']
-        except HttpError as e:
-            print(f"Error creating event: {e}")
-            raise
-
     def update_event(
         self,
         event_id: str,
@@ -188,41 +379,51 @@ class GoogleCalendarService:
         description: str = None,
         calendar_id: str = "primary"
     ) -> bool:
-        """Обновить существующее событие"""
+        """Обновить существующее событие (patch только изменённых полей, без GET)"""
         if not self.service:
             return False
 
-        try:
-            event = self.service.events().get(
-                calendarId=calendar_id,
-                eventId=event_id
-            ).execute()
-
-            if summary:
-                event['summary'] = summary
-            if description:
-                event['description'] = description
-            if start_time:
-                event['start'] = {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': TIMEZONE,
-                }
-            if end_time:
-                event['end'] = {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': TIMEZONE,
-                }
+        event = {}
+        if summary:
+            event['summary'] = summary
+        if description:
+            event['description'] = description
+        if start_time:
+            event['start'] = {
+                'dateTime': start_time.isoformat(),
+                'timeZone': TIMEZONE,
+            }
+        if end_time:
+            event['end'] = {
+                'dateTime': end_time.isoformat(),
+                'timeZone': TIMEZONE,
+            }
+        if not event:
+            return True
 
-            self.service.events().update(
-                calendarId=calendar_id,
-                eventId=event_id,
-                body=event
-            ).execute()
+        try:
+            self.patch_request(event_id, event, calendar_id).execute()
             return True
-        except HttpError as e:
+        except API_ERRORS as e:
             print(f"Error updating event: {e}")
             return False
 
+    def move_event(
+        self,
+        event_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        calendar_id: str = "primary"
+    ) -> dict:
+        """
+        Перенести событие (patch start/end).
+        Raises: HttpError (404/410 — событие удалено в календаре)
+        """
+        return self.patch_request(event_id, {
+            'start': {'dateTime': start_time.isoformat(), 'timeZone': TIMEZONE},
+            'end': {'dateTime': end_time.isoformat(), 'timeZone': TIMEZONE},
+        }, calendar_id).execute()
+
     def delete_event(self, event_id: str, calendar_id: str = "primary") -> bool:
         """Удалить событие"""
         if not self.service:
@@ -234,33 +435,10 @@ class GoogleCalendarService:
                 eventId=event_id
             ).execute()
             return True
-        except HttpError as e:
+        except API_ERRORS as e:
             print(f"Error deleting event: {e}")
             return False
 
-    def get_today_events(self, calendar_id: str = "primary") -> list:
-        """Получить события на сегодня"""
-        if not self.service:
-            return []
-
-        try:
-            now = datetime.now()
-            start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = start_of_day + timedelta(days=1)
-
-            events_result = self.service.events().list(
-                calendarId=calendar_id,
-                timeMin=start_of_day.isoformat() + 'Z',
-                timeMax=end_of_day.isoformat() + 'Z',
-                maxResults=50,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            return events_result.get('items', [])
-        except HttpError as e:
-            print(f"Error getting events: {e}")
-            return []
-
     def get_event(self, event_id: str, calendar_id: str = "primary") -> dict | None:
         """Получить событие по ID"""
         if not self.service:
@@ -271,78 +449,139 @@ class GoogleCalendarService:
                 calendarId=calendar_id,
                 eventId=event_id
             ).execute()
-        except HttpError:
+        except API_ERRORS:
             return None
 
-    # === Методы для умных напоминаний и follow-up ===
+    # === Пакетная запись (batch endpoint) ===
 
-    def get_upcoming_events(
-        self,
-        minutes_ahead: int = 30,
-        calendar_id: str = "primary"
-    ) -> list:
+    def insert_request(self, event: dict, calendar_id: str = "primary"):
+        return self.service.events().insert(calendarId=calendar_id, body=event)
+
+    def patch_request(self, event_id: str, fields: dict, calendar_id: str = "primary"):
+        return self.service.events().patch(calendarId=calendar_id, eventId=event_id, body=fields)
+
+    def delete_request(self, event_id: str, calendar_id: str = "primary"):
+        return self.service.events().delete(calendarId=calendar_id, eventId=event_id)
+
+    def execute_batch(self, requests: list) -> list[tuple[dict | None, Exception | None]]:
         """
-        Получить события, начинающиеся в ближайшие N минут.
-        Используется для умных напоминаний.
+        Выполнить запросы (insert/patch/delete_request) через batch endpoint:
+        один HTTP-запрос на каждые BATCH_SIZE операций.
+
+        Returns: [(response, error)] в порядке requests
+        Raises: RetryLater — пачку ограничили целиком (фасад повторяет по одной пачке)
         """
         if not self.service:
-            return []
+            error = ValueError("Service не инициализирован. Вызовите load_credentials().")
+            return [(None, error)] * len(requests)
+
+        results = [(None, None)] * len(requests)
+
+        def on_result(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+            if isinstance(exception, HttpError) and _is_retryable(exception):
+                # Операцию внутри пачки ограничили — притормаживаем следующие запросы
+                quota_governor.record("calendar.batch", THROTTLED)
+                quota_governor.throttle(self.user_id, quota_governor.backoff(0, _retry_after(exception)))
+
+        for offset in range(0, len(requests), BATCH_SIZE):
+            chunk = requests[offset:offset + BATCH_SIZE]
+            batch = self.service.new_batch_http_request(callback=on_result)
+            for index, request in enumerate(chunk, start=offset):
+                batch.add(request, request_id=str(index))
+            try:
+                # Пачка расходует квоту как len(chunk) запросов; без http batch взял бы
+                # Http первого запроса — потока, который его собрал
+                execute = partial(batch.execute, http=_authorized_http(self.credentials))
+                governed_call(self.user_id, "calendar.batch", execute, cost=len(chunk))
+            except API_ERRORS as e:
+                # Пачка не ушла целиком
+                for index in range(offset, offset + len(chunk)):
+                    results[index] = (None, e)
+        return results
+
+    def create_events(self, events: list[dict], calendar_id: str = "primary") -> list[str | None]:
+        """
+        Создать несколько событий задач одним batch-запросом.
 
-        try:
-            now = datetime.now()
-            time_max = now + timedelta(minutes=minutes_ahead)
+        Args:
+            events: аргументы create_event (summary, start_time, end_time, description, is_priority)
 
-            events_result = self.service.events().list(
-                calendarId=calendar_id,
-                timeMin=now.isoformat() + 'Z',
-                timeMax=time_max.isoformat() + 'Z',
-                maxResults=20,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            return events_result.get('items', [])
-        except HttpError as e:
-            print(f"Error getting upcoming events: {e}")
-            return []
+        Returns: event_id для каждого события (None — не создано)
+        """
+        return _event_ids(self.execute_batch(self._insert_requests(events, calendar_id)))
+
+    def _insert_requests(self, events: list[dict], calendar_id: str = "primary") -> list:
+        return [self.insert_request(self._event_body(**event), calendar_id) for event in events]
 
-    def get_recently_ended_events(
+    # === Выборки для зеркала и сверки ===
+
+    def list_event_changes(
         self,
-        minutes_past: int = 10,
-        calendar_id: str = "primary"
-    ) -> list:
+        calendar_id: str = "primary",
+        sync_token: str = None,
+        time_min: datetime = None,
+        time_max: datetime = None
+    ) -> tuple[list, str | None]:
+        """
+        Выборка для локального зеркала, все страницы (nextPageToken).
+        С sync_token — только изменения с прошлой выборки (отменённые приходят
+        со status="cancelled"), без него — полная выборка окна [time_min, time_max].
+
+        Returns: (events, next_sync_token)
+        Raises: SyncTokenExpired (410 Gone), HttpError
+        """
+        if not self.service:
+            return [], None
+
+        params = {'calendarId': calendar_id, 'singleEvents': True, 'maxResults': 250}
+        if sync_token:
+            params['syncToken'] = sync_token
+        else:
+            if time_min:
+                params['timeMin'] = time_min.isoformat()
+            if time_max:
+                params['timeMax'] = time_max.isoformat()
+
+        events = []
+        page_token = None
+        while True:
+            try:
+                result = self.service.events().list(pageToken=page_token, **params).execute()
+            except HttpError as e:
+                if e.resp.status == 410:
+                    raise SyncTokenExpired(calendar_id) from e
+                raise
+            events.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return events, result.get('nextSyncToken')
+
+    def list_bot_events(self, updated_min: datetime, calendar_id: str = "primary") -> list:
         """
-        Получить события, завершившиеся за последние N минут.
-        Используется для follow-up триггеров.
+        События бота (помечены BOT_EVENT_PROPERTY), изменённые после updated_min,
+        включая удалённые (status="cancelled"). Все страницы.
+        Raises: HttpError
         """
         if not self.service:
             return []
 
-        try:
-            now = datetime.now()
-            time_min = now - timedelta(minutes=minutes_past)
-
-            events_result = self.service.events().list(
+        key, value = BOT_EVENT_PROPERTY
+        events = []
+        page_token = None
+        while True:
+            result = self.service.events().list(
                 calendarId=calendar_id,
-                timeMin=time_min.isoformat() + 'Z',
-                timeMax=now.isoformat() + 'Z',
-                maxResults=20,
-                singleEvents=True,
-                orderBy='startTime'
+                privateExtendedProperty=f"{key}={value}",
+                updatedMin=updated_min.isoformat(),
+                showDeleted=True,
+                maxResults=250,
+                pageToken=page_token
             ).execute()
-
-            # Фильтруем только завершившиеся (end < now)
-            ended_events = []
-            for event in events_result.get('items', []):
-                end_str = event.get('end', {}).get('dateTime')
-                if end_str:
-                    # Парсим время окончания
-                    end_time = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
-                    if end_time.replace(tzinfo=None) <= now:
-                        ended_events.append(event)
-            return ended_events
-        except HttpError as e:
-            print(f"Error getting recently ended events: {e}")
-            return []
+            events.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return events
 
     def update_event_color(
         self,
@@ -358,20 +597,9 @@ class GoogleCalendarService:
             return False
 
         try:
-            event = self.service.events().get(
-                calendarId=calendar_id,
-                eventId=event_id
-            ).execute()
-
-            event['colorId'] = color_id
-
-            self.service.events().update(
-                calendarId=calendar_id,
-                eventId=event_id,
-                body=event
-            ).execute()
+            self.patch_request(event_id, {'colorId': color_id}, calendar_id).execute()
             return True
-        except HttpError as e:
+        except API_ERRORS as e:
             print(f"Error updating event color: {e}")
             return False
 
@@ -425,6 +653,7 @@ class GoogleCalendarService:
                 },
                 'recurrence': [recurrence_rule],
                 'colorId': "8",  # Серый по умолчанию (не выполнено)
+                'extendedProperties': bot_event_tag(),
                 'reminders': {
                     'useDefault': False,
                     'overrides': [
@@ -438,6 +667,146 @@ class GoogleCalendarService:
                 body=event
             ).execute()
             return result['id']
-        except HttpError as e:
+        except API_ERRORS as e:
             print(f"Error creating recurring event: {e}")
             return None
+
+
+# === Асинхронный фасад ===
+
+# Общий ограниченный пул на все запросы к Google API: event loop не блокируется,
+# а одновременных HTTP-запросов не больше GOOGLE_API_MAX_WORKERS
+_executor = ThreadPoolExecutor(max_workers=GOOGLE_API_MAX_WORKERS, thread_name_prefix="gcal")
+
+# Маркер "при таймауте пробросить исключение"
+_RAISE = object()
+
+
+class AsyncGoogleCalendarService:
+    """
+    Awaitable-обёртка над GoogleCalendarService.
+
+    Каждый блокирующий вызов уходит в общий пул потоков и ограничен
+    таймаутом; в потоке — одна попытка. Ожидание квоты и паузы перед повторами
+    ограниченных запросов (до GOOGLE_API_MAX_RETRIES) выдерживаются на event loop.
+    Пока синхронизация пользователя на паузе (circuit breaker), методы с пустым
+    результатом сразу возвращают его. При таймауте методы ведут себя как синхронные при HttpError:
+    чтение возвращает пустой результат, изменение — False/None,
+    а create_event(s), move_event, exchange_code, list_event_changes, list_bot_events,
+    execute и execute_batch пробрасывают asyncio.TimeoutError.
+    """
+
+    def __init__(self, user_id: int = None, timeout: float = GOOGLE_API_TIMEOUT):
+        self.sync = GoogleCalendarService(user_id)
+        self.timeout = timeout
+
+    @property
+    def user_id(self) -> int | None:
+        return self.sync.user_id
+
+    @property
+    def service(self):
+        """googleapiclient Resource — для сборки запросов, выполнять через execute()"""
+        return self.sync.service
+
+    async def _call(self, func, *args, default=_RAISE, **kwargs):
+        """Выполнить блокирующий func в пуле с таймаутом, повторяя после RetryLater"""
+        if default is not _RAISE and quota_governor.is_open(self.user_id):
+            return default
+
+        name = getattr(func, "__name__", repr(func))
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            future = loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                print(f"Google API timeout ({self.timeout}s) in {name} for user {self.user_id}")
+                if default is _RAISE:
+                    raise
+                return default
+            except RetryLater as e:
+                if e.error is None:
+                    # Квоты пока нет — ждём токены, попытка не расходуется
+                    await quota_governor.sleep(e.delay)
+                    continue
+                if attempt >= GOOGLE_API_MAX_RETRIES:
+                    quota_governor.record(e.method, FAILED)
+                    print(f"Google API throttled in {name} for user {self.user_id}: {e.error}")
+                    if default is _RAISE:
+                        raise e.error from None
+                    return default
+                # Притормаживаем и остальные запросы пользователя на время паузы
+                delay = quota_governor.backoff(attempt, e.delay)
+                quota_governor.throttle(self.user_id, delay)
+                attempt += 1
+                await quota_governor.sleep(delay)
+
+    # === OAuth2 ===
+
+    def get_auth_url(self) -> tuple[str, str]:
+        """Сетевых запросов нет — вызывается синхронно"""
+        return self.sync.get_auth_url()
+
+    async def exchange_code(self, code: str, state: str) -> str:
+        return await self._call(self.sync.exchange_code, code, state)
+
+    async def load_credentials(self, encrypted_refresh_token: str) -> bool:
+        # Синхронизация на паузе после ошибок авторизации — job'ы пропускают пользователя
+        if quota_governor.is_open(self.user_id):
+            return False
+        return await self._call(self.sync.load_credentials, encrypted_refresh_token, default=False)
+
+    # === Event CRUD ===
+
+    async def execute(self, request):
+        """Выполнить произвольный запрос, собранный через self.service"""
+        return await self._call(request.execute)
+
+    async def create_event(self, *args, **kwargs) -> str:
+        return await self._call(self.sync.create_event, *args, **kwargs)
+
+    async def execute_batch(self, requests: list) -> list[tuple[dict | None, Exception | None]]:
+        """
+        По одной пачке (BATCH_SIZE) на вызов пула: повтор ограниченной пачки
+        не отправляет заново уже записанные
+        """
+        results = []
+        for offset in range(0, len(requests), BATCH_SIZE):
+            chunk = requests[offset:offset + BATCH_SIZE]
+            try:
+                results.extend(await self._call(self.sync.execute_batch, chunk))
+            except HttpError as e:
+                # Пачку ограничивали до последнего повтора
+                results.extend([(None, e)] * len(chunk))
+        return results
+
+    async def create_events(self, events: list[dict], calendar_id: str = "primary") -> list[str | None]:
+        # Запросы собираются в пуле, как и выполняются — не в потоке event loop
+        requests = await self._call(self.sync._insert_requests, events, calendar_id)
+        return _event_ids(await self.execute_batch(requests))
+
+    async def update_event(self, *args, **kwargs) -> bool:
+        return await self._call(self.sync.update_event, *args, default=False, **kwargs)
+
+    async def move_event(self, *args, **kwargs) -> dict:
+        return await self._call(self.sync.move_event, *args, **kwargs)
+
+    async def delete_event(self, *args, **kwargs) -> bool:
+        return await self._call(self.sync.delete_event, *args, default=False, **kwargs)
+
+    async def get_event(self, *args, **kwargs) -> dict | None:
+        return await self._call(self.sync.get_event, *args, default=None, **kwargs)
+
+    async def list_event_changes(self, *args, **kwargs) -> tuple[list, str | None]:
+        return await self._call(self.sync.list_event_changes, *args, **kwargs)
+
+    async def list_bot_events(self, *args, **kwargs) -> list:
+        return await self._call(self.sync.list_bot_events, *args, **kwargs)
+
+    async def update_event_color(self, *args, **kwargs) -> bool:
+        return await self._call(self.sync.update_event_color, *args, default=False, **kwargs)
+
+    async def create_recurring_event(self, *args, **kwargs) -> str | None:
+        return await self._call(self.sync.create_recurring_event, *args, default=None, **kwargs)
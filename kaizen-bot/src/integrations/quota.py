@@ -0,0 +1,227 @@
+"""
+Квота запросов к Google Calendar API.
+
+Все запросы к API (включая batch) проходят через quota_governor:
+- token bucket на процесс и на пользователя — всплеск job'ов не выбивает
+  лимиты Google (403 rateLimitExceeded / 429);
+- при ограничении — экспоненциальная задержка с jitter, bucket пользователя
+  ставится на паузу, чтобы остальные его запросы тоже подождали;
+- потоки пула не спят: запрос без квоты или ограниченный API заканчивается
+  RetryLater, а ожидание и повтор выполняет фасад на event loop (asyncio.sleep);
+- circuit breaker: после AUTH_FAILURE_THRESHOLD ошибок авторизации подряд
+  (отозванный refresh token) синхронизация пользователя приостанавливается
+  на GOOGLE_AUTH_CIRCUIT_HOURS вместо бесконечных повторов;
+- счётчики calls / throttled / failed по методам API.
+
+Одна попытка (governed_call), цикл повторов и классификация HttpError — в google_calendar.py.
+Модуль без зависимостей от Google-библиотек, чтобы crud мог его импортировать.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+
+from src.config import (
+    GOOGLE_API_GLOBAL_RATE, GOOGLE_API_USER_RATE, GOOGLE_API_USER_BURST,
+    GOOGLE_API_BACKOFF_BASE, GOOGLE_API_BACKOFF_MAX,
+    GOOGLE_AUTH_FAILURE_THRESHOLD, GOOGLE_AUTH_CIRCUIT_HOURS
+)
+
+# Исходы вызова для счётчиков
+CALLS, THROTTLED, FAILED = "calls", "throttled", "failed"
+
+
+class CalendarCircuitOpen(Exception):
+    """Синхронизация пользователя приостановлена после повторных ошибок авторизации"""
+
+    def __init__(self, user_id: int):
+        super().__init__(f"Calendar sync paused for user {user_id}: repeated auth failures")
+        self.user_id = user_id
+
+
+class RetryLater(Exception):
+    """
+    Запрос не выполнен: квоты нет (error=None, delay — сколько ждать токенов)
+    или API ответил ограничением (error — HttpError, delay — Retry-After).
+    Поток пула не ждёт — фасад выдерживает паузу на event loop и повторяет вызов.
+    """
+
+    def __init__(self, delay: float = None, error: Exception = None, method: str = None):
+        super().__init__(f"Retry {method or 'request'} later: {error or f'quota, {delay:.2f}s'}")
+        self.delay = delay
+        self.error = error
+        self.method = method
+
+
+class QuotaBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity подряд.
+    Не блокирует: wait_time() говорит, сколько ждать, take() списывает.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait_time(self, cost: float) -> float:
+        """Сколько ждать до cost токенов; 0 — можно списывать"""
+        cost = min(cost, self.capacity)
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= cost:
+                return 0
+            return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float):
+        with self._lock:
+            self.tokens -= min(cost, self.capacity)
+
+    def pause(self, seconds: float):
+        """Не выдавать токены seconds секунд (API попросил притормозить)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0
+
+
+class QuotaGovernor:
+    """Лимиты, circuit breaker и счётчики запросов к Calendar API; потокобезопасный"""
+
+    def __init__(
+        self,
+        global_rate: float = GOOGLE_API_GLOBAL_RATE,
+        user_rate: float = GOOGLE_API_USER_RATE,
+        user_burst: float = GOOGLE_API_USER_BURST,
+        backoff_base: float = GOOGLE_API_BACKOFF_BASE,
+        backoff_max: float = GOOGLE_API_BACKOFF_MAX,
+        auth_failure_threshold: int = GOOGLE_AUTH_FAILURE_THRESHOLD,
+        circuit_seconds: float = GOOGLE_AUTH_CIRCUIT_HOURS * 3600,
+        clock=time.monotonic,
+        sleep=asyncio.sleep
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.auth_failure_threshold = auth_failure_threshold
+        self.circuit_seconds = circuit_seconds
+        self.clock = clock
+        self.sleep = sleep
+
+        self.global_bucket = QuotaBucket(global_rate, max(global_rate, user_burst), clock)
+        self._user_buckets: dict[int, QuotaBucket] = {}
+        self._auth_failures: dict[int, int] = {}
+        self._open_until: dict[int, float] = {}
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: {CALLS: 0, THROTTLED: 0, FAILED: 0})
+        self._lock = threading.Lock()
+        self._acquire_lock = threading.Lock()
+
+    def _user_bucket(self, user_id: int) -> QuotaBucket:
+        with self._lock:
+            bucket = self._user_buckets.get(user_id)
+            if bucket is None:
+                bucket = QuotaBucket(self.user_rate, self.user_burst, self.clock)
+                self._user_buckets[user_id] = bucket
+            return bucket
+
+    # === Лимиты ===
+
+    def try_acquire(self, user_id: int | None, cost: float = 1) -> float:
+        """
+        Списать квоту на cost запросов без ожидания.
+        Returns: 0 — списано, иначе сколько секунд подождать (ничего не списано)
+        Raises: CalendarCircuitOpen, если пользователь на паузе
+        """
+        if self.is_open(user_id):
+            raise CalendarCircuitOpen(user_id)
+        buckets = [self.global_bucket]
+        if user_id is not None:
+            buckets.append(self._user_bucket(user_id))
+        # Проверка и списание во всех bucket'ах — одним шагом для всех потоков
+        with self._acquire_lock:
+            wait = max(bucket.wait_time(cost) for bucket in buckets)
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.take(cost)
+            return wait
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Задержка перед повтором attempt (с 0): экспонента с jitter, не меньше Retry-After"""
+        delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+        delay *= random.uniform(0.5, 1.0)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def throttle(self, user_id: int | None, delay: float):
+        """API ответил ограничением: притормозить запросы пользователя (без пользователя — все)"""
+        bucket = self._user_bucket(user_id) if user_id is not None else self.global_bucket
+        bucket.pause(delay)
+
+    # === Circuit breaker ===
+
+    def is_open(self, user_id: int | None) -> bool:
+        """Синхронизация пользователя на паузе после ошибок авторизации?"""
+        if user_id is None:
+            return False
+        with self._lock:
+            open_until = self._open_until.get(user_id)
+            if open_until is None:
+                return False
+            if self.clock() < open_until:
+                return True
+            # Пауза истекла: следующий запрос пробный, одна ошибка снова откроет
+            del self._open_until[user_id]
+            self._auth_failures[user_id] = self.auth_failure_threshold - 1
+            return False
+
+    def auth_failed(self, user_id: int | None) -> bool:
+        """Учесть ошибку авторизации. Returns: True, если синхронизация поставлена на паузу"""
+        if user_id is None:
+            return False
+        with self._lock:
+            failures = self._auth_failures.get(user_id, 0) + 1
+            self._auth_failures[user_id] = failures
+            if failures < self.auth_failure_threshold:
+                return False
+            self._open_until[user_id] = self.clock() + self.circuit_seconds
+        print(f"[CALENDAR QUOTA] User {user_id}: {failures} auth failures, "
+              f"sync paused for {self.circuit_seconds / 3600:g}h")
+        return True
+
+    def auth_ok(self, user_id: int | None):
+        if user_id is not None and user_id in self._auth_failures:
+            with self._lock:
+                self._auth_failures.pop(user_id, None)
+
+    def reset(self, user_id: int):
+        """Снять паузу и забыть ошибки (пользователь переподключил календарь)"""
+        with self._lock:
+            self._auth_failures.pop(user_id, None)
+            self._open_until.pop(user_id, None)
+            self._user_buckets.pop(user_id, None)
+
+    # === Счётчики ===
+
+    def record(self, method: str, outcome: str):
+        with self._lock:
+            self._counters[method][outcome] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """{метод API: {"calls", "throttled", "failed"}}"""
+        with self._lock:
+            return {method: dict(counts) for method, counts in self._counters.items()}
+
+
+# Один governor на процесс
+quota_governor = QuotaGovernor()
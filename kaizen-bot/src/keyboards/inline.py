@@ -1,5 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from src.database.pagination import Page
 
 
 def get_main_menu() -> InlineKeyboardMarkup:
@@ -107,15 +108,22 @@ def get_back_keyboard() -> InlineKeyboardMarkup:
 
 # ============ GTD INBOX ============
 
-def get_inbox_keyboard(items: list, page: int = 0, per_page: int = 5) -> InlineKeyboardMarkup:
-    """Клавиатура inbox с пагинацией"""
-    builder = InlineKeyboardBuilder()
+def add_page_navigation(builder: InlineKeyboardBuilder, page: Page, callback_prefix: str):
+    """Кнопки ⬅️ / ➡️ с курсорами страницы в callback_data (<prefix>:<cursor>)"""
+    nav_buttons = []
+    if page.prev_cursor:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{callback_prefix}:{page.prev_cursor}"))
+    if page.next_cursor:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{callback_prefix}:{page.next_cursor}"))
+    if nav_buttons:
+        builder.row(*nav_buttons)
+
 
-    start = page * per_page
-    end = start + per_page
-    page_items = items[start:end]
+def get_inbox_keyboard(page: Page, callback_prefix: str = "inbox_page") -> InlineKeyboardMarkup:
+    """Клавиатура страницы inbox; callback_prefix — для листания отфильтрованного списка"""
+    builder = InlineKeyboardBuilder()
 
-    for item in page_items:
+    for item in page.items:
         text = item.text[:35] + ('...' if len(item.text) > 35 else '')
         builder.row(InlineKeyboardButton(
             text=f"📥 {text}",
@@ -123,13 +131,7 @@ def get_inbox_keyboard(items: list, page: int = 0, per_page: int = 5) -> InlineK
         ))
 
     # Навигация
-    nav_buttons = []
-    if page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"inbox_page:{page-1}"))
-    if end < len(items):
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"inbox_page:{page+1}"))
-    if nav_buttons:
-        builder.row(*nav_buttons)
+    add_page_navigation(builder, page, callback_prefix)
 
     # Действия
     builder.row(InlineKeyboardButton(text="🔍 Фильтр", callback_data="inbox_filter"))
@@ -238,17 +240,19 @@ def get_inbox_done_keyboard() -> InlineKeyboardMarkup:
 
 # ============ GTD SOMEDAY ============
 
-def get_someday_keyboard(items: list) -> InlineKeyboardMarkup:
-    """Клавиатура списка 'когда-нибудь'"""
+def get_someday_keyboard(page: Page) -> InlineKeyboardMarkup:
+    """Клавиатура страницы списка 'когда-нибудь'"""
     builder = InlineKeyboardBuilder()
 
-    for item in items[:10]:
+    for item in page.items:
         text = item.text[:35] + ('...' if len(item.text) > 35 else '')
         builder.row(InlineKeyboardButton(
             text=f"💭 {text}",
             callback_data=f"someday_item:{item.id}"
         ))
 
+    add_page_navigation(builder, page, "someday_page")
+
     builder.row(InlineKeyboardButton(text="🔙 Главное меню", callback_data="main_menu"))
     return builder.as_markup()
 
@@ -111,6 +111,12 @@ def get_reminder_settings_keyboard(
         ))
     builder.row(*time_buttons)
 
+    # Свои исключения для follow-up
+    builder.row(InlineKeyboardButton(
+        text="🚫 Исключения",
+        callback_data="reminder_exclusions"
+    ))
+
     # Назад
     builder.row(InlineKeyboardButton(
         text="🔙 Назад",
@@ -0,0 +1,44 @@
+"""
+Unit of work на апдейт: одна сессия SQLAlchemy и один коммит на весь хэндлер
+
+Сессия попадает в data["session"] — хэндлеры получают её параметром
+`session` и передают в CRUD (session=session). Внутри unit of work CRUD
+делает только flush(). Хэндлер, который после записей отвечает в Telegram,
+вызывает end_unit_of_work(session) до первого сетевого await — иначе
+блокировка записи SQLite держалась бы на время запроса к API. Если хэндлер
+этого не сделал, коммит выполняет middleware после него; при исключении
+незафиксированное откатывается целиком.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.database.models import get_session
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Открывает сессию на апдейт; коммитит в конце, если хэндлер не зафиксировал её сам"""
+
+    def __init__(self, session_factory: Callable = None):
+        self.session_factory = session_factory or get_session
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        session = self.session_factory()
+        session.info["unit_of_work"] = True
+        data["session"] = session
+        try:
+            result = await handler(event, data)
+            if session.info.get("unit_of_work"):
+                session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
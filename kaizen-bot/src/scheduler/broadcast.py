@@ -0,0 +1,155 @@
+"""
+Рассылка сообщений многим пользователям с учётом лимитов Telegram.
+
+Все broadcast job'ы из jobs.py отправляют через общий Broadcaster:
+- глобальный token bucket (~30 сообщений/сек на бота)
+- не чаще одного сообщения в секунду в один чат
+- ограниченное число одновременных отправок
+- TelegramRetryAfter → пауза всей рассылки и повтор
+- статистика по прогону: sent / failed / blocked / elapsed
+
+Сообщение — dict с аргументами bot.send_message (chat_id, text,
+parse_mode, reply_markup, ...). Необязательный ключ "on_sent" —
+callback, вызываемый после успешной доставки.
+"""
+
+import asyncio
+import time
+from typing import Iterable
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from src.config import BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_CHAT_INTERVAL
+
+# Сколько раз повторять сообщение после RetryAfter
+MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться токена (с учётом паузы после RetryAfter)"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов на seconds (Telegram попросил подождать)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class Broadcaster:
+    """Общий движок рассылки: один bucket на все job'ы бота"""
+
+    def __init__(
+        self,
+        rate: float = BROADCAST_RATE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        chat_interval: float = BROADCAST_CHAT_INTERVAL
+    ):
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.chat_interval = chat_interval
+        self._chat_next_at: dict[int, float] = {}
+
+    async def _wait_for_chat(self, chat_id: int):
+        """Лимит на чат: резервируем слот и ждём его"""
+        now = time.monotonic()
+        slot = max(now, self._chat_next_at.get(chat_id, 0.0))
+        self._chat_next_at[chat_id] = slot + self.chat_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _prune_chats(self):
+        """Забыть чаты, слот которых уже прошёл"""
+        now = time.monotonic()
+        self._chat_next_at = {
+            chat_id: next_at for chat_id, next_at in self._chat_next_at.items() if next_at > now
+        }
+
+    async def _send(self, bot, message: dict, stats: dict, name: str):
+        message = dict(message)
+        on_sent = message.pop("on_sent", None)
+        chat_id = message["chat_id"]
+
+        await self._wait_for_chat(chat_id)
+        for attempt in range(MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            try:
+                await bot.send_message(**message)
+            except TelegramRetryAfter as e:
+                stats["retried"] += 1
+                self.bucket.pause(e.retry_after)
+                if attempt == MAX_RETRIES:
+                    stats["failed"] += 1
+                    print(f"[BROADCAST] {name}: retry limit for {chat_id}")
+                continue
+            except TelegramForbiddenError:
+                # Пользователь заблокировал бота
+                stats["blocked"] += 1
+                return
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"[BROADCAST] {name}: error for {chat_id}: {e}")
+                return
+
+            stats["sent"] += 1
+            if on_sent:
+                try:
+                    on_sent()
+                except Exception as e:
+                    print(f"[BROADCAST] {name}: on_sent error for {chat_id}: {e}")
+            return
+
+    async def broadcast(self, bot, messages: Iterable[dict], name: str = "broadcast") -> dict:
+        """
+        Разослать сообщения пулом из concurrency воркеров.
+
+        Returns: {"sent", "failed", "blocked", "retried", "elapsed"}
+        """
+        stats = {"sent": 0, "failed": 0, "blocked": 0, "retried": 0, "elapsed": 0.0}
+        started = time.monotonic()
+        queue = iter(messages)
+
+        async def worker():
+            for message in queue:
+                await self._send(bot, message, stats, name)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        self._prune_chats()
+        stats["elapsed"] = round(time.monotonic() - started, 3)
+        print(
+            f"[BROADCAST] {name}: sent={stats['sent']} failed={stats['failed']} "
+            f"blocked={stats['blocked']} retried={stats['retried']} elapsed={stats['elapsed']}s"
+        )
+        return stats
+
+
+# Один экземпляр на процесс: глобальный лимит общий для всех рассылок
+broadcaster = Broadcaster()
+
+
+async def broadcast(bot, messages: Iterable[dict], name: str = "broadcast") -> dict:
+    """Разослать сообщения через общий Broadcaster"""
+    return await broadcaster.broadcast(bot, messages, name)
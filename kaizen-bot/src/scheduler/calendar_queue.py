@@ -0,0 +1,157 @@
+"""
+Очередь записи в Google Calendar
+
+Хэндлеры ставят задачу (enqueue_* из crud_calendar + wake()) и сразу отвечают
+пользователю — без запросов к Google API. Пул воркеров выполняет задачи в фоне:
+- очередь хранится в SQLite (calendar_jobs) и переживает перезапуск;
+- задачи одного пользователя склеиваются по (kind, job_key) и выполняются
+  по одной за раз;
+- при ошибке — повтор с экспоненциальной задержкой, после
+  CALENDAR_QUEUE_MAX_ATTEMPTS задача отбрасывается.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from src.config import (
+    CALENDAR_QUEUE_WORKERS, CALENDAR_QUEUE_MAX_ATTEMPTS,
+    CALENDAR_QUEUE_BACKOFF_BASE, CALENDAR_QUEUE_BACKOFF_MAX, CALENDAR_QUEUE_POLL_INTERVAL,
+    GOOGLE_API_TIMEOUT
+)
+from src.database.crud import get_user_by_id
+from src.database.crud_calendar import (
+    CALENDAR_JOB_PUSH, CALENDAR_JOB_EVENT,
+    claim_calendar_jobs, complete_calendar_job, fail_calendar_job, count_calendar_jobs
+)
+from src.scheduler.calendar_sync import sync_user_tasks_to_calendar, push_item_to_calendar
+
+# Аренда задачи воркером: с запасом на несколько вызовов API подряд
+JOB_LEASE = timedelta(seconds=GOOGLE_API_TIMEOUT * 6)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Задержка перед повтором: BASE, 2·BASE, 4·BASE, ... не больше MAX"""
+    return timedelta(seconds=min(CALENDAR_QUEUE_BACKOFF_BASE * 2 ** attempts, CALENDAR_QUEUE_BACKOFF_MAX))
+
+
+async def _push_tasks(user, payload: dict):
+    if not user.calendar_sync_enabled or not user.google_refresh_token_encrypted:
+        return
+    success, message = await sync_user_tasks_to_calendar(user)
+    if not success:
+        raise RuntimeError(message)
+
+
+async def _push_item(user, payload: dict):
+    if not user.google_refresh_token_encrypted:
+        return
+    await push_item_to_calendar(
+        user, payload["item_type"], payload["item_id"], datetime.fromisoformat(payload["start"])
+    )
+
+
+JOB_HANDLERS = {
+    CALENDAR_JOB_PUSH: _push_tasks,
+    CALENDAR_JOB_EVENT: _push_item,
+}
+
+
+class CalendarQueue:
+    """Диспетчер (забирает готовые задачи из БД) + пул воркеров"""
+
+    def __init__(
+        self,
+        workers: int = CALENDAR_QUEUE_WORKERS,
+        poll_interval: float = CALENDAR_QUEUE_POLL_INTERVAL,
+        handlers: dict = None
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self._wakeup: asyncio.Event | None = None
+        self._jobs: asyncio.Queue | None = None
+        self._busy_users: set[int] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def wake(self):
+        """Проверить очередь сейчас, не дожидаясь poll_interval (после постановки задачи)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Запустить диспетчер и воркеры в текущем event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._jobs = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"Calendar queue: {self.workers} workers, {count_calendar_jobs()} pending jobs")
+
+    async def stop(self):
+        """Остановить воркеры; незавершённые задачи останутся в БД и выполнятся после перезапуска"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._busy_users.clear()
+        self._wakeup = None
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            free = self.workers - len(self._busy_users)
+            if free > 0:
+                try:
+                    jobs = claim_calendar_jobs(free, JOB_LEASE, exclude_users=self._busy_users)
+                except Exception as e:
+                    print(f"Calendar queue claim error: {e}")
+                    jobs = []
+                for job in jobs:
+                    self._busy_users.add(job.user_id)
+                    self._jobs.put_nowait(job)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job = await self._jobs.get()
+            try:
+                await self.run_job(job)
+            except Exception as e:
+                # Сбой записи результата в БД: аренда истечёт, и задача выполнится снова
+                print(f"Calendar queue worker error: {e}")
+            finally:
+                self._busy_users.discard(job.user_id)
+                self.wake()
+
+    async def run_job(self, job) -> bool:
+        """Выполнить одну задачу и записать результат. Returns: True при успехе"""
+        try:
+            handler = self.handlers[job.kind]
+            user = get_user_by_id(job.user_id)
+            if user is not None:
+                await handler(user, json.loads(job.payload) if job.payload else {})
+        except Exception as e:
+            attempts = (job.attempts or 0) + 1
+            retry_at = None
+            if attempts < CALENDAR_QUEUE_MAX_ATTEMPTS:
+                retry_at = datetime.utcnow() + retry_delay(job.attempts or 0)
+            print(f"Calendar job {job.kind} for user {job.user_id} failed "
+                  f"(attempt {attempts}/{CALENDAR_QUEUE_MAX_ATTEMPTS}): {e}")
+            fail_calendar_job(job.id, job.generation, str(e), retry_at)
+            return False
+
+        complete_calendar_job(job.id, job.generation)
+        return True
+
+
+calendar_queue = CalendarQueue()
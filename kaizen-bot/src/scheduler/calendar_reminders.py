@@ -1,17 +1,31 @@
 """
 Умные напоминания о событиях календаря и follow-up триггеры.
 
-Два job'а запускаются каждые 5 минут:
-1. check_upcoming_events() — напоминания о предстоящих событиях
-2. check_ended_events() — follow-up после завершения событий
+Один job check_calendar_events() каждые 5 минут: инкрементальная синхронизация
+зеркала (syncToken — в ответе только изменения), затем окно
+[now - 10 мин, now + reminder_minutes_before] читается из локального
+зеркала calendar_events и питает оба конвейера:
+1. напоминания о событиях, начинающихся в ближайшие N минут
+2. follow-up после событий, завершившихся за последние 10 минут
+
+Каждое событие классифицируется один раз (event_classifier: время + маркеры
+бота + исключения пользователя). Строки calendar_event_reminders для событий
+тика создаются/читаются пачкой, отметки об отправке коммитятся одним разом
+на пользователя.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
 
-from src.database.models import get_session, User, CalendarEventReminder
+from src.config import CALENDAR_REMINDER_RETENTION_DAYS
+from src.database.models import get_session, User
 from src.database.crud import get_users_with_calendar_enabled
-from src.integrations.google_calendar import GoogleCalendarService
+from src.database.crud_calendar import (
+    get_calendar_events_between, get_or_create_event_reminders, purge_event_reminders
+)
+from src.integrations.google_calendar import AsyncGoogleCalendarService
+from src.scheduler.calendar_sync import sync_user_calendar
+from src.scheduler.event_classifier import ClassifiedEvent, get_event_classifier
+from src.scheduler.reminder_index import user_zone
 from src.keyboards.inline_calendar import get_followup_keyboard
 
 # Глобальная переменная для бота (устанавливается из jobs.py)
@@ -24,17 +38,8 @@ def set_bot(bot_instance):
     bot = bot_instance
 
 
-# Слова для исключения из follow-up
-EXCLUDED_KEYWORDS = [
-    "focus", "фокус",
-    "обед", "lunch",
-    "перерыв", "break",
-    "отдых", "rest",
-    "[kaizen]", "⭐"
-]
-
-# Минимальная длительность события для follow-up (минуты)
-MIN_EVENT_DURATION_MINUTES = 15
+# За сколько минут назад искать завершившиеся события для follow-up
+FOLLOWUP_LOOKBACK_MINUTES = 10
 
 
 def _is_in_quiet_hours(user: User) -> bool:
@@ -52,96 +57,112 @@ def _is_in_quiet_hours(user: User) -> bool:
         return start <= current_hour < end
 
 
-def _should_exclude_event(event: dict) -> bool:
-    """Проверить, нужно ли исключить событие из follow-up"""
-    summary = event.get('summary', '').lower()
-
-    # Проверяем ключевые слова
-    for keyword in EXCLUDED_KEYWORDS:
-        if keyword.lower() in summary:
-            return True
+def _reminder_row(item: ClassifiedEvent) -> dict | None:
+    """Строка calendar_event_reminders для события (None — без id или времени начала)"""
+    event_id = item.event.get('id')
+    if not event_id or not item.start:
+        return None
 
-    # Проверяем длительность
-    start_str = event.get('start', {}).get('dateTime')
-    end_str = event.get('end', {}).get('dateTime')
+    return {
+        "google_event_id": event_id,
+        # Время события в его таймзоне, без tzinfo
+        "event_start": item.start.replace(tzinfo=None),
+        "event_end": item.end.replace(tzinfo=None) if item.end else None,
+        "event_summary": (item.event.get('summary') or '')[:500],
+        "is_bot_created": item.is_bot_created,
+        "is_excluded": item.is_excluded,
+    }
+
+
+def split_event_window(
+    items: list[ClassifiedEvent],
+    now: datetime,
+    minutes_before: int,
+    lookback_minutes: int = FOLLOWUP_LOOKBACK_MINUTES
+) -> tuple[list, list]:
+    """
+    Разложить события окна на два конвейера.
+    Returns: (upcoming — начнутся в ближайшие minutes_before минут,
+              ended — завершились за последние lookback_minutes минут)
+    """
+    upcoming, ended = [], []
+    for item in items:
+        if item.start and now <= item.start <= now + timedelta(minutes=minutes_before):
+            upcoming.append(item)
+        if item.end and now - timedelta(minutes=lookback_minutes) <= item.end <= now:
+            ended.append(item)
+    return upcoming, ended
+
+
+async def _send_event_reminders(user, items: list[ClassifiedEvent], reminders: dict, minutes_before: int):
+    """Напоминания о предстоящих событиях (отметки коммитит вызывающий)"""
+    for item in items:
+        reminder = reminders.get(item.event.get('id'))
+        if not reminder:
+            continue
+
+        # Пропускаем если уже напоминали
+        if reminder.reminder_sent_at:
+            continue
+
+        # Отправляем напоминание
+        summary = item.event.get('summary', 'Событие')
+        time_str = item.start.strftime("%H:%M") if item.start else ""
 
-    if start_str and end_str:
         try:
-            start = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
-            duration = (end - start).total_seconds() / 60
-
-            if duration < MIN_EVENT_DURATION_MINUTES:
-                return True
-        except ValueError:
-            pass
-
-    return False
-
-
-def _get_or_create_reminder(
-    session,
-    user_id: int,
-    event: dict
-) -> Optional[CalendarEventReminder]:
-    """Получить или создать запись о напоминании"""
-    event_id = event.get('id')
-    if not event_id:
-        return None
+            await bot.send_message(
+                user.telegram_id,
+                f"📅 *Через {minutes_before} мин:* {summary}\n"
+                f"⏰ Начало: {time_str}",
+                parse_mode="Markdown"
+            )
 
-    # Ищем существующую запись
-    reminder = session.query(CalendarEventReminder).filter(
-        CalendarEventReminder.user_id == user_id,
-        CalendarEventReminder.google_event_id == event_id
-    ).first()
+            # Отмечаем что напомнили
+            reminder.reminder_sent_at = datetime.now()
 
-    if reminder:
-        return reminder
+        except Exception as e:
+            print(f"Error sending reminder to user {user.telegram_id}: {e}")
 
-    # Парсим время события
-    start_str = event.get('start', {}).get('dateTime')
-    end_str = event.get('end', {}).get('dateTime')
 
-    start_time = None
-    end_time = None
+async def _send_followups(user, items: list[ClassifiedEvent], reminders: dict):
+    """Follow-up после завершившихся событий (отметки коммитит вызывающий)"""
+    for item in items:
+        reminder = reminders.get(item.event.get('id'))
+        if not reminder:
+            continue
 
-    if start_str:
-        try:
-            start_time = datetime.fromisoformat(start_str.replace('Z', '+00:00')).replace(tzinfo=None)
-        except ValueError:
-            pass
+        # Пропускаем если уже отправляли follow-up
+        if reminder.followup_sent_at:
+            continue
 
-    if end_str:
-        try:
-            end_time = datetime.fromisoformat(end_str.replace('Z', '+00:00')).replace(tzinfo=None)
-        except ValueError:
-            pass
+        # Пропускаем исключённые события (созданные ботом, "focus", свои исключения, короткие) —
+        # по текущим исключениям пользователя, а не сохранённым в строке
+        if item.is_excluded:
+            continue
 
-    if not start_time:
-        return None
+        # Отправляем follow-up
+        summary = item.event.get('summary', 'Событие')
 
-    # Создаём новую запись
-    is_bot_created = any(kw in event.get('summary', '').lower() for kw in ['[kaizen]', '⭐'])
+        try:
+            await bot.send_message(
+                user.telegram_id,
+                f"✅ *Событие завершилось:* {summary}\n\n"
+                f"Есть action items для записи?",
+                parse_mode="Markdown",
+                reply_markup=get_followup_keyboard(reminder.id)
+            )
 
-    reminder = CalendarEventReminder(
-        user_id=user_id,
-        google_event_id=event_id,
-        event_start=start_time,
-        event_end=end_time,
-        event_summary=event.get('summary', '')[:500],
-        is_bot_created=is_bot_created,
-        is_excluded=_should_exclude_event(event)
-    )
-    session.add(reminder)
-    session.commit()
+            # Отмечаем что отправили follow-up
+            reminder.followup_sent_at = datetime.now()
 
-    return reminder
+        except Exception as e:
+            print(f"Error sending followup to user {user.telegram_id}: {e}")
 
 
-async def check_upcoming_events():
+async def check_calendar_events():
     """
-    Проверить предстоящие события и отправить напоминания.
-    Вызывается каждые 5 минут из APScheduler.
+    Напоминания о предстоящих событиях и follow-up после завершившихся.
+    Вызывается каждые 5 минут из APScheduler: один запрос к Google на пользователя.
     """
     if not bot:
         return
@@ -151,10 +172,6 @@ async def check_upcoming_events():
         users = get_users_with_calendar_enabled()
 
         for user in users:
-            # Пропускаем если напоминания выключены
-            if not user.event_reminders_enabled:
-                continue
-
             # Пропускаем если тихие часы
             if _is_in_quiet_hours(user):
                 continue
@@ -163,123 +180,58 @@ async def check_upcoming_events():
             if not user.google_refresh_token_encrypted:
                 continue
 
-            calendar_service = GoogleCalendarService(user.id)
-            if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
+            calendar_service = AsyncGoogleCalendarService(user.id)
+            if not await calendar_service.load_credentials(user.google_refresh_token_encrypted):
                 continue
 
-            # Получаем события в ближайшие N минут
+            # Окно вперёд нужно только если напоминания включены
             minutes_before = user.reminder_minutes_before or 15
-            events = calendar_service.get_upcoming_events(
-                minutes_ahead=minutes_before,
-                calendar_id=user.google_calendar_id or "primary"
-            )
-
-            for event in events:
-                reminder = _get_or_create_reminder(session, user.id, event)
-                if not reminder:
-                    continue
-
-                # Пропускаем если уже напоминали
-                if reminder.reminder_sent_at:
-                    continue
-
-                # Отправляем напоминание
-                summary = event.get('summary', 'Событие')
-                start_str = event.get('start', {}).get('dateTime', '')
-
-                # Форматируем время
-                time_str = ""
-                if start_str:
-                    try:
-                        start = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-                        time_str = start.strftime("%H:%M")
-                    except ValueError:
-                        pass
-
-                try:
-                    await bot.send_message(
-                        user.telegram_id,
-                        f"📅 *Через {minutes_before} мин:* {summary}\n"
-                        f"⏰ Начало: {time_str}",
-                        parse_mode="Markdown"
-                    )
-
-                    # Отмечаем что напомнили
-                    reminder.reminder_sent_at = datetime.now()
-                    session.commit()
-
-                except Exception as e:
-                    print(f"Error sending reminder to user {user.telegram_id}: {e}")
-
-    except Exception as e:
-        print(f"Error in check_upcoming_events: {e}")
-    finally:
-        session.close()
-
-
-async def check_ended_events():
-    """
-    Проверить завершившиеся события и отправить follow-up.
-    Вызывается каждые 5 минут из APScheduler.
-    """
-    if not bot:
-        return
-
-    session = get_session()
-    try:
-        users = get_users_with_calendar_enabled()
+            ahead = minutes_before if user.event_reminders_enabled else 0
 
-        for user in users:
-            # Пропускаем если тихие часы
-            if _is_in_quiet_hours(user):
+            if not await sync_user_calendar(user, calendar_service):
                 continue
 
-            if not user.google_refresh_token_encrypted:
+            now = datetime.now(timezone.utc)
+            zone = user_zone(user.timezone)
+            classifier = get_event_classifier(user.event_exclusions)
+            items = [
+                classifier.classify(event.to_event_dict(zone))
+                for event in get_calendar_events_between(
+                    user.id,
+                    now - timedelta(minutes=FOLLOWUP_LOOKBACK_MINUTES),
+                    now + timedelta(minutes=ahead)
+                )
+            ]
+            if not items:
                 continue
 
-            calendar_service = GoogleCalendarService(user.id)
-            if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
+            upcoming, ended = split_event_window(items, now, ahead)
+            if not user.event_reminders_enabled:
+                upcoming = []
+            if not upcoming and not ended:
                 continue
 
-            # Получаем события завершившиеся за последние 10 минут
-            events = calendar_service.get_recently_ended_events(
-                minutes_past=10,
-                calendar_id=user.google_calendar_id or "primary"
-            )
-
-            for event in events:
-                reminder = _get_or_create_reminder(session, user.id, event)
-                if not reminder:
-                    continue
-
-                # Пропускаем если уже отправляли follow-up
-                if reminder.followup_sent_at:
-                    continue
-
-                # Пропускаем исключённые события (созданные ботом, "focus", короткие)
-                if reminder.is_bot_created or reminder.is_excluded:
-                    continue
-
-                # Отправляем follow-up
-                summary = event.get('summary', 'Событие')
+            # Все строки напоминаний тика — одним upsert + одним IN-запросом
+            rows = [row for row in map(_reminder_row, upcoming + ended) if row]
+            reminders = get_or_create_event_reminders(user.id, rows, session=session)
 
-                try:
-                    await bot.send_message(
-                        user.telegram_id,
-                        f"✅ *Событие завершилось:* {summary}\n\n"
-                        f"Есть action items для записи?",
-                        parse_mode="Markdown",
-                        reply_markup=get_followup_keyboard(reminder.id)
-                    )
+            await _send_event_reminders(user, upcoming, reminders, minutes_before)
+            await _send_followups(user, ended, reminders)
 
-                    # Отмечаем что отправили follow-up
-                    reminder.followup_sent_at = datetime.now()
-                    session.commit()
-
-                except Exception as e:
-                    print(f"Error sending followup to user {user.telegram_id}: {e}")
+            # Отметки об отправке — одним коммитом
+            session.commit()
 
     except Exception as e:
-        print(f"Error in check_ended_events: {e}")
+        print(f"Error in check_calendar_events: {e}")
     finally:
         session.close()
+
+
+def purge_old_event_reminders():
+    """Удалить отметки о событиях, завершившихся больше CALENDAR_REMINDER_RETENTION_DAYS дней назад"""
+    try:
+        deleted = purge_event_reminders(datetime.now() - timedelta(days=CALENDAR_REMINDER_RETENTION_DAYS))
+        if deleted:
+            print(f"[CALENDAR REMINDERS] Purged {deleted} old reminder rows")
+    except Exception as e:
+        print(f"Error purging event reminders: {e}")
@@ -3,25 +3,144 @@
 
 Направления:
 1. Bot -> Calendar: задачи дня + inbox с дедлайном
-2. Calendar -> Bot: (будущая фича) polling изменений
+2. Calendar -> Bot: локальное зеркало событий (calendar_events), инкрементально
+   по syncToken; при 410 и раз в CALENDAR_FULL_RESYNC_HOURS — полная синхронизация
+3. Сверка событий бота: изменённые с прошлой сверки (updatedMin + приватный тег)
+   переносят дедлайны/время задач, удалённые — снимают ссылки
+
+Запись Bot -> Calendar выполняется задачами очереди (calendar_queue),
+хэндлеры и периодический опрос только ставят их.
 """
 
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
+from functools import partial
+
+from googleapiclient.errors import HttpError
+
+from src.config import CALENDAR_MIRROR_DAYS, CALENDAR_FULL_RESYNC_HOURS
 
 from src.database.crud import (
     get_today_entry,
+    get_inbox_item,
     get_inbox_items_with_deadline,
     update_daily_entry_event_ids,
     update_inbox_event_id,
     update_calendar_last_sync,
     get_users_with_calendar_enabled
 )
-from src.integrations.google_calendar import GoogleCalendarService
+from src.database.crud_calendar import (
+    get_calendar_sync_state, apply_calendar_changes, reconcile_bot_events, enqueue_tasks_push
+)
+from src.database.crud_user_tasks import get_user_task, update_user_task_event
+from src.integrations.google_calendar import AsyncGoogleCalendarService, SyncTokenExpired
+
+
+def _needs_full_sync(state, calendar_id: str, now: datetime) -> bool:
+    """
+    Полная синхронизация: первая, при смене календаря и периодически —
+    чтобы в зеркало попадали события, въехавшие в окно CALENDAR_MIRROR_DAYS
+    без изменений (например, новые экземпляры повторяющихся привычек)
+    """
+    if state is None or not state.sync_token or state.calendar_id != calendar_id:
+        return True
+    if not state.last_full_sync_at:
+        return True
+    return now - state.last_full_sync_at >= timedelta(hours=CALENDAR_FULL_RESYNC_HOURS)
+
+
+async def sync_user_calendar(
+    user,
+    service: AsyncGoogleCalendarService = None,
+    max_age: timedelta = None
+) -> bool:
+    """
+    Обновить локальное зеркало календаря пользователя.
+
+    Args:
+        user: объект User с google_refresh_token_encrypted
+        service: уже загруженный сервис (иначе загружается здесь)
+        max_age: не ходить в API, если зеркало свежее
+
+    Returns: True, если зеркалу можно доверять (синхронизировано сейчас или раньше)
+    """
+    calendar_id = user.google_calendar_id or "primary"
+    now = datetime.utcnow()
+    state = get_calendar_sync_state(user.id)
+
+    if max_age and state and state.last_synced_at and state.calendar_id == calendar_id \
+            and now - state.last_synced_at < max_age:
+        return True
+
+    if service is None:
+        service = AsyncGoogleCalendarService(user.id)
+        if not await service.load_credentials(user.google_refresh_token_encrypted):
+            return False
+
+    full = _needs_full_sync(state, calendar_id, now)
+    try:
+        if not full:
+            try:
+                events, sync_token = await service.list_event_changes(
+                    calendar_id, sync_token=state.sync_token
+                )
+            except SyncTokenExpired:
+                print(f"[CALENDAR SYNC] User {user.id}: sync token expired, full resync")
+                full = True
+
+        if full:
+            utc_now = datetime.now(timezone.utc)
+            events, sync_token = await service.list_event_changes(
+                calendar_id,
+                time_min=utc_now - timedelta(days=1),
+                time_max=utc_now + timedelta(days=CALENDAR_MIRROR_DAYS)
+            )
+    except Exception as e:
+        print(f"Error syncing calendar mirror for user {user.id}: {e}")
+        return state is not None and state.calendar_id == calendar_id
+
+    apply_calendar_changes(user.id, calendar_id, events, sync_token, full=full)
+    return True
+
+
+# Глубина первой сверки (когда прошлой ещё не было)
+RECONCILE_LOOKBACK = timedelta(days=7)
+
+
+async def reconcile_user_calendar(user, service: AsyncGoogleCalendarService = None) -> dict | None:
+    """
+    Сверить события бота с календарём: только изменённые после прошлой сверки.
+
+    Returns: {"moved", "unlinked"} или None, если календарь недоступен
+    """
+    state = get_calendar_sync_state(user.id)
+    started = datetime.now(timezone.utc)
+    if state and state.last_reconciled_at:
+        updated_min = state.last_reconciled_at.replace(tzinfo=timezone.utc)
+    else:
+        updated_min = started - RECONCILE_LOOKBACK
+
+    if service is None:
+        service = AsyncGoogleCalendarService(user.id)
+        if not await service.load_credentials(user.google_refresh_token_encrypted):
+            return None
+
+    try:
+        events = await service.list_bot_events(updated_min, calendar_id=user.google_calendar_id or "primary")
+    except Exception as e:
+        print(f"Error reconciling calendar for user {user.id}: {e}")
+        return None
+
+    # Следующая сверка начинается с момента запроса — изменения во время выборки не теряются
+    stats = reconcile_bot_events(user.id, events, started.replace(tzinfo=None))
+    if stats["moved"] or stats["unlinked"]:
+        print(f"[CALENDAR SYNC] User {user.id}: moved={stats['moved']} unlinked={stats['unlinked']}")
+    return stats
 
 
 async def sync_user_tasks_to_calendar(user) -> tuple[bool, str]:
     """
-    Синхронизировать задачи пользователя в Google Calendar
+    Синхронизировать задачи пользователя в Google Calendar.
+    Все новые события (задачи дня + inbox с дедлайном) создаются одним batch-запросом.
 
     Args:
         user: объект User с google_refresh_token_encrypted
@@ -33,34 +152,43 @@ async def sync_user_tasks_to_calendar(user) -> tuple[bool, str]:
         return False, "Календарь не подключён"
 
     try:
-        service = GoogleCalendarService(user.id)
-        if not service.load_credentials(user.google_refresh_token_encrypted):
+        service = AsyncGoogleCalendarService(user.id)
+        if not await service.load_credentials(user.google_refresh_token_encrypted):
             return False, "Не удалось загрузить credentials. Переподключи календарь."
 
-        synced_count = 0
         calendar_id = user.google_calendar_id or "primary"
 
-        # 1. Синхронизируем задачи дня (DailyEntry)
+        # (аргументы события, callback(event_id) после создания)
+        pending = []
+
+        # 1. Задачи дня (DailyEntry) — ID сохраняются одним обновлением записи
+        daily_event_ids = {}
         entry = get_today_entry(user.id)
         if entry and entry.morning_completed:
-            count = await _sync_daily_tasks(service, user, entry, calendar_id)
-            synced_count += count
-
-        # 2. Синхронизируем inbox с дедлайнами
-        inbox_items = get_inbox_items_with_deadline(user.id)
-        for item in inbox_items:
-            if not item.google_event_id:  # ещё не синхронизировано
-                try:
-                    event_id = service.create_event(
-                        summary=item.text[:100],  # ограничиваем длину
-                        start_time=item.deadline,
-                        description=f"Из Kaizen Inbox\nЭнергия: {item.energy_level or '-'}\nВремя: {item.time_estimate or '-'}",
-                        calendar_id=calendar_id
-                    )
-                    update_inbox_event_id(item.id, event_id)
+            for event, field_name in _daily_task_events(entry):
+                pending.append((event, partial(daily_event_ids.__setitem__, field_name)))
+
+        # 2. Inbox с дедлайнами, ещё не синхронизированные
+        # (calendar_synced_at без события — пользователь удалил его в календаре)
+        for item in get_inbox_items_with_deadline(user.id):
+            if item.google_event_id or item.calendar_synced_at:
+                continue
+            pending.append(({
+                "summary": item.text[:100],  # ограничиваем длину
+                "start_time": item.deadline,
+                "description": f"Из Kaizen Inbox\nЭнергия: {item.energy_level or '-'}\nВремя: {item.time_estimate or '-'}",
+            }, partial(update_inbox_event_id, item.id)))
+
+        synced_count = 0
+        if pending:
+            event_ids = await service.create_events([event for event, _ in pending], calendar_id=calendar_id)
+            for (_, on_created), event_id in zip(pending, event_ids):
+                if event_id:
+                    on_created(event_id)
                     synced_count += 1
-                except Exception as e:
-                    print(f"Error syncing inbox item {item.id}: {e}")
+
+        if daily_event_ids:
+            update_daily_entry_event_ids(user.id, **daily_event_ids)
 
         # Обновляем время последней синхронизации
         update_calendar_last_sync(user.telegram_id)
@@ -74,18 +202,12 @@ async def sync_user_tasks_to_calendar(user) -> tuple[bool, str]:
         return False, str(e)
 
 
-async def _sync_daily_tasks(
-    service: GoogleCalendarService,
-    user,
-    entry,
-    calendar_id: str
-) -> int:
+def _daily_task_events(entry) -> list[tuple[dict, str]]:
     """
-    Синхронизировать задачи дня в календарь
+    Ещё не синхронизированные задачи дня
 
-    Returns: количество созданных событий
+    Returns: [(аргументы события, поле DailyEntry для event_id)]
     """
-    synced = 0
     today = date.today()
 
     # Базовое время для задач: 9:00
@@ -99,75 +221,109 @@ async def _sync_daily_tasks(
         (entry.task_3, entry.task_3_event_id, 3, "task_3_event_id"),
     ]
 
-    event_ids = {}
+    # Задачи, чьи события пользователь удалил в календаре
+    deleted = set((entry.calendar_deleted_tasks or "").split(","))
 
+    events = []
     for task_text, existing_event_id, task_num, field_name in tasks:
         if not task_text:
             continue
 
-        # Уже синхронизировано?
-        if existing_event_id:
+        # Уже синхронизировано или удалено в календаре?
+        if existing_event_id or str(task_num) in deleted:
             continue
 
         is_priority = entry.priority_task == task_num
 
-        try:
-            # Время события: приоритетная в 8:00, остальные в 9:00, 10:00, 11:00
-            if is_priority:
-                start_time = priority_time
-            else:
-                # Смещаем обычные задачи чтобы не накладывались
-                offset = (task_num - 1) * 60  # 0, 60, 120 минут
-                start_time = base_time + timedelta(minutes=offset)
-
-            event_id = service.create_event(
-                summary=task_text[:100],
-                start_time=start_time,
-                end_time=start_time + timedelta(hours=1),
-                is_priority=is_priority,
-                description=f"Задача #{task_num} на {today.strftime('%d.%m.%Y')}"
-            )
-            event_ids[field_name] = event_id
-            synced += 1
-
-        except Exception as e:
-            print(f"Error creating event for task {task_num}: {e}")
+        # Время события: приоритетная в 8:00, остальные в 9:00, 10:00, 11:00
+        if is_priority:
+            start_time = priority_time
+        else:
+            # Смещаем обычные задачи чтобы не накладывались
+            offset = (task_num - 1) * 60  # 0, 60, 120 минут
+            start_time = base_time + timedelta(minutes=offset)
 
-    # Сохраняем event IDs
-    if event_ids:
-        update_daily_entry_event_ids(user.id, **event_ids)
+        events.append(({
+            "summary": task_text[:100],
+            "start_time": start_time,
+            "end_time": start_time + timedelta(hours=1),
+            "is_priority": is_priority,
+            "description": f"Задача #{task_num} на {today.strftime('%d.%m.%Y')}",
+        }, field_name))
 
-    return synced
+    return events
 
 
-async def sync_after_morning_kaizen(user) -> tuple[bool, str]:
+async def push_item_to_calendar(user, item_type: str, item_id: int, event_time: datetime) -> str | None:
     """
-    Вызывается после завершения утреннего кайдзена
+    Поставить inbox item / задачу в календарь на event_time (задача очереди).
 
-    Args:
-        user: объект User
+    Уже связанное событие переносится patch'ем, а не дублируется; заново
+    создаётся, только если его удалили в календаре (404/410).
+    Остальные ошибки API пробрасываются — очередь повторит попытку.
 
-    Returns:
-        (success, message)
+    Returns: event_id или None, если элемент успели удалить
     """
-    if not user.calendar_sync_enabled:
-        return False, "Синхронизация отключена"
-
-    return await sync_user_tasks_to_calendar(user)
+    if item_type == "inbox":
+        item = get_inbox_item(item_id)
+        if item is None:
+            return None
+        summary = item.text[:100]
+        description = f"Из Inbox | {item.text}"
+    else:
+        item = get_user_task(item_id)
+        if item is None:
+            return None
+        summary = item.name
+        description = f"Задача из Kaizen Bot | Награда: {item.reward_amount}₽"
+
+    service = AsyncGoogleCalendarService(user.id)
+    if not await service.load_credentials(user.google_refresh_token_encrypted):
+        raise RuntimeError("Не удалось загрузить credentials")
+
+    calendar_id = user.google_calendar_id or "primary"
+    event_id = item.google_event_id
+    if event_id:
+        try:
+            await service.move_event(
+                event_id,
+                start_time=event_time,
+                end_time=event_time + timedelta(hours=1),
+                calendar_id=calendar_id
+            )
+        except HttpError as e:
+            if e.resp.status not in (404, 410):
+                raise
+            event_id = None  # событие удалено в календаре
+
+    if not event_id:
+        event_id = await service.create_event(
+            summary=summary,
+            start_time=event_time,
+            description=description,
+            calendar_id=calendar_id,
+            is_priority=False
+        )
+
+    if item_type == "inbox":
+        update_inbox_event_id(item_id, event_id)
+    else:
+        update_user_task_event(item_id, event_id, event_time)
+    return event_id
 
 
 async def poll_all_calendars():
     """
     Периодический опрос календарей всех пользователей
-    Вызывается из APScheduler
-
-    TODO: Реализовать когда понадобится обратная синхронизация
+    Вызывается из APScheduler: зеркало и сверка Calendar -> Bot,
+    Bot -> Calendar — задачей очереди (склеивается с поставленными хэндлерами)
     """
     users = get_users_with_calendar_enabled()
 
     for user in users:
         try:
-            # Пока только синхронизируем бот -> календарь
-            await sync_user_tasks_to_calendar(user)
+            await sync_user_calendar(user)
+            await reconcile_user_calendar(user)
+            enqueue_tasks_push(user.id)
         except Exception as e:
             print(f"Error polling calendar for user {user.telegram_id}: {e}")
@@ -0,0 +1,106 @@
+"""
+Классификация событий календаря для напоминаний и follow-up.
+
+Один проход по событию: время начала/окончания разбирается один раз,
+название проверяется одним скомпилированным regex, собранным из
+ключевых слов по умолчанию и исключений пользователя (User.event_exclusions).
+Результат — is_bot_created и is_excluded сразу.
+
+Классификатор компилируется один раз на каждый набор исключений (lru_cache),
+поэтому job'у напоминаний достаточно get_event_classifier(user.event_exclusions).
+"""
+
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple
+
+# Маркеры в названиях событий, которые создаёт бот (см. GoogleCalendarService._event_body)
+BOT_MARKERS = ("[kaizen]", "⭐")
+
+# Слова для исключения из follow-up (у пользователя — плюс свои)
+DEFAULT_EXCLUDED_KEYWORDS = (
+    "focus", "фокус",
+    "обед", "lunch",
+    "перерыв", "break",
+    "отдых", "rest",
+)
+
+# Минимальная длительность события для follow-up (минуты)
+MIN_EVENT_DURATION_MINUTES = 15
+
+# Сколько своих исключений можно задать и какой длины
+MAX_USER_EXCLUSIONS = 30
+MAX_EXCLUSION_LENGTH = 50
+
+
+def parse_event_time(event: dict, key: str) -> datetime | None:
+    """Aware datetime начала/окончания события (None для событий на весь день)"""
+    value = event.get(key, {}).get('dateTime')
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_exclusions(text: str | None) -> list[str]:
+    """Исключения пользователя из строки «через запятую / с новой строки» → без дублей, в нижнем регистре"""
+    keywords = []
+    for part in re.split(r"[,;\n]", text or ""):
+        keyword = part.strip().lower()[:MAX_EXCLUSION_LENGTH]
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords[:MAX_USER_EXCLUSIONS]
+
+
+class ClassifiedEvent(NamedTuple):
+    """Событие + всё, что о нём нужно конвейерам напоминаний"""
+    event: dict
+    start: datetime | None
+    end: datetime | None
+    is_bot_created: bool
+    is_excluded: bool
+
+
+class EventClassifier:
+    """Скомпилированный классификатор: маркеры бота и исключения — одним regex"""
+
+    def __init__(self, keywords=DEFAULT_EXCLUDED_KEYWORDS):
+        def alternation(words):
+            return "|".join(re.escape(word) for word in sorted(set(words)))
+
+        pattern = f"(?P<bot>{alternation(BOT_MARKERS)})"
+        if keywords:
+            pattern += f"|(?P<excluded>{alternation(keywords)})"
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+
+    def classify(self, event: dict) -> ClassifiedEvent:
+        start = parse_event_time(event, 'start')
+        end = parse_event_time(event, 'end')
+
+        is_bot_created = keyword_match = False
+        for match in self.pattern.finditer(event.get('summary') or ''):
+            if match.lastgroup == "bot":
+                is_bot_created = True
+            else:
+                keyword_match = True
+            if is_bot_created and keyword_match:
+                break
+
+        too_short = bool(start and end) and (end - start).total_seconds() / 60 < MIN_EVENT_DURATION_MINUTES
+        return ClassifiedEvent(
+            event=event,
+            start=start,
+            end=end,
+            is_bot_created=is_bot_created,
+            is_excluded=is_bot_created or keyword_match or too_short,
+        )
+
+
+@lru_cache(maxsize=256)
+def get_event_classifier(user_exclusions: str | None = None) -> EventClassifier:
+    """Классификатор для исключений пользователя (сырое значение User.event_exclusions)"""
+    return EventClassifier(DEFAULT_EXCLUDED_KEYWORDS + tuple(parse_exclusions(user_exclusions)))
@@ -2,16 +2,24 @@
 Синхронизация выполнения привычек с Google Calendar.
 
 Job sync_habit_completions() запускается ежедневно в 22:30
-(после вечерней рефлексии) и обновляет цвет событий:
+(после вечерней рефлексии) и обновляет цвет сегодняшнего экземпляра события:
 - Выполнено → зелёный (colorId: "10")
 - Не выполнено → без изменений (нейтрально, без стыда!)
+
+Экземпляр и его текущий цвет берутся из локального зеркала календаря,
+без чтения события из API.
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+
+from src.config import CALENDAR_SYNC_MAX_AGE
 
 from src.database.models import get_session, HabitCalendarEvent, DailyEntry
 from src.database.crud import get_all_users, get_today_entry
-from src.integrations.google_calendar import GoogleCalendarService
+from src.database.crud_calendar import get_day_calendar_events
+from src.integrations.google_calendar import AsyncGoogleCalendarService
+from src.scheduler.calendar_sync import sync_user_calendar
+from src.scheduler.reminder_index import user_zone
 
 
 # Цвета событий
@@ -45,8 +53,8 @@ async def sync_habit_completions():
                 continue
 
             # Загружаем calendar service
-            calendar_service = GoogleCalendarService(user.id)
-            if not calendar_service.load_credentials(user.google_refresh_token_encrypted):
+            calendar_service = AsyncGoogleCalendarService(user.id)
+            if not await calendar_service.load_credentials(user.google_refresh_token_encrypted):
                 continue
 
             # Получаем сегодняшнюю запись
@@ -54,6 +62,18 @@ async def sync_habit_completions():
             if not entry:
                 continue
 
+            # Сегодняшние экземпляры повторяющихся событий — из зеркала
+            if not await sync_user_calendar(
+                user, calendar_service, max_age=timedelta(minutes=CALENDAR_SYNC_MAX_AGE)
+            ):
+                continue
+            zone = user_zone(user.timezone)
+            today_instances = {
+                event.recurring_event_id: event
+                for event in get_day_calendar_events(user.id, datetime.now(zone).date(), zone)
+                if event.recurring_event_id
+            }
+
             # Обновляем цвета для каждой привычки
             for habit_event in habit_events:
                 if not habit_event.google_event_id:
@@ -68,11 +88,18 @@ async def sync_habit_completions():
 
                 # Обновляем цвет только если выполнено (без стыда за невыполненное!)
                 if is_completed:
-                    success = calendar_service.update_event_color(
-                        event_id=habit_event.google_event_id,
-                        color_id=COLOR_COMPLETED,
-                        calendar_id=user.google_calendar_id or "primary"
-                    )
+                    instance = today_instances.get(habit_event.google_event_id)
+                    if instance is None:
+                        continue  # сегодня экземпляра нет (удалён или серия закончилась)
+
+                    if instance.color_id == COLOR_COMPLETED:
+                        success = True  # уже зелёный — запрос не нужен
+                    else:
+                        success = await calendar_service.update_event_color(
+                            event_id=instance.google_event_id,
+                            color_id=COLOR_COMPLETED,
+                            calendar_id=user.google_calendar_id or "primary"
+                        )
 
                     if success:
                         habit_event.last_completed_date = date.today()
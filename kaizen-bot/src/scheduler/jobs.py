@@ -1,12 +1,23 @@
 import asyncio
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from src.config import TIMEZONE, MORNING_HOUR, MORNING_MINUTE, EVENING_HOUR, EVENING_MINUTE
-from src.database.crud import get_all_users, get_today_entry, get_week_stats, get_inbox_count
+from src.database.crud import get_week_stats_for_all_users
+from src.database.models import User
+from src.database.crud_async import (
+    get_all_users, get_inbox_counts, get_morning_reminder_audience,
+    get_evening_reminder_audience, get_task_reminder_audience
+)
 from src.keyboards.inline import get_main_menu, get_review_start_keyboard
 from src.handlers.stats import format_week_report
+from src.scheduler.broadcast import broadcast
+from src.scheduler.reminder_index import ReminderIndex
 
 # TODO: Добавить тесты для scheduler jobs (мок bot.send_message)
 # TODO: Рассмотреть dependency injection вместо глобальной переменной bot
@@ -14,6 +25,10 @@ from src.handlers.stats import format_week_report
 bot = None
 scheduler = AsyncIOScheduler(timezone=TIMEZONE)
 
+# Индекс персональных напоминаний (утро / вечер / задачи дня)
+reminder_index = ReminderIndex()
+REMINDER_DISPATCH_JOB_ID = "reminder_dispatch"
+
 
 def set_bot(bot_instance):
     """Установка экземпляра бота для отправки сообщений"""
@@ -25,50 +40,50 @@ def set_bot(bot_instance):
     set_calendar_bot(bot_instance)
 
 
-async def send_morning_reminder():
-    """Утреннее напоминание"""
+async def send_morning_reminder(user_ids: list[int] = None):
+    """Утреннее напоминание (user_ids — те, у кого оно сработало в индексе)"""
     if not bot:
         return
 
-    users = get_all_users()
-    for user in users:
+    messages = []
+    for user in await get_morning_reminder_audience(user_ids):
         try:
-            entry = get_today_entry(user.id)
-            if not entry or not entry.morning_completed:
-                await bot.send_message(
-                    user.telegram_id,
-                    "🌅 *Доброе утро!*\n\n"
-                    "Пора заполнить утренний кайдзен.\n"
-                    "3 задачи + рефлексия = продуктивный день!",
-                    parse_mode="Markdown",
-                    reply_markup=get_main_menu()
-                )
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": "🌅 *Доброе утро!*\n\n"
+                        "Пора заполнить утренний кайдзен.\n"
+                        "3 задачи + рефлексия = продуктивный день!",
+                "parse_mode": "Markdown",
+                "reply_markup": get_main_menu()
+            })
         except Exception as e:
-            print(f"Ошибка отправки утреннего напоминания пользователю {user.telegram_id}: {e}")
+            print(f"Ошибка подготовки утреннего напоминания пользователю {user.telegram_id}: {e}")
+
+    return await broadcast(bot, messages, "morning_reminder")
 
 
-async def send_evening_reminder():
+async def send_evening_reminder(user_ids: list[int] = None):
     """Вечернее напоминание (с напоминанием о планировании 22:00-22:30)"""
     if not bot:
         return
 
-    users = get_all_users()
-    for user in users:
+    messages = []
+    for user in await get_evening_reminder_audience(user_ids):
         try:
-            entry = get_today_entry(user.id)
-            if entry and entry.morning_completed and not entry.evening_completed:
-                await bot.send_message(
-                    user.telegram_id,
-                    "🌙 *Добрый вечер!*\n\n"
-                    "Пора подвести итоги дня.\n"
-                    "Отметь выполненные задачи и запиши инсайт!\n\n"
-                    "_После рефлексии — планирование на завтра (22:00-22:30)_\n"
-                    "_📋 Things 3 + Google Calendar_",
-                    parse_mode="Markdown",
-                    reply_markup=get_main_menu()
-                )
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": "🌙 *Добрый вечер!*\n\n"
+                        "Пора подвести итоги дня.\n"
+                        "Отметь выполненные задачи и запиши инсайт!\n\n"
+                        "_После рефлексии — планирование на завтра (22:00-22:30)_\n"
+                        "_📋 Things 3 + Google Calendar_",
+                "parse_mode": "Markdown",
+                "reply_markup": get_main_menu()
+            })
         except Exception as e:
-            print(f"Ошибка отправки вечернего напоминания пользователю {user.telegram_id}: {e}")
+            print(f"Ошибка подготовки вечернего напоминания пользователю {user.telegram_id}: {e}")
+
+    return await broadcast(bot, messages, "evening_reminder")
 
 
 async def send_weekly_report():
@@ -76,23 +91,32 @@ async def send_weekly_report():
     if not bot:
         return
 
-    users = get_all_users()
-    for user in users:
+    # Статистика всех пользователей одним GROUP BY по user_stats_daily
+    try:
+        stats_by_user = get_week_stats_for_all_users()
+    except Exception as e:
+        print(f"Ошибка подготовки еженедельных отчётов: {e}")
+        return
+
+    messages = []
+    for user in await get_all_users():
         try:
-            stats = get_week_stats(user.id)
-            if stats['total_entries'] > 0:
+            stats = stats_by_user.get(user.id)
+            if stats and stats['total_entries'] > 0:
                 report = "📅 *Еженедельный отчёт*\n\n"
                 report += format_week_report(stats)
                 report += "\n\n🚀 Отличная неделя! Продолжай в том же духе!"
 
-                await bot.send_message(
-                    user.telegram_id,
-                    report,
-                    parse_mode="Markdown",
-                    reply_markup=get_main_menu()
-                )
+                messages.append({
+                    "chat_id": user.telegram_id,
+                    "text": report,
+                    "parse_mode": "Markdown",
+                    "reply_markup": get_main_menu()
+                })
         except Exception as e:
-            print(f"Ошибка отправки еженедельного отчёта пользователю {user.telegram_id}: {e}")
+            print(f"Ошибка подготовки еженедельного отчёта пользователю {user.telegram_id}: {e}")
+
+    return await broadcast(bot, messages, "weekly_report")
 
 
 async def send_weekly_review_reminder():
@@ -100,22 +124,24 @@ async def send_weekly_review_reminder():
     if not bot:
         return
 
-    users = get_all_users()
-    for user in users:
+    inbox_counts = await get_inbox_counts()
+    messages = []
+    for user in await get_all_users():
         try:
-            inbox_count = get_inbox_count(user.id)
-
-            await bot.send_message(
-                user.telegram_id,
-                "📋 *Время для Weekly Review!*\n\n"
-                f"📥 В inbox: {inbox_count} задач\n\n"
-                "Это важная часть GTD - еженедельный обзор.\n"
-                "Займёт 10-15 минут.",
-                parse_mode="Markdown",
-                reply_markup=get_review_start_keyboard()
-            )
+            inbox_count = inbox_counts.get(user.id, 0)
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": "📋 *Время для Weekly Review!*\n\n"
+                        f"📥 В inbox: {inbox_count} задач\n\n"
+                        "Это важная часть GTD - еженедельный обзор.\n"
+                        "Займёт 10-15 минут.",
+                "parse_mode": "Markdown",
+                "reply_markup": get_review_start_keyboard()
+            })
         except Exception as e:
-            print(f"Ошибка отправки review напоминания пользователю {user.telegram_id}: {e}")
+            print(f"Ошибка подготовки review напоминания пользователю {user.telegram_id}: {e}")
+
+    return await broadcast(bot, messages, "weekly_review_reminder")
 
 
 async def send_birthday_reminders():
@@ -129,43 +155,46 @@ async def send_birthday_reminders():
     )
 
     today = date.today()
+    messages = []
 
     # Напоминания за 1 день
     for user, d in get_dates_for_reminder(days_ahead=1):
-        if was_reminder_sent(d.id, "before", today.year):
-            continue
-
         try:
+            if was_reminder_sent(d.id, "before", today.year):
+                continue
+
             emoji = "🎂" if d.date_type == "birthday" else "📌"
-            await bot.send_message(
-                user.telegram_id,
-                f"{emoji} *Напоминание!*\n\n"
-                f"Завтра: *{d.name}*\n"
-                f"Не забудь поздравить! 🎁",
-                parse_mode="Markdown"
-            )
-            mark_reminder_sent(d.id, "before", today.year)
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": f"{emoji} *Напоминание!*\n\n"
+                        f"Завтра: *{d.name}*\n"
+                        f"Не забудь поздравить! 🎁",
+                "parse_mode": "Markdown",
+                "on_sent": lambda date_id=d.id: mark_reminder_sent(date_id, "before", today.year)
+            })
         except Exception as e:
             print(f"Birthday reminder error (before): {e}")
 
     # Напоминания в сам день
     for user, d in get_dates_for_reminder(days_ahead=0):
-        if was_reminder_sent(d.id, "on_day", today.year):
-            continue
-
         try:
+            if was_reminder_sent(d.id, "on_day", today.year):
+                continue
+
             emoji = "🎂" if d.date_type == "birthday" else "📌"
-            await bot.send_message(
-                user.telegram_id,
-                f"{emoji} *Сегодня!*\n\n"
-                f"*{d.name}*\n"
-                f"Поздравь! 🎉",
-                parse_mode="Markdown"
-            )
-            mark_reminder_sent(d.id, "on_day", today.year)
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": f"{emoji} *Сегодня!*\n\n"
+                        f"*{d.name}*\n"
+                        f"Поздравь! 🎉",
+                "parse_mode": "Markdown",
+                "on_sent": lambda date_id=d.id: mark_reminder_sent(date_id, "on_day", today.year)
+            })
         except Exception as e:
             print(f"Birthday reminder error (on_day): {e}")
 
+    return await broadcast(bot, messages, "birthday_reminders")
+
 
 async def send_monthly_assessment_reminder():
     """Напоминание о ежемесячной оценке принципов (1-е число месяца)"""
@@ -174,20 +203,21 @@ async def send_monthly_assessment_reminder():
 
     from src.keyboards.inline_principles import get_principles_start_keyboard
 
-    users = get_all_users()
-    for user in users:
-        try:
-            await bot.send_message(
-                user.telegram_id,
-                "📊 *Время для ежемесячной оценки!*\n\n"
-                "Прошёл ещё один месяц. Пора оценить свои 25 принципов жизни.\n\n"
-                "Оценка займёт 5 дней по 2 минуты в день.\n"
-                "Это поможет отследить прогресс!",
-                parse_mode="Markdown",
-                reply_markup=get_principles_start_keyboard()
-            )
-        except Exception as e:
-            print(f"Monthly assessment reminder error: {e}")
+    keyboard = get_principles_start_keyboard()
+    messages = [
+        {
+            "chat_id": user.telegram_id,
+            "text": "📊 *Время для ежемесячной оценки!*\n\n"
+                    "Прошёл ещё один месяц. Пора оценить свои 25 принципов жизни.\n\n"
+                    "Оценка займёт 5 дней по 2 минуты в день.\n"
+                    "Это поможет отследить прогресс!",
+            "parse_mode": "Markdown",
+            "reply_markup": keyboard
+        }
+        for user in await get_all_users()
+    ]
+
+    return await broadcast(bot, messages, "monthly_assessment_reminder")
 
 
 async def send_quizlet_reminder():
@@ -197,65 +227,39 @@ async def send_quizlet_reminder():
 
     from src.handlers.quizlet import get_quizlet_keyboard
 
-    users = get_all_users()
-    for user in users:
-        try:
-            await bot.send_message(
-                user.telegram_id,
-                "🇬🇧 *Quizlet английский*\n\n"
-                "Пора заниматься английским!\n"
-                "Открой Quizlet и позанимайся 10-15 минут.\n\n"
-                "💰 Награда: *60₽*",
-                parse_mode="Markdown",
-                reply_markup=get_quizlet_keyboard()
-            )
-        except Exception as e:
-            print(f"Quizlet reminder error: {e}")
+    keyboard = get_quizlet_keyboard()
+    messages = [
+        {
+            "chat_id": user.telegram_id,
+            "text": "🇬🇧 *Quizlet английский*\n\n"
+                    "Пора заниматься английским!\n"
+                    "Открой Quizlet и позанимайся 10-15 минут.\n\n"
+                    "💰 Награда: *60₽*",
+            "parse_mode": "Markdown",
+            "reply_markup": keyboard
+        }
+        for user in await get_all_users()
+    ]
 
+    return await broadcast(bot, messages, "quizlet_reminder")
 
-async def send_task_reminder():
+
+async def send_task_reminder(user_ids: list[int] = None):
     """
-    Напоминание о задачах дня (проверяется каждые 10 минут).
+    Напоминание о задачах дня (время и тихие часы — в индексе напоминаний).
     Отправляет список незавершённых задач с интерактивными кнопками.
     """
     if not bot:
         return
 
-    from datetime import datetime
-    from src.scheduler.calendar_reminders import _is_in_quiet_hours
+    from src.keyboards.inline_tasks import get_daily_task_reminder_keyboard
 
-    users = get_all_users()
-    current_time = datetime.now()
+    # Напоминания включены, утро заполнено, вечер нет — уже отфильтровано запросом
+    audience = await get_task_reminder_audience(user_ids)
+    messages = []
 
-    for user in users:
+    for user, entry in audience:
         try:
-            # Проверка: напоминания включены
-            if not user.task_reminders_enabled:
-                continue
-
-            # Проверка: правильное время (±5 минут от настроенного)
-            reminder_hour = user.task_reminder_hour or 14
-            reminder_minute = user.task_reminder_minute or 0
-
-            if not (current_time.hour == reminder_hour and
-                    abs(current_time.minute - reminder_minute) <= 5):
-                continue
-
-            # Проверка: тихие часы
-            if _is_in_quiet_hours(user):
-                continue
-
-            # Получить запись на сегодня
-            entry = get_today_entry(user.id)
-
-            # Пропустить если утро не заполнено
-            if not entry or not entry.morning_completed:
-                continue
-
-            # Пропустить если вечер уже завершён
-            if entry.evening_completed:
-                continue
-
             # Собрать задачи
             tasks = [
                 (1, entry.task_1, entry.task_1_done),
@@ -271,8 +275,6 @@ async def send_task_reminder():
                 continue
 
             # Формируем сообщение
-            from src.keyboards.inline_tasks import get_daily_task_reminder_keyboard
-
             message_text = "📝 *Задачи на сегодня*\n\n"
 
             for num, text, done in tasks:
@@ -289,33 +291,97 @@ async def send_task_reminder():
 
             message_text += f"\nВыполнено: {completed_count} из {total_count}"
 
-            await bot.send_message(
-                user.telegram_id,
-                message_text,
-                parse_mode="Markdown",
-                reply_markup=get_daily_task_reminder_keyboard(entry.id, tasks)
-            )
-
+            messages.append({
+                "chat_id": user.telegram_id,
+                "text": message_text,
+                "parse_mode": "Markdown",
+                "reply_markup": get_daily_task_reminder_keyboard(entry.id, tasks)
+            })
         except Exception as e:
-            print(f"Error sending task reminder to user {user.telegram_id}: {e}")
+            print(f"Ошибка подготовки напоминания о задачах пользователю {user.telegram_id}: {e}")
 
+    return await broadcast(bot, messages, "task_reminder")
+
+
+# ============ ПЕРСОНАЛЬНЫЕ НАПОМИНАНИЯ ============
+
+REMINDER_SENDERS = {
+    "morning": send_morning_reminder,
+    "evening": send_evening_reminder,
+    "task": send_task_reminder,
+}
+
+
+def _arm_reminder_dispatch():
+    """Поставить единственный date-job на ближайшее срабатывание в индексе"""
+    next_due = reminder_index.next_due()
+    if next_due is None:
+        if scheduler.get_job(REMINDER_DISPATCH_JOB_ID):
+            scheduler.remove_job(REMINDER_DISPATCH_JOB_ID)
+        return
 
-def setup_scheduler():
-    """Настройка планировщика"""
-    # Утреннее напоминание
     scheduler.add_job(
-        send_morning_reminder,
-        CronTrigger(hour=MORNING_HOUR, minute=MORNING_MINUTE, timezone=TIMEZONE),
-        id="morning_reminder",
-        replace_existing=True
+        dispatch_due_reminders,
+        DateTrigger(run_date=max(next_due, datetime.now(timezone.utc))),
+        id=REMINDER_DISPATCH_JOB_ID,
+        replace_existing=True,
+        misfire_grace_time=None
     )
 
-    # Вечернее напоминание
+
+async def dispatch_due_reminders():
+    """Отправить все сработавшие напоминания и перевести таймер на следующее"""
+    try:
+        due = defaultdict(list)
+        for user_id, kind in reminder_index.pop_due():
+            due[kind].append(user_id)
+
+        for kind, user_ids in due.items():
+            try:
+                await REMINDER_SENDERS[kind](user_ids)
+            except Exception as e:
+                print(f"Reminder dispatch error ({kind}): {e}")
+    finally:
+        _arm_reminder_dispatch()
+
+
+async def init_reminder_index():
+    """Построить индекс напоминаний по всем пользователям (при старте)"""
+    for user in await get_all_users():
+        reminder_index.schedule(user)
+    _arm_reminder_dispatch()
+    print(f"Reminder index: {len(reminder_index)} entries, next at {reminder_index.next_due()}")
+
+
+def reschedule_user_reminders(user):
+    """Обновить напоминания пользователя после /start или смены настроек"""
+    if user is None:
+        return
+    before = reminder_index.next_due()
+    reminder_index.schedule(user)
+    if scheduler.running and reminder_index.next_due() != before:
+        _arm_reminder_dispatch()
+
+
+@event.listens_for(Session, "after_flush")
+def _index_new_users(session, flush_context):
+    # Пользователей создаёт не только /start (захват в inbox, someday, review,
+    # календарь) — новая строка users попадает в индекс сразу после вставки
+    for obj in session.new:
+        if isinstance(obj, User):
+            reschedule_user_reminders(obj)
+
+
+def setup_scheduler():
+    """Настройка планировщика"""
+    # Утро / вечер / задачи дня: персональное время и таймзона пользователя.
+    # Индекс строится при старте, дальше один date-job на ближайшее срабатывание
     scheduler.add_job(
-        send_evening_reminder,
-        CronTrigger(hour=EVENING_HOUR, minute=EVENING_MINUTE, timezone=TIMEZONE),
-        id="evening_reminder",
-        replace_existing=True
+        init_reminder_index,
+        DateTrigger(run_date=datetime.now(timezone.utc)),
+        id="reminder_index_init",
+        replace_existing=True,
+        misfire_grace_time=None
     )
 
     # Weekly Review напоминание (воскресенье в 18:00, за 2 часа до отчёта)
@@ -366,30 +432,24 @@ def setup_scheduler():
         replace_existing=True
     )
 
-    # Напоминание о задачах дня (каждые 10 минут)
-    scheduler.add_job(
-        send_task_reminder,
-        CronTrigger(minute="*/10", timezone=TIMEZONE),
-        id="task_reminder",
-        replace_existing=True
-    )
-
     # === Умные напоминания о событиях календаря ===
 
-    # Напоминания о предстоящих событиях (каждые 5 минут)
-    from src.scheduler.calendar_reminders import check_upcoming_events, check_ended_events
+    # Напоминания о предстоящих событиях + follow-up после завершения (каждые 5 минут,
+    # одно окно событий на пользователя)
+    from src.scheduler.calendar_reminders import check_calendar_events
     scheduler.add_job(
-        check_upcoming_events,
+        check_calendar_events,
         CronTrigger(minute="*/5", timezone=TIMEZONE),
-        id="calendar_event_reminders",
+        id="calendar_event_window",
         replace_existing=True
     )
 
-    # Follow-up после завершения событий (каждые 5 минут)
+    # Очистка отметок напоминаний о давно завершившихся событиях (ежедневно в 04:00)
+    from src.scheduler.calendar_reminders import purge_old_event_reminders
     scheduler.add_job(
-        check_ended_events,
-        CronTrigger(minute="*/5", timezone=TIMEZONE),
-        id="calendar_event_followups",
+        purge_old_event_reminders,
+        CronTrigger(hour=4, minute=0, timezone=TIMEZONE),
+        id="calendar_reminders_purge",
         replace_existing=True
     )
 
@@ -419,17 +479,17 @@ def start_scheduler():
     if not scheduler.running:
         scheduler.start()
         print(f"Scheduler started. Timezone: {TIMEZONE}")
-        print(f"Morning reminder: {MORNING_HOUR}:{MORNING_MINUTE:02d}")
-        print(f"Evening reminder: {EVENING_HOUR}:{EVENING_MINUTE:02d}")
+        print(f"Morning / evening / task reminders: per-user time and timezone "
+              f"(defaults {MORNING_HOUR}:{MORNING_MINUTE:02d} / {EVENING_HOUR}:{EVENING_MINUTE:02d} / 14:00)")
         print("Weekly review reminder: Sunday 18:00")
         print("Weekly report: Sunday 20:00")
         print("Calendar sync: every 30 minutes")
         print("Birthday reminders: daily 09:00")
         print("Monthly assessment: 1st day of month 10:00")
         print("Quizlet reminder: daily 21:30")
-        print("Task reminders: every 10 minutes (user time configurable)")
         print("Calendar event reminders: every 5 minutes")
         print("Calendar event followups: every 5 minutes")
+        print("Calendar reminders purge: daily 04:00")
         print("Habit calendar sync: daily 22:30")
 
 
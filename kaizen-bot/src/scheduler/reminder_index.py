@@ -0,0 +1,154 @@
+"""
+Индекс ближайших срабатываний напоминаний по (пользователь, тип).
+
+Вместо глобальных cron'ов и опроса всех пользователей каждые 10 минут
+храним для каждого (user_id, kind) момент следующего срабатывания в UTC —
+с учётом таймзоны пользователя, его времени напоминания и (для задач дня)
+тихих часов. Утро и вечер пользователь выбирает сам — тихие часы их не глушат.
+Min-heap отдаёт ближайший момент; диспетчер в jobs.py просыпается только
+к нему и обрабатывает O(due) записей. Сработавшие записи сразу
+переставляются на следующий день по сохранённым настройкам — без запросов к БД.
+
+Изменение настроек пользователя → schedule(user) обновляет только его записи
+(старые записи в heap становятся устаревшими и отбрасываются лениво).
+"""
+
+import heapq
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from src.config import (
+    TIMEZONE, MORNING_HOUR, MORNING_MINUTE, EVENING_HOUR, EVENING_MINUTE
+)
+
+REMINDER_KINDS = ("morning", "evening", "task")
+
+# Значения по умолчанию, если в профиле пусто
+DEFAULT_TASK_REMINDER = (14, 0)
+DEFAULT_QUIET_HOURS = (23, 7)
+
+
+def user_zone(name: str | None) -> ZoneInfo:
+    """Таймзона пользователя; при неизвестном имени — таймзона бота"""
+    try:
+        return ZoneInfo(name or TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(TIMEZONE)
+
+
+def reminder_spec(user, kind: str) -> tuple | None:
+    """
+    Настройки, от которых зависит время срабатывания:
+    (timezone, hour, minute, quiet_start, quiet_end) или None, если напоминание выключено.
+    Тихие часы заданы только для задач дня, у утра и вечера они None.
+    """
+    if kind == "morning":
+        hour, minute = user.morning_hour, user.morning_minute
+        hour = MORNING_HOUR if hour is None else hour
+        minute = MORNING_MINUTE if minute is None else minute
+    elif kind == "evening":
+        hour, minute = user.evening_hour, user.evening_minute
+        hour = EVENING_HOUR if hour is None else hour
+        minute = EVENING_MINUTE if minute is None else minute
+    elif kind == "task":
+        if not user.task_reminders_enabled:
+            return None
+        hour, minute = user.task_reminder_hour, user.task_reminder_minute
+        hour = DEFAULT_TASK_REMINDER[0] if hour is None else hour
+        minute = DEFAULT_TASK_REMINDER[1] if minute is None else minute
+        quiet_start, quiet_end = user.quiet_hours_start, user.quiet_hours_end
+        quiet_start = DEFAULT_QUIET_HOURS[0] if quiet_start is None else quiet_start
+        quiet_end = DEFAULT_QUIET_HOURS[1] if quiet_end is None else quiet_end
+        return (user.timezone or TIMEZONE, hour, minute, quiet_start, quiet_end)
+    else:
+        raise ValueError(f"Unknown reminder kind: {kind}")
+
+    return (user.timezone or TIMEZONE, hour, minute, None, None)
+
+
+def _in_quiet_hours(hour: int, quiet_start: int, quiet_end: int) -> bool:
+    """Тот же расчёт, что в calendar_reminders._is_in_quiet_hours, но для заданного часа"""
+    if quiet_start > quiet_end:
+        return hour >= quiet_start or hour < quiet_end
+    return quiet_start <= hour < quiet_end
+
+
+def next_fire_time(spec: tuple, after: datetime) -> datetime | None:
+    """
+    Следующий момент срабатывания (UTC) строго после after.
+    None — если время задаёт тихие часы и попадает в них (такое напоминание не шлём).
+    """
+    tz_name, hour, minute, quiet_start, quiet_end = spec
+    if quiet_start is not None and _in_quiet_hours(hour, quiet_start, quiet_end):
+        return None
+
+    zone = user_zone(tz_name)
+    local_day = after.astimezone(zone).date()
+    # Сегодня/завтра по местному времени; третий день — запас на переходы DST
+    for offset in range(3):
+        day = local_day + timedelta(days=offset)
+        fire_at = datetime.combine(day, time(hour, minute), tzinfo=zone).astimezone(timezone.utc)
+        if fire_at > after:
+            return fire_at
+    return None
+
+
+class ReminderIndex:
+    """Min-heap (fire_at, user_id, kind) + актуальная запись на каждый ключ"""
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int, str]] = []
+        self._entries: dict[tuple[int, str], tuple[datetime, tuple]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _push(self, user_id: int, kind: str, spec: tuple | None, after: datetime):
+        key = (user_id, kind)
+        fire_at = next_fire_time(spec, after) if spec else None
+        if fire_at is None:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (fire_at, spec)
+        heapq.heappush(self._heap, (fire_at, user_id, kind))
+
+    def schedule(self, user, now: datetime = None):
+        """Добавить/обновить записи пользователя (после /start или смены настроек)"""
+        now = now or datetime.now(timezone.utc)
+        for kind in REMINDER_KINDS:
+            spec = reminder_spec(user, kind)
+            current = self._entries.get((user.id, kind))
+            if current and current[1] == spec:
+                continue  # настройки не менялись — запись актуальна
+            self._push(user.id, kind, spec, now)
+
+    def remove(self, user_id: int):
+        """Убрать все напоминания пользователя"""
+        for kind in REMINDER_KINDS:
+            self._entries.pop((user_id, kind), None)
+
+    def _is_current(self, fire_at: datetime, user_id: int, kind: str) -> bool:
+        entry = self._entries.get((user_id, kind))
+        return entry is not None and entry[0] == fire_at
+
+    def next_due(self) -> datetime | None:
+        """Ближайший момент срабатывания (устаревшие записи выбрасываются)"""
+        while self._heap and not self._is_current(*self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime = None) -> list[tuple[int, str]]:
+        """
+        Забрать все сработавшие (user_id, kind) и сразу переставить их
+        на следующее срабатывание по сохранённым настройкам
+        """
+        now = now or datetime.now(timezone.utc)
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, user_id, kind = heapq.heappop(self._heap)
+            if not self._is_current(fire_at, user_id, kind):
+                continue
+            due.append((user_id, kind))
+            spec = self._entries[(user_id, kind)][1]
+            self._push(user_id, kind, spec, max(now, fire_at))
+        return due
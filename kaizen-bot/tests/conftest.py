@@ -6,6 +6,15 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.database.models import Base, User, DailyEntry, Goal, InboxItem, SomedayMaybe
+from src.database.identity_cache import identity_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    """Каждый тест — своя БД: кэш User / RewardFund не должен переживать тест."""
+    identity_cache.clear()
+    yield
+    identity_cache.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,137 @@
+"""Tests for the rate-limited broadcast engine."""
+
+import asyncio
+import time
+from unittest.mock import patch, AsyncMock
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.scheduler import jobs
+from src.scheduler.broadcast import Broadcaster, TokenBucket
+
+
+class FakeBot:
+    """Records send_message calls; errors[chat_id] is raised once per entry."""
+
+    def __init__(self, errors: dict = None):
+        self.sent = []
+        self.errors = {chat_id: list(errs) for chat_id, errs in (errors or {}).items()}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def _method():
+    return SendMessage(chat_id=1, text="x")
+
+
+def _messages(chat_ids):
+    return [{"chat_id": chat_id, "text": f"hi {chat_id}"} for chat_id in chat_ids]
+
+
+class TestTokenBucket:
+
+    def test_limits_rate(self):
+        bucket = TokenBucket(rate=50)
+
+        async def take(n):
+            started = time.monotonic()
+            for _ in range(n):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        # Первый токен сразу, остальные 10 — по 20 мс
+        assert asyncio.run(take(11)) >= 0.18
+
+
+class TestBroadcaster:
+
+    def test_sends_all_and_reports_stats(self):
+        bot = FakeBot()
+        stats = asyncio.run(Broadcaster(rate=1000, concurrency=5).broadcast(bot, _messages(range(20))))
+
+        assert stats["sent"] == 20
+        assert stats["failed"] == stats["blocked"] == 0
+        assert sorted(chat_id for chat_id, _, _ in bot.sent) == list(range(20))
+
+    def test_global_rate(self):
+        bot = FakeBot()
+        stats = asyncio.run(Broadcaster(rate=100, concurrency=10).broadcast(bot, _messages(range(21))))
+
+        assert stats["sent"] == 21
+        assert stats["elapsed"] >= 0.18
+
+    def test_per_chat_interval(self):
+        bot = FakeBot()
+        broadcaster = Broadcaster(rate=1000, concurrency=5, chat_interval=0.2)
+        asyncio.run(broadcaster.broadcast(bot, _messages([7, 7, 7])))
+
+        times = [sent_at for _, _, sent_at in bot.sent]
+        assert len(times) == 3
+        assert times[2] - times[0] >= 0.38
+
+    def test_retry_after_pauses_and_retries(self):
+        bot = FakeBot(errors={1: [TelegramRetryAfter(_method(), "Too Many Requests", retry_after=0)]})
+        stats = asyncio.run(Broadcaster(rate=1000).broadcast(bot, _messages([1, 2])))
+
+        assert stats["sent"] == 2
+        assert stats["retried"] == 1
+
+    def test_blocked_and_failed(self):
+        bot = FakeBot(errors={
+            1: [TelegramForbiddenError(_method(), "bot was blocked by the user")],
+            2: [RuntimeError("network")],
+        })
+        sent_callbacks = []
+        messages = _messages([1, 2, 3])
+        for message in messages:
+            message["on_sent"] = lambda chat_id=message["chat_id"]: sent_callbacks.append(chat_id)
+
+        stats = asyncio.run(Broadcaster(rate=1000).broadcast(bot, messages))
+
+        assert (stats["sent"], stats["blocked"], stats["failed"]) == (1, 1, 1)
+        assert sent_callbacks == [3]
+
+
+class TestBroadcastJobs:
+    """Scheduler jobs go through the broadcast engine."""
+
+    def test_quizlet_reminder(self):
+        users = [type("U", (), {"telegram_id": tg_id})() for tg_id in (11, 22)]
+        bot = FakeBot()
+
+        with patch.object(jobs, "bot", bot), \
+                patch.object(jobs, "get_all_users", AsyncMock(return_value=users)), \
+                patch.object(jobs, "broadcast", Broadcaster(rate=1000).broadcast):
+            stats = asyncio.run(jobs.send_quizlet_reminder())
+
+        assert stats["sent"] == 2
+        assert {chat_id for chat_id, _, _ in bot.sent} == {11, 22}
+
+    def test_bad_user_does_not_abort_task_reminder(self):
+        class Entry:
+            id, priority_task = 1, None
+            task_1, task_1_done = "Отчёт", False
+            task_2 = task_3 = None
+            task_2_done = task_3_done = False
+
+        class BrokenEntry(Entry):
+            @property
+            def task_1(self):
+                raise ValueError("broken row")
+
+        users = [type("U", (), {"telegram_id": tg_id})() for tg_id in (11, 22, 33)]
+        audience = [(users[0], Entry()), (users[1], BrokenEntry()), (users[2], Entry())]
+        bot = FakeBot()
+
+        with patch.object(jobs, "bot", bot), \
+                patch.object(jobs, "get_task_reminder_audience", AsyncMock(return_value=audience)), \
+                patch.object(jobs, "broadcast", Broadcaster(rate=1000).broadcast):
+            stats = asyncio.run(jobs.send_task_reminder())
+
+        assert stats["sent"] == 2
+        assert {chat_id for chat_id, _, _ in bot.sent} == {11, 33}
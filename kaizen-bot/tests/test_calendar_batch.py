@@ -0,0 +1,150 @@
+"""Tests for batched Google Calendar writes and patch-based updates."""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from googleapiclient.errors import HttpError
+
+from src.integrations import google_calendar
+from src.integrations.google_calendar import GoogleCalendarService, AsyncGoogleCalendarService
+from src.scheduler import calendar_sync
+
+
+class FakeBatch:
+    """Collects requests; execute() answers each via respond(request)."""
+
+    def __init__(self, callback, respond, log):
+        self.callback, self.respond = callback, respond
+        self.requests = []
+        self.http = self.thread_http = None
+        log.append(self)
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.http, self.thread_http = http, google_calendar._thread_http()
+        for request_id, request in self.requests:
+            response, error = self.respond(request)
+            self.callback(request_id, response, error)
+
+
+def make_service(respond):
+    service = GoogleCalendarService(1)
+    service.service = MagicMock()
+    service.batches = []
+    service.service.new_batch_http_request.side_effect = \
+        lambda callback: FakeBatch(callback, respond, service.batches)
+    return service
+
+
+class TestExecuteBatch:
+
+    def test_results_in_order_and_chunked(self):
+        service = make_service(lambda request: ({"id": request}, None))
+
+        with patch.object(google_calendar, "BATCH_SIZE", 2):
+            results = service.execute_batch(["r0", "r1", "r2"])
+
+        assert results == [({"id": "r0"}, None), ({"id": "r1"}, None), ({"id": "r2"}, None)]
+        assert [len(batch.requests) for batch in service.batches] == [2, 1]
+
+    def test_create_events_maps_failures_to_none(self):
+        error = HttpError(SimpleNamespace(status=400, reason="bad"), b"{}")
+
+        def respond(request):
+            return (None, error) if "fail" in request.body["summary"] else ({"id": "new"}, None)
+
+        service = make_service(respond)
+        service.service.events.return_value.insert.side_effect = \
+            lambda calendarId, body: SimpleNamespace(body=body)
+
+        event_ids = service.create_events([
+            {"summary": "ok", "start_time": datetime(2026, 3, 10, 9)},
+            {"summary": "fail", "start_time": datetime(2026, 3, 10, 10)},
+        ])
+
+        assert event_ids == ["new", None]
+        assert len(service.batches) == 1
+
+    def test_async_batch_uses_executing_threads_http(self):
+        service = AsyncGoogleCalendarService(1)
+        service.sync = make_service(lambda request: ({"id": "new"}, None))
+
+        event_ids = asyncio.run(service.create_events([
+            {"summary": "ok", "start_time": datetime(2026, 3, 10, 9)},
+        ]))
+
+        batch = service.sync.batches[0]
+        assert event_ids == ["new"]
+        assert batch.http.http is batch.thread_http
+        assert batch.thread_http is not google_calendar._thread_http()  # не Http потока event loop
+
+
+class TestPatchUpdates:
+
+    def test_color_update_is_single_patch(self):
+        service = GoogleCalendarService(1)
+        service.service = MagicMock()
+
+        assert service.update_event_color("evt", "10", calendar_id="work")
+
+        events = service.service.events.return_value
+        events.patch.assert_called_once_with(calendarId="work", eventId="evt", body={"colorId": "10"})
+        events.get.assert_not_called()
+        events.update.assert_not_called()
+
+    def test_update_event_sends_only_changed_fields(self):
+        service = GoogleCalendarService(1)
+        service.service = MagicMock()
+
+        assert service.update_event("evt", summary="New title")
+
+        events = service.service.events.return_value
+        events.patch.assert_called_once_with(calendarId="primary", eventId="evt", body={"summary": "New title"})
+        events.get.assert_not_called()
+
+
+class TestSyncUserTasksToCalendar:
+
+    def test_daily_tasks_and_inbox_in_one_batch(self):
+        user = SimpleNamespace(id=1, telegram_id=10, google_refresh_token_encrypted="token",
+                               google_calendar_id="work")
+        entry = SimpleNamespace(
+            morning_completed=True, priority_task=2,
+            task_1="Write report", task_1_event_id=None,
+            task_2="Gym", task_2_event_id=None,
+            task_3="Call mom", task_3_event_id="existing",
+            calendar_deleted_tasks=None,
+        )
+        inbox = [
+            SimpleNamespace(id=7, text="Pay bills", deadline=datetime(2026, 3, 11, 18), google_event_id=None,
+                            calendar_synced_at=None, energy_level=None, time_estimate=None),
+            SimpleNamespace(id=8, text="Synced", deadline=datetime(2026, 3, 12, 18), google_event_id="done",
+                            calendar_synced_at=datetime(2026, 3, 1), energy_level=None, time_estimate=None),
+        ]
+        create_events = AsyncMock(return_value=["e1", "e2", None])
+        update_inbox = MagicMock()
+        update_daily = MagicMock()
+
+        with patch.object(calendar_sync.AsyncGoogleCalendarService, "load_credentials",
+                          AsyncMock(return_value=True)), \
+                patch.object(calendar_sync.AsyncGoogleCalendarService, "create_events", create_events), \
+                patch.object(calendar_sync, "get_today_entry", return_value=entry), \
+                patch.object(calendar_sync, "get_inbox_items_with_deadline", return_value=inbox), \
+                patch.object(calendar_sync, "update_inbox_event_id", update_inbox), \
+                patch.object(calendar_sync, "update_daily_entry_event_ids", update_daily), \
+                patch.object(calendar_sync, "update_calendar_last_sync"):
+            success, message = asyncio.run(calendar_sync.sync_user_tasks_to_calendar(user))
+
+        create_events.assert_awaited_once()
+        events = create_events.await_args.args[0]
+        assert [e["summary"] for e in events] == ["Write report", "Gym", "Pay bills"]
+        assert events[1]["is_priority"] is True
+        assert create_events.await_args.kwargs["calendar_id"] == "work"
+
+        update_daily.assert_called_once_with(1, task_1_event_id="e1", task_2_event_id="e2")
+        update_inbox.assert_not_called()  # событие для inbox не создалось
+        assert (success, message) == (True, "Синхронизировано: 2 событий")
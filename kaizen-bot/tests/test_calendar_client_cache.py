@@ -0,0 +1,98 @@
+"""Tests for the per-user Google Calendar client cache."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud
+from src.database.models import Base
+from src.integrations import google_calendar
+from src.integrations.client_cache import CalendarClientCache, client_cache
+from src.integrations.google_calendar import GoogleCalendarService
+
+
+class TestCalendarClientCache:
+
+    def test_hit_and_miss(self):
+        cache = CalendarClientCache(max_size=10, ttl=60)
+        cache.put(1, "token", "creds", "service")
+
+        assert cache.get(1, "token") == ("creds", "service")
+        assert cache.get(2, "token") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_changed_token_misses(self):
+        cache = CalendarClientCache(max_size=10, ttl=60)
+        cache.put(1, "old", "creds", "service")
+
+        assert cache.get(1, "new") is None
+        assert len(cache) == 0
+
+    def test_ttl_expiry(self):
+        cache = CalendarClientCache(max_size=10, ttl=60)
+        with patch("src.integrations.client_cache.time.monotonic", return_value=1000.0):
+            cache.put(1, "token", "creds", "service")
+        with patch("src.integrations.client_cache.time.monotonic", return_value=1061.0):
+            assert cache.get(1, "token") is None
+
+    def test_lru_eviction(self):
+        cache = CalendarClientCache(max_size=2, ttl=60)
+        cache.put(1, "t", "c1", "s1")
+        cache.put(2, "t", "c2", "s2")
+        cache.get(1, "t")  # 1 — недавно использованный, вытесняется 2
+        cache.put(3, "t", "c3", "s3")
+
+        assert cache.get(2, "t") is None
+        assert cache.get(1, "t") == ("c1", "s1")
+        assert cache.get(3, "t") == ("c3", "s3")
+
+
+class TestLoadCredentialsCache:
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        client_cache.clear()
+        yield
+        client_cache.clear()
+
+    def test_second_load_reuses_client(self):
+        with patch.object(google_calendar, "_build_service", wraps=google_calendar._build_service) as build:
+            first = GoogleCalendarService(1)
+            second = GoogleCalendarService(1)
+            assert first.load_credentials("token")
+            assert second.load_credentials("token")
+
+        build.assert_called_once()
+        assert second.service is first.service
+        assert second.credentials is first.credentials
+
+    def test_without_user_id_not_cached(self):
+        assert GoogleCalendarService().load_credentials("token")
+        assert len(client_cache) == 0
+
+
+class TestCrudInvalidation:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        client_cache.clear()
+        with patch.object(crud, 'get_session', sessionmaker(bind=engine)):
+            self.user = crud.get_or_create_user(telegram_id=555)
+            yield
+        client_cache.clear()
+
+    def test_update_token_invalidates(self):
+        client_cache.put(self.user.id, "token", "creds", "service")
+        crud.update_user_google_token(555, "token")
+
+        assert client_cache.get(self.user.id, "token") is None
+
+    def test_disable_sync_invalidates(self):
+        client_cache.put(self.user.id, "token", "creds", "service")
+        crud.disable_calendar_sync(555)
+
+        assert client_cache.get(self.user.id, "token") is None
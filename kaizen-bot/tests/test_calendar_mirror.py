@@ -0,0 +1,193 @@
+"""Tests for the local Google Calendar mirror and its incremental sync."""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
+
+import pytest
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud_calendar
+from src.database.models import Base, User, CalendarEvent
+from src.integrations.google_calendar import GoogleCalendarService, SyncTokenExpired
+from src.scheduler import calendar_sync
+
+
+def make_event(event_id, start, end, **fields):
+    event = {
+        "id": event_id,
+        "summary": fields.pop("summary", event_id),
+        "start": {"dateTime": start},
+        "end": {"dateTime": end},
+    }
+    event.update(fields)
+    return event
+
+
+class FakeRequest:
+    def __init__(self, result=None, error=None):
+        self.result, self.error = result, error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def http_error(status):
+    return HttpError(SimpleNamespace(status=status, reason="error"), b"{}")
+
+
+class TestMirrorFixture:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=1, google_refresh_token_encrypted="token", calendar_sync_enabled=True)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.expunge(user)
+        session.close()
+        self.user = user
+
+        with patch.object(crud_calendar, 'get_session', self.session_factory):
+            yield
+
+    def mirror(self) -> dict[str, CalendarEvent]:
+        session = self.session_factory()
+        try:
+            return {e.google_event_id: e for e in session.query(CalendarEvent).all()}
+        finally:
+            session.close()
+
+
+class TestApplyCalendarChanges(TestMirrorFixture):
+
+    def test_upsert_and_cancel(self):
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            make_event("a", "2026-03-10T10:00:00+03:00", "2026-03-10T11:00:00+03:00"),
+            make_event("b", "2026-03-10T12:00:00Z", "2026-03-10T13:00:00Z"),
+        ], "token-1", full=True)
+
+        upserted, deleted = crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            make_event("a", "2026-03-10T15:00:00+03:00", "2026-03-10T16:00:00+03:00", summary="moved"),
+            {"id": "b", "status": "cancelled"},
+        ], "token-2")
+
+        assert (upserted, deleted) == (1, 1)
+        mirror = self.mirror()
+        assert list(mirror) == ["a"]
+        # Время хранится в UTC
+        assert mirror["a"].start_time == datetime(2026, 3, 10, 12, 0)
+        assert mirror["a"].summary == "moved"
+
+        state = crud_calendar.get_calendar_sync_state(self.user.id)
+        assert state.sync_token == "token-2"
+        assert state.last_full_sync_at is not None
+
+    def test_full_sync_replaces_mirror(self):
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            make_event("old", "2026-03-10T10:00:00Z", "2026-03-10T11:00:00Z"),
+        ], "token-1", full=True)
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            make_event("new", "2026-03-11T10:00:00Z", "2026-03-11T11:00:00Z"),
+        ], "token-2", full=True)
+
+        assert list(self.mirror()) == ["new"]
+
+    def test_day_events_include_all_day(self):
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            {"id": "holiday", "start": {"date": "2026-03-10"}, "end": {"date": "2026-03-11"}},
+            # 00:30 по Москве 10-го = 21:30 UTC 9-го
+            make_event("early", "2026-03-09T21:30:00Z", "2026-03-09T22:30:00Z"),
+            make_event("yesterday", "2026-03-09T18:00:00Z", "2026-03-09T19:00:00Z"),
+        ], "token", full=True)
+
+        events = crud_calendar.get_day_calendar_events(
+            self.user.id, date(2026, 3, 10), ZoneInfo("Europe/Moscow")
+        )
+
+        assert [e.google_event_id for e in events] == ["holiday", "early"]
+        assert events[1].to_event_dict(ZoneInfo("Europe/Moscow"))["start"]["dateTime"].startswith(
+            "2026-03-10T00:30"
+        )
+
+
+class TestListEventChanges:
+
+    def make_service(self, responses):
+        service = GoogleCalendarService(1)
+        service.service = MagicMock()
+        service.service.events.return_value.list.side_effect = [FakeRequest(**r) for r in responses]
+        return service
+
+    def test_follows_pages_and_returns_sync_token(self):
+        service = self.make_service([
+            {"result": {"items": [{"id": "a"}], "nextPageToken": "p2"}},
+            {"result": {"items": [{"id": "b"}], "nextSyncToken": "sync"}},
+        ])
+
+        events, token = service.list_event_changes(sync_token="old")
+
+        assert [e["id"] for e in events] == ["a", "b"]
+        assert token == "sync"
+        calls = service.service.events.return_value.list.call_args_list
+        assert calls[0].kwargs["syncToken"] == "old"
+        assert calls[1].kwargs["pageToken"] == "p2"
+
+    def test_gone_raises_sync_token_expired(self):
+        service = self.make_service([{"error": http_error(410)}])
+
+        with pytest.raises(SyncTokenExpired):
+            service.list_event_changes(sync_token="stale")
+
+
+class TestSyncUserCalendar(TestMirrorFixture):
+
+    def run_sync(self, service, **kwargs):
+        return asyncio.run(calendar_sync.sync_user_calendar(self.user, service, **kwargs))
+
+    def make_service(self, *results):
+        service = MagicMock()
+        service.list_event_changes = AsyncMock(side_effect=list(results))
+        return service
+
+    def test_first_sync_is_full_then_incremental(self):
+        now = datetime.now(timezone.utc)
+        event = make_event("a", now.isoformat(), (now + timedelta(hours=1)).isoformat())
+        service = self.make_service(([event], "token-1"), ([], "token-2"))
+
+        assert self.run_sync(service)
+        assert "time_min" in service.list_event_changes.await_args.kwargs
+
+        assert self.run_sync(service)
+        assert service.list_event_changes.await_args.kwargs["sync_token"] == "token-1"
+        assert list(self.mirror()) == ["a"]
+
+    def test_expired_token_triggers_full_resync(self):
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [
+            make_event("stale", "2026-03-10T10:00:00Z", "2026-03-10T11:00:00Z"),
+        ], "token-1", full=True)
+        service = self.make_service(SyncTokenExpired("primary"), ([], "token-2"))
+
+        assert self.run_sync(service)
+
+        assert service.list_event_changes.await_count == 2
+        assert self.mirror() == {}
+        assert crud_calendar.get_calendar_sync_state(self.user.id).sync_token == "token-2"
+
+    def test_fresh_mirror_skips_api(self):
+        crud_calendar.apply_calendar_changes(self.user.id, "primary", [], "token-1", full=True)
+        service = self.make_service()
+
+        assert self.run_sync(service, max_age=timedelta(minutes=5))
+        service.list_event_changes.assert_not_awaited()
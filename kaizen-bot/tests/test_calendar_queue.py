@@ -0,0 +1,221 @@
+"""Tests for the persistent calendar push queue."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud, crud_calendar
+from src.database.models import Base, User, InboxItem, CalendarJob
+from src.scheduler import calendar_queue, calendar_sync
+from src.scheduler.calendar_queue import CalendarQueue, retry_delay
+
+
+LEASE = timedelta(minutes=2)
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(SimpleNamespace(status=status, reason="error"), b"{}")
+
+
+class TestQueueFixture:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        self.users = [User(telegram_id=100 + i, google_refresh_token_encrypted="token",
+                           calendar_sync_enabled=True) for i in range(2)]
+        session.add_all(self.users)
+        session.commit()
+        self.user_ids = [user.id for user in self.users]
+        session.close()
+
+        with patch.object(crud_calendar, 'get_session', self.session_factory), \
+                patch.object(crud, 'get_session', self.session_factory):
+            yield
+
+    def jobs(self) -> list[CalendarJob]:
+        session = self.session_factory()
+        try:
+            return session.query(CalendarJob).order_by(CalendarJob.id).all()
+        finally:
+            session.close()
+
+
+class TestEnqueue(TestQueueFixture):
+
+    def test_same_key_is_coalesced(self):
+        user_id = self.user_ids[0]
+        crud_calendar.enqueue_item_event(user_id, "inbox", 7, datetime(2026, 3, 10, 9))
+        crud_calendar.enqueue_item_event(user_id, "inbox", 7, datetime(2026, 3, 10, 15))
+        crud_calendar.enqueue_tasks_push(user_id)
+        crud_calendar.enqueue_tasks_push(user_id)
+
+        jobs = self.jobs()
+        assert [(job.kind, job.job_key) for job in jobs] == [("event", "inbox:7"), ("push", "")]
+        assert json.loads(jobs[0].payload)["start"] == "2026-03-10T15:00:00"
+        assert jobs[0].generation == 2
+
+    def test_deadline_update_enqueues_event_in_same_transaction(self):
+        session = self.session_factory()
+        item = InboxItem(user_id=self.user_ids[0], text="Pay bills")
+        session.add(item)
+        session.commit()
+        item_id = item.id
+        session.close()
+
+        crud.update_inbox_item_deadline(item_id, datetime(2026, 3, 11, 18))
+
+        jobs = self.jobs()
+        assert [(job.kind, job.job_key) for job in jobs] == [("event", f"inbox:{item_id}")]
+
+
+class TestClaim(TestQueueFixture):
+
+    def test_one_job_per_user_and_lease(self):
+        first, second = self.user_ids
+        crud_calendar.enqueue_tasks_push(first)
+        crud_calendar.enqueue_item_event(first, "task", 1, datetime(2026, 3, 10, 9))
+        crud_calendar.enqueue_tasks_push(second)
+        now = datetime.utcnow() + timedelta(seconds=1)
+
+        claimed = crud_calendar.claim_calendar_jobs(10, LEASE, now=now)
+        assert sorted(job.user_id for job in claimed) == [first, second]
+
+        # Занятые пользователи и арендованные задачи не выдаются
+        assert crud_calendar.claim_calendar_jobs(10, LEASE, exclude_users={first}, now=now) == []
+
+        # Аренда истекла (бот упал) — задачу можно взять снова
+        later = now + LEASE + timedelta(seconds=1)
+        assert len(crud_calendar.claim_calendar_jobs(10, LEASE, now=later)) == 2
+
+    def test_requeued_while_running_is_kept(self):
+        user_id = self.user_ids[0]
+        crud_calendar.enqueue_tasks_push(user_id)
+        job, = crud_calendar.claim_calendar_jobs(1, LEASE, now=datetime.utcnow() + timedelta(seconds=1))
+
+        crud_calendar.enqueue_tasks_push(user_id)
+        crud_calendar.complete_calendar_job(job.id, job.generation)
+
+        requeued, = self.jobs()
+        assert requeued.generation == 2
+        assert requeued.locked_until is None
+
+
+class TestRunJob(TestQueueFixture):
+
+    def claim_one(self):
+        job, = crud_calendar.claim_calendar_jobs(1, LEASE, now=datetime.utcnow() + timedelta(seconds=1))
+        return job
+
+    def test_success_deletes_job(self):
+        handler = AsyncMock()
+        queue = CalendarQueue(handlers={"push": handler})
+        crud_calendar.enqueue_tasks_push(self.user_ids[0])
+
+        assert asyncio.run(queue.run_job(self.claim_one()))
+
+        assert handler.await_args.args[0].id == self.user_ids[0]
+        assert self.jobs() == []
+
+    def test_failure_backs_off_then_gives_up(self):
+        queue = CalendarQueue(handlers={"push": AsyncMock(side_effect=RuntimeError("quota"))})
+        crud_calendar.enqueue_tasks_push(self.user_ids[0])
+
+        before = datetime.utcnow()
+        assert not asyncio.run(queue.run_job(self.claim_one()))
+
+        job, = self.jobs()
+        assert job.attempts == 1
+        assert job.last_error == "quota"
+        assert job.locked_until is None
+        assert job.next_run_at >= before + retry_delay(0)
+
+        with patch.object(calendar_queue, "CALENDAR_QUEUE_MAX_ATTEMPTS", 2):
+            job.next_run_at = datetime.utcnow()
+            asyncio.run(queue.run_job(job))
+        assert self.jobs() == []
+
+    def test_retry_delay_is_exponential_and_capped(self):
+        with patch.object(calendar_queue, "CALENDAR_QUEUE_BACKOFF_BASE", 10), \
+                patch.object(calendar_queue, "CALENDAR_QUEUE_BACKOFF_MAX", 60):
+            assert [retry_delay(n).total_seconds() for n in range(4)] == [10, 20, 40, 60]
+
+    def test_workers_drain_queue_after_wake(self):
+        done = []
+
+        async def handler(user, payload):
+            done.append((user.id, payload.get("item_id")))
+
+        async def scenario():
+            queue = CalendarQueue(workers=2, poll_interval=60, handlers={"push": handler, "event": handler})
+            queue.start()
+            crud_calendar.enqueue_tasks_push(self.user_ids[0])
+            crud_calendar.enqueue_item_event(self.user_ids[1], "inbox", 5, datetime(2026, 3, 10, 9))
+            queue.wake()
+            for _ in range(100):
+                if len(done) == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        asyncio.run(scenario())
+
+        assert sorted(done) == [(self.user_ids[0], None), (self.user_ids[1], 5)]
+        assert self.jobs() == []
+
+
+class TestPushItemToCalendar:
+
+    def run_push(self, item, move_error=None):
+        user = SimpleNamespace(id=1, google_refresh_token_encrypted="token", google_calendar_id=None)
+        move_event = AsyncMock(return_value={"id": item.google_event_id}, side_effect=move_error)
+        create_event = AsyncMock(return_value="new-event")
+        save = MagicMock()
+
+        with patch.object(calendar_sync.AsyncGoogleCalendarService, "load_credentials",
+                          AsyncMock(return_value=True)), \
+                patch.object(calendar_sync.AsyncGoogleCalendarService, "move_event", move_event), \
+                patch.object(calendar_sync.AsyncGoogleCalendarService, "create_event", create_event), \
+                patch.object(calendar_sync, "get_inbox_item", return_value=item), \
+                patch.object(calendar_sync, "update_inbox_event_id", save):
+            event_id = asyncio.run(calendar_sync.push_item_to_calendar(
+                user, "inbox", 7, datetime(2026, 3, 10, 15)
+            ))
+        return event_id, move_event, create_event, save
+
+    def test_existing_event_is_moved_not_duplicated(self):
+        item = SimpleNamespace(text="Pay bills", google_event_id="evt")
+
+        event_id, move_event, create_event, save = self.run_push(item)
+
+        assert event_id == "evt"
+        assert move_event.await_args.kwargs["start_time"] == datetime(2026, 3, 10, 15)
+        create_event.assert_not_awaited()
+        save.assert_called_once_with(7, "evt")
+
+    def test_event_deleted_in_calendar_is_recreated(self):
+        item = SimpleNamespace(text="Pay bills", google_event_id="gone")
+
+        event_id, _, create_event, save = self.run_push(item, move_error=http_error(410))
+
+        assert event_id == "new-event"
+        create_event.assert_awaited_once()
+        save.assert_called_once_with(7, "new-event")
+
+    def test_other_move_errors_are_retried_not_recreated(self):
+        item = SimpleNamespace(text="Pay bills", google_event_id="evt")
+
+        with pytest.raises(HttpError):
+            self.run_push(item, move_error=http_error(500))
+
@@ -0,0 +1,244 @@
+"""Tests for the Google Calendar quota governor: rate limits, backoff, circuit breaker, counters."""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+import httplib2
+import pytest
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from src.integrations import google_calendar
+from src.integrations.google_calendar import (
+    AsyncGoogleCalendarService, GovernedHttpRequest, governed_call, _build_service
+)
+from src.integrations.quota import QuotaBucket, QuotaGovernor, CalendarCircuitOpen, RetryLater
+
+
+class FakeClock:
+    """time.monotonic + asyncio.sleep: sleep двигает часы"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(status, reason=None, headers=None):
+    resp = httplib2.Response({"status": status, **(headers or {})})
+    error = {"message": "error"}
+    if reason:
+        error["errors"] = [{"reason": reason}]
+    return HttpError(resp, json.dumps({"error": error}).encode())
+
+
+class TestQuotaBucket:
+
+    def test_waits_for_tokens_after_burst(self):
+        clock = FakeClock()
+        bucket = QuotaBucket(rate=2, capacity=2, clock=clock)
+
+        for _ in range(2):
+            assert bucket.wait_time(1) == 0
+            bucket.take(1)
+
+        assert bucket.wait_time(1) == 0.5
+
+    def test_pause_blocks_until_expired(self):
+        clock = FakeClock()
+        bucket = QuotaBucket(rate=100, capacity=10, clock=clock)
+
+        bucket.pause(3)
+        assert bucket.wait_time(1) == 3
+        clock.now += 3
+        assert bucket.wait_time(1) == 0
+
+    def test_governor_takes_nothing_when_one_bucket_is_empty(self):
+        clock = FakeClock()
+        governor = QuotaGovernor(global_rate=1, user_rate=100, user_burst=1, clock=clock)
+
+        assert governor.try_acquire(1) == 0
+        assert governor.try_acquire(2) > 0  # глобальный bucket пуст
+        assert governor._user_bucket(2).tokens == 1
+
+
+class TestGovernedCall:
+
+    @pytest.fixture(autouse=True)
+    def governor(self):
+        self.clock = FakeClock()
+        self.governor = QuotaGovernor(
+            global_rate=100, user_rate=100, user_burst=100,
+            backoff_base=1, backoff_max=8,
+            auth_failure_threshold=3, circuit_seconds=3600,
+            clock=self.clock, sleep=self.clock.sleep
+        )
+        with patch.object(google_calendar, "quota_governor", self.governor), \
+                patch.object(google_calendar, "GOOGLE_API_MAX_RETRIES", 3):
+            yield
+
+    def governed_service(self, method, func, timeout=1.0):
+        """Фасад, у которого sync-метод method — один governed_call(func)"""
+        service = AsyncGoogleCalendarService(1, timeout=timeout)
+        setattr(service.sync, method, lambda *args, **kwargs: governed_call(1, f"calendar.{method}", func))
+        return service
+
+    def test_throttled_call_is_single_attempt(self):
+        func = MagicMock(side_effect=http_error(429, headers={"retry-after": "2"}))
+
+        with pytest.raises(RetryLater) as info:
+            governed_call(1, "calendar.events.list", func)
+
+        assert func.call_count == 1
+        assert info.value.delay == 2 and info.value.error.resp.status == 429
+        assert self.clock.sleeps == []  # поток пула не ждёт
+
+    def test_no_quota_raises_before_request(self):
+        self.governor = QuotaGovernor(global_rate=100, user_rate=1, user_burst=1, clock=self.clock)
+        func = MagicMock(return_value={})
+        with patch.object(google_calendar, "quota_governor", self.governor):
+            governed_call(1, "calendar.events.get", func)
+            with pytest.raises(RetryLater) as info:
+                governed_call(1, "calendar.events.get", func)
+
+        assert func.call_count == 1
+        assert info.value.error is None and info.value.delay == 1
+
+    def test_rate_limit_retried_with_backoff_on_event_loop(self):
+        func = MagicMock(side_effect=[
+            http_error(429, headers={"retry-after": "2"}),
+            http_error(403, "rateLimitExceeded"),
+            {"id": "ok"},
+        ])
+        service = self.governed_service("get_event", func)
+
+        assert asyncio.run(service.get_event("e1")) == {"id": "ok"}
+
+        assert func.call_count == 3
+        assert self.clock.sleeps[0] >= 2  # Retry-After учитывается
+        assert 1.0 <= self.clock.sleeps[1] <= 2.0  # второй повтор: 2·base с jitter 0.5-1
+        assert self.governor.stats()["calendar.get_event"] == {"calls": 3, "throttled": 2, "failed": 0}
+
+    def test_gives_up_after_max_retries(self):
+        func = MagicMock(side_effect=http_error(503))
+
+        assert asyncio.run(self.governed_service("get_event", func).get_event("e1")) is None
+        with pytest.raises(HttpError):
+            asyncio.run(self.governed_service("create_event", func).create_event(summary="x", start_time=None))
+
+        assert func.call_count == 8
+        assert self.governor.stats()["calendar.create_event"] == {"calls": 4, "throttled": 4, "failed": 1}
+
+    def test_each_timeout_covers_one_attempt(self):
+        # Пауза перед повтором не съедает таймаут следующей попытки
+        func = MagicMock(side_effect=[http_error(503), {"id": "ok"}])
+        service = self.governed_service("get_event", func, timeout=0.5)
+        self.governor.backoff = lambda attempt, retry_after=None: 1.0
+
+        async def sleep(seconds):
+            await self.clock.sleep(seconds)
+            await asyncio.sleep(0.6)
+
+        self.governor.sleep = sleep
+        assert asyncio.run(service.get_event("e1")) == {"id": "ok"}
+
+    def test_forbidden_and_not_found_are_not_retried(self):
+        for error in (http_error(403, "forbidden"), http_error(404)):
+            func = MagicMock(side_effect=error)
+            with pytest.raises(HttpError):
+                governed_call(1, "calendar.events.get", func)
+            assert func.call_count == 1
+        assert self.clock.sleeps == []
+
+    def test_auth_failures_open_circuit(self):
+        failing = MagicMock(side_effect=RefreshError("invalid_grant"))
+        for _ in range(2):
+            with pytest.raises(RefreshError):
+                governed_call(7, "calendar.events.list", failing)
+        assert not self.governor.is_open(7)
+
+        with pytest.raises(HttpError):
+            governed_call(7, "calendar.events.list", MagicMock(side_effect=http_error(401)))
+        assert self.governor.is_open(7)
+
+        # Пока пауза — ни одного запроса
+        func = MagicMock()
+        with pytest.raises(CalendarCircuitOpen):
+            governed_call(7, "calendar.events.list", func)
+        func.assert_not_called()
+        assert not asyncio.run(AsyncGoogleCalendarService(7).load_credentials("token"))
+
+        # Пауза истекла: пробный запрос, одна ошибка снова открывает
+        self.clock.now += 3600
+        assert not self.governor.is_open(7)
+        with pytest.raises(RefreshError):
+            governed_call(7, "calendar.events.list", failing)
+        assert self.governor.is_open(7)
+
+        # Методы с пустым результатом не бросают CalendarCircuitOpen
+        service = AsyncGoogleCalendarService(7)
+        service.sync.service = MagicMock()
+        service.sync.patch_request = MagicMock(return_value=MagicMock(
+            execute=lambda: governed_call(7, "calendar.events.patch", func)
+        ))
+        assert service.sync.update_event("e1", summary="x") is False
+        assert not asyncio.run(service.update_event("e1", summary="x"))
+        func.assert_not_called()
+
+        # Переподключение календаря снимает паузу
+        self.governor.reset(7)
+        assert governed_call(7, "calendar.events.list", MagicMock(return_value={})) == {}
+
+    def test_success_resets_auth_failures(self):
+        for _ in range(2):
+            with pytest.raises(RefreshError):
+                governed_call(7, "calendar.events.list", MagicMock(side_effect=RefreshError("x")))
+        governed_call(7, "calendar.events.list", MagicMock(return_value={}))
+        with pytest.raises(RefreshError):
+            governed_call(7, "calendar.events.list", MagicMock(side_effect=RefreshError("x")))
+
+        assert not self.governor.is_open(7)
+
+
+class TestGovernedService:
+
+    def test_requests_carry_user_and_method(self):
+        service = _build_service(Credentials(token="token"), user_id=5)
+
+        request = service.events().list(calendarId="primary")
+
+        assert isinstance(request, GovernedHttpRequest)
+        assert request.user_id == 5
+        assert request.methodId == "calendar.events.list"
+
+    def test_request_runs_on_executing_threads_http(self):
+        # Собран в event loop (как insert в morning.py), выполнен в пуле
+        service = _build_service(Credentials(token="token"), user_id=5)
+        request = service.events().insert(calendarId="primary", body={})
+        used = []
+
+        def fake_execute(self, http=None, num_retries=0):
+            used.append(http.http)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                return await loop.run_in_executor(
+                    pool, lambda: (request.execute(), google_calendar._thread_http())[1]
+                )
+
+        with patch.object(HttpRequest, "execute", fake_execute):
+            worker_http = asyncio.run(run())
+
+        assert used == [worker_http]
+        assert worker_http is not google_calendar._thread_http()
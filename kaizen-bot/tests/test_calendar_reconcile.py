@@ -0,0 +1,149 @@
+"""Tests for reconciling bot-created calendar events back into local records."""
+
+import asyncio
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud_calendar
+from src.database.models import (
+    Base, User, InboxItem, UserTask, DailyEntry, HabitCalendarEvent, CalendarSyncState
+)
+from src.integrations.google_calendar import GoogleCalendarService, BOT_EVENT_PROPERTY
+from src.scheduler import calendar_sync
+
+
+def moved(event_id, start):
+    return {"id": event_id, "status": "confirmed", "start": {"dateTime": start}}
+
+
+def cancelled(event_id):
+    return {"id": event_id, "status": "cancelled"}
+
+
+class TestReconcileBotEvents:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=1)
+        session.add(user)
+        session.flush()
+        self.user_id = user.id
+        session.add_all([
+            InboxItem(user_id=user.id, text="Pay bills", deadline=datetime(2026, 3, 11, 18),
+                      google_event_id="inbox-moved", calendar_synced_at=datetime(2026, 3, 1)),
+            InboxItem(user_id=user.id, text="Old", deadline=datetime(2026, 3, 12, 18),
+                      google_event_id="inbox-deleted", calendar_synced_at=datetime(2026, 3, 1)),
+            UserTask(user_id=user.id, name="Gym", reward_amount=10,
+                     google_event_id="task-moved", calendar_time=datetime(2026, 3, 10, 9)),
+            DailyEntry(user_id=user.id, entry_date=date(2026, 3, 10), task_1="A", task_2="B",
+                       task_1_event_id="daily-deleted", task_2_event_id="daily-kept",
+                       priority_event_id="daily-deleted"),
+            HabitCalendarEvent(user_id=user.id, habit_type="exercise", google_event_id="habit-deleted"),
+        ])
+        session.commit()
+        session.close()
+
+        self.commits = 0
+
+        def count_commit(session):
+            self.commits += 1
+
+        event.listen(self.session_factory, "after_commit", count_commit)
+
+        with patch.object(crud_calendar, 'get_session', self.session_factory):
+            yield
+
+    def query(self, model):
+        session = self.session_factory()
+        try:
+            return session.query(model).order_by(model.id if hasattr(model, "id") else model.user_id).all()
+        finally:
+            session.close()
+
+    def test_moves_and_unlinks_in_one_transaction(self):
+        stats = crud_calendar.reconcile_bot_events(self.user_id, [
+            moved("inbox-moved", "2026-03-11T21:00:00+03:00"),
+            cancelled("inbox-deleted"),
+            moved("task-moved", "2026-03-10T08:00:00Z"),  # 11:00 по Москве
+            cancelled("daily-deleted"),
+            cancelled("habit-deleted"),
+            moved("daily-kept", "2026-03-10T10:00:00+03:00"),
+        ], reconciled_at=datetime(2026, 3, 10, 12))
+
+        assert stats == {"moved": 2, "unlinked": 3}
+        assert self.commits == 1
+
+        inbox_moved, inbox_deleted = self.query(InboxItem)
+        assert inbox_moved.deadline == datetime(2026, 3, 11, 21)
+        assert inbox_deleted.google_event_id is None
+
+        assert self.query(UserTask)[0].calendar_time == datetime(2026, 3, 10, 11)
+
+        entry = self.query(DailyEntry)[0]
+        assert entry.task_1_event_id is None
+        assert entry.priority_event_id is None
+        assert entry.task_2_event_id == "daily-kept"
+        assert entry.calendar_deleted_tasks == "1"
+
+        habit = self.query(HabitCalendarEvent)[0]
+        assert habit.google_event_id is None
+        assert habit.is_active is False
+
+        assert self.query(CalendarSyncState)[0].last_reconciled_at == datetime(2026, 3, 10, 12)
+
+    def test_unchanged_time_is_not_counted(self):
+        stats = crud_calendar.reconcile_bot_events(self.user_id, [
+            moved("inbox-moved", "2026-03-11T18:00:00+03:00"),
+        ], reconciled_at=datetime(2026, 3, 10, 12))
+
+        assert stats == {"moved": 0, "unlinked": 0}
+
+
+class TestListBotEvents:
+
+    def test_filters_by_tag_and_updated_min(self):
+        service = GoogleCalendarService(1)
+        service.service = MagicMock()
+        service.service.events.return_value.list.return_value.execute.return_value = {"items": [{"id": "a"}]}
+
+        events = service.list_bot_events(datetime(2026, 3, 10, 12), calendar_id="work")
+
+        assert events == [{"id": "a"}]
+        kwargs = service.service.events.return_value.list.call_args.kwargs
+        assert kwargs["privateExtendedProperty"] == "{}={}".format(*BOT_EVENT_PROPERTY)
+        assert kwargs["updatedMin"] == "2026-03-10T12:00:00"
+        assert kwargs["showDeleted"] is True
+        assert kwargs["calendarId"] == "work"
+
+    def test_created_events_are_tagged(self):
+        body = GoogleCalendarService._event_body("Task", datetime(2026, 3, 10, 9))
+        key, value = BOT_EVENT_PROPERTY
+        assert body["extendedProperties"]["private"][key] == value
+
+
+class TestReconcileUserCalendar:
+
+    def test_uses_last_reconciled_at_as_updated_min(self):
+        user = SimpleNamespace(id=1, google_calendar_id=None, google_refresh_token_encrypted="token")
+        state = SimpleNamespace(last_reconciled_at=datetime(2026, 3, 10, 12))
+        service = MagicMock()
+        service.list_bot_events = AsyncMock(return_value=[])
+        reconcile = MagicMock(return_value={"moved": 0, "unlinked": 0})
+
+        with patch.object(calendar_sync, "get_calendar_sync_state", return_value=state), \
+                patch.object(calendar_sync, "reconcile_bot_events", reconcile):
+            asyncio.run(calendar_sync.reconcile_user_calendar(user, service))
+
+        updated_min = service.list_bot_events.await_args.args[0]
+        assert updated_min.isoformat() == "2026-03-10T12:00:00+00:00"
+        assert reconcile.call_args.args[2] > datetime(2026, 3, 10, 12)
@@ -0,0 +1,294 @@
+"""Tests for calendar event reminders and follow-ups read from the local calendar mirror."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud_calendar
+from src.database.models import Base, User, CalendarEventReminder
+from src.handlers import calendar_reminders as handlers
+from src.scheduler import calendar_reminders
+from src.scheduler.calendar_reminders import split_event_window, _reminder_row
+from src.scheduler.event_classifier import EventClassifier, get_event_classifier, parse_exclusions
+
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def make_event(event_id, start_offset, end_offset, summary="Встреча"):
+    """Событие со временем относительно NOW (в минутах)"""
+    start = NOW + timedelta(minutes=start_offset)
+    end = NOW + timedelta(minutes=end_offset)
+    return {
+        "id": event_id,
+        "summary": summary,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": end.isoformat()},
+    }
+
+
+def classify(*events, exclusions=None):
+    classifier = get_event_classifier(exclusions)
+    return [classifier.classify(e) for e in events]
+
+
+class TestEventClassifier:
+
+    def test_bot_marker_and_default_keywords(self):
+        bot, focus, meeting = classify(
+            make_event("bot", 0, 30, "⭐ [Kaizen] Отчёт"),
+            make_event("focus", 0, 60, "Focus time"),
+            make_event("meeting", 0, 60, "Встреча с командой"),
+        )
+
+        assert (bot.is_bot_created, bot.is_excluded) == (True, True)
+        assert (focus.is_bot_created, focus.is_excluded) == (False, True)
+        assert (meeting.is_bot_created, meeting.is_excluded) == (False, False)
+        assert meeting.start == NOW and meeting.end == NOW + timedelta(minutes=60)
+
+    def test_short_event_excluded(self):
+        short, = classify(make_event("short", 0, 10))
+        assert short.is_excluded and not short.is_bot_created
+
+    def test_user_exclusions(self):
+        event = make_event("standup", 0, 30, "Daily Standup (team)")
+
+        assert not classify(event)[0].is_excluded
+        assert classify(event, exclusions="standup, 1:1")[0].is_excluded
+
+    def test_keywords_escaped(self):
+        classifier = EventClassifier(["1:1 (x)"])
+        assert classifier.classify(make_event("a", 0, 30, "Sync 1:1 (x)")).is_excluded
+        assert not classifier.classify(make_event("b", 0, 30, "Sync 1:1 x")).is_excluded
+
+    def test_parse_exclusions_normalizes(self):
+        assert parse_exclusions(" Standup; 1:1,\nstandup , ,СПОРТ") == ["standup", "1:1", "спорт"]
+        assert parse_exclusions(None) == []
+
+    def test_classifier_compiled_once_per_exclusions(self):
+        assert get_event_classifier("gym") is get_event_classifier("gym")
+        assert get_event_classifier("gym") is not get_event_classifier(None)
+
+
+class TestSplitEventWindow:
+
+    def test_splits_upcoming_and_ended(self):
+        events = [
+            make_event("ended", -40, -5),
+            make_event("ongoing", -20, 20),
+            make_event("soon", 10, 40),
+            make_event("later", 30, 60),
+            make_event("long_ago", -60, -15),
+        ]
+
+        upcoming, ended = split_event_window(classify(*events), NOW, minutes_before=15)
+
+        assert [item.event["id"] for item in upcoming] == ["soon"]
+        assert [item.event["id"] for item in ended] == ["ended"]
+
+    def test_offsets_in_other_timezone(self):
+        # 15:10 по Москве = 12:10 UTC
+        event = {
+            "id": "msk",
+            "start": {"dateTime": "2026-03-10T15:10:00+03:00"},
+            "end": {"dateTime": "2026-03-10T16:00:00+03:00"},
+        }
+        upcoming, _ = split_event_window(classify(event), NOW, minutes_before=15)
+        assert [item.event for item in upcoming] == [event]
+
+    def test_all_day_events_skipped(self):
+        event = {"id": "day", "start": {"date": "2026-03-10"}, "end": {"date": "2026-03-11"}}
+        assert split_event_window(classify(event), NOW, minutes_before=60) == ([], [])
+
+
+class TestCheckCalendarEvents:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+        session = self.session_factory()
+        self.users = [
+            User(telegram_id=100 + i, google_refresh_token_encrypted="token",
+                 calendar_sync_enabled=True, reminder_minutes_before=15)
+            for i in range(2)
+        ]
+        session.add_all(self.users)
+        session.commit()
+        for user in self.users:
+            session.refresh(user)
+        session.expunge_all()
+        session.close()
+
+        yield
+
+    def run_tick(self, events):
+        bot = AsyncMock()
+        changes = AsyncMock(return_value=(events, "sync-token"))
+
+        with patch.object(calendar_reminders, "bot", bot), \
+                patch.object(calendar_reminders, "get_session", self.session_factory), \
+                patch.object(crud_calendar, "get_session", self.session_factory), \
+                patch.object(calendar_reminders, "get_users_with_calendar_enabled", return_value=self.users), \
+                patch.object(calendar_reminders, "_is_in_quiet_hours", return_value=False), \
+                patch.object(calendar_reminders, "datetime") as fake_datetime, \
+                patch.object(calendar_reminders.AsyncGoogleCalendarService, "load_credentials",
+                             AsyncMock(return_value=True)), \
+                patch.object(calendar_reminders.AsyncGoogleCalendarService, "list_event_changes", changes):
+            fake_datetime.now.side_effect = lambda tz=None: NOW if tz else NOW.replace(tzinfo=None)
+            fake_datetime.fromisoformat = datetime.fromisoformat
+            asyncio.run(calendar_reminders.check_calendar_events())
+        return bot, changes
+
+    def test_one_request_per_user_feeds_both_pipelines(self):
+        events = [make_event("soon", 10, 40), make_event("ended", -40, -5), make_event("later", 30, 60)]
+
+        bot, changes = self.run_tick(events)
+
+        # Первый тик — полная синхронизация зеркала, по запросу на пользователя
+        assert changes.await_count == 2
+        assert "sync_token" not in changes.await_args.kwargs
+
+        texts = [call.args[1] for call in bot.send_message.await_args_list]
+        assert sum("Через 15 мин" in text for text in texts) == 2
+        assert sum("Событие завершилось" in text for text in texts) == 2
+        assert len(texts) == 4
+
+    def test_user_exclusions_skip_followup(self):
+        self.users[0].event_exclusions = "встреча"
+
+        bot, _ = self.run_tick([make_event("soon", 10, 40), make_event("ended", -40, -5)])
+
+        followups = [call.args[0] for call in bot.send_message.await_args_list
+                     if "Событие завершилось" in call.args[1]]
+        assert followups == [self.users[1].telegram_id]
+
+    def test_next_tick_is_incremental_and_does_not_repeat(self):
+        events = [make_event("soon", 10, 40), make_event("ended", -40, -5)]
+        self.run_tick(events)
+
+        bot, changes = self.run_tick([])
+
+        assert changes.await_args.kwargs["sync_token"] == "sync-token"
+        bot.send_message.assert_not_awaited()
+        session = self.session_factory()
+        try:
+            reminders = session.query(CalendarEventReminder).all()
+            assert len(reminders) == 4
+            assert all(r.reminder_sent_at or r.followup_sent_at for r in reminders)
+        finally:
+            session.close()
+
+
+class TestEventReminderRows:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=1)
+        session.add(user)
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+        with patch.object(crud_calendar, "get_session", self.session_factory):
+            yield
+
+    def rows(self, *events):
+        return [_reminder_row(item) for item in classify(*events)]
+
+    def test_one_insert_and_one_select_per_tick(self):
+        first = crud_calendar.get_or_create_event_reminders(
+            self.user_id, self.rows(make_event("a", 10, 40), make_event("b", -40, -5))
+        )
+        session = self.session_factory()
+        session.query(CalendarEventReminder).filter_by(google_event_id="a").update({"reminder_sent_at": NOW})
+        session.commit()
+        session.close()
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+        # "b" дважды (оба конвейера) + новое "c"
+        reminders = crud_calendar.get_or_create_event_reminders(
+            self.user_id, self.rows(make_event("a", 10, 40), make_event("b", -40, -5),
+                                    make_event("b", -40, -5), make_event("c", 5, 30))
+        )
+
+        assert statements == ["INSERT", "SELECT"]
+        assert sorted(reminders) == ["a", "b", "c"]
+        assert reminders["a"].id == first["a"].id
+        assert reminders["a"].reminder_sent_at is not None
+
+        session = self.session_factory()
+        try:
+            assert session.query(CalendarEventReminder).count() == 3
+        finally:
+            session.close()
+
+    def test_purge_removes_only_old_events(self):
+        crud_calendar.get_or_create_event_reminders(self.user_id, self.rows(
+            make_event("old", -60 * 24 * 40, -60 * 24 * 40 + 30),
+            make_event("recent", -60, -30),
+        ))
+
+        deleted = crud_calendar.purge_event_reminders(NOW.replace(tzinfo=None) - timedelta(days=30))
+
+        assert deleted == 1
+        session = self.session_factory()
+        try:
+            assert [r.google_event_id for r in session.query(CalendarEventReminder)] == ["recent"]
+        finally:
+            session.close()
+
+
+class TestReminderExclusionsHandler:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+        session = self.session_factory()
+        session.add(User(telegram_id=100))
+        session.commit()
+        session.close()
+
+        with patch.object(handlers, "get_session", self.session_factory):
+            yield
+
+    def make_message(self, text):
+        message = AsyncMock()
+        message.text = text
+        message.from_user.id = 100
+        return message
+
+    def test_keywords_are_escaped(self):
+        message, state = self.make_message("my_event, *важно*, <b>"), AsyncMock()
+
+        asyncio.run(handlers.process_reminder_exclusions(message, state))
+
+        text = message.answer.await_args.args[0]
+        assert message.answer.await_args.kwargs["parse_mode"] == "HTML"
+        assert "my_event, *важно*, &lt;b&gt;" in text
+        state.clear.assert_awaited_once()
+
+    def test_state_cleared_when_reply_fails(self):
+        message, state = self.make_message("standup"), AsyncMock()
+        message.answer.side_effect = RuntimeError("Bad Request")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(handlers.process_reminder_exclusions(message, state))
+
+        state.clear.assert_awaited_once()
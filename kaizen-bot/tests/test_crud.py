@@ -318,18 +318,40 @@ class TestInboxCRUD(TestSessionFixture):
         updated = crud.get_inbox_item(item.id)
         assert updated.status == "deleted"
 
-    def test_get_inbox_by_context(self):
-        """Test filtering inbox by energy/time context."""
+    def test_pending_counter_follows_status_changes(self):
+        """Counter stays equal to COUNT(pending) through every inbox transition."""
         user = crud.get_or_create_user(telegram_id=123)
-        crud.create_inbox_item(user.id, "High energy task", energy_level="high")
-        crud.create_inbox_item(user.id, "Low energy task", energy_level="low")
-        crud.create_inbox_item(user.id, "Quick task", time_estimate="5min")
-
-        high_energy = crud.get_inbox_by_context(user.id, energy_level="high")
-        quick_tasks = crud.get_inbox_by_context(user.id, time_estimate="5min")
+        items = [crud.create_inbox_item(user.id, f"Item {i}") for i in range(5)]
+
+        def real_count():
+            session = self.get_session()
+            try:
+                return session.query(InboxItem).filter_by(user_id=user.id, status="pending").count()
+            finally:
+                session.close()
+
+        crud.update_inbox_item(items[0].id, status="processed")
+        crud.update_inbox_item(items[0].id, status="processed")  # повтор не считается дважды
+        crud.update_inbox_item(items[1].id, energy_level="high")
+        crud.delete_inbox_item(items[2].id)
+        someday = crud.move_inbox_to_someday(items[3].id)
+        assert crud.get_inbox_count(user.id) == real_count() == 2
+
+        crud.move_someday_to_inbox(someday.id)
+        crud.update_inbox_item(items[0].id, status="pending")
+        assert crud.get_inbox_count(user.id) == real_count() == 4
+
+    def test_missing_counter_is_rebuilt_from_count(self):
+        """A user without a counter row (pre-migration data) gets it seeded by COUNT."""
+        user = crud.get_or_create_user(telegram_id=123)
+        session = self.get_session()
+        session.add_all([InboxItem(user_id=user.id, text=f"Old {i}") for i in range(3)])
+        session.commit()
+        session.close()
 
-        assert len(high_energy) == 1
-        assert len(quick_tasks) == 1
+        assert crud.get_inbox_count(user.id) == 3
+        crud.create_inbox_item(user.id, "New")
+        assert crud.get_inbox_count(user.id) == 4
 
 
 class TestSomedayCRUD(TestSessionFixture):
@@ -388,6 +410,94 @@ class TestSomedayCRUD(TestSessionFixture):
         assert updated.last_reviewed is not None
 
 
+class TestKeysetPagination(TestSessionFixture):
+    """Tests for cursor pages of inbox, someday and reports."""
+
+    def _add_inbox(self, user_id, count, **fields):
+        """Items with distinct and shared created_at (ties are broken by id)."""
+        base = datetime(2026, 10, 1, 12, 0)
+        session = self.get_session()
+        items = [
+            InboxItem(user_id=user_id, text=f"Item {i}", created_at=base + timedelta(minutes=i // 2), **fields)
+            for i in range(count)
+        ]
+        session.add_all(items)
+        session.commit()
+        ids = [item.id for item in items]
+        session.close()
+        return ids
+
+    def _walk(self, fetch):
+        """Walk forward to the end, then back to the start; return pages of ids."""
+        pages = [fetch(None)]
+        while pages[-1].next_cursor:
+            pages.append(fetch(pages[-1].next_cursor))
+        back = [pages[-1]]
+        while back[-1].prev_cursor:
+            back.append(fetch(back[-1].prev_cursor))
+        ids = lambda ps: [[item.id for item in p.items] for p in ps]  # noqa: E731
+        return ids(pages), ids(back)
+
+    def test_inbox_pages_forward_and_back(self):
+        user = crud.get_or_create_user(telegram_id=123)
+        ids = self._add_inbox(user.id, 12)
+        newest_first = sorted(ids, key=lambda i: (ids.index(i) // 2, i), reverse=True)
+
+        forward, back = self._walk(lambda cursor: crud.get_inbox_page(user.id, cursor=cursor, limit=5))
+
+        assert forward == [newest_first[0:5], newest_first[5:10], newest_first[10:12]]
+        assert back == forward[::-1]
+        assert crud.get_inbox_page(user.id).total == 12
+        assert crud.get_inbox_page(user.id).prev_cursor is None
+
+    def test_inbox_page_filters_and_skips_processed(self):
+        user = crud.get_or_create_user(telegram_id=123)
+        self._add_inbox(user.id, 7, energy_level="high")
+        self._add_inbox(user.id, 3, energy_level="low")
+        self._add_inbox(user.id, 4, energy_level="high", status="processed")
+
+        page = crud.get_inbox_page(user.id, limit=5, energy_level="high")
+        assert page.total == 7
+        assert all(item.energy_level == "high" and item.status == "pending" for item in page.items)
+
+        rest = crud.get_inbox_page(user.id, cursor=page.next_cursor, limit=5, energy_level="high")
+        assert len(rest.items) == 2 and rest.next_cursor is None
+
+    def test_malformed_cursor_returns_first_page(self):
+        user = crud.get_or_create_user(telegram_id=123)
+        for i in range(7):
+            crud.create_inbox_item(user.id, f"Task {i}")
+        first = crud.get_inbox_page(user.id, limit=5)
+
+        # Кнопки старых сообщений: inbox_page:1, someday_page:2, reports_page:0
+        for cursor in ("1", "a", "a12_x", "b_"):
+            page = crud.get_inbox_page(user.id, cursor=cursor, limit=5)
+            assert [item.id for item in page.items] == [item.id for item in first.items]
+            assert page.prev_cursor is None
+        assert crud.get_someday_page(user.id, cursor="2").total == 0
+        assert crud.get_reports_page(cursor="0").items == []
+
+    def test_empty_inbox_page(self):
+        user = crud.get_or_create_user(telegram_id=123)
+        page = crud.get_inbox_page(user.id)
+        assert page.items == [] and page.total == 0
+        assert page.next_cursor is None and page.prev_cursor is None
+
+    def test_someday_and_reports_pages(self):
+        user = crud.get_or_create_user(telegram_id=123)
+        for i in range(13):
+            crud.create_someday_item(user.id, f"Idea {i}")
+            crud.create_report(user.id, "idea", f"Report {i}")
+
+        someday = crud.get_someday_page(user.id)
+        assert (len(someday.items), someday.total) == (10, 13)
+        assert len(crud.get_someday_page(user.id, cursor=someday.next_cursor).items) == 3
+
+        reports = crud.get_reports_page(limit=10)
+        assert [r.description for r in reports.items][:2] == ["Report 12", "Report 11"]
+        assert crud.get_reports_page(status="done").total == 0
+
+
 class TestPriorityTaskCRUD(TestSessionFixture):
     """Tests for priority task operations."""
 
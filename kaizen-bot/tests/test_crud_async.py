@@ -0,0 +1,216 @@
+"""Tests for async CRUD operations (AsyncSession + aiosqlite)."""
+
+import asyncio
+import pytest
+from datetime import date, timedelta
+from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, User, DailyEntry
+from src.database import crud_async
+
+
+class TestAsyncSessionFixture:
+    """Fixture that patches get_async_session for all tests."""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        """Set up in-memory aiosqlite database and patch get_async_session."""
+        self.loop = asyncio.new_event_loop()
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            echo=False,
+            poolclass=StaticPool
+        )
+
+        async def create_all():
+            async with self.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        self.run(create_all())
+        self.session_factory = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+        with patch.object(crud_async, 'get_async_session', self.session_factory):
+            yield
+
+        self.run(self.engine.dispose())
+        self.loop.close()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+
+class TestAsyncUserCRUD(TestAsyncSessionFixture):
+    """Tests for async user operations."""
+
+    def test_get_or_create_user_creates_new(self):
+        """Test creating a new user."""
+        user = self.run(crud_async.get_or_create_user(123456, "testuser", "Test"))
+
+        assert user.id is not None
+        assert user.telegram_id == 123456
+        assert user.username == "testuser"
+
+    def test_get_or_create_user_returns_existing(self):
+        """Test that get_or_create returns existing user."""
+        user1 = self.run(crud_async.get_or_create_user(123456, "user1"))
+        user2 = self.run(crud_async.get_or_create_user(123456, "user2"))
+
+        assert user1.id == user2.id
+        assert user2.username == "user1"
+
+    def test_get_user_by_telegram_id_not_found(self):
+        """Test that non-existent user returns None."""
+        assert self.run(crud_async.get_user_by_telegram_id(42)) is None
+
+    def test_get_all_users(self):
+        """Test fetching all users."""
+        for tg_id in (111, 222, 333):
+            self.run(crud_async.get_or_create_user(tg_id))
+
+        assert len(self.run(crud_async.get_all_users())) == 3
+
+
+class TestAsyncDailyEntryCRUD(TestAsyncSessionFixture):
+    """Tests for async daily entry operations."""
+
+    def test_get_or_create_today_entry(self):
+        """Test that today's entry is created once."""
+        user = self.run(crud_async.get_or_create_user(123))
+
+        entry1 = self.run(crud_async.get_or_create_today_entry(user.id))
+        entry2 = self.run(crud_async.get_or_create_today_entry(user.id))
+
+        assert entry1.id == entry2.id
+        assert entry1.entry_date == date.today()
+
+    def test_get_today_entry_missing(self):
+        """Test that missing entry returns None."""
+        user = self.run(crud_async.get_or_create_user(123))
+        assert self.run(crud_async.get_today_entry(user.id)) is None
+
+
+class TestAsyncInboxCRUD(TestAsyncSessionFixture):
+    """Tests for async inbox operations."""
+
+    def test_create_inbox_item_and_count(self):
+        """Test creating inbox items and counting pending ones."""
+        user = self.run(crud_async.get_or_create_user(123))
+
+        item = self.run(crud_async.create_inbox_item(user.id, "Buy milk", energy_level="low"))
+        self.run(crud_async.create_inbox_item(user.id, "Call mom"))
+
+        assert item.id is not None
+        assert item.status == "pending"
+        assert self.run(crud_async.get_inbox_count(user.id)) == 2
+        assert len(self.run(crud_async.get_user_inbox(user.id))) == 2
+
+    def test_capture_inbox_item_creates_user_and_returns_count(self):
+        """Capture creates a missing user and returns the pending count."""
+        assert self.run(crud_async.capture_inbox_item(555, "First", username="new")) == 1
+        assert self.run(crud_async.capture_inbox_item(555, "Second")) == 2
+
+        user = self.run(crud_async.get_user_by_telegram_id(555))
+        assert user.username == "new"
+        assert {item.text for item in self.run(crud_async.get_user_inbox(user.id))} == {"First", "Second"}
+        assert self.run(crud_async.get_inbox_count(user.id)) == 2
+
+    def test_capture_does_not_count_when_counter_exists(self):
+        """With a counter row in place, capture issues no COUNT over inbox_items."""
+        self.run(crud_async.capture_inbox_item(555, "First"))
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            assert self.run(crud_async.capture_inbox_item(555, "Second")) == 2
+        finally:
+            event.remove(self.engine.sync_engine, "before_cursor_execute", capture)
+
+        assert not any("count(" in statement.lower() for statement in statements)
+
+
+class TestAsyncRewardsCRUD(TestAsyncSessionFixture):
+    """Tests for async reward operations."""
+
+    def test_add_reward_creates_fund_and_updates_balance(self):
+        """Test that add_reward creates the fund lazily and updates balance."""
+        user = self.run(crud_async.get_or_create_user(123))
+
+        transaction = self.run(crud_async.add_reward(user.id, 50, "morning_kaizen"))
+        self.run(crud_async.add_reward(user.id, 20, "task_done"))
+
+        assert transaction.amount == 50
+        assert self.run(crud_async.get_reward_balance(user.id)) == 70
+        assert self.run(crud_async.get_reward_balance_by_telegram_id(123)) == 70
+
+
+class TestAsyncReminderAudiences(TestAsyncSessionFixture):
+    """Audience queries replace per-user get_today_entry lookups."""
+
+    def _setup_users(self):
+        """no_entry: нет записи; empty: запись без утра; morning: только утро; done: всё заполнено."""
+        ids = {}
+        for name, tg_id in (("no_entry", 1), ("empty", 2), ("morning", 3), ("done", 4)):
+            ids[name] = self.run(crud_async.get_or_create_user(tg_id)).id
+
+        async def fill():
+            async with self.session_factory() as session:
+                for name, morning, evening in (("empty", False, False), ("morning", True, False), ("done", True, True)):
+                    session.add(DailyEntry(
+                        user_id=ids[name], entry_date=date.today(), task_1="T1",
+                        morning_completed=morning, evening_completed=evening
+                    ))
+                # Вчерашняя запись не должна влиять на сегодняшнюю аудиторию
+                session.add(DailyEntry(
+                    user_id=ids["no_entry"], entry_date=date.today() - timedelta(days=1),
+                    morning_completed=True
+                ))
+                await session.commit()
+
+        self.run(fill())
+        return ids
+
+    def test_morning_audience(self):
+        ids = self._setup_users()
+        users = self.run(crud_async.get_morning_reminder_audience())
+        assert {u.id for u in users} == {ids["no_entry"], ids["empty"]}
+
+    def test_evening_audience(self):
+        ids = self._setup_users()
+        users = self.run(crud_async.get_evening_reminder_audience())
+        assert [u.id for u in users] == [ids["morning"]]
+
+    def test_task_reminder_audience_returns_entries(self):
+        ids = self._setup_users()
+        rows = self.run(crud_async.get_task_reminder_audience())
+
+        assert len(rows) == 1
+        user, entry = rows[0]
+        assert user.id == ids["morning"]
+        assert entry.user_id == user.id and entry.task_1 == "T1"
+
+    def test_task_reminder_audience_respects_toggle(self):
+        ids = self._setup_users()
+
+        async def disable():
+            async with self.session_factory() as session:
+                user = await session.get(User, ids["morning"])
+                user.task_reminders_enabled = False
+                await session.commit()
+
+        self.run(disable())
+        assert self.run(crud_async.get_task_reminder_audience()) == []
+
+    def test_inbox_counts(self):
+        user1 = self.run(crud_async.get_or_create_user(1))
+        user2 = self.run(crud_async.get_or_create_user(2))
+        for text in ("a", "b"):
+            self.run(crud_async.create_inbox_item(user1.id, text))
+        self.run(crud_async.create_inbox_item(user2.id, "c"))
+
+        assert self.run(crud_async.get_inbox_counts()) == {user1.id: 2, user2.id: 1}
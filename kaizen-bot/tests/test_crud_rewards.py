@@ -0,0 +1,145 @@
+"""Tests for the batch reward API (one transaction per grant)."""
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, User, RewardFund, RewardTransaction, UserTask, UserTaskCompletion
+from src.database import crud_rewards, crud_user_tasks
+
+
+class TestRewardsFixture:
+    """In-memory database with one user; counts commits and INSERTs."""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=123)
+        session.add(user)
+        session.flush()
+        session.add(RewardFund(user_id=user.id))
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+        self.commits = 0
+        self.inserts = []
+
+        def count_commit(session):
+            self.commits += 1
+
+        def capture_insert(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT INTO REWARD_TRANSACTIONS"):
+                self.inserts.append(statement)
+
+        event.listen(self.session_factory, "after_commit", count_commit)
+        event.listen(self.engine, "before_cursor_execute", capture_insert)
+
+        with patch.object(crud_rewards, 'get_session', self.session_factory), \
+                patch.object(crud_user_tasks, 'get_session', self.session_factory):
+            yield
+
+    def transactions(self) -> list[RewardTransaction]:
+        session = self.session_factory()
+        try:
+            return session.query(RewardTransaction).order_by(RewardTransaction.id).all()
+        finally:
+            session.close()
+
+
+class TestAddRewards(TestRewardsFixture):
+    """Tests for add_rewards / add_reward."""
+
+    def test_batch_is_one_commit_and_one_insert(self):
+        transactions = crud_rewards.add_rewards(self.user_id, [
+            ("task_done", 30, "Задачи"),
+            ("exercise", 20, None),
+        ], daily_entry_id=None)
+
+        assert [t.amount for t in transactions] == [30, 20]
+        assert all(t.id is not None for t in transactions)
+        assert self.commits == 1
+        assert len(self.inserts) == 1
+        assert crud_rewards.get_reward_balance(self.user_id) == 50
+
+    def test_add_reward_keeps_single_item_api(self):
+        transaction = crud_rewards.add_reward(self.user_id, 15, "manual_adjustment", "Ручное")
+
+        assert transaction.amount == 15
+        assert transaction.description == "Ручное"
+        assert self.commits == 1
+
+    def test_empty_batch_changes_nothing(self):
+        assert crud_rewards.add_rewards(self.user_id, []) == []
+        assert crud_rewards.get_reward_balance(self.user_id) == 0
+
+    def test_creates_fund_lazily(self):
+        session = self.session_factory()
+        user = User(telegram_id=456)
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        session.close()
+
+        crud_rewards.add_reward(user_id, 10, "task_done")
+        assert crud_rewards.get_reward_balance(user_id) == 10
+
+
+class TestGrants(TestRewardsFixture):
+    """Grant functions write all line items in one transaction."""
+
+    def test_evening_reflection_single_transaction(self):
+        breakdown = crud_rewards.grant_evening_reflection_reward(
+            self.user_id, tasks_done=2, priority_done=True, exercised=True, ate_well=True
+        )
+
+        # Ставки по умолчанию: 50 + 2×20 + 50 + 30 + 20
+        assert breakdown == {
+            "evening": 50, "tasks": 40, "priority": 50, "exercise": 30, "eating": 20, "total": 190
+        }
+        assert self.commits == 1
+        assert len(self.inserts) == 1
+        assert [t.transaction_type for t in self.transactions()] == [
+            "evening_reflection", "task_done", "priority_task", "exercise", "eating_well"
+        ]
+        assert crud_rewards.get_reward_balance(self.user_id) == 190
+
+    def test_morning_kaizen(self):
+        assert crud_rewards.grant_morning_kaizen_reward(self.user_id) == 50
+        assert self.commits == 1
+        assert crud_rewards.get_reward_balance(self.user_id) == 50
+
+    def test_inbox_task(self):
+        reward = crud_rewards.grant_inbox_task_reward(self.user_id, None, "30min", "high")
+
+        assert reward["total"] == 50
+        assert self.commits == 1
+        assert self.transactions()[0].transaction_type == "inbox_task_done"
+
+    def test_complete_user_task_is_atomic(self):
+        session = self.session_factory()
+        task = UserTask(user_id=self.user_id, name="Gym", reward_amount=40, is_recurring=False)
+        session.add(task)
+        session.commit()
+        task_id = task.id
+        session.close()
+        self.commits = 0
+
+        result = crud_user_tasks.complete_user_task(self.user_id, task_id)
+
+        assert result["success"] is True
+        assert result["balance"] == 40
+        assert self.commits == 1
+
+        session = self.session_factory()
+        try:
+            completion = session.query(UserTaskCompletion).one()
+            assert completion.reward_transaction_id == self.transactions()[0].id
+            assert session.get(UserTask, task_id).is_active is False
+        finally:
+            session.close()
@@ -0,0 +1,48 @@
+"""Tests for the evening reflection task checklist kept in FSM data."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.handlers import evening
+
+
+def make_callback(data: str):
+    return SimpleNamespace(
+        data=data,
+        from_user=SimpleNamespace(id=42),
+        message=SimpleNamespace(edit_text=AsyncMock(), edit_reply_markup=AsyncMock()),
+        answer=AsyncMock(),
+    )
+
+
+class TestEveningTaskChecklist:
+
+    def test_toggles_live_in_fsm_data(self):
+        entry = SimpleNamespace(
+            morning_completed=True,
+            task_1="Отчёт", task_2="Спорт", task_3="Книга",
+            task_1_done=True, task_2_done=None, task_3_done=False
+        )
+        storage = MemoryStorage()
+        state = FSMContext(storage, StorageKey(bot_id=1, chat_id=42, user_id=42))
+
+        async def scenario():
+            await evening.start_evening(make_callback("evening_start"), state)
+            await evening.toggle_task(make_callback("toggle_task:2"), state)
+            await evening.toggle_task(make_callback("toggle_task:1"), state)
+            await evening.tasks_done(make_callback("tasks_done"), state)
+            return await state.get_state(), await state.get_data()
+
+        with patch.object(evening, "get_user_by_telegram_id", return_value=SimpleNamespace(id=7)), \
+                patch.object(evening, "get_today_entry", return_value=entry), \
+                patch.object(evening, "get_task_completion_keyboard", MagicMock()):
+            current, data = asyncio.run(scenario())
+
+        assert current == evening.EveningStates.insight.state
+        assert (data["task_1_done"], data["task_2_done"], data["task_3_done"]) == (False, True, False)
+        assert not hasattr(evening, "task_states")
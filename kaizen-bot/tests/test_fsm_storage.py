@@ -0,0 +1,141 @@
+"""Tests for the SQLite-backed aiogram FSM storage (write-behind cache, restart survival)."""
+
+import asyncio
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.fsm_storage import SQLiteStorage, storage_key
+from src.database.models import Base
+
+
+class Flow(StatesGroup):
+    first = State()
+    second = State()
+
+
+def key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+class TestSQLiteStorage:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'fsm.db'}"
+        sync_engine = create_engine(url)
+        Base.metadata.create_all(sync_engine)
+        sync_engine.dispose()
+        self.url = url.replace("sqlite://", "sqlite+aiosqlite://")
+
+    def run(self, scenario):
+        """Свой async engine на каждый прогон (каждый asyncio.run — новый loop)"""
+        async def wrapper():
+            engine = create_async_engine(self.url)
+            try:
+                return await scenario(engine)
+            finally:
+                await engine.dispose()
+        return asyncio.run(wrapper())
+
+    def rows(self):
+        async def scenario(engine):
+            async with engine.connect() as conn:
+                result = await conn.execute(text("SELECT key, state, data FROM fsm_states ORDER BY key"))
+                return [tuple(row) for row in result]
+        return self.run(scenario)
+
+    def test_state_survives_restart(self):
+        async def before_restart(engine):
+            storage = SQLiteStorage(engine, flush_interval=60)
+            context = FSMContext(storage, key(7))
+            await context.set_state(Flow.first)
+            await context.update_data(task_1="Позвонить", ratings={"3": 8})
+            await storage.close()
+
+        async def after_restart(engine):
+            context = FSMContext(SQLiteStorage(engine), key(7))
+            return await context.get_state(), await context.get_data()
+
+        self.run(before_restart)
+
+        assert self.run(after_restart) == ("Flow:first", {"task_1": "Позвонить", "ratings": {"3": 8}})
+
+    def test_writes_are_coalesced_into_one_transaction(self):
+        async def scenario(engine):
+            statements = []
+            event.listen(engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+            storage = SQLiteStorage(engine, flush_interval=60)
+            for user_id in range(3):
+                context = FSMContext(storage, key(user_id))
+                await context.set_state(Flow.first)
+                await context.update_data(step=1)
+                await context.update_data(step=2)
+                await context.set_state(Flow.second)
+
+            reads = statements.count("SELECT")
+            nothing_written = "INSERT" not in statements
+            written = await storage.flush()
+            return reads, nothing_written, written, statements.count("INSERT")
+
+        reads, nothing_written, written, inserts = self.run(scenario)
+
+        assert reads == 3  # по одному чтению на ключ, дальше кэш
+        assert nothing_written
+        assert written == 3
+        assert inserts == 1  # одна executemany-вставка на все ключи
+        assert [(row[1], row[2]) for row in self.rows()] == [("Flow:second", '{"step": 2}')] * 3
+
+    def test_flushed_in_background_after_interval(self):
+        async def scenario(engine):
+            storage = SQLiteStorage(engine, flush_interval=0.01)
+            await storage.set_state(key(1), Flow.first)
+            await asyncio.sleep(0.1)
+
+        self.run(scenario)
+
+        assert [row[1] for row in self.rows()] == ["Flow:first"]
+
+    def test_clear_deletes_row(self):
+        async def scenario(engine):
+            storage = SQLiteStorage(engine, flush_interval=0)
+            context = FSMContext(storage, key(1))
+            await context.set_state(Flow.first)
+            await context.update_data(x=1)
+            await context.clear()
+
+        self.run(scenario)
+
+        assert self.rows() == []
+
+    def test_processes_share_state_without_cache(self):
+        async def scenario(engine):
+            first = SQLiteStorage(engine, flush_interval=0, cache_ttl=0)
+            second = SQLiteStorage(engine, flush_interval=0, cache_ttl=0)
+
+            await first.set_state(key(1), Flow.first)
+            seen = await second.get_state(key(1))
+            await second.set_state(key(1), Flow.second)
+            return seen, await first.get_state(key(1))
+
+        assert self.run(scenario) == ("Flow:first", "Flow:second")
+
+    def test_cache_is_bounded_but_keeps_unsaved_keys(self):
+        async def scenario(engine):
+            storage = SQLiteStorage(engine, flush_interval=60, cache_size=2)
+            for user_id in range(5):
+                await storage.set_state(key(user_id), Flow.first)
+            unsaved = len(storage._cache)
+            await storage.flush()
+            await storage.get_state(key(0))
+            return unsaved, list(storage._cache)
+
+        unsaved, cached = self.run(scenario)
+
+        assert unsaved == 5
+        assert cached == [storage_key(key(4)), storage_key(key(0))]
@@ -0,0 +1,91 @@
+"""Tests for the async Google Calendar facade (thread pool + per-call timeout)."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.integrations.google_calendar import AsyncGoogleCalendarService
+
+
+def slow(seconds, result=None):
+    """Blocking stand-in for a Google API call."""
+    def call(*args, **kwargs):
+        time.sleep(seconds)
+        return result
+    call.__name__ = "slow_call"
+    return call
+
+
+def make_service(timeout=1.0, **methods):
+    service = AsyncGoogleCalendarService(user_id=1, timeout=timeout)
+    for name, func in methods.items():
+        setattr(service.sync, name, func)
+    return service
+
+
+class TestAsyncGoogleCalendarService:
+
+    def test_returns_sync_result(self):
+        service = make_service(get_event=MagicMock(return_value={"id": "e1"}))
+
+        event = asyncio.run(service.get_event("e1", calendar_id="primary"))
+
+        assert event == {"id": "e1"}
+        service.sync.get_event.assert_called_once_with("e1", calendar_id="primary")
+
+    def test_does_not_block_event_loop(self):
+        service = make_service(get_event=slow(0.3, None))
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.05)
+
+        async def run():
+            await asyncio.gather(service.get_event("e1"), ticker())
+
+        asyncio.run(run())
+        # Тикер шёл, пока вызов API висел в пуле
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.3
+
+    def test_calls_run_concurrently(self):
+        service = make_service(get_event=slow(0.2, {"id": "e"}))
+
+        async def run():
+            started = time.monotonic()
+            results = await asyncio.gather(*(service.get_event(f"e{i}") for i in range(4)))
+            return results, time.monotonic() - started
+
+        results, elapsed = asyncio.run(run())
+        assert len(results) == 4
+        assert elapsed < 0.6
+
+    def test_timeout_returns_default(self):
+        service = make_service(
+            timeout=0.05,
+            get_event=slow(0.3, {"id": "late"}),
+            update_event_color=slow(0.3, True),
+            load_credentials=slow(0.3, True),
+        )
+
+        assert asyncio.run(service.get_event("late")) is None
+        assert asyncio.run(service.update_event_color("e1", "10")) is False
+        assert asyncio.run(service.load_credentials("token")) is False
+
+    def test_timeout_raises_for_create(self):
+        service = make_service(timeout=0.05, create_event=slow(0.3, "event-id"))
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(service.create_event(summary="x", start_time=None))
+
+    def test_execute_runs_prepared_request(self):
+        service = make_service()
+        request = MagicMock()
+        request.execute.return_value = {"id": "sport"}
+
+        assert asyncio.run(service.execute(request)) == {"id": "sport"}
+        request.execute.assert_called_once_with()
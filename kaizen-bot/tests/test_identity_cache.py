@@ -0,0 +1,121 @@
+"""Tests for the in-process User / RewardFund cache and its write-through invalidation."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud, crud_rewards
+from src.database.identity_cache import IdentityCache, identity_cache
+from src.database.models import Base, User, RewardFund
+
+
+class TestIdentityCache:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.selects = 0
+
+        def count_select(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                self.selects += 1
+
+        event.listen(self.engine, "before_cursor_execute", count_select)
+
+        session = self.session_factory()
+        user = User(telegram_id=500, username="cached")
+        session.add(user)
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+        with patch.object(crud, "get_session", self.session_factory), \
+                patch.object(crud_rewards, "get_session", self.session_factory):
+            yield
+
+    def test_repeated_lookups_hit_cache(self):
+        before = identity_cache.stats()["user"]
+        first = crud.get_user_by_telegram_id(500)
+        selects = self.selects
+
+        second = crud.get_user_by_telegram_id(500)
+        by_id = crud.get_user_by_id(self.user_id)
+        existing = crud.get_or_create_user(500)
+
+        assert self.selects == selects
+        assert second is not first  # каждому вызову — свой объект
+        assert second.username == by_id.username == existing.username == "cached"
+        after = identity_cache.stats()["user"]
+        assert after["hits"] - before["hits"] == 3
+        assert after["misses"] - before["misses"] == 1
+
+    def test_mutating_returned_object_does_not_leak(self):
+        user = crud.get_user_by_telegram_id(500)
+        user.username = "changed locally"
+
+        assert crud.get_user_by_telegram_id(500).username == "cached"
+
+    def test_user_writes_invalidate(self):
+        crud.get_user_by_telegram_id(500)
+        crud.update_user_settings(500, timezone="Asia/Tokyo")
+        assert crud.get_user_by_telegram_id(500).timezone == "Asia/Tokyo"
+
+        crud.update_user_google_token(500, "encrypted")
+        assert crud.get_user_by_id(self.user_id).google_refresh_token_encrypted == "encrypted"
+
+        # Правка прямо в хэндлере через свою сессию
+        session = self.session_factory()
+        session.query(User).filter(User.telegram_id == 500).first().event_reminders_enabled = False
+        session.commit()
+        session.close()
+        assert crud.get_user_by_telegram_id(500).event_reminders_enabled is False
+
+    def test_fund_writes_invalidate(self):
+        assert crud_rewards.get_reward_balance(self.user_id) == 0
+        assert crud_rewards.get_reward_fund_by_telegram_id(500).balance == 0
+
+        crud_rewards.add_reward(self.user_id, 50, "bonus")
+        assert crud_rewards.get_reward_balance(self.user_id) == 50
+        assert crud_rewards.get_reward_balance_by_telegram_id(500) == 50
+
+        crud_rewards.update_reward_rates(self.user_id, morning_kaizen=77)
+        crud_rewards.toggle_penalties(self.user_id, True)
+        fund = crud_rewards.get_or_create_reward_fund(self.user_id)
+        assert (fund.rate_morning_kaizen, fund.penalties_enabled) == (77, True)
+
+    def test_session_calls_bypass_cache(self):
+        crud.get_user_by_telegram_id(500)
+
+        session = self.session_factory()
+        try:
+            user = crud.get_user_by_telegram_id(500, session=session)
+            assert user in session
+            user.username = "in uow"
+            session.commit()
+        finally:
+            session.close()
+
+        assert crud.get_user_by_telegram_id(500).username == "in uow"
+
+    def test_ttl_lru_and_stale_put(self):
+        now = [0.0]
+        cache = IdentityCache(max_size=2, ttl=10, clock=lambda: now[0])
+        users = [User(id=i, telegram_id=100 + i) for i in range(3)]
+
+        cache.put(users[0])
+        assert cache.get(("user", "id", 0)).telegram_id == 100
+        now[0] = 11
+        assert cache.get(("user", "id", 0)) is None
+
+        cache.put(users[1])
+        cache.put(users[2])
+        assert len(cache) == 2  # у пользователя два ключа: id и telegram_id
+
+        epoch = cache.epoch
+        cache.invalidate([("user", "id", 2)])
+        cache.put(RewardFund(id=1, user_id=2), epoch)
+        assert cache.get(("fund", "user_id", 2)) is None
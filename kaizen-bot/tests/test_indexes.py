@@ -0,0 +1,179 @@
+"""Regression tests: hot CRUD queries must use composite indexes (EXPLAIN QUERY PLAN)."""
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, User, RewardFund, UserTask
+from src.database import crud, crud_rewards, crud_user_tasks, crud_dates, crud_calendar
+from src.scheduler.calendar_reminders import _reminder_row
+from src.scheduler.event_classifier import get_event_classifier
+
+
+class TestQueryPlans:
+    """Each hot query is captured while the CRUD function runs and then explained."""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        """Set up in-memory database with one user, fund and task."""
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=123)
+        session.add(user)
+        session.flush()
+        fund = RewardFund(user_id=user.id)
+        task = UserTask(user_id=user.id, name="Gym", reward_amount=50)
+        session.add_all([fund, task])
+        session.commit()
+        self.user_id, self.task_id = user.id, task.id
+        session.close()
+
+        with patch.object(crud, 'get_session', self.session_factory), \
+                patch.object(crud_rewards, 'get_session', self.session_factory), \
+                patch.object(crud_user_tasks, 'get_session', self.session_factory), \
+                patch.object(crud_dates, 'get_session', self.session_factory), \
+                patch.object(crud_calendar, 'get_session', self.session_factory):
+            yield
+
+    def _capture_plans(self, func) -> list[str]:
+        """Run func, capture its SELECTs and return their query plans."""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(self.engine, "before_cursor_execute", capture)
+        try:
+            func()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", capture)
+
+        plans = []
+        with self.engine.connect() as conn:
+            for statement, parameters in statements:
+                rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                plans.append(" | ".join(row[-1] for row in rows))
+        return plans
+
+    def _assert_uses_index(self, plans: list[str], table: str, index_name: str):
+        table_plans = [p for p in plans if f" {table} " in f" {p} "]
+        assert table_plans, f"No query against {table} was captured"
+        for plan in table_plans:
+            assert f"SCAN {table}" not in plan, plan
+            assert index_name in plan, plan
+
+    def test_today_entry_uses_index(self):
+        plans = self._capture_plans(lambda: crud.get_today_entry(self.user_id))
+        self._assert_uses_index(plans, "daily_entries", "ix_daily_entries_user_date")
+
+    def test_user_inbox_uses_index(self):
+        plans = self._capture_plans(lambda: crud.get_user_inbox(self.user_id))
+        self._assert_uses_index(plans, "inbox_items", "ix_inbox_items_user_status_created")
+
+    def test_inbox_count_uses_index(self):
+        plans = self._capture_plans(lambda: crud.get_inbox_count(self.user_id))
+        self._assert_uses_index(plans, "inbox_items", "ix_inbox_items_user_status_created")
+
+    def test_inbox_pages_use_index(self):
+        first = crud.get_inbox_page(self.user_id)
+        plans = self._capture_plans(lambda: crud.get_inbox_page(self.user_id, cursor="a1792000000000000_5"))
+        plans += self._capture_plans(lambda: crud.get_inbox_page(self.user_id, cursor="b1792000000000000_5"))
+        assert first.items == []
+        self._assert_uses_index(plans, "inbox_items", "ix_inbox_items_user_status_created")
+        assert not any("TEMP B-TREE" in plan for plan in plans), plans
+
+    def test_someday_page_uses_index(self):
+        plans = self._capture_plans(lambda: crud.get_someday_page(self.user_id, cursor="a1792000000000000_5"))
+        self._assert_uses_index(plans, "someday_maybe", "ix_someday_maybe_user_created")
+        assert not any("TEMP B-TREE" in plan for plan in plans), plans
+
+    def test_reports_page_uses_index(self):
+        # Весь список админа: COUNT — по покрывающему индексу, страница — поиск по нему же
+        count_plan, page_plan = self._capture_plans(lambda: crud.get_reports_page(cursor="a1792000000000000_5"))
+        assert "COVERING INDEX ix_reports_created" in count_plan, count_plan
+        assert "SEARCH reports USING INDEX ix_reports_created" in page_plan, page_plan
+
+    def test_recent_transactions_uses_index(self):
+        plans = self._capture_plans(lambda: crud_rewards.get_recent_transactions(self.user_id))
+        self._assert_uses_index(plans, "reward_transactions", "ix_reward_transactions_fund_created")
+
+    def test_today_earnings_uses_index(self):
+        plans = self._capture_plans(lambda: crud_rewards.get_today_earnings(self.user_id))
+        self._assert_uses_index(plans, "reward_transactions", "ix_reward_transactions_fund_created")
+
+    def test_task_completions_today_uses_index(self):
+        plans = self._capture_plans(
+            lambda: crud_user_tasks.get_task_completions_today(self.user_id, self.task_id)
+        )
+        self._assert_uses_index(plans, "user_task_completions", "ix_user_task_completions_task_date")
+
+    def test_calendar_reminder_lookup_uses_index(self):
+        row = _reminder_row(get_event_classifier().classify({
+            "id": "evt1",
+            "summary": "Meeting",
+            "start": {"dateTime": "2026-01-20T10:00:00+03:00"},
+            "end": {"dateTime": "2026-01-20T11:00:00+03:00"},
+        }))
+        plans = self._capture_plans(lambda: crud_calendar.get_or_create_event_reminders(self.user_id, [row]))
+        self._assert_uses_index(plans, "calendar_event_reminders", "ux_calendar_event_reminders_user_event")
+
+    def test_calendar_mirror_window_uses_index(self):
+        from datetime import datetime, timedelta
+
+        now = datetime(2026, 1, 20, 10, 0)
+        plans = self._capture_plans(
+            lambda: crud_calendar.get_calendar_events_between(self.user_id, now, now + timedelta(minutes=15))
+        )
+        self._assert_uses_index(plans, "calendar_events", "ix_calendar_events_user_start")
+
+    def test_dates_for_reminder_uses_index(self):
+        plans = self._capture_plans(lambda: crud_dates.get_dates_for_reminder(days_ahead=0))
+        self._assert_uses_index(plans, "important_dates", "ix_important_dates_month_day_active")
+
+
+class TestCreateMissingIndexes:
+    """Indexes are added to tables created before they were declared."""
+
+    def test_creates_indexes_on_existing_tables(self, tmp_path):
+        from sqlalchemy import inspect
+        from src.database import models
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_daily_entries_user_date")
+
+        with patch.object(models, 'engine', engine):
+            models._create_missing_indexes()
+
+        names = {idx['name'] for idx in inspect(engine).get_indexes("daily_entries")}
+        assert "ix_daily_entries_user_date" in names
+
+    def test_duplicate_reminders_removed_before_unique_index(self, tmp_path):
+        from datetime import datetime
+        from sqlalchemy import inspect, text
+        from src.database import models
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ux_calendar_event_reminders_user_event")
+            for _ in range(2):
+                conn.execute(text(
+                    "INSERT INTO calendar_event_reminders (user_id, google_event_id, event_start) "
+                    "VALUES (1, 'evt', :start)"
+                ), {"start": datetime(2026, 1, 20, 10)})
+
+        with patch.object(models, 'engine', engine):
+            models._dedupe_calendar_event_reminders()
+            models._create_missing_indexes()
+
+        names = {idx['name'] for idx in inspect(engine).get_indexes("calendar_event_reminders")}
+        assert "ux_calendar_event_reminders_user_event" in names
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM calendar_event_reminders").scalar() == 1
@@ -12,6 +12,7 @@ from src.keyboards.inline import (
     get_someday_keyboard,
     get_inbox_item_keyboard,
 )
+from src.database.pagination import Page
 
 
 class TestMainMenu:
@@ -123,10 +124,13 @@ class TestInboxKeyboard:
             items.append(item)
         return items
 
-    def test_shows_items_on_first_page(self):
-        """Test first page displays correct items."""
-        items = self._create_mock_items(12)
-        keyboard = get_inbox_keyboard(items, page=0, per_page=5)
+    def _nav_buttons(self, keyboard, prefix="inbox_page:"):
+        buttons = [btn for row in keyboard.inline_keyboard for btn in row]
+        return [btn for btn in buttons if btn.callback_data.startswith(prefix)]
+
+    def test_shows_items_of_page(self):
+        """Test the page's items are displayed."""
+        keyboard = get_inbox_keyboard(Page(self._create_mock_items(5), total=12, next_cursor="a1_5"))
 
         buttons = [btn for row in keyboard.inline_keyboard for btn in row]
         item_buttons = [btn for btn in buttons if btn.callback_data.startswith("inbox_item:")]
@@ -134,46 +138,44 @@ class TestInboxKeyboard:
         assert len(item_buttons) == 5
 
     def test_pagination_shows_next_only_on_first_page(self):
-        """Test first page shows only next button."""
-        items = self._create_mock_items(12)
-        keyboard = get_inbox_keyboard(items, page=0, per_page=5)
+        """Test first page shows only next button carrying the cursor."""
+        keyboard = get_inbox_keyboard(Page(self._create_mock_items(5), total=12, next_cursor="a100_5"))
 
-        buttons = [btn for row in keyboard.inline_keyboard for btn in row]
-        nav_buttons = [btn for btn in buttons if btn.callback_data.startswith("inbox_page:")]
+        nav_buttons = self._nav_buttons(keyboard)
 
-        # Should only have next button
         assert len(nav_buttons) == 1
         assert nav_buttons[0].text == "➡️"
+        assert nav_buttons[0].callback_data == "inbox_page:a100_5"
 
     def test_pagination_shows_both_on_middle_page(self):
         """Test middle page shows both prev and next buttons."""
-        items = self._create_mock_items(15)
-        keyboard = get_inbox_keyboard(items, page=1, per_page=5)
-
-        buttons = [btn for row in keyboard.inline_keyboard for btn in row]
-        nav_buttons = [btn for btn in buttons if btn.callback_data.startswith("inbox_page:")]
+        page = Page(self._create_mock_items(5), total=15, next_cursor="a100_5", prev_cursor="b200_1")
+        keyboard = get_inbox_keyboard(page)
 
-        assert len(nav_buttons) == 2
-        texts = [btn.text for btn in nav_buttons]
-        assert "⬅️" in texts
-        assert "➡️" in texts
+        texts = [btn.text for btn in self._nav_buttons(keyboard)]
+        assert texts == ["⬅️", "➡️"]
 
     def test_pagination_shows_prev_only_on_last_page(self):
         """Test last page shows only prev button."""
-        items = self._create_mock_items(12)
-        keyboard = get_inbox_keyboard(items, page=2, per_page=5)
+        keyboard = get_inbox_keyboard(Page(self._create_mock_items(2), total=12, prev_cursor="b200_1"))
 
-        buttons = [btn for row in keyboard.inline_keyboard for btn in row]
-        nav_buttons = [btn for btn in buttons if btn.callback_data.startswith("inbox_page:")]
+        nav_buttons = self._nav_buttons(keyboard)
 
-        # Should only have prev button (only 2 items on page 2)
         assert len(nav_buttons) == 1
         assert nav_buttons[0].text == "⬅️"
 
+    def test_filtered_pages_keep_filter_in_callback(self):
+        """Test a filtered list pages through its own callback prefix."""
+        page = Page(self._create_mock_items(5), total=12, next_cursor="a100_5")
+        keyboard = get_inbox_keyboard(page, callback_prefix="inbox_fe:high")
+
+        nav_buttons = self._nav_buttons(keyboard, "inbox_fe:")
+        assert nav_buttons[0].callback_data == "inbox_fe:high:a100_5"
+        assert len(nav_buttons[0].callback_data.encode()) <= 64
+
     def test_truncates_long_item_text(self):
         """Test that long item texts are truncated."""
-        items = self._create_mock_items(3)
-        keyboard = get_inbox_keyboard(items, page=0)
+        keyboard = get_inbox_keyboard(Page(self._create_mock_items(3), total=3))
 
         buttons = [btn for row in keyboard.inline_keyboard for btn in row]
         first_item = next(btn for btn in buttons if btn.callback_data == "inbox_item:1")
@@ -183,13 +185,9 @@ class TestInboxKeyboard:
 
     def test_no_pagination_for_small_list(self):
         """Test no pagination buttons for small lists."""
-        items = self._create_mock_items(3)
-        keyboard = get_inbox_keyboard(items, page=0, per_page=5)
-
-        buttons = [btn for row in keyboard.inline_keyboard for btn in row]
-        nav_buttons = [btn for btn in buttons if btn.callback_data.startswith("inbox_page:")]
+        keyboard = get_inbox_keyboard(Page(self._create_mock_items(3), total=3))
 
-        assert len(nav_buttons) == 0
+        assert len(self._nav_buttons(keyboard)) == 0
 
 
 class TestPriorityKeyboard:
@@ -289,20 +287,19 @@ class TestSomedayKeyboard:
             items.append(item)
         return items
 
-    def test_limits_to_10_items(self):
-        """Test that only 10 items are shown."""
-        items = self._create_mock_items(15)
-        keyboard = get_someday_keyboard(items)
+    def test_shows_page_items_and_next_button(self):
+        """Test that the page's items and a cursor button are shown."""
+        keyboard = get_someday_keyboard(Page(self._create_mock_items(10), total=15, next_cursor="a100_6"))
 
         buttons = [btn for row in keyboard.inline_keyboard for btn in row]
         item_buttons = [btn for btn in buttons if btn.callback_data.startswith("someday_item:")]
 
         assert len(item_buttons) == 10
+        assert [btn.callback_data for btn in buttons if btn.text == "➡️"] == ["someday_page:a100_6"]
 
     def test_has_back_button(self):
         """Test keyboard has back to main menu button."""
-        items = self._create_mock_items(3)
-        keyboard = get_someday_keyboard(items)
+        keyboard = get_someday_keyboard(Page(self._create_mock_items(3), total=3))
 
         buttons = [btn for row in keyboard.inline_keyboard for btn in row]
         back_buttons = [btn for btn in buttons if btn.callback_data == "main_menu"]
@@ -0,0 +1,46 @@
+"""Tests for engine configuration in models.py."""
+
+import asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.models import apply_sqlite_pragmas
+
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": "-8000",
+    "temp_store": "MEMORY",
+    "busy_timeout": "3000",
+    "mmap_size": "",  # пустое значение не применяется
+}
+
+
+class TestSqlitePragmas:
+    """PRAGMA profile is applied to every new connection."""
+
+    def test_sync_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+        apply_sqlite_pragmas(engine, PRAGMAS)
+
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -8000
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 3000
+        engine.dispose()
+
+    def test_async_engine(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        apply_sqlite_pragmas(engine, PRAGMAS)
+
+        async def read_pragmas():
+            async with engine.connect() as conn:
+                journal = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+                synchronous = (await conn.exec_driver_sql("PRAGMA synchronous")).scalar()
+            await engine.dispose()
+            return journal, synchronous
+
+        assert asyncio.run(read_pragmas()) == ("wal", 1)
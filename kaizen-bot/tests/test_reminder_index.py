@@ -0,0 +1,162 @@
+"""Tests for the per-user reminder index (next fire time per user and kind)."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+
+from src.scheduler import jobs
+from src.scheduler.reminder_index import ReminderIndex, next_fire_time, reminder_spec
+
+
+def make_user(user_id=1, tz="Europe/Moscow", **overrides):
+    fields = dict(
+        id=user_id, timezone=tz,
+        morning_hour=7, morning_minute=0,
+        evening_hour=22, evening_minute=0,
+        task_reminders_enabled=True, task_reminder_hour=14, task_reminder_minute=0,
+        quiet_hours_start=23, quiet_hours_end=7,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestNextFireTime:
+
+    def test_uses_user_timezone(self):
+        # 07:00 в Москве = 04:00 UTC, в Нью-Йорке зимой = 12:00 UTC
+        now = utc(2026, 1, 15, 0, 0)
+        moscow = reminder_spec(make_user(tz="Europe/Moscow"), "morning")
+        new_york = reminder_spec(make_user(tz="America/New_York"), "morning")
+
+        assert next_fire_time(moscow, now) == utc(2026, 1, 15, 4, 0)
+        assert next_fire_time(new_york, now) == utc(2026, 1, 15, 12, 0)
+
+    def test_rolls_over_to_next_day(self):
+        spec = reminder_spec(make_user(), "morning")
+        assert next_fire_time(spec, utc(2026, 1, 15, 4, 0)) == utc(2026, 1, 16, 4, 0)
+
+    def test_quiet_hours_suppress_task_reminder(self):
+        spec = reminder_spec(make_user(task_reminder_hour=23, task_reminder_minute=30), "task")
+        assert next_fire_time(spec, utc(2026, 1, 15, 0, 0)) is None
+
+    def test_midnight_task_reminder_is_kept(self):
+        # 00:00 — валидное время, а не «не задано»
+        spec = reminder_spec(make_user(task_reminder_hour=0, quiet_hours_start=1, quiet_hours_end=6), "task")
+        assert spec[1:3] == (0, 0)
+        assert next_fire_time(spec, utc(2026, 1, 15, 0, 0)) == utc(2026, 1, 15, 21, 0)
+
+    def test_quiet_hours_ending_at_midnight(self):
+        # Тихие часы 22-00: задача в 06:00 не в них (с концом по умолчанию 07 — была бы)
+        spec = reminder_spec(make_user(task_reminder_hour=6, quiet_hours_start=22, quiet_hours_end=0), "task")
+        assert spec[3:] == (22, 0)
+        assert next_fire_time(spec, utc(2026, 1, 15, 0, 0)) == utc(2026, 1, 15, 3, 0)
+
+    def test_quiet_hours_do_not_apply_to_morning_and_evening(self):
+        # Клавиатура настроек предлагает утро 06:00 и вечер 23:00 — внутри тихих часов 23-07
+        morning = reminder_spec(make_user(morning_hour=6, morning_minute=30), "morning")
+        evening = reminder_spec(make_user(evening_hour=23), "evening")
+
+        assert next_fire_time(morning, utc(2026, 1, 15, 0, 0)) == utc(2026, 1, 15, 3, 30)
+        assert next_fire_time(evening, utc(2026, 1, 15, 0, 0)) == utc(2026, 1, 15, 20, 0)
+
+    def test_unknown_timezone_falls_back(self):
+        spec = reminder_spec(make_user(tz="Mars/Olympus"), "morning")
+        assert next_fire_time(spec, utc(2026, 1, 15, 0, 0)) == utc(2026, 1, 15, 4, 0)
+
+    def test_disabled_task_reminder(self):
+        assert reminder_spec(make_user(task_reminders_enabled=False), "task") is None
+
+
+class TestReminderIndex:
+
+    def test_pop_due_returns_only_due_and_reschedules(self):
+        index = ReminderIndex()
+        now = utc(2026, 1, 15, 3, 30)  # вечер в Нью-Йорке (03:00 UTC) уже прошёл
+        index.schedule(make_user(1), now)
+        index.schedule(make_user(2, tz="America/New_York"), now)
+
+        assert index.next_due() == utc(2026, 1, 15, 4, 0)
+        assert index.pop_due(utc(2026, 1, 15, 4, 0)) == [(1, "morning")]
+        # Сработавшее переставлено на завтра, остальные не тронуты
+        assert index._entries[(1, "morning")][0] == utc(2026, 1, 16, 4, 0)
+        assert index.next_due() == utc(2026, 1, 15, 11, 0)  # задачи дня, Москва 14:00
+
+    def test_no_double_fire(self):
+        index = ReminderIndex()
+        index.schedule(make_user(1), utc(2026, 1, 15, 0, 0))
+
+        assert index.pop_due(utc(2026, 1, 15, 4, 1)) == [(1, "morning")]
+        assert index.pop_due(utc(2026, 1, 15, 4, 2)) == []
+
+    def test_settings_change_updates_incrementally(self):
+        index = ReminderIndex()
+        now = utc(2026, 1, 15, 0, 0)
+        index.schedule(make_user(1), now)
+        index.schedule(make_user(1, morning_hour=9), now)
+
+        # Старая запись на 07:00 устарела и не срабатывает
+        assert index.pop_due(utc(2026, 1, 15, 4, 0)) == []
+        assert index.pop_due(utc(2026, 1, 15, 6, 0)) == [(1, "morning")]
+
+    def test_disabling_task_reminder_removes_entry(self):
+        index = ReminderIndex()
+        now = utc(2026, 1, 15, 0, 0)
+        index.schedule(make_user(1), now)
+        index.schedule(make_user(1, task_reminders_enabled=False), now)
+
+        assert len(index) == 2
+        assert (1, "task") not in index._entries
+
+    def test_unchanged_settings_do_not_grow_heap(self):
+        index = ReminderIndex()
+        user = make_user(1)
+        index.schedule(user)
+        size = len(index._heap)
+        index.schedule(user)
+        assert len(index._heap) == size
+
+
+class TestDispatch:
+
+    def test_dispatch_sends_due_by_kind(self):
+        index = ReminderIndex()
+        past = datetime.now(timezone.utc) - timedelta(days=1)
+        for user_id in (1, 2):
+            index.schedule(make_user(user_id), past)
+
+        senders = {kind: AsyncMock() for kind in ("morning", "evening", "task")}
+        with patch.object(jobs, "reminder_index", index), \
+                patch.dict(jobs.REMINDER_SENDERS, senders), \
+                patch.object(jobs, "_arm_reminder_dispatch") as arm:
+            asyncio.run(jobs.dispatch_due_reminders())
+
+        for kind in ("morning", "evening", "task"):
+            senders[kind].assert_awaited_once_with([1, 2])
+        arm.assert_called_once()
+        assert index.next_due() > datetime.now(timezone.utc)
+
+    def test_users_created_outside_start_are_indexed(self):
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from src.database import crud_async
+        from src.database.models import Base
+
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+        async def capture():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            with patch.object(crud_async, "get_async_session", async_sessionmaker(bind=engine)):
+                await crud_async.capture_inbox_item(555, "Купить молоко")
+            await engine.dispose()
+
+        index = ReminderIndex()
+        with patch.object(jobs, "reminder_index", index):
+            asyncio.run(capture())
+
+        assert {kind for _, kind in index._entries} == {"morning", "evening", "task"}
@@ -0,0 +1,107 @@
+"""Tests for the user_stats_daily rollup: flush-time maintenance, backfill and the all-users weekly batch."""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud, stats_rollup
+from src.database.models import Base, DailyEntry, UserStatsDaily
+
+
+class TestStatsRollup:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        with patch.object(crud, "get_session", self.session_factory), \
+                patch.object(stats_rollup, "get_session", self.session_factory):
+            self.user_id = crud.get_or_create_user(telegram_id=1).id
+            yield
+
+    def rollup(self, user_id=None) -> dict[date, UserStatsDaily]:
+        session = self.session_factory()
+        try:
+            rows = session.query(UserStatsDaily).filter_by(user_id=user_id or self.user_id).all()
+            return {row.stat_date: row for row in rows}
+        finally:
+            session.close()
+
+    def test_update_functions_maintain_today_row(self):
+        crud.update_morning_entry(self.user_id, "Сон", "Новости", "Отчёт", "Спорт", "")
+        crud.update_priority_task(self.user_id, 2)
+        crud.update_habits(self.user_id, sleep_time="23:30", wake_time="07:15", exercised=True)
+        crud.update_evening_entry(self.user_id, False, True, True, "Инсайт", "Раньше лечь")
+
+        row = self.rollup()[date.today()]
+        assert (row.morning_completed, row.evening_completed) == (1, 1)
+        assert (row.tasks_planned, row.tasks_done) == (2, 1)  # task_3 пустая — не считается
+        assert (row.priority_set, row.priority_done) == (1, 1)
+        assert (row.exercised, row.ate_well) == (1, 0)
+        assert (row.wake_minutes, row.sleep_minutes) == (7 * 60 + 15, 23 * 60 + 30)
+
+    def test_direct_session_writes_and_deletes(self):
+        session = self.session_factory()
+        entry = DailyEntry(user_id=self.user_id, entry_date=date.today(), task_1="Отчёт")
+        session.add(entry)
+        session.commit()
+        assert self.rollup()[date.today()].tasks_done == 0
+
+        # Как отметка задачи из напоминания: правка записи прямо в хэндлере
+        entry.task_1_done = True
+        session.commit()
+        assert self.rollup()[date.today()].tasks_done == 1
+
+        session.delete(entry)
+        session.commit()
+        session.close()
+        assert self.rollup() == {}
+
+    def test_backfill_rebuilds_rows_written_without_orm(self):
+        with self.engine.begin() as conn:
+            conn.execute(DailyEntry.__table__.insert(), [
+                {"user_id": self.user_id, "entry_date": date.today() - timedelta(days=i),
+                 "task_1": "Задача", "task_1_done": i % 2 == 0, "morning_completed": True, "wake_time": "bad"}
+                for i in range(5)
+            ])
+        assert self.rollup() == {}
+
+        assert stats_rollup.backfill_stats_daily(batch_size=2) == 5
+        rows = self.rollup()
+        assert len(rows) == 5
+        assert sum(row.tasks_done for row in rows.values()) == 3
+        assert all(row.wake_minutes is None for row in rows.values())
+        assert crud.get_week_stats(self.user_id)["completed_tasks"] == 3
+
+    def test_all_users_week_stats_in_two_queries(self):
+        other_id = crud.get_or_create_user(telegram_id=2).id
+        idle_id = crud.get_or_create_user(telegram_id=3).id
+        session = self.session_factory()
+        for user_id in (self.user_id, other_id):
+            for i in range(9):
+                session.add(DailyEntry(
+                    user_id=user_id, entry_date=date.today() - timedelta(days=i),
+                    task_1="Задача", task_1_done=i < 4, morning_completed=True,
+                    insight=f"Инсайт {i}" if i < 2 else None
+                ))
+        session.commit()
+        session.close()
+
+        statements = []
+        capture = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(self.engine, "before_cursor_execute", capture)
+        try:
+            batch = crud.get_week_stats_for_all_users()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", capture)
+
+        assert len(statements) == 2
+        assert set(batch) == {self.user_id, other_id} and idle_id not in batch
+        assert batch[self.user_id] == crud.get_week_stats(self.user_id)
+        assert batch[other_id]["total_entries"] == 8
+        assert batch[other_id]["insights"] == ["Инсайт 0", "Инсайт 1"]
@@ -0,0 +1,105 @@
+"""Tests for the per-update unit of work (DbSessionMiddleware + session-aware CRUD)."""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, RewardTransaction, DailyEntry, end_unit_of_work
+from src.database import crud, crud_rewards
+from src.middlewares.db_session import DbSessionMiddleware
+
+
+class TestUnitOfWork:
+    """CRUD calls share one session and are committed once by the middleware."""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        """Set up in-memory database and count commits on every session."""
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.commits = 0
+
+        def count_commit(session):
+            self.commits += 1
+
+        event.listen(self.session_factory, "after_commit", count_commit)
+
+        with patch.object(crud, 'get_session', self.session_factory), \
+                patch.object(crud_rewards, 'get_session', self.session_factory):
+            yield
+
+    def _morning_flow(self, session):
+        """Handler body: the same CRUD chain as finish_morning."""
+        user = crud.get_or_create_user(telegram_id=123, session=session)
+        crud.update_morning_entry(user.id, "+", "-", "T1", "T2", "T3", session=session)
+        crud.update_priority_task(user.id, 2, session=session)
+        entry = crud.get_today_entry(user.id, session=session)
+        crud_rewards.grant_morning_kaizen_reward(user.id, daily_entry_id=entry.id, session=session)
+        return user
+
+    def test_without_session_each_call_commits(self):
+        """Backwards compatible: no session means own session and own commit."""
+        self._morning_flow(None)
+        assert self.commits > 3
+
+    def test_middleware_commits_once(self):
+        middleware = DbSessionMiddleware(self.session_factory)
+
+        async def handler(event, data):
+            return self._morning_flow(data["session"]).id
+
+        user_id = asyncio.run(middleware(handler, object(), {}))
+
+        assert self.commits == 1
+        assert crud_rewards.get_reward_balance(user_id) == 50
+        assert crud.get_today_entry(user_id).priority_task == 2
+
+    def test_middleware_rolls_back_on_error(self):
+        middleware = DbSessionMiddleware(self.session_factory)
+
+        async def handler(event, data):
+            self._morning_flow(data["session"])
+            raise RuntimeError("handler failed")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(middleware(handler, object(), {}))
+
+        assert self.commits == 0
+        session = self.session_factory()
+        try:
+            assert session.query(DailyEntry).count() == 0
+            assert session.query(RewardTransaction).count() == 0
+        finally:
+            session.close()
+
+    def test_handler_commits_before_network_await(self):
+        """end_unit_of_work releases the write lock before the reply; the middleware adds no commit."""
+        middleware = DbSessionMiddleware(self.session_factory)
+        seen = {}
+
+        async def reply():
+            # Пока хэндлер «ждёт Telegram», другая сессия видит и может писать
+            session = self.session_factory()
+            try:
+                seen["entries"] = session.query(DailyEntry).count()
+                crud.get_or_create_user(telegram_id=999, session=session)  # сама коммитит
+            finally:
+                session.close()
+
+        async def handler(event, data):
+            session = data["session"]
+            user = self._morning_flow(session)
+            end_unit_of_work(session)
+            await reply()
+            # После фиксации запись в той же сессии коммитится сразу
+            crud.update_priority_task(user.id, 3, session=session)
+            return user.id
+
+        user_id = asyncio.run(middleware(handler, object(), {}))
+
+        assert seen["entries"] == 1
+        assert self.commits == 3  # unit of work, чужая сессия, запись после фиксации
+        assert crud.get_today_entry(user_id).priority_task == 3
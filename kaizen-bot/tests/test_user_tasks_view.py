@@ -0,0 +1,110 @@
+"""Tests for the /tasks read model: tasks, today's completions and stats in a fixed number of queries."""
+
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.database import crud_rewards, crud_user_tasks
+from src.database.models import Base, User, UserTask, InboxItem, DailyEntry
+
+
+class TestTasksView:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        session = self.session_factory()
+        user = User(telegram_id=1)
+        session.add(user)
+        session.flush()
+        self.user_id = user.id
+
+        self.tasks = [
+            UserTask(user_id=user.id, name=f"Задача {i}", reward_amount=10 * (i + 1), is_recurring=True)
+            for i in range(30)
+        ]
+        self.one_off = UserTask(user_id=user.id, name="Разовая", reward_amount=100, is_recurring=False)
+        self.archived = UserTask(user_id=user.id, name="Старая", reward_amount=5, is_active=False)
+        session.add_all(self.tasks + [self.one_off, self.archived])
+        session.add_all([
+            InboxItem(user_id=user.id, text="Купить молоко"),
+            InboxItem(user_id=user.id, text="Готово", status="processed"),
+            DailyEntry(user_id=user.id, entry_date=date.today(), morning_completed=True, task_1="Отчёт"),
+        ])
+        session.commit()
+        self.task_ids = [task.id for task in self.tasks]
+        self.one_off_id = self.one_off.id
+        session.close()
+
+        with patch.object(crud_rewards, "get_session", self.session_factory), \
+                patch.object(crud_user_tasks, "get_session", self.session_factory):
+            yield
+
+    def count_queries(self, func):
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", capture)
+        try:
+            result = func()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", capture)
+        return result, statements
+
+    def test_three_queries_regardless_of_task_count(self):
+        crud_user_tasks.complete_user_task(self.user_id, self.task_ids[0])
+        crud_user_tasks.complete_user_task(self.user_id, self.task_ids[2])
+        # Разовая задача после выполнения архивируется, но награда входит в статистику дня
+        crud_user_tasks.complete_user_task(self.user_id, self.one_off_id)
+
+        view, statements = self.count_queries(lambda: crud_user_tasks.get_tasks_view(self.user_id))
+
+        assert len(statements) == 3
+        assert [task.id for task in view["user_tasks"]] == self.task_ids
+        assert view["completions_today"][self.task_ids[0]] == 1
+        assert view["completions_today"][self.task_ids[1]] == 0
+        assert view["stats_today"] == {"tasks_completed": 3, "total_earned": 10 + 30 + 100}
+        assert view["stats_today"] == crud_user_tasks.get_user_stats_today(self.user_id)
+        assert [item.text for item in view["inbox_tasks"]] == ["Купить молоко"]
+        assert view["daily_entry"].task_1 == "Отчёт"
+
+    def test_filter_skips_unneeded_queries(self):
+        view, statements = self.count_queries(
+            lambda: crud_user_tasks.get_tasks_view(self.user_id, filter_type="inbox")
+        )
+
+        assert len(statements) == 2
+        assert view["user_tasks"] == [] and view["completions_today"] == {}
+        assert view["daily_entry"] is None
+        assert len(view["inbox_tasks"]) == 1
+
+    def test_completions_today_single_query(self):
+        crud_user_tasks.complete_user_task(self.user_id, self.task_ids[5])
+
+        count, statements = self.count_queries(
+            lambda: crud_user_tasks.get_task_completions_today(self.user_id, self.task_ids[5])
+        )
+
+        assert count == 1
+        assert len(statements) == 1
+        assert crud_user_tasks.get_task_completions_today(self.user_id + 1, self.task_ids[5]) == 0
+
+    def test_complete_user_task_stays_in_callers_session(self):
+        session = self.session_factory()
+        with patch.object(crud_user_tasks, "get_session", side_effect=AssertionError("second session")), \
+                patch.object(crud_rewards, "get_session", side_effect=AssertionError("second session")):
+            first = crud_user_tasks.complete_user_task(self.user_id, self.task_ids[3], session=session)
+            again = crud_user_tasks.complete_user_task(self.user_id, self.task_ids[3], session=session)
+        session.commit()
+        session.close()
+
+        assert first["success"] and first["reward"] == 40
+        assert again == {"success": False, "message": "Задача уже выполнена сегодня", "reward": 0, "balance": 0}